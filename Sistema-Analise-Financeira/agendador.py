@@ -0,0 +1,235 @@
+"""Pré-busca agendada dos símbolos da watchlist depois do fechamento.
+
+Os símbolos mais vistos chegam frios no horário de pico, justo quando o
+limite da Twelve Data está mais disputado. O ``Agendador`` roda uma vez por
+dia útil, em ``Config.PREFETCH_AT`` (horário de Nova York, depois do
+fechamento), e para cada símbolo de ``Config.WATCHLIST`` chama
+``aquecer(simbolo, dia)``: no app isso busca as barras novas para o armazém,
+estende os indicadores de forma incremental, refaz a previsão e deixa os
+caches quentes (``app_simples.aquecer_simbolo``).
+
+As chamadas são espaçadas por um ``BaldeTokens`` de capacidade 1 com a taxa
+``Config.PREFETCH_RATE``: saem em intervalos iguais, sem rajada, deixando o
+resto do limite para as requisições dos usuários. O estado de cada símbolo
+(última barra, atraso em pregões, erro) vai para ``status()`` e para um JSON
+no armazém, que o /prefetch lê quando o agendador roda em outro processo.
+
+Uso como processo separado (só aquece o armazém em disco, compartilhado com
+os workers web):
+    python agendador.py          # laço diário
+    python agendador.py --once   # uma passada agora
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import Config
+from limitador import BaldeTokens
+
+logger = logging.getLogger(__name__)
+
+FUSO_BOLSA = ZoneInfo('America/New_York')
+# Fechamento do pregão regular; antes disso o último pregão completo é o anterior
+FECHAMENTO = (16, 0)
+
+
+def interpretar_horario(texto):
+    """``"16:30"`` em ``(16, 30)``"""
+    try:
+        hora, minuto = (int(parte) for parte in texto.strip().split(':'))
+    except ValueError:
+        raise ValueError(f'Horário inválido: {texto!r} (ex: "16:30")')
+    if not (0 <= hora < 24 and 0 <= minuto < 60):
+        raise ValueError(f'Horário inválido: {texto!r} (ex: "16:30")')
+    return hora, minuto
+
+
+def interpretar_watchlist(texto):
+    """``"aapl, msft"`` em ``['AAPL', 'MSFT']``, sem repetidos"""
+    simbolos = [s.strip().upper() for s in (texto or '').split(',')]
+    return list(dict.fromkeys(s for s in simbolos if s))
+
+
+def ultimo_pregao(agora):
+    """Data do último pregão já fechado em ``agora`` (dias úteis, sem feriados)"""
+    dia = np.datetime64(agora.date(), 'D')
+    if (agora.hour, agora.minute) < FECHAMENTO or not np.is_busday(dia):
+        dia -= 1
+    return np.busday_offset(dia, 0, roll='backward').astype(object)
+
+
+def atraso_pregoes(ultima_barra, agora):
+    """Pregões fechados que faltam no armazém depois de ``ultima_barra``"""
+    return max(int(np.busday_count(ultima_barra, ultimo_pregao(agora))), 0)
+
+
+class Agendador:
+    """Chama ``aquecer(simbolo, dia)`` para cada símbolo, uma vez por dia útil.
+
+    ``aquecer`` devolve a data da última barra do símbolo (ou ``None``);
+    exceções viram ``status: error`` sem interromper a passada.
+    """
+
+    def __init__(self, simbolos, aquecer, horario=(16, 30), taxa='4/minute',
+                 caminho_status=None, relogio=None):
+        self.simbolos = list(simbolos)
+        self.aquecer = aquecer
+        self.horario = horario
+        self.limitador = BaldeTokens.de_texto(taxa, capacidade=1)
+        self.caminho_status = caminho_status
+        self._relogio = relogio or (lambda: datetime.now(FUSO_BOLSA))
+        self._estado = {s: {'symbol': s, 'status': 'pending'} for s in self.simbolos}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.executando = False
+        self.ultima_execucao = None
+        self.proxima_execucao = None
+
+    # CALENDÁRIO
+
+    def proxima(self, agora):
+        """Próximo dia útil em ``horario`` (Nova York) depois de ``agora``"""
+        hora, minuto = self.horario
+        alvo = agora.astimezone(FUSO_BOLSA).replace(hour=hora, minute=minuto, second=0,
+                                                   microsecond=0)
+        if alvo <= agora:
+            alvo += timedelta(days=1)
+        while not np.is_busday(np.datetime64(alvo.date(), 'D')):
+            alvo += timedelta(days=1)
+        return alvo
+
+    # EXECUÇÃO
+
+    def executar(self):
+        """Uma passada pela watchlist, com as chamadas espaçadas pelo limitador"""
+        self.executando = True
+        inicio_passada = self._relogio()
+        try:
+            for simbolo in self.simbolos:
+                if self._parar.is_set():
+                    break
+                self.limitador.adquirir()
+                self._aquecer(simbolo)
+        finally:
+            self.executando = False
+            self.ultima_execucao = inicio_passada
+            self._salvar_status()
+
+    def _aquecer(self, simbolo):
+        agora = self._relogio()
+        inicio = time.perf_counter()
+        try:
+            ultima_barra = self.aquecer(simbolo, agora.date())
+        except Exception as e:
+            logger.warning("Pré-busca de %s falhou: %s", simbolo, e)
+            atualizacao = {'status': 'error', 'error': str(e)}
+        else:
+            atualizacao = {'status': 'ok', 'error': None, 'last_bar': ultima_barra,
+                           'refreshed': agora}
+        atualizacao['attempted'] = agora
+        atualizacao['elapsed_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        with self._trava:
+            self._estado[simbolo].update(atualizacao)
+
+    def _laco(self):
+        while not self._parar.is_set():
+            agora = self._relogio()
+            self.proxima_execucao = self.proxima(agora)
+            if self._parar.wait((self.proxima_execucao - agora).total_seconds()):
+                return
+            try:
+                self.executar()
+            except Exception:
+                logger.exception("Erro na pré-busca agendada")
+
+    def iniciar(self, imediatamente=False):
+        """Laço diário numa thread daemon; ``imediatamente`` faz uma passada antes"""
+        if self._thread is not None:
+            return self
+
+        def alvo():
+            if imediatamente:
+                self.executar()
+            self._laco()
+
+        self._thread = threading.Thread(target=alvo, name='agendador', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    # ESTADO
+
+    def status(self):
+        """Estado de cada símbolo, com o atraso em pregões da última barra"""
+        agora = self._relogio()
+        with self._trava:
+            simbolos = [dict(item) for item in self._estado.values()]
+        for item in simbolos:
+            ultima_barra = item.get('last_bar')
+            item['lag_sessions'] = (None if ultima_barra is None
+                                    else atraso_pregoes(ultima_barra, agora))
+            for campo in ('last_bar', 'refreshed', 'attempted'):
+                if item.get(campo) is not None:
+                    item[campo] = item[campo].isoformat()
+        return {
+            'running': self.executando,
+            'last_run': self.ultima_execucao.isoformat() if self.ultima_execucao else None,
+            'next_run': self.proxima_execucao.isoformat() if self.proxima_execucao else None,
+            'symbols': simbolos,
+        }
+
+    def _salvar_status(self):
+        """Grava ``status()`` em JSON (escrita atômica), para outros processos"""
+        if not self.caminho_status:
+            return
+        temporario = f'{self.caminho_status}.tmp'
+        with open(temporario, 'w') as arquivo:
+            json.dump(self.status(), arquivo)
+        os.replace(temporario, self.caminho_status)
+
+
+def ler_status(caminho, agora=None):
+    """Status gravado por um agendador em outro processo (atraso de agora), ou ``None``"""
+    try:
+        with open(caminho) as arquivo:
+            status = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    agora = agora or datetime.now(FUSO_BOLSA)
+    for item in status['symbols']:
+        if item.get('last_bar'):
+            item['lag_sessions'] = atraso_pregoes(item['last_bar'][:10], agora)
+    return status
+
+
+def criar(aquecer, caminho_status=None):
+    """Agendador com a watchlist e os horários de ``Config``"""
+    return Agendador(
+        interpretar_watchlist(Config.WATCHLIST), aquecer,
+        interpretar_horario(Config.PREFETCH_AT), Config.PREFETCH_RATE, caminho_status
+    )
+
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    import app_simples
+
+    agendador = app_simples.obter_agendador(iniciar=False)
+    if not agendador.simbolos:
+        sys.exit('WATCHLIST vazia (ex: WATCHLIST=AAPL,MSFT,GOOG)')
+    if '--once' in sys.argv[1:]:
+        agendador.executar()
+        print(json.dumps(agendador.status(), indent=2))
+    else:
+        agendador._laco()
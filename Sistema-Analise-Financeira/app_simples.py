@@ -1,283 +1,1024 @@
-from flask import Flask, render_template, request, jsonify, send_file
-import requests
+from flask import (Blueprint, Flask, Response, current_app, g, render_template, request,
+                   jsonify)
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
+import itertools
+import logging
 import os
-import io
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
+import queue
+import threading
+import time
+from functools import partial
+from armazenamento import ArmazemOHLCV
+from cache import CacheResultados
+import lote
+import agendador
+import metricas
+import avaliacao
+import backtest
+import carteira
+import compacto
+import faixas
+import triagem
+import provedor
+import exportacao
+import motor_indicadores
+import previsao
+import reamostragem
+import respostas
+import serializacao
+import transmissao
+from incremental import IndicadoresIncrementais
+from config import Config
 
 load_dotenv()
 API_KEY = os.getenv('TWELVE_API_KEY')
+# Mesmo nome do app.logger do Flask, mas usável fora do contexto da requisição
+logger = logging.getLogger(__name__)
 
-app = Flask(__name__, static_folder='static', template_folder='templates')
+rotas = Blueprint('analise', __name__)
+armazem = ArmazemOHLCV(Config.DATA_STORE_DIR)
+cache_resultados = CacheResultados(
+    Config.CACHE_TIMEOUT, Config.CACHE_MAX_ITEMS, Config.CACHE_MAX_BYTES
+)
+# Quadros de indicadores por símbolo, servidos em fatias (ver faixas.py)
+cache_faixas = CacheResultados(
+    Config.CACHE_TIMEOUT, Config.CACHE_MAX_ITEMS, Config.CACHE_MAX_BYTES
+)
+quadros = faixas.QuadrosPorFaixa(cache_faixas)
+_pool_calculo = None
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+metricas.registrar_coletor(lambda: metricas.linhas_caches(
+    {'analises': cache_resultados, 'faixas': cache_faixas, 'modelos': previsao.modelos}
+))
+metricas.registrar_coletor(quadros.linhas_metricas)
+metricas.registrar_coletor(lambda: metricas.linhas_provedor(
+    provedor.obter_cliente().metricas.resumo(), provedor.LIMITES_LATENCIA
+))
 
-def calcular_indicadores(df):
-    """Calcula indicadores técnicos reais"""
-    # SMA
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    
-    # EMA
-    df['EMA_12'] = df['Close'].ewm(span=12).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26).mean()
-    
-    # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-    df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
-    
-    # Bollinger Bands
-    df['Middle_Band'] = df['Close'].rolling(window=20).mean()
-    std = df['Close'].rolling(window=20).std()
-    df['Upper_Band'] = df['Middle_Band'] + (2 * std)
-    df['Lower_Band'] = df['Middle_Band'] - (2 * std)
-    
-    # ATR (Average True Range)
-    high_low = df['High'] - df['Low']
-    high_close = (df['High'] - df['Close'].shift()).abs()
-    low_close = (df['Low'] - df['Close'].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    df['ATR'] = tr.rolling(window=14).mean()
-    
-    # Stochastic Oscillator
-    low_14 = df['Low'].rolling(window=14).min()
-    high_14 = df['High'].rolling(window=14).max()
-    df['Stochastic_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
-    df['Stochastic_D'] = df['Stochastic_K'].rolling(window=3).mean()
+SEM_DADOS = 'No data is available'
+# Barras devolvidas quando o pedido não tem período
+TAMANHO_SAIDA = 200
+# Barras extras antes do início pedido: a janela mais longa dos indicadores (SMA_200)
+BARRAS_AQUECIMENTO = 200
+# Máximo do outputsize da Twelve Data, usado nas buscas com período
+MAX_SAIDA = 5000
+
+def quadro_api(api_data):
+    """Converte a resposta da Twelve Data em DataFrame OHLCV"""
+    if 'values' not in api_data:
+        mensagem = api_data.get('message', 'Dados não encontrados')
+        # Período sem pregão (feriado) não é erro para o armazém local
+        if SEM_DADOS in mensagem:
+            return pd.DataFrame()
+        raise ValueError(mensagem)
+        
+    # Converter para DataFrame
+    df = pd.DataFrame(api_data['values'])
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    df = df.sort_values('datetime')
+    df.set_index('datetime', inplace=True)
     
-    # OBV (On Balance Volume)
-    obv = [0]
-    for i in range(1, len(df)):
-        if df['Close'].iloc[i] > df['Close'].iloc[i-1]:
-            obv.append(obv[-1] + df['Volume'].iloc[i])
-        elif df['Close'].iloc[i] < df['Close'].iloc[i-1]:
-            obv.append(obv[-1] - df['Volume'].iloc[i])
+    # Converter colunas para numérico
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col])
+        
+    df.rename(columns={
+        'open': 'Open', 'high': 'High', 'low': 'Low', 
+        'close': 'Close', 'volume': 'Volume'
+    }, inplace=True)
+    return df
+
+def parametros_busca(intervalo, start, end):
+    """``outputsize``, ``start_date`` e ``end_date`` de uma chamada ao /time_series.
+
+    No diário, sem início vêm as últimas ``TAMANHO_SAIDA`` barras mais o
+    aquecimento dos indicadores; com início, e sempre no intradiário, as
+    páginas têm o tamanho máximo (a chamada custa o mesmo crédito). No
+    intradiário uma data sem hora vale pelo dia inteiro (para o provedor ela
+    seria a meia-noite).
+    """
+    if not reamostragem.intradiario(intervalo):
+        return (MAX_SAIDA if start else TAMANHO_SAIDA + BARRAS_AQUECIMENTO), start, end
+    if start and len(start) == 10:
+        start += ' 00:00:00'
+    if end and len(end) == 10:
+        end += ' 23:59:59'
+    return MAX_SAIDA, start, end
+
+def paginas_busca(intervalo):
+    return Config.INTRADAY_MAX_PAGES if reamostragem.intradiario(intervalo) else 1
+
+def _buscar_api(symbol, start, end, intervalo='1day'):
+    """Busca a série na Twelve Data"""
+    tamanho, start, end = parametros_busca(intervalo, start, end)
+    with metricas.etapa('upstream'):
+        return quadro_api(provedor.obter_cliente().serie_temporal(
+            symbol, intervalo, outputsize=tamanho, start_date=start, end_date=end
+        ))
+
+def baixar_dados(symbol, start, end, intervalo='1day', fechado_ate=None):
+    """Histórico no ``intervalo``, reaproveitando o que já está gravado em disco.
+
+    O armazém guarda só a granularidade base; intervalos mais longos são
+    reamostrados dela em vez de buscados de novo. ``fechado_ate`` segue para
+    ``ArmazemOHLCV.obter``.
+    """
+    base = reamostragem.intervalo_base(intervalo, Config.INTRADAY_BASE_INTERVAL)
+    with metricas.etapa('fetch'):
+        if not start or not end:
+            df = _buscar_api(symbol, start, end, intervalo)
         else:
-            obv.append(obv[-1])
-    df['OBV'] = obv
-    
-    # Williams %R
-    df['Williams_R'] = -100 * ((high_14 - df['Close']) / (high_14 - low_14))
-    
-    # CCI (Commodity Channel Index)
-    tp = (df['High'] + df['Low'] + df['Close']) / 3
-    sma_tp = tp.rolling(window=20).mean()
-    mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
-    df['CCI'] = (tp - sma_tp) / (0.015 * mad)
-    
+            df = armazem.obter(
+                symbol, base, start, end,
+                lambda inicio, fim: _buscar_api(symbol, inicio, fim, base),
+                limite=parametros_busca(base, start, end)[0], paginas=paginas_busca(base),
+                fechado_ate=fechado_ate
+            )
+            if df is not None and base != intervalo:
+                df = reamostragem.reamostrar(df, intervalo)
+    if df is None or df.empty:
+        raise ValueError('Dados não encontrados')
+    df.index.name = 'datetime'
     return df
 
-def prever_precos(df, dias=30):
-    """Previsão de preços usando regressão polinomial"""
-    df_copy = df.copy()
-    df_copy = df_copy.dropna()
-    
-    # Preparar dados
-    X = np.arange(len(df_copy)).reshape(-1, 1)
-    y = df_copy['Close'].values
-    
-    # Modelo de regressão polinomial
-    model = make_pipeline(PolynomialFeatures(2), LinearRegression())
-    model.fit(X, y)
-    
-    # Predições in-sample
-    df_copy['Pred'] = model.predict(X)
+INDICADORES = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'EMA_12', 'EMA_26', 'RSI',
+    'MACD', 'MACD_Signal', 'MACD_Histogram', 'Middle_Band', 'Upper_Band', 'Lower_Band',
+    'ATR', 'Stochastic_K', 'Stochastic_D', 'OBV', 'Williams_R', 'CCI'
+]
+
+# Campos das barras enviadas ao vivo (a previsão só vem no snapshot)
+CAMPOS_AO_VIVO = [c for c in serializacao.CAMPOS_HISTORICO if c != 'Pred']
+
+tabela_triagem = triagem.TabelaTriagem(INDICADORES)
+_trava_triagem = threading.Lock()
+_atualizando_triagem = threading.Event()
+
+def calcular_indicadores(df, indicadores=None):
+    """Calcula indicadores técnicos reais"""
+    return motor_indicadores.calcular(
+        df, indicadores or INDICADORES, ajuste_ema=True, inplace=True
+    )
+
+def prever_precos(df, dias=30, symbol=None, intervalo='1day'):
+    """Previsão ``dias`` barras à frente com bandas de confiança.
+
+    O modelo é ``Config.FORECAST_MODEL``; com ``auto`` vence o de menor erro
+    na avaliação walk-forward das últimas barras. Os quantis dos erros do
+    modelo escolhido dão ``Lower`` e ``Upper`` (ausentes se a série for curta
+    demais para avaliar).
+    """
+    # Fatia sem o aquecimento dos indicadores (sem copiar as colunas)
+    df_copy = compacto.sem_aquecimento(df).copy(deep=False)
+    y = df_copy['Close'].to_numpy()
+    modelo = Config.FORECAST_MODEL
     
-    # Predições futuras
-    future_X = np.arange(len(df_copy), len(df_copy) + dias).reshape(-1, 1)
-    future_preds = model.predict(future_X)
+    # Avaliação walk-forward (somas acumuladas, sem reajustar a cada origem)
+    candidatos = avaliacao.CANDIDATOS if modelo == 'auto' else [modelo]
+    try:
+        erros = avaliacao.avaliar(y, dias, candidatos, origens=Config.FORECAST_EVAL_ORIGINS)
+    except ValueError:
+        erros = None
+    if modelo == 'auto':
+        modelo = 'poly2' if erros is None else avaliacao.escolher(erros)
     
-    future_dates = []
-    last_date = df_copy.index[-1]
-    for i in range(1, dias + 1):
-        future_dates.append((last_date + timedelta(days=i)).strftime('%Y-%m-%d'))
+    # Ajuste final com toda a série (coeficientes em cache por símbolo)
+    dentro, future_preds = avaliacao.prever(y, modelo, dias, chave=symbol)
+    df_copy['Pred'] = dentro.astype(y.dtype, copy=False)
+    df_copy.attrs['modelo'] = modelo
     
-    future_data = [{'Date': date, 'Pred': pred} for date, pred in zip(future_dates, future_preds)]
+    future_dates = previsao.datas_futuras(df_copy.index[-1], dias, intervalo).strftime(
+        reamostragem.formato_data(intervalo)
+    )
+    future_data = [{'Date': date, 'Pred': pred} for date, pred in zip(future_dates, future_preds.tolist())]
+    if erros is not None:
+        inferior, superior = avaliacao.bandas(
+            erros[modelo], dias, Config.FORECAST_BAND_CONFIDENCE
+        )
+        for linha, baixo, alto in zip(future_data, (future_preds + inferior).tolist(),
+                                      (future_preds + superior).tolist()):
+            linha['Lower'] = baixo
+            linha['Upper'] = alto
     
     return df_copy, future_data
 
-@app.route('/')
+def inicio_aquecimento(start, intervalo='1day'):
+    """Data (ISO) da busca que deixa ``BARRAS_AQUECIMENTO`` barras antes de ``start``"""
+    dias = reamostragem.dias_corridos(intervalo, BARRAS_AQUECIMENTO)
+    return (pd.Timestamp(start) - pd.Timedelta(days=dias)).strftime('%Y-%m-%d')
+
+def baixar_aquecido(symbol, start, end, intervalo='1day', fechado_ate=None):
+    """``baixar_dados`` com as barras de aquecimento dos indicadores antes de ``start``"""
+    inicio = inicio_aquecimento(start, intervalo) if start else None
+    return baixar_dados(symbol, inicio, end, intervalo, fechado_ate)
+
+def inicio_resultado(df, start):
+    """Primeira barra devolvida: ``start`` ou, sem início, a que vem depois do aquecimento"""
+    if start:
+        return pd.Timestamp(start)
+    return df.index[BARRAS_AQUECIMENTO] if len(df) > BARRAS_AQUECIMENTO else df.index[0]
+
+def quadro_indicadores(df, inicio=None):
+    """Indicadores sobre o histórico baixado, sem as barras anteriores a ``inicio``"""
+    with metricas.etapa('indicators'):
+        if Config.COMPACT_DTYPE:
+            # Quadro compacto: uma única matriz no dtype configurado, sem cópias entre etapas
+            quadro = compacto.QuadroCompacto.de_quadro(df, INDICADORES, Config.COMPACT_DTYPE)
+            compacto.calcular(quadro, INDICADORES, ajuste_ema=True)
+            df = quadro.para_quadro(df.index.name)
+        else:
+            df = calcular_indicadores(df)
+    return df if inicio is None else faixas.fatiar(df, inicio)
+
+def preparar_analise(df, horizon, symbol=None, intervalo='1day', inicio=None):
+    """Indicadores e previsão sobre o histórico já baixado.
+
+    As barras antes de ``inicio`` só aquecem os indicadores e ficam fora do
+    resultado.
+    """
+    df = quadro_indicadores(df, inicio)
+    with metricas.etapa('forecast'):
+        return prever_precos(df, horizon, symbol, intervalo)
+
+def indicadores_periodo(symbol, start, end, intervalo='1day'):
+    """Histórico com indicadores de ``start`` a ``end``, válidos desde a primeira barra.
+
+    Com período completo sai de ``quadros``: um período já coberto é só uma
+    fatia do quadro do símbolo, e um que se sobrepõe a ele recalcula a união.
+    """
+    if not start or not end:
+        df = baixar_aquecido(symbol, start, end, intervalo)
+        df = quadro_indicadores(df, inicio_resultado(df, start))
+    else:
+        def calcular(inicio, fim):
+            df = baixar_aquecido(symbol, inicio.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d'),
+                                 intervalo)
+            return quadro_indicadores(df, inicio)
+
+        df = quadros.obter((symbol.upper(), intervalo), start, end, calcular)
+    # Período sem pregão (fim de semana, início depois do fim): nada a analisar
+    if df.empty:
+        raise ValueError('Dados não encontrados')
+    return df
+
+def analisar_baixado(df, symbol, start, end, horizon, intervalo='1day'):
+    """``analisar`` de ``start`` a ``end`` sobre barras já buscadas (com o aquecimento).
+
+    Usado pelo modo assíncrono, que busca as barras sem bloquear: o período
+    sai do quadro do símbolo quando já coberto e, se não, é calculado sobre
+    ``df``, sem voltar ao armazém nem ao provedor.
+    """
+    df = quadros.obter((symbol.upper(), intervalo), start, end,
+                       lambda inicio, fim: quadro_indicadores(df, inicio), uniao=False)
+    if df.empty:
+        raise ValueError('Dados não encontrados')
+    with metricas.etapa('forecast'):
+        return prever_precos(df, horizon, symbol, intervalo)
+
+def chave_analise(symbol, start, end, horizon, intervalo='1day'):
+    return (symbol.upper(), start, end, horizon, intervalo)
+
+def analisar(symbol, start, end, horizon, intervalo='1day'):
+    """Busca, indicadores e previsão, reaproveitando resultados recentes"""
+    def calcular():
+        df = indicadores_periodo(symbol, start, end, intervalo)
+        with metricas.etapa('forecast'):
+            return prever_precos(df, horizon, symbol, intervalo)
+    
+    return cache_resultados.obter_ou_calcular(
+        chave_analise(symbol, start, end, horizon, intervalo), calcular
+    )
+
+def indicadores_simbolo(symbol, start, end):
+    """Histórico diário com indicadores (sem previsão), fatiado do quadro do símbolo"""
+    return indicadores_periodo(symbol, start, end)
+
+def corpo_dados(symbol, horizon, formato, df_with_pred, future_data, intervalo='1day'):
+    """Resposta do /data já codificada em JSON"""
+    formato_data = reamostragem.formato_data(intervalo)
+    with metricas.etapa('serialize'):
+        return serializacao.dumps({
+            'status': 'ok',
+            'meta': {
+                'symbol': symbol,
+                'name': f'{symbol} Stock',
+                'horizon': horizon,
+                'interval': intervalo,
+                'model': df_with_pred.attrs.get('modelo')
+            },
+            'data': serializacao.serializar(
+                df_with_pred, serializacao.CAMPOS_HISTORICO, formato, formato_data
+            ),
+            'future': serializacao.serializar_futuro(future_data, formato, formato_data)
+        })
+
+def obter_pool_calculo():
+    """Pool de processos do /data/batch, criado no primeiro uso"""
+    global _pool_calculo
+    if _pool_calculo is None and Config.BATCH_PROCESS_WORKERS > 0:
+        # Importado só aqui: multiprocessing não é usado fora do lote e do backtest
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Sem fork: o processo já tem threads (agendador, /stream, cliente HTTP) e
+        # um fork copiaria travas seguras por elas. Sem forkserver (Windows), spawn.
+        metodos = multiprocessing.get_all_start_methods()
+        metodo = 'forkserver' if 'forkserver' in metodos else 'spawn'
+        _pool_calculo = ProcessPoolExecutor(max_workers=Config.BATCH_PROCESS_WORKERS,
+                                            mp_context=multiprocessing.get_context(metodo))
+    return _pool_calculo
+
+def processar_simbolo(symbol, df, horizon, formato, intervalo='1day', start=None):
+    """Indicadores, previsão e serialização de um símbolo do lote (linha NDJSON)"""
+    df_with_pred, future_data = preparar_analise(
+        df, horizon, symbol, intervalo, inicio_resultado(df, start)
+    )
+    formato_data = reamostragem.formato_data(intervalo)
+    return serializacao.dumps({
+        'symbol': symbol,
+        'status': 'ok',
+        'model': df_with_pred.attrs.get('modelo'),
+        'data': serializacao.serializar(
+            df_with_pred, serializacao.CAMPOS_HISTORICO, formato, formato_data
+        ),
+        'future': serializacao.serializar_futuro(future_data, formato, formato_data)
+    }) + b'\n'
+
+def avaliar_simbolo(symbol, close, horizon, modelos, modo, janela, origens):
+    """Pontuação walk-forward dos modelos de um símbolo (roda no pool de processos)"""
+    erros = avaliacao.avaliar(close, horizon, modelos, modo, janela, origens)
+    pontuacoes = {}
+    for modelo, erro in erros.items():
+        pontos = avaliacao.pontuar(erro)
+        pontuacoes[modelo] = {
+            'mae': serializacao.matriz(pontos['mae']),
+            'rmse': serializacao.matriz(pontos['rmse']),
+            'mae_mean': pontos['mae_mean'],
+            'rmse_mean': pontos['rmse_mean']
+        }
+    return {'symbol': symbol, 'best': avaliacao.escolher(erros), 'scores': pontuacoes}
+
+def _buscar_recentes(symbol, intervalo):
+    """Últimas barras direto do provedor, para o acompanhamento ao vivo"""
+    with metricas.etapa('upstream'):
+        return quadro_api(provedor.obter_cliente().serie_temporal(
+            symbol, intervalo, outputsize=Config.STREAM_POLL_BARS
+        ))
+
+def _canal_ao_vivo(chave):
+    """Funções de um ``transmissao.Canal`` para (símbolo, intervalo, início)"""
+    symbol, intervalo, start = chave
+    formato_data = reamostragem.formato_data(intervalo)
+
+    def snapshot(df, horizon):
+        df = faixas.fatiar(df, inicio_resultado(df, start))
+        df_with_pred, future_data = prever_precos(df, horizon, symbol, intervalo)
+        return corpo_dados(symbol, horizon, 'rows', df_with_pred, future_data, intervalo)
+
+    def barras(df):
+        return serializacao.dumps({
+            'symbol': symbol,
+            'bars': serializacao.serializar(df, CAMPOS_AO_VIVO, 'rows', formato_data)
+        })
+
+    return (
+        lambda: baixar_aquecido(symbol, start, date.today().isoformat(), intervalo),
+        lambda: _buscar_recentes(symbol, intervalo),
+        snapshot, barras, INDICADORES
+    )
+
+difusor = transmissao.Difusor(_canal_ao_vivo, Config.STREAM_POLL_SECONDS)
+
+@metricas.registrar_coletor
+def _linhas_ao_vivo():
+    resumo = difusor.resumo()
+    return ['# TYPE stream_channels gauge', f"stream_channels {resumo['canais']}",
+            '# TYPE stream_subscribers gauge', f"stream_subscribers {resumo['assinantes']}"]
+
+# Pré-busca da watchlist: estado incremental dos indicadores por símbolo
+_agendador = None
+_trava_agendador = threading.Lock()
+_incrementais = {}
+# Dados até o fechamento não mudam até a próxima passada
+VALIDADE_AQUECIMENTO = 24 * 3600
+
+def _estender_indicadores(symbol, df):
+    """Indicadores de ``df`` continuando o estado da última passada, se ele ainda servir"""
+    estado, quadro = _incrementais.get(symbol, (None, None))
+    if estado is not None and estado.ultima_data in df.index:
+        novas = df.loc[df.index > estado.ultima_data]
+        quadro = pd.concat([quadro, estado.atualizar(novas)])
+    else:
+        # Primeira passada (ou histórico alterado): calcula tudo e guarda o estado
+        estado = IndicadoresIncrementais(INDICADORES, ajuste_ema=True)
+        quadro = estado.iniciar(df)
+    _incrementais[symbol] = (estado, quadro)
+    return quadro
+
+def aquecer_simbolo(symbol, dia):
+    """Pré-busca de um símbolo da watchlist depois do fechamento de ``dia``.
+
+    Grava as barras novas no armazém, com o pregão de ``dia`` já dado como
+    coberto, estende os indicadores e deixa em cache o quadro do símbolo de
+    ``PREFETCH_START`` até ``dia``: qualquer período dentro dele sai como
+    fatia, sem provedor nem recálculo. Devolve a data da última barra.
+    """
+    symbol = symbol.upper()
+    start, end = Config.PREFETCH_START, dia.isoformat()
+    df = baixar_aquecido(symbol, start, end, fechado_ate=dia)
+    with metricas.etapa('indicators'):
+        quadro = _estender_indicadores(symbol, df)
+    inicio, fim = faixas.limites(start, end)
+    quadro = faixas.fatiar(quadro, inicio)
+    quadros.guardar((symbol, '1day'), inicio, fim, quadro, VALIDADE_AQUECIMENTO)
+    return quadro.index[-1].date()
+
+def _status_agendador():
+    return os.path.join(armazem.raiz, 'agendador.json')
+
+def obter_agendador(iniciar=True):
+    """Agendador da watchlist, criado (e, com ``iniciar``, posto para rodar) no primeiro uso"""
+    global _agendador
+    with _trava_agendador:
+        if _agendador is None:
+            _agendador = agendador.criar(aquecer_simbolo, _status_agendador())
+        if iniciar:
+            _agendador.iniciar()
+    return _agendador
+
+@metricas.registrar_coletor
+def _linhas_agendador():
+    if _agendador is None:
+        return []
+    linhas = ['# TYPE prefetch_lag_sessions gauge']
+    for item in _agendador.status()['symbols']:
+        if item['lag_sessions'] is not None:
+            linhas.append(f'prefetch_lag_sessions{{symbol="{item["symbol"]}"}} '
+                          f'{item["lag_sessions"]}')
+    return linhas
+
+@rotas.before_app_request
+def iniciar_agendador():
+    if Config.PREFETCH_ENABLED and _agendador is None:
+        obter_agendador()
+
+@rotas.before_app_request
+def iniciar_instrumentacao():
+    if Config.METRICS_ENABLED:
+        g.inicio_requisicao = time.perf_counter()
+        g.tempos = metricas.iniciar_requisicao()
+    if Config.PROFILE_ENABLED and request.args.get('profile') == '1':
+        g.perfil = metricas.AmostradorPerfil().iniciar()
+
+@rotas.after_app_request
+def registrar_instrumentacao(resposta):
+    """Server-Timing, histograma por rota e o perfil pedido com ?profile=1.
+
+    Em respostas em streaming o tempo vai até o início do corpo.
+    """
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        nome = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{time.monotonic_ns()}"
+        resposta.headers['X-Profile'] = os.path.basename(perfil.salvar(Config.PROFILE_DIR, nome))
+    if 'tempos' in g:
+        total = time.perf_counter() - g.inicio_requisicao
+        resposta.headers['Server-Timing'] = metricas.server_timing(g.tempos, total)
+        rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+        metricas.requisicoes.observar(total, request.method, rota, str(resposta.status_code))
+    return resposta
+
+@rotas.after_app_request
+def comprimir_resposta(resposta):
+    """Compressão conforme o Accept-Encoding e cache longo dos estáticos versionados"""
+    if request.endpoint == 'static' and request.args.get('v') == respostas.impressao_digital(
+            current_app.static_folder, request.view_args.get('filename', '')):
+        resposta.cache_control.public = True
+        resposta.cache_control.max_age = respostas.UM_ANO
+        resposta.cache_control.immutable = True
+    return respostas.comprimir_resposta(resposta, request.headers.get('Accept-Encoding'))
+
+@rotas.app_url_defaults
+def versionar_estaticos(endpoint, valores):
+    """``url_for('static', ...)`` com o hash do conteúdo: arquivo novo, URL nova"""
+    if endpoint == 'static' and 'filename' in valores:
+        versao = respostas.impressao_digital(current_app.static_folder, valores['filename'])
+        if versao:
+            valores['v'] = versao
+
+@rotas.route('/prefetch')
+def get_prefetch():
+    """Estado da pré-busca: última barra, atraso em pregões e erro por símbolo"""
+    if _agendador is not None:
+        status = dict(_agendador.status(), source='worker')
+    else:
+        # Agendador em outro processo (python agendador.py): o status gravado no armazém
+        status = agendador.ler_status(_status_agendador())
+        status = {'symbols': []} if status is None else dict(status, source='file')
+    return serializacao.resposta_json(dict(
+        status, enabled=Config.PREFETCH_ENABLED,
+        watchlist=agendador.interpretar_watchlist(Config.WATCHLIST)
+    ))
+
+@rotas.route('/metrics')
+def get_metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@rotas.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/data', methods=['POST'])
+def etag_dados(symbol, start, end, horizon, intervalo, formato, df_with_pred):
+    """ETag do /data: pedido, última barra (data e fechamento) e modelo da previsão"""
+    ultima = df_with_pred.iloc[-1]
+    return respostas.etag(
+        symbol.upper(), start, end, horizon, intervalo, formato,
+        df_with_pred.index[-1].value, float(ultima['Close']), df_with_pred.attrs.get('modelo')
+    )
+
+@rotas.route('/data', methods=['GET', 'POST'])
 def get_data():
+    """Análise de um símbolo; no GET (parâmetros na URL) com ETag e 304"""
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         symbol = data.get('symbol', 'AAPL')
         start = data.get('start')
         end = data.get('end')
         horizon = int(data.get('horizon', 30))
+        formato = data.get('format', 'rows')
+        intervalo = data.get('interval', '1day')
+        if formato not in serializacao.FORMATOS:
+            return jsonify({'error': f'Formato inválido: {formato}'}), 400
+        if intervalo not in reamostragem.INTERVALOS:
+            return jsonify({'error': f'Intervalo inválido: {intervalo}'}), 400
         
-        # Buscar dados da API
-        url = "https://api.twelvedata.com/time_series"
-        params = {
-            'symbol': symbol,
-            'interval': '1day',
-            'apikey': API_KEY,
-            'outputsize': 200,
-            'start_date': start,
-            'end_date': end
-        }
-        
-        response = requests.get(url, params=params)
-        api_data = response.json()
+        # Busca, indicadores e previsão (com cache em memória)
+        try:
+            df_with_pred, future_data = analisar(symbol, start, end, horizon, intervalo)
+        except ValueError as e:
+            return jsonify({'error': f'Erro: {e}'}), 400
+        except provedor.ProvedorIndisponivel as e:
+            return jsonify({'error': str(e)}), 503
         
-        if 'values' not in api_data:
-            return jsonify({'error': f'Erro: {api_data.get("message", "Dados não encontrados")}'}), 400
-            
-        # Converter para DataFrame
-        df = pd.DataFrame(api_data['values'])
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df = df.sort_values('datetime')
-        df.set_index('datetime', inplace=True)
+        # GET: se o cliente já tem esta versão, nem serializa
+        if request.method == 'GET':
+            etag = etag_dados(symbol, start, end, horizon, intervalo, formato, df_with_pred)
+            if respostas.corresponde(request.if_none_match, etag):
+                resposta = Response(status=304)
+            else:
+                resposta = Response(
+                    corpo_dados(symbol, horizon, formato, df_with_pred, future_data, intervalo),
+                    mimetype='application/json'
+                )
+            resposta.set_etag(etag)
+            resposta.cache_control.public = True
+            resposta.cache_control.max_age = Config.DATA_MAX_AGE
+            resposta.vary.add('Accept-Encoding')
+            return resposta
         
-        # Converter colunas para numérico
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col])
-            
-        df.rename(columns={
-            'open': 'Open', 'high': 'High', 'low': 'Low', 
-            'close': 'Close', 'volume': 'Volume'
-        }, inplace=True)
+        # Preparar dados para o frontend (conversão vetorizada)
+        return Response(
+            corpo_dados(symbol, horizon, formato, df_with_pred, future_data, intervalo),
+            mimetype='application/json'
+        )
         
-        # Calcular indicadores
-        df = calcular_indicadores(df)
+    except Exception as e:
+        print(f"Erro: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@rotas.route('/data/batch', methods=['POST'])
+def get_data_batch():
+    data = request.get_json() or {}
+    try:
+        simbolos = lote.normalizar_simbolos(data.get('symbols'), Config.BATCH_MAX_SYMBOLS)
+        horizon = int(data.get('horizon', 30))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    start = data.get('start')
+    end = data.get('end')
+    formato = data.get('format', 'rows')
+    intervalo = data.get('interval', '1day')
+    if formato not in serializacao.FORMATOS:
+        return jsonify({'error': f'Formato inválido: {formato}'}), 400
+    if intervalo not in reamostragem.INTERVALOS:
+        return jsonify({'error': f'Intervalo inválido: {intervalo}'}), 400
+    
+    def gerar():
+        ok = erros = 0
+        resultados = lote.processar_lote(
+            simbolos,
+            lambda symbol: baixar_aquecido(symbol, start, end, intervalo),
+            partial(processar_simbolo, horizon=horizon, formato=formato, intervalo=intervalo,
+                    start=start),
+            Config.BATCH_FETCH_WORKERS,
+            obter_pool_calculo()
+        )
+        # Cada símbolo vira uma linha assim que termina
+        for symbol, linha, erro in resultados:
+            if erro is None:
+                ok += 1
+                yield linha
+            else:
+                erros += 1
+                yield serializacao.dumps({'symbol': symbol, 'status': 'error', 'error': erro}) + b'\n'
+        yield serializacao.dumps({'status': 'done', 'ok': ok, 'errors': erros}) + b'\n'
+    
+    return Response(gerar(), mimetype='application/x-ndjson')
+
+@rotas.route('/forecast/evaluate', methods=['POST'])
+def get_forecast_evaluation():
+    data = request.get_json() or {}
+    start = data.get('start')
+    end = data.get('end')
+    intervalo = data.get('interval', '1day')
+    modo = data.get('mode', 'expanding')
+    try:
+        simbolos = lote.normalizar_simbolos(data.get('symbols'), Config.BATCH_MAX_SYMBOLS)
+        horizon = int(data.get('horizon', 30))
+        janela = int(data['window']) if data.get('window') else None
+        origens = int(data.get('origins', Config.FORECAST_EVAL_ORIGINS))
+        modelos = data.get('models') or list(avaliacao.CANDIDATOS)
+        if not isinstance(modelos, list):
+            raise ValueError('"models" deve ser uma lista, ex: ["poly2", "ema"]')
+        avaliacao.validar(modelos, modo, janela, horizon, origens)
+        reamostragem.validar(intervalo)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    resultados, erros = {}, {}
+    for symbol, resultado, erro in lote.processar_lote(
+            simbolos,
+            lambda symbol: baixar_dados(symbol, start, end, intervalo)['Close'].to_numpy(float),
+            partial(avaliar_simbolo, horizon=horizon, modelos=modelos, modo=modo,
+                    janela=janela, origens=origens),
+            Config.BATCH_FETCH_WORKERS,
+            obter_pool_calculo()
+    ):
+        if erro is None:
+            resultados[symbol] = resultado
+        else:
+            erros[symbol] = erro
+    
+    return serializacao.resposta_json({
+        'status': 'ok',
+        'meta': {'horizon': horizon, 'mode': modo, 'window': janela, 'origins': origens,
+                 'models': modelos, 'interval': intervalo, 'errors': erros},
+        'results': [resultados[s] for s in simbolos if s in resultados]
+    })
+
+@rotas.route('/stream')
+def get_stream():
+    """Snapshot e depois só as barras novas, por server-sent events"""
+    symbol = request.args.get('symbol', 'AAPL').upper()
+    intervalo = request.args.get('interval', '1day')
+    try:
+        horizon = int(request.args.get('horizon', 30))
+        reamostragem.validar(intervalo)
+        padrao = 5 if reamostragem.intradiario(intervalo) else 365
+        start = request.args.get('start') or (date.today() - timedelta(days=padrao)).isoformat()
+        chave = (symbol, intervalo, start)
+        fila = queue.Queue()
+        snapshot = difusor.assinar(chave, fila.put, horizon)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except provedor.ProvedorIndisponivel as e:
+        return jsonify({'error': str(e)}), 503
+    
+    def gerar():
+        yield snapshot
+        while True:
+            try:
+                yield fila.get(timeout=Config.STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield transmissao.PING
+    
+    resposta = Response(gerar(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Chamado pelo servidor quando o cliente desconecta (mesmo antes do primeiro envio)
+    resposta.call_on_close(lambda: difusor.cancelar(chave, fila.put))
+    return resposta
+
+@rotas.route('/backtest', methods=['POST'])
+def get_backtest():
+    data = request.get_json() or {}
+    symbol = data.get('symbol', 'AAPL')
+    estrategia = data.get('strategy', 'rsi')
+    parametros = data.get('params') or {}
+    formato = data.get('format', 'rows')
+    try:
+        custo = float(data.get('cost', 0))
+        top = int(data.get('top', 20))
+        if formato not in serializacao.FORMATOS:
+            raise ValueError(f'Formato inválido: {formato}')
+        if not isinstance(parametros, dict):
+            raise ValueError('"params" deve ser um objeto')
+        combinacoes = int(np.prod([len(v) if isinstance(v, list) else 1
+                                   for v in parametros.values()]))
+        if combinacoes > Config.BACKTEST_MAX_COMBOS:
+            raise ValueError(f'No máximo {Config.BACKTEST_MAX_COMBOS} combinações por requisição')
         
-        # Fazer previsão
-        df_with_pred, future_data = prever_precos(df, horizon)
+        df = indicadores_simbolo(symbol, data.get('start'), data.get('end'))
+        meta = {'symbol': symbol, 'strategy': estrategia, 'cost': custo}
         
-        # Preparar dados para o frontend
-        processed_data = []
-        for idx, row in df_with_pred.iterrows():
-            processed_data.append({
-                'Date': idx.strftime('%Y-%m-%d'),
-                'Open': float(row['Open']),
-                'High': float(row['High']),
-                'Low': float(row['Low']),
-                'Close': float(row['Close']),
-                'Volume': int(row['Volume']),
-                'SMA_20': float(row['SMA_20']) if pd.notna(row['SMA_20']) else None,
-                'SMA_50': float(row['SMA_50']) if pd.notna(row['SMA_50']) else None,
-                'EMA_12': float(row['EMA_12']) if pd.notna(row['EMA_12']) else None,
-                'EMA_26': float(row['EMA_26']) if pd.notna(row['EMA_26']) else None,
-                'RSI': float(row['RSI']) if pd.notna(row['RSI']) else None,
-                'MACD': float(row['MACD']) if pd.notna(row['MACD']) else None,
-                'MACD_Signal': float(row['MACD_Signal']) if pd.notna(row['MACD_Signal']) else None,
-                'Upper_Band': float(row['Upper_Band']) if pd.notna(row['Upper_Band']) else None,
-                'Lower_Band': float(row['Lower_Band']) if pd.notna(row['Lower_Band']) else None,
-                'Pred': float(row['Pred']) if pd.notna(row['Pred']) else None
+        if any(isinstance(v, list) for v in parametros.values()):
+            # Grade de parâmetros: blocos avaliados no pool de processos
+            tabela = backtest.varredura(df, estrategia, parametros, custo,
+                                        executor=obter_pool_calculo())
+            return serializacao.resposta_json({
+                'status': 'ok',
+                'meta': dict(meta, combinations=len(tabela)),
+                'results': serializacao.serializar(tabela.head(top), list(tabela.columns), formato)
             })
         
-        return jsonify({
+        resultado, curva = backtest.backtest(df, estrategia, parametros, custo)
+        return serializacao.resposta_json({
             'status': 'ok',
-            'meta': {
-                'symbol': symbol,
-                'name': f'{symbol} Stock',
-                'horizon': horizon
-            },
-            'data': processed_data,
-            'future': future_data
+            'meta': meta,
+            'metrics': {k: (None if v != v else v) for k, v in resultado.items()},
+            'equity': serializacao.serializar(
+                curva, ['Date', 'Position', 'Equity', 'Drawdown'], formato
+            )
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except provedor.ProvedorIndisponivel as e:
+        return jsonify({'error': str(e)}), 503
+
+def _snapshot_triagem():
+    return os.path.join(armazem.raiz, 'triagem.npz')
+
+def _atualizar_triagem():
+    try:
+        alterados = tabela_triagem.atualizar(armazem, calcular_indicadores)
+        if alterados:
+            tabela_triagem.salvar(_snapshot_triagem())
+    finally:
+        _atualizando_triagem.clear()
+
+def obter_triagem():
+    """Tabela da triagem; recalculada em segundo plano quando fica velha"""
+    with _trava_triagem:
+        caminho = _snapshot_triagem()
+        if tabela_triagem.atualizado_em is None and os.path.exists(caminho):
+            tabela_triagem.carregar(caminho)
+        if not len(tabela_triagem):
+            # Primeira consulta sem snapshot: atualiza antes de responder
+            _atualizando_triagem.set()
+            _atualizar_triagem()
+        elif (time.time() - (tabela_triagem.atualizado_em or 0) > Config.SCREENER_MAX_AGE
+              and not _atualizando_triagem.is_set()):
+            _atualizando_triagem.set()
+            threading.Thread(target=_atualizar_triagem, daemon=True).start()
+    return tabela_triagem
+
+@rotas.route('/screen', methods=['POST'])
+def get_screen():
+    inicio = time.perf_counter()
+    data = request.get_json() or {}
+    filtros = data.get('filters') or []
+    formato = data.get('format', 'rows')
+    try:
+        if formato not in serializacao.FORMATOS:
+            raise ValueError(f'Formato inválido: {formato}')
+        if isinstance(filtros, str) or not isinstance(filtros, list):
+            raise ValueError('"filters" deve ser uma lista, ex: ["RSI < 30"]')
+        tabela = obter_triagem()
+        resultado, total = tabela.consultar(
+            filtros, ordenar=data.get('sort'), decrescente=bool(data.get('desc', False)),
+            limite=int(data.get('limit', 50)), colunas=data.get('columns')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    atualizado = tabela.atualizado_em
+    return serializacao.resposta_json({
+        'status': 'ok',
+        'meta': {
+            'symbols': len(tabela),
+            'matches': total,
+            'updated': datetime.fromtimestamp(atualizado).isoformat() if atualizado else None,
+            'elapsed_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        },
+        'results': serializacao.serializar(resultado, list(resultado.columns), formato)
+    })
+
+def fechamentos(symbol, start, end):
+    """``(datas, Close)`` diários em ns; direto do armazém quando não há lacunas"""
+    if not armazem.lacunas_a_buscar(symbol, '1day', start, end):
+        serie = armazem.coluna(symbol, '1day', 'Close', start, end)
+        if serie is not None and len(serie[0]):
+            return serie
+    df = baixar_dados(symbol, start, end)
+    return (df.index.values.astype('datetime64[ns]').astype('int64'),
+            df['Close'].to_numpy(dtype=float))
+
+def _pesos_carteira(pesos, simbolos):
+    if pesos is None:
+        return None
+    if not isinstance(pesos, dict):
+        raise ValueError('"weights" deve ser um objeto, ex: {"AAPL": 0.6, "MSFT": 0.4}')
+    pesos = {str(s).upper().strip(): float(p) for s, p in pesos.items()}
+    return [pesos.get(s, 0.0) for s in simbolos]
+
+@rotas.route('/portfolio', methods=['POST'])
+def get_portfolio():
+    data = request.get_json() or {}
+    formato = data.get('format', 'rows')
+    hoje = date.today()
+    start = data.get('start') or (hoje - timedelta(days=365)).isoformat()
+    end = data.get('end') or hoje.isoformat()
+    try:
+        simbolos = lote.normalizar_simbolos(data.get('symbols'), Config.BATCH_MAX_SYMBOLS)
+        referencia = str(data.get('benchmark') or '').upper().strip() or None
+        confianca = float(data.get('confidence', 0.95))
+        livre = float(data.get('risk_free', 0))
+        janela = int(data['window']) if data.get('window') else None
+        passo = int(data['step']) if data.get('step') else None
+        matriz_janelas = data.get('rolling_matrix', 'correlation')
+        if formato not in serializacao.FORMATOS:
+            raise ValueError(f'Formato inválido: {formato}')
+        if matriz_janelas not in ('correlation', 'covariance'):
+            raise ValueError('"rolling_matrix" deve ser correlation ou covariance')
         
-    except Exception as e:
-        print(f"Erro: {e}")
-        return jsonify({'error': str(e)}), 500
+        series, erros = {}, {}
+        buscar = simbolos + ([referencia] if referencia and referencia not in simbolos else [])
+        for symbol, serie, erro in lote.processar_lote(
+                buscar, lambda symbol: fechamentos(symbol, start, end),
+                lambda symbol, serie: serie, Config.BATCH_FETCH_WORKERS):
+            if erro is None:
+                series[symbol] = serie
+            else:
+                erros[symbol] = erro
+        if referencia is not None and referencia not in series:
+            raise ValueError(f"Benchmark {referencia}: {erros.get(referencia)}")
+        validos = [s for s in simbolos if s in series]
+        if not validos:
+            raise ValueError('Nenhum símbolo com dados no período')
+        
+        with metricas.etapa('portfolio'):
+            colunas = validos + ([referencia] if referencia is not None else [])
+            datas, precos = carteira.alinhar([series[s] for s in colunas])
+            if janela is not None and janela < len(datas):
+                quantidade = (len(datas) - 1 - janela) // (passo or janela) + 1
+                if quantidade * len(validos) ** 2 > Config.PORTFOLIO_MAX_CELLS:
+                    raise ValueError(f'Janelas demais: aumente "step" ou reduza os símbolos '
+                                     f'(máximo de {Config.PORTFOLIO_MAX_CELLS} valores)')
+            resultado = carteira.analisar(
+                precos[:, :len(validos)], _pesos_carteira(data.get('weights'), validos),
+                None if referencia is None else precos[:, -1], confianca,
+                data.get('optimize'), livre, janela, passo
+            )
+            rolagem = resultado.get('rolling')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except provedor.ProvedorIndisponivel as e:
+        return jsonify({'error': str(e)}), 503
+    
+    with metricas.etapa('serialize'):
+        # ``alinhar`` devolve as datas em ns (int64)
+        dias = datas.astype('datetime64[ns]').astype('datetime64[D]')
+        ativos = pd.DataFrame({
+            'Symbol': validos,
+            'Return': resultado['return'],
+            'Volatility': resultado['volatility'],
+            'Sharpe': resultado['sharpe'],
+            'VaR': resultado['var'],
+            'CVaR': resultado['cvar'],
+        })
+        if 'beta' in resultado:
+            ativos['Beta'] = resultado['beta']
+        
+        def carteira_json(resumo):
+            return dict(resumo, weights=dict(zip(validos, resumo['weights'].tolist())))
+        
+        corpo = {
+            'status': 'ok',
+            'meta': {
+                'symbols': validos,
+                'benchmark': referencia,
+                'start': str(dias[0]),
+                'end': str(dias[-1]),
+                'observations': len(datas),
+                'confidence': confianca,
+                'errors': erros
+            },
+            'assets': serializacao.serializar(ativos, list(ativos.columns), formato),
+            'correlation': serializacao.matriz(resultado['correlation']),
+            'covariance': serializacao.matriz(resultado['covariance']),
+            'portfolio': carteira_json(resultado['portfolio'])
+        }
+        if 'optimized' in resultado:
+            corpo['optimized'] = carteira_json(resultado['optimized'])
+        if rolagem is not None:
+            corpo['rolling'] = {
+                'dates': [str(d) for d in dias[rolagem['index']]],
+                'volatility': serializacao.matriz(rolagem['volatility']),
+                matriz_janelas: serializacao.matriz(rolagem[matriz_janelas])
+            }
+        return serializacao.resposta_json(corpo)
+
+def _analises_exportacao(simbolos, start, end, horizon, ignorados):
+    """Analisa um símbolo por vez conforme a exportação em lote avança.
 
-@app.route('/download', methods=['POST'])
+    Símbolos sem dados (ou com o provedor fora) são pulados e anotados em
+    ``ignorados`` como ``(simbolo, excecao)``.
+    """
+    for symbol in simbolos:
+        try:
+            df_with_pred, future_data = analisar(symbol, start, end, horizon)
+        except (ValueError, provedor.ProvedorIndisponivel) as e:
+            logger.warning(f"Exportação: {symbol} ignorado ({e})")
+            ignorados.append((symbol, e))
+            continue
+        yield symbol, df_with_pred, future_data
+
+def _com_primeiro_bloco(blocos):
+    """Gera o primeiro bloco já agora e devolve um gerador com todos eles"""
+    primeiro = next(blocos, b'')
+
+    def gerar():
+        yield primeiro
+        yield from blocos
+    return gerar()
+
+@rotas.route('/download', methods=['POST'])
 def download():
     try:
         data = request.get_json()
-        symbol = data.get('ticker', 'AAPL')
         start = data.get('start')
         end = data.get('end')
         horizon = int(data.get('horizon', 30))
+        formato = data.get('format', 'xlsx')
         
-        url = "https://api.twelvedata.com/time_series"
-        params = {
-            'symbol': symbol,
-            'interval': '1day',
-            'apikey': API_KEY,
-            'outputsize': 200,
-            'start_date': start,
-            'end_date': end
-        }
+        try:
+            exportacao.validar_formato(formato)
+            if 'tickers' in data:
+                simbolos = lote.normalizar_simbolos(data['tickers'], Config.BATCH_MAX_SYMBOLS)
+            else:
+                simbolos = [data.get('ticker', 'AAPL')]
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        response = requests.get(url, params=params)
-        api_data = response.json()
-        
-        if 'values' not in api_data:
-            return jsonify({'error': 'Dados não encontrados'}), 400
-            
-        df = pd.DataFrame(api_data['values'])
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df = df.sort_values('datetime')
-        df.set_index('datetime', inplace=True)
-        
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col])
-            
-        df.rename(columns={
-            'open': 'Open', 'high': 'High', 'low': 'Low', 
-            'close': 'Close', 'volume': 'Volume'
-        }, inplace=True)
-        
-        df = calcular_indicadores(df)
-        df_with_pred, future_df = prever_precos(df, horizon)
-        
-        # Criar Excel com formatação
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_with_pred.to_excel(writer, sheet_name='Dados_Historicos')
-            pd.DataFrame(future_df).to_excel(writer, sheet_name='Previsao_Futura', index=False)
-            
-            workbook = writer.book
-            
-            # Formatos
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#4472C4',
-                'font_color': 'white',
-                'border': 1
-            })
-            
-            money_format = workbook.add_format({'num_format': '$#,##0.00'})
-            
-            worksheet1 = writer.sheets['Dados_Historicos']
-            worksheet1.set_column('A:A', 12)
-            worksheet1.set_column('B:Z', 15, money_format)
-            
-            worksheet2 = writer.sheets['Previsao_Futura']
-            worksheet2.set_column('A:A', 12)
-            worksheet2.set_column('B:B', 15, money_format)
+        varios = len(simbolos) > 1
+        ignorados = []
+        if varios:
+            analises = _analises_exportacao(simbolos, start, end, horizon, ignorados)
+            primeiro = next(analises, None)
+            if primeiro is None:
+                # Nenhum símbolo com dados: erro em vez de um arquivo vazio
+                indisponivel = any(isinstance(e, provedor.ProvedorIndisponivel)
+                                   for _, e in ignorados)
+                return jsonify({
+                    'error': 'Nenhum símbolo com dados',
+                    'skipped': [{'symbol': s, 'error': str(e)} for s, e in ignorados]
+                }), 503 if indisponivel else 400
+            itens = itertools.chain([primeiro], analises)
+            nome = 'lote'
+        else:
+            symbol = simbolos[0]
+            try:
+                df_with_pred, future_df = analisar(symbol, start, end, horizon)
+            except ValueError:
+                return jsonify({'error': 'Dados não encontrados'}), 400
+            except provedor.ProvedorIndisponivel as e:
+                return jsonify({'error': str(e)}), 503
+            itens = [(symbol, df_with_pred, future_df)]
+            nome = symbol
         
-        output.seek(0)
-        return send_file(
-            output, 
-            as_attachment=True, 
-            download_name=f'{symbol}_analise_{datetime.now().strftime("%Y%m%d")}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        # Arquivo gerado e enviado aos poucos, sem montar tudo em memória
+        mimetype, extensao = exportacao.FORMATOS[formato]
+        arquivo = f'{nome}_analise_{datetime.now().strftime("%Y%m%d")}.{extensao}'
+        corpo = exportacao.exportar(
+            formato, itens, varios, abas=('Dados_Historicos', 'Previsao_Futura'),
+            formatar=True, ignorados=ignorados
         )
+        cabecalhos = {'Content-Disposition': f'attachment; filename={arquivo}'}
+        if formato in exportacao.EM_ARQUIVO:
+            # O arquivo fica pronto antes do primeiro bloco: a lista de ignorados está completa
+            corpo = _com_primeiro_bloco(corpo)
+        if ignorados:
+            cabecalhos['X-Skipped-Symbols'] = ','.join(s for s, _ in ignorados)
+        return Response(corpo, mimetype=mimetype, headers=cabecalhos)
         
     except Exception as e:
         print(f"Erro no download: {e}")
         return jsonify({'error': str(e)}), 500
 
+def criar_app():
+    """App Flask com as rotas da análise.
+
+    Só monta o app: o estado pesado (pool de processos, cliente HTTP, threads
+    do /stream e da triagem) nasce no primeiro uso, o que permite carregar o
+    módulo no processo mestre do gunicorn (``preload_app``) antes do fork.
+    """
+    novo = Flask(__name__, static_folder='static', template_folder='templates')
+    novo.register_blueprint(rotas)
+    return novo
+
+app = criar_app()
+
 if __name__ == '__main__':
     print(f"API Key: {API_KEY[:10]}...")
     app.run(debug=True, port=5001)
\ No newline at end of file
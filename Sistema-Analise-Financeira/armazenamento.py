@@ -0,0 +1,300 @@
+"""Armazenamento local de séries OHLCV por símbolo e intervalo.
+
+Cada série fica em ``<raiz>/<SIMBOLO>/<intervalo>/`` com um arquivo ``.npy``
+por coluna (lidos com memory-map) e um ``meta.json`` que registra quais
+intervalos de datas já foram baixados. Só as lacunas são buscadas no provedor.
+"""
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import reamostragem
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _para_data(valor):
+    # datetime (e Timestamp) também é date, mas precisa perder a hora
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return valor
+    return pd.Timestamp(valor).date()
+
+
+def _tem_pregao(inicio, fim):
+    return np.busday_count(inicio, fim + timedelta(days=1)) > 0
+
+
+def mesclar_intervalos(intervalos):
+    """Une intervalos [inicio, fim] sobrepostos ou adjacentes"""
+    resultado = []
+    for inicio, fim in sorted(intervalos):
+        if resultado and inicio <= resultado[-1][1] + timedelta(days=1):
+            if fim > resultado[-1][1]:
+                resultado[-1] = (resultado[-1][0], fim)
+        else:
+            resultado.append((inicio, fim))
+    return resultado
+
+
+def calcular_lacunas(cobertos, inicio, fim):
+    """Retorna os trechos de [inicio, fim] que não estão em ``cobertos``"""
+    lacunas = []
+    cursor = inicio
+    for c_inicio, c_fim in mesclar_intervalos(cobertos):
+        if c_fim < cursor:
+            continue
+        if c_inicio > fim:
+            break
+        if c_inicio > cursor:
+            lacunas.append((cursor, c_inicio - timedelta(days=1)))
+        cursor = max(cursor, c_fim + timedelta(days=1))
+        if cursor > fim:
+            break
+    if cursor <= fim:
+        lacunas.append((cursor, fim))
+    return lacunas
+
+
+class ArmazemOHLCV:
+    """Cache em disco de barras OHLCV com busca incremental de lacunas"""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+        self._travas = {}
+        self._trava_travas = threading.Lock()
+
+    def _diretorio(self, simbolo, intervalo):
+        return os.path.join(self.raiz, simbolo.upper(), intervalo)
+
+    @contextmanager
+    def _travar(self, simbolo, intervalo):
+        chave = (simbolo.upper(), intervalo)
+        with self._trava_travas:
+            trava = self._travas.setdefault(chave, threading.Lock())
+        with trava:
+            if fcntl is None:
+                yield
+                return
+            diretorio = self._diretorio(simbolo, intervalo)
+            os.makedirs(diretorio, exist_ok=True)
+            # Trava entre processos (vários workers do gunicorn)
+            with open(os.path.join(diretorio, '.lock'), 'w') as arquivo:
+                fcntl.flock(arquivo, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+    def _ler_meta(self, simbolo, intervalo):
+        caminho = os.path.join(self._diretorio(simbolo, intervalo), 'meta.json')
+        try:
+            with open(caminho) as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return {'linhas': 0, 'intervalos': []}
+
+    def intervalos_cobertos(self, simbolo, intervalo):
+        meta = self._ler_meta(simbolo, intervalo)
+        return [(_para_data(i), _para_data(f)) for i, f in meta['intervalos']]
+
+    def simbolos(self, intervalo='1day'):
+        """Lista os símbolos que possuem dados gravados no intervalo"""
+        if not os.path.isdir(self.raiz):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.raiz)
+            if os.path.exists(os.path.join(self.raiz, nome, intervalo, 'meta.json'))
+        )
+
+    def _ler_arrays(self, simbolo, intervalo, colunas=COLUNAS):
+        diretorio = self._diretorio(simbolo, intervalo)
+        meta = self._ler_meta(simbolo, intervalo)
+        if not meta['linhas']:
+            return None
+        try:
+            arrays = {
+                nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r')
+                for nome in ['datas'] + list(colunas)
+            }
+        except OSError:
+            return None
+        # Gravação interrompida no meio: descarta em vez de misturar versões
+        if any(len(a) != meta['linhas'] for a in arrays.values()):
+            logger.warning("Armazém inconsistente para %s/%s, ignorando", simbolo, intervalo)
+            return None
+        return arrays
+
+    @staticmethod
+    def _quadro(arrays, esquerda, direita):
+        indice = pd.to_datetime(np.asarray(arrays['datas'][esquerda:direita]), unit='ns')
+        return pd.DataFrame(
+            {col: np.array(arrays[col][esquerda:direita]) for col in COLUNAS},
+            index=pd.DatetimeIndex(indice, name='Date')
+        )
+
+    def ler(self, simbolo, intervalo, inicio=None, fim=None):
+        """Lê as barras gravadas entre ``inicio`` e ``fim`` (inclusive)"""
+        arrays = self._ler_arrays(simbolo, intervalo)
+        if arrays is None:
+            return None
+
+        datas = arrays['datas']
+        esquerda = 0
+        direita = len(datas)
+        if inicio is not None:
+            limite = pd.Timestamp(_para_data(inicio)).value
+            esquerda = int(np.searchsorted(datas, limite, side='left'))
+        if fim is not None:
+            limite = (pd.Timestamp(_para_data(fim)) + pd.Timedelta(days=1)).value
+            direita = int(np.searchsorted(datas, limite, side='left'))
+        return self._quadro(arrays, esquerda, direita)
+
+    def coluna(self, simbolo, intervalo, nome, inicio=None, fim=None):
+        """``(datas, valores)`` de uma coluna entre ``inicio`` e ``fim``, sem montar DataFrame"""
+        arrays = self._ler_arrays(simbolo, intervalo, [nome])
+        if arrays is None:
+            return None
+        datas = arrays['datas']
+        esquerda = 0 if inicio is None else int(
+            np.searchsorted(datas, pd.Timestamp(_para_data(inicio)).value, side='left')
+        )
+        direita = len(datas) if fim is None else int(np.searchsorted(
+            datas, (pd.Timestamp(_para_data(fim)) + pd.Timedelta(days=1)).value, side='left'
+        ))
+        return np.array(datas[esquerda:direita]), np.array(arrays[nome][esquerda:direita])
+
+    def ultimas(self, simbolo, intervalo, quantidade):
+        """As ``quantidade`` barras mais recentes (só elas saem do memory-map)"""
+        arrays = self._ler_arrays(simbolo, intervalo)
+        if arrays is None:
+            return None
+        total = len(arrays['datas'])
+        return self._quadro(arrays, max(total - quantidade, 0), total)
+
+    def gravar(self, simbolo, intervalo, df, inicio, fim):
+        """Mescla ``df`` nas barras existentes e marca [inicio, fim] como coberto"""
+        with self._travar(simbolo, intervalo):
+            self._gravar(simbolo, intervalo, df, inicio, fim)
+
+    def _gravar(self, simbolo, intervalo, df, inicio, fim):
+        diretorio = self._diretorio(simbolo, intervalo)
+        os.makedirs(diretorio, exist_ok=True)
+
+        linhas = self._ler_meta(simbolo, intervalo)['linhas']
+        if len(df):
+            existente = self.ler(simbolo, intervalo)
+            novo = df[COLUNAS].copy()
+            novo.index = pd.DatetimeIndex(pd.to_datetime(novo.index), name='Date')
+            if existente is not None and len(existente):
+                combinado = pd.concat([existente, novo])
+                # Em datas repetidas vale a barra mais recente
+                combinado = combinado[~combinado.index.duplicated(keep='last')]
+            else:
+                combinado = novo
+            combinado = combinado.sort_index()
+
+            arrays = {'datas': combinado.index.values.astype('datetime64[ns]').astype('int64')}
+            for col in COLUNAS:
+                arrays[col] = combinado[col].to_numpy()
+
+            for nome, valores in arrays.items():
+                temporario = os.path.join(diretorio, f'{nome}.tmp.npy')
+                np.save(temporario, valores)
+                os.replace(temporario, os.path.join(diretorio, f'{nome}.npy'))
+            linhas = len(combinado)
+
+        cobertos = self.intervalos_cobertos(simbolo, intervalo)
+        if inicio is not None and fim is not None:
+            inicio, fim = _para_data(inicio), _para_data(fim)
+            if inicio <= fim:
+                cobertos.append((inicio, fim))
+        meta = {
+            'linhas': linhas,
+            'intervalos': [[i.isoformat(), f.isoformat()] for i, f in mesclar_intervalos(cobertos)]
+        }
+        temporario = os.path.join(diretorio, 'meta.tmp.json')
+        with open(temporario, 'w') as arquivo:
+            json.dump(meta, arquivo)
+        os.replace(temporario, os.path.join(diretorio, 'meta.json'))
+
+    def lacunas(self, simbolo, intervalo, inicio, fim):
+        return calcular_lacunas(
+            self.intervalos_cobertos(simbolo, intervalo), _para_data(inicio), _para_data(fim)
+        )
+
+    def lacunas_a_buscar(self, simbolo, intervalo, inicio, fim):
+        """Lacunas que ``obter`` levaria ao provedor (ignora as só de fim de semana)"""
+        return [
+            (l_inicio, l_fim) for l_inicio, l_fim in self.lacunas(simbolo, intervalo, inicio, fim)
+            if _tem_pregao(l_inicio, l_fim)
+        ]
+
+    def obter(self, simbolo, intervalo, inicio, fim, buscar, limite=None, paginas=1,
+              fechado_ate=None):
+        """Retorna as barras de [inicio, fim], buscando no provedor só o que falta.
+
+        ``buscar(inicio, fim)`` recebe datas ISO e deve devolver um DataFrame
+        (vazio se não houver pregão no período) ou ``None`` em caso de erro.
+        Se o provedor devolver ``limite`` linhas a resposta pode ter sido
+        truncada: até ``paginas`` buscas seguem para trás, com ``fim`` logo
+        antes da barra mais antiga recebida (data e hora, ``AAAA-MM-DD HH:MM:SS``),
+        e só o trecho efetivamente recebido é marcado como coberto.
+        ``fechado_ate`` é o último dia cuja barra já é definitiva (padrão:
+        ontem); depois do fechamento, o próprio dia.
+        """
+        inicio = _para_data(inicio)
+        fim = _para_data(fim)
+        # A barra do dia corrente ainda pode mudar, então só é dada como coberta
+        # quando quem chama sabe que o pregão fechou
+        if fechado_ate is None:
+            ultimo_fechado = date.today() - timedelta(days=1)
+        else:
+            ultimo_fechado = _para_data(fechado_ate)
+        intradiario = intervalo in reamostragem.MINUTOS and reamostragem.intradiario(intervalo)
+
+        with self._travar(simbolo, intervalo):
+            for l_inicio, l_fim in self.lacunas(simbolo, intervalo, inicio, fim):
+                if not _tem_pregao(l_inicio, l_fim):
+                    # Só fim de semana: nada a buscar
+                    self._gravar(simbolo, intervalo, pd.DataFrame(), l_inicio,
+                                 min(l_fim, ultimo_fechado))
+                    continue
+
+                logger.info("Buscando %s %s de %s a %s", simbolo, intervalo, l_inicio, l_fim)
+                recebidos = []
+                cobre_inicio = l_inicio
+                fim_pagina = l_fim.isoformat()
+                for _ in range(paginas):
+                    novo = buscar(l_inicio.isoformat(), fim_pagina)
+                    if novo is None:
+                        return None
+                    recebidos.append(novo)
+                    if limite is None or len(novo) < limite:
+                        cobre_inicio = l_inicio
+                        break
+                    primeira = pd.Timestamp(novo.index.min())
+                    cobre_inicio = primeira.date()
+                    if intradiario:
+                        # O dia da barra mais antiga pode ter vindo pela metade
+                        cobre_inicio += timedelta(days=1)
+                    fim_pagina = (primeira - pd.Timedelta(seconds=1)).isoformat(sep=' ')
+                novo = recebidos[0] if len(recebidos) == 1 else pd.concat(recebidos[::-1])
+                self._gravar(simbolo, intervalo, novo, cobre_inicio, min(l_fim, ultimo_fechado))
+
+        df = self.ler(simbolo, intervalo, inicio, fim)
+        if df is None or df.empty:
+            return None
+        return df
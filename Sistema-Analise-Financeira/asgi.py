@@ -0,0 +1,360 @@
+"""Modo de serviço assíncrono (ASGI) do app_simples.
+
+Com workers síncronos cada requisição ao /data segura um worker durante toda
+a ida à Twelve Data. Aqui o POST /data roda num loop asyncio: a busca no
+provedor é aguardada sem ocupar o worker, o cálculo de indicadores e previsão
+vai para um executor e o loop segue atendendo outras requisições. Requisições
+iguais simultâneas compartilham a mesma busca e o mesmo cálculo. As demais
+rotas são repassadas ao app Flask numa thread, com resposta em streaming.
+
+Uso (requer um servidor ASGI, ex: uvicorn):
+    uvicorn asgi:app --workers 2
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+import asyncio
+import contextvars
+import io
+import json
+import logging
+import sys
+import time
+
+import app_simples
+import metricas
+import provedor
+import reamostragem
+import respostas
+import serializacao
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+# PROTOCOLO
+
+async def _ler_corpo(receive):
+    partes = []
+    while True:
+        mensagem = await receive()
+        partes.append(mensagem.get('body', b''))
+        if not mensagem.get('more_body'):
+            return b''.join(partes)
+
+
+async def _responder(send, status, corpo, tipo='application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', tipo.encode()),
+                    (b'content-length', str(len(corpo)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': corpo})
+
+
+def _comprimindo(scope, send):
+    """``send`` que comprime o corpo único das rotas nativas, como o Flask (respostas.py)"""
+    cabecalhos = dict(scope.get('headers', []))
+    codificacao = respostas.escolher_codificacao(
+        cabecalhos.get(b'accept-encoding', b'').decode('latin-1')
+    )
+    inicio = {}
+
+    async def enviar(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            inicio.update(mensagem)
+            return
+        if inicio:
+            corpo = mensagem.get('body', b'')
+            cabecalhos = inicio.pop('headers')
+            tipo = dict(cabecalhos).get(b'content-type', b'').decode('latin-1')
+            if respostas.comprimivel(tipo):
+                cabecalhos = [*cabecalhos, (b'vary', b'Accept-Encoding')]
+            if (codificacao and inicio['status'] == 200 and not mensagem.get('more_body')
+                    and len(corpo) >= Config.COMPRESS_MIN_BYTES and respostas.comprimivel(tipo)):
+                corpo = respostas.comprimir(corpo, codificacao)
+                cabecalhos = [(k, v) for k, v in cabecalhos if k != b'content-length'] + [
+                    (b'content-encoding', codificacao.encode()),
+                    (b'content-length', str(len(corpo)).encode())
+                ]
+            await send(dict(inicio, headers=cabecalhos))
+            inicio.clear()
+            mensagem = dict(mensagem, body=corpo)
+        await send(mensagem)
+
+    return enviar
+
+
+async def _erro(send, status, mensagem):
+    await _responder(send, status, serializacao.dumps({'error': mensagem}))
+
+
+async def _ciclo_de_vida(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# /data ASSÍNCRONO
+
+async def baixar_dados(symbol, start, end, intervalo='1day'):
+    """Como ``app_simples.baixar_dados``, aguardando o provedor sem bloquear o loop"""
+    cliente = provedor.obter_cliente_assincrono()
+    base = reamostragem.intervalo_base(intervalo, Config.INTRADAY_BASE_INTERVAL)
+
+    async def buscar(inicio, fim, intervalo):
+        tamanho, inicio, fim = app_simples.parametros_busca(intervalo, inicio, fim)
+        with metricas.etapa('upstream'):
+            return app_simples.quadro_api(await cliente.serie_temporal(
+                symbol, intervalo, outputsize=tamanho, start_date=inicio, end_date=fim
+            ))
+
+    with metricas.etapa('fetch'):
+        if not start or not end:
+            df = await buscar(start, end, intervalo)
+        else:
+            armazem = app_simples.armazem
+            lacunas = [
+                (i.isoformat(), f.isoformat())
+                for i, f in armazem.lacunas_a_buscar(symbol, base, start, end)
+            ]
+            # Primeira página de cada lacuna buscada em paralelo; a gravação no
+            # armazém (disco, trava) vai para uma thread. As páginas seguintes, e o
+            # que outra requisição tiver mudado nesse meio-tempo, são buscados de
+            # forma síncrona lá mesmo.
+            recebidos = dict(zip(
+                lacunas, await asyncio.gather(*(buscar(i, f, base) for i, f in lacunas))
+            ))
+            df = await asyncio.to_thread(
+                armazem.obter, symbol, base, start, end,
+                lambda i, f: recebidos.pop((i, f)) if (i, f) in recebidos
+                else app_simples._buscar_api(symbol, i, f, base),
+                app_simples.parametros_busca(base, start, end)[0],
+                app_simples.paginas_busca(base)
+            )
+            if df is not None and base != intervalo:
+                df = reamostragem.reamostrar(df, intervalo)
+    if df is None or df.empty:
+        raise ValueError('Dados não encontrados')
+    df.index.name = 'datetime'
+    return df
+
+
+# Tarefas em andamento por chave: requisições iguais aguardam a mesma tarefa
+# (como o ``obter_ou_calcular`` dos caches no modo síncrono)
+_em_andamento = {}
+
+
+async def _uma_vez(chave, criar):
+    tarefa = _em_andamento.get(chave)
+    if tarefa is None:
+        tarefa = asyncio.ensure_future(criar())
+        _em_andamento[chave] = tarefa
+        tarefa.add_done_callback(lambda _: _em_andamento.pop(chave, None))
+    # Uma requisição cancelada (cliente desconectou) não cancela as demais
+    return await asyncio.shield(tarefa)
+
+
+async def analisar(symbol, start, end, horizon, intervalo='1day'):
+    """``app_simples.analisar`` com o mesmo cache, uma única busca e cálculo por chave"""
+    chave = app_simples.chave_analise(symbol, start, end, horizon, intervalo)
+    encontrado, resultado = app_simples.cache_resultados.obter(chave)
+    if encontrado:
+        return resultado
+    return await _uma_vez(chave, lambda: _calcular(symbol, start, end, horizon, intervalo))
+
+
+async def _calcular(symbol, start, end, horizon, intervalo):
+    loop = asyncio.get_running_loop()
+    # Com as barras de aquecimento antes de ``start``, cortadas depois dos indicadores
+    inicio = app_simples.inicio_aquecimento(start, intervalo) if start else None
+    chave_busca = (symbol.upper(), inicio, end, intervalo)
+    df = await _uma_vez(chave_busca, lambda: baixar_dados(symbol, inicio, end, intervalo))
+    if start and end:
+        # Sobre as barras recebidas, reaproveitando o quadro de indicadores do
+        # símbolo (em memória, por isso numa thread e não no pool de processos).
+        # Com o contexto copiado, as etapas entram no Server-Timing.
+        pool = None
+        tarefa = (contextvars.copy_context().run, app_simples.analisar_baixado,
+                  df, symbol, start, end, horizon, intervalo)
+    else:
+        pool = app_simples.obter_pool_calculo()
+        tarefa = (app_simples.preparar_analise, df, horizon, symbol, intervalo,
+                  app_simples.inicio_resultado(df, start))
+        if pool is None:
+            tarefa = (contextvars.copy_context().run, *tarefa)
+    resultado = await loop.run_in_executor(pool, *tarefa)
+    app_simples.cache_resultados.definir(
+        app_simples.chave_analise(symbol, start, end, horizon, intervalo), resultado
+    )
+    return resultado
+
+
+async def dados(receive, send):
+    if not Config.METRICS_ENABLED:
+        return await _dados(receive, send)
+    inicio = time.perf_counter()
+    tempos = metricas.iniciar_requisicao()
+
+    async def enviar(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            total = time.perf_counter() - inicio
+            timing = metricas.server_timing(tempos, total).encode('latin-1')
+            mensagem = dict(mensagem, headers=[*mensagem['headers'], (b'server-timing', timing)])
+            metricas.requisicoes.observar(total, 'POST', '/data', str(mensagem['status']))
+        await send(mensagem)
+
+    await _dados(receive, enviar)
+
+
+async def _dados(receive, send):
+    try:
+        data = json.loads(await _ler_corpo(receive) or b'{}')
+        symbol = data.get('symbol', 'AAPL')
+        start = data.get('start')
+        end = data.get('end')
+        horizon = int(data.get('horizon', 30))
+        formato = data.get('format', 'rows')
+        intervalo = data.get('interval', '1day')
+    except (ValueError, AttributeError) as e:
+        return await _erro(send, 400, str(e))
+    if formato not in serializacao.FORMATOS:
+        return await _erro(send, 400, f'Formato inválido: {formato}')
+    if intervalo not in reamostragem.INTERVALOS:
+        return await _erro(send, 400, f'Intervalo inválido: {intervalo}')
+
+    try:
+        df_with_pred, future_data = await analisar(symbol, start, end, horizon, intervalo)
+        corpo = await asyncio.to_thread(
+            app_simples.corpo_dados, symbol, horizon, formato, df_with_pred, future_data,
+            intervalo
+        )
+    except ValueError as e:
+        return await _erro(send, 400, f'Erro: {e}')
+    except provedor.ProvedorIndisponivel as e:
+        return await _erro(send, 503, str(e))
+    except Exception as e:
+        logger.exception("Erro no /data assíncrono")
+        return await _erro(send, 500, str(e))
+    await _responder(send, 200, corpo)
+
+
+ROTAS = {
+    ('POST', '/data'): dados,
+}
+
+
+# REPASSE AO FLASK
+
+def _environ(scope, corpo):
+    servidor, porta = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': servidor,
+        'SERVER_PORT': str(porta),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(corpo)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for nome, valor in scope.get('headers', []):
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[nome] = valor
+            continue
+        chave = f'HTTP_{nome}'
+        environ[chave] = f'{environ[chave]},{valor}' if chave in environ else valor
+    return environ
+
+
+async def _desconexao(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def repassar_wsgi(app_wsgi, scope, receive, send):
+    """Executa ``app_wsgi`` numa thread, enviando cada bloco assim que é gerado.
+
+    Se o cliente desconecta, para de pedir blocos e fecha a resposta (o que
+    encerra, por exemplo, a assinatura do /stream), em vez de deixar o
+    gerador rodando no executor.
+    """
+    environ = _environ(scope, await _ler_corpo(receive))
+    inicio = {}
+
+    def start_response(status, cabecalhos, exc_info=None):
+        inicio['status'] = int(status.split(' ', 1)[0])
+        inicio['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                             for k, v in cabecalhos]
+        return lambda dados: None
+
+    loop = asyncio.get_running_loop()
+    desconectado = asyncio.ensure_future(_desconexao(receive))
+    pendente = None
+
+    async def proximo():
+        # Próximo bloco; None no fim da resposta ou se o cliente desconectar antes
+        nonlocal pendente
+        pendente = loop.run_in_executor(None, next, blocos, None)
+        await asyncio.wait([pendente, desconectado], return_when=asyncio.FIRST_COMPLETED)
+        if desconectado.done():
+            return None
+        bloco, pendente = pendente.result(), None
+        return bloco
+
+    resposta = await loop.run_in_executor(None, app_wsgi, environ, start_response)
+    blocos = iter(resposta)
+    try:
+        bloco = await proximo()
+        if desconectado.done():
+            return
+        await send({'type': 'http.response.start', 'status': inicio['status'],
+                    'headers': inicio['headers']})
+        while bloco is not None:
+            if bloco:
+                await send({'type': 'http.response.body', 'body': bloco, 'more_body': True})
+            bloco = await proximo()
+        if not desconectado.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        desconectado.cancel()
+        if pendente is not None:
+            # Um gerador em execução não pode ser fechado: espera o bloco em curso
+            # (no /stream, no máximo um intervalo de heartbeat)
+            await asyncio.gather(pendente, return_exceptions=True)
+        if hasattr(resposta, 'close'):
+            await loop.run_in_executor(None, resposta.close)
+
+
+class AppAssincrono:
+    """Aplicação ASGI: rotas de ``ROTAS`` nativas, o resto via Flask"""
+
+    def __init__(self, app_wsgi, rotas=ROTAS):
+        self.app_wsgi = app_wsgi
+        self.rotas = rotas
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await _ciclo_de_vida(receive, send)
+        if scope['type'] != 'http':
+            return
+        rota = self.rotas.get((scope['method'], scope['path']))
+        if rota is not None:
+            return await rota(receive, _comprimindo(scope, send))
+        await repassar_wsgi(self.app_wsgi, scope, receive, send)
+
+
+app = AppAssincrono(app_simples.app)
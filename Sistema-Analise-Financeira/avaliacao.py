@@ -0,0 +1,185 @@
+"""Avaliação walk-forward dos modelos de previsão e escolha do melhor por série.
+
+Em cada origem ``t`` cada candidato é ajustado só com o que era conhecido
+até ali (janela expansiva ``y[:t+1]`` ou móvel com as últimas ``janela``
+barras) e prevê os ``passos`` seguintes; os erros contra o que de fato
+aconteceu dão MAE e RMSE por horizonte, e os quantis desses erros viram as
+bandas de confiança da previsão.
+
+Nenhum ajuste é refeito do zero a cada origem. Na janela expansiva XᵀX e Xᵀy
+de todas as origens saem de somas acumuladas das potências de x (reescalado
+para [0, 1] em cada origem, o que mantém o sistema bem condicionado) e são
+resolvidos num único ``solve`` em lote. Na janela móvel a matriz de
+Vandermonde é a mesma em toda origem, então a previsão de cada horizonte é um
+filtro linear fixo sobre a janela e todas as origens saem de um produto
+``janelas @ filtros``. A extrapolação da EMA (suavização exponencial dupla
+de Brown) é recursiva e já produz o nível e a tendência de todas as origens.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import previsao
+
+CANDIDATOS = ('poly1', 'poly2', 'poly3', 'log_linear', 'ema')
+MODOS = ('expanding', 'rolling')
+# Barras mínimas até a primeira origem avaliada
+MINIMO_BARRAS = 20
+SPAN_EMA = 20
+
+
+def validar_modelo(modelo):
+    if modelo not in CANDIDATOS:
+        raise ValueError(f"Modelo inválido: {modelo} (use {', '.join(CANDIDATOS)})")
+
+
+def validar(modelos, modo='expanding', janela=None, passos=1, origens=None):
+    if passos < 1:
+        raise ValueError('O horizonte precisa ser de pelo menos 1 barra')
+    if origens is not None and origens < 1:
+        raise ValueError('Avalie pelo menos 1 origem')
+    if not modelos:
+        raise ValueError('Informe ao menos um modelo')
+    for modelo in modelos:
+        validar_modelo(modelo)
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo} (use {' ou '.join(MODOS)})")
+    if modo == 'rolling' and (janela is None or janela < MINIMO_BARRAS):
+        raise ValueError(f'Janela móvel precisa de pelo menos {MINIMO_BARRAS} barras')
+
+
+def _grau(modelo):
+    return 1 if modelo == 'log_linear' else int(modelo[4:])
+
+
+# PREVISÕES EM TODAS AS ORIGENS
+
+def _polinomio_expansivo(y, grau, origens, passos):
+    """``(origens, passos)``: ajuste de ``y[:t+1]`` em cada origem ``t``"""
+    expoentes = np.arange(2 * grau + 1)
+    potencias = np.arange(len(y), dtype=float)[:, None] ** expoentes
+    somas_x = np.cumsum(potencias, axis=0)[origens]
+    somas_xy = np.cumsum(potencias[:, :grau + 1] * y[:, None], axis=0)[origens]
+    # x / t em cada origem: basta dividir as somas de x^k por t^k
+    escala = np.maximum(origens, 1).astype(float)[:, None]
+    somas_x /= escala ** expoentes
+    somas_xy /= escala ** expoentes[:grau + 1]
+    g = np.arange(grau + 1)
+    coeficientes = np.linalg.solve(somas_x[:, g[:, None] + g], somas_xy[..., None])[..., 0]
+    futuro = (origens[:, None] + np.arange(1, passos + 1)) / escala
+    return np.einsum('mpg,mg->mp', futuro[..., None] ** g, coeficientes)
+
+
+def _polinomio_movel(y, grau, janela, origens, passos):
+    """``(origens, passos)``: ajuste das ``janela`` barras até cada origem"""
+    # Mesma reescala de previsao.ajustar: a janela ocupa [-1, 1]
+    x = np.linspace(-1, 1, janela)
+    futuro = 1 + 2 / (janela - 1) * np.arange(1, passos + 1)
+    filtros = np.linalg.pinv(np.vander(x, grau + 1, increasing=True)).T @ \
+        np.vander(futuro, grau + 1, increasing=True).T
+    return sliding_window_view(y, janela)[origens - janela + 1] @ filtros
+
+
+def _brown(y, span=SPAN_EMA):
+    """Nível e tendência da suavização exponencial dupla em cada barra"""
+    alfa = 2 / (span + 1)
+    s1 = pd.Series(y).ewm(span=span, adjust=False).mean().to_numpy()
+    s2 = pd.Series(s1).ewm(span=span, adjust=False).mean().to_numpy()
+    return 2 * s1 - s2, alfa / (1 - alfa) * (s1 - s2)
+
+
+def previsoes(y, modelo, origens, passos, modo='expanding', janela=None):
+    """Previsões ``(origens, passos)`` de ``modelo`` feitas em cada origem"""
+    y = np.asarray(y, dtype=float)
+    origens = np.asarray(origens)
+    if modelo == 'ema':
+        # Recursiva: usa tudo até a origem nos dois modos
+        nivel, tendencia = _brown(y)
+        return nivel[origens, None] + tendencia[origens, None] * np.arange(1, passos + 1)
+    serie = np.log(y) if modelo == 'log_linear' else y
+    if modo == 'rolling':
+        resultado = _polinomio_movel(serie, _grau(modelo), janela, origens, passos)
+    else:
+        resultado = _polinomio_expansivo(serie, _grau(modelo), origens, passos)
+    return np.exp(resultado) if modelo == 'log_linear' else resultado
+
+
+# AVALIAÇÃO
+
+def avaliar(y, passos, modelos=CANDIDATOS, modo='expanding', janela=None, origens=None):
+    """Erros walk-forward (real - previsto) de cada modelo.
+
+    Avalia as últimas ``origens`` origens (todas, se ``None``); os horizontes
+    ficam limitados ao que essas origens conseguem conferir. Devolve
+    ``{modelo: erros}`` com erros ``(origens, horizontes)`` e NaN onde o
+    valor real ainda não existe.
+    """
+    validar(modelos, modo, janela, passos, origens)
+    y = np.asarray(y, dtype=float)
+    primeira = max(MINIMO_BARRAS, janela if modo == 'rolling' else 0) - 1
+    todas = np.arange(primeira, len(y) - 1)
+    if origens:
+        todas = todas[-origens:]
+    if not len(todas):
+        raise ValueError('Sem dados suficientes para avaliar a previsão')
+    passos = min(passos, len(todas))
+
+    alvos = todas[:, None] + np.arange(1, passos + 1)
+    reais = y[np.minimum(alvos, len(y) - 1)]
+    reais[alvos >= len(y)] = np.nan
+    return {
+        modelo: reais - previsoes(y, modelo, todas, passos, modo, janela)
+        for modelo in modelos
+    }
+
+
+def pontuar(erros):
+    """MAE e RMSE por horizonte, e as médias entre horizontes"""
+    mae = np.nanmean(np.abs(erros), axis=0)
+    rmse = np.sqrt(np.nanmean(erros ** 2, axis=0))
+    return {'mae': mae, 'rmse': rmse, 'mae_mean': float(mae.mean()),
+            'rmse_mean': float(rmse.mean())}
+
+
+def escolher(erros_por_modelo):
+    """Modelo com o menor MAE médio entre os horizontes"""
+    return min(erros_por_modelo, key=lambda m: np.nanmean(np.abs(erros_por_modelo[m])))
+
+
+def bandas(erros, passos, confianca=0.9):
+    """Limites ``(inferior, superior)`` somados à previsão em cada horizonte.
+
+    São os quantis empíricos dos erros walk-forward; além do último horizonte
+    avaliado crescem com a raiz do horizonte, como num passeio aleatório.
+    """
+    cauda = (1 - confianca) / 2
+    inferior, superior = np.nanquantile(erros, [cauda, 1 - cauda], axis=0)
+    avaliados = len(inferior)
+    if passos > avaliados:
+        fator = np.sqrt(np.arange(avaliados + 1, passos + 1) / avaliados)
+        inferior = np.concatenate([inferior, inferior[-1] * fator])
+        superior = np.concatenate([superior, superior[-1] * fator])
+    return inferior[:passos], superior[:passos]
+
+
+# AJUSTE FINAL
+
+def prever(y, modelo, passos, chave=None):
+    """Ajuste com toda a série: ``(previsto dentro da amostra, próximos passos)``.
+
+    Na EMA o valor dentro da amostra é a previsão de um passo feita na barra
+    anterior.
+    """
+    validar_modelo(modelo)
+    y = np.asarray(y, dtype=float)
+    x = np.arange(len(y))
+    futuro = np.arange(len(y), len(y) + passos)
+    if modelo == 'ema':
+        nivel, tendencia = _brown(y)
+        dentro = np.concatenate([y[:1], (nivel + tendencia)[:-1]])
+        return dentro, nivel[-1] + tendencia[-1] * np.arange(1, passos + 1)
+    if modelo == 'log_linear':
+        ajuste = previsao.obter_modelo(x, np.log(y), 1, chave=chave)
+        return np.exp(ajuste.prever(x)), np.exp(ajuste.prever(futuro))
+    ajuste = previsao.obter_modelo(x, y, _grau(modelo), chave=chave)
+    return ajuste.prever(x), ajuste.prever(futuro)
@@ -0,0 +1,216 @@
+"""Backtest vetorizado das estratégias sobre as colunas de ``calcular_indicadores``.
+
+Uma estratégia transforma o quadro de indicadores em matrizes booleanas de
+entrada e saída, uma linha por combinação de parâmetros. A posição (comprado
+ou fora) vem de um forward-fill vetorizado desses sinais e retornos, curva de
+capital, drawdown e Sharpe são calculados para todas as combinações de uma vez,
+sem laço por barra. ``varredura`` divide uma grade de parâmetros em blocos que
+podem rodar num pool de processos.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+PERIODOS_ANO = 252
+
+# Parâmetros padrão de cada estratégia (os mesmos do motor de indicadores)
+ESTRATEGIAS = {
+    'rsi': {'janela': 14, 'inferior': 30.0, 'superior': 70.0},
+    'macd': {'rapida': 12, 'lenta': 26, 'sinal': 9},
+    'bollinger': {'janela': 20, 'desvios': 2.0},
+}
+
+# SÉRIES
+
+# Com os parâmetros padrão as colunas já calculadas por calcular_indicadores
+# são reaproveitadas; nos demais casos a série é calculada a partir do Close.
+
+def _rsi(df, janela):
+    if janela == 14 and 'RSI' in df:
+        return df['RSI'].to_numpy(dtype=float)
+    delta = df['Close'].diff()
+    ganho = delta.clip(lower=0).rolling(window=janela).mean()
+    perda = (-delta.clip(upper=0)).rolling(window=janela).mean()
+    return (100 - (100 / (1 + ganho / perda))).to_numpy(dtype=float)
+
+
+def _macd(df, rapida, lenta, sinal, ajuste_ema, emas=None):
+    if (rapida, lenta, sinal) == (12, 26, 9) and {'MACD', 'MACD_Signal'} <= set(df.columns):
+        return (df['MACD'] - df['MACD_Signal']).to_numpy(dtype=float)
+    # EMAs do Close compartilhadas entre as combinações de uma varredura
+    emas = {} if emas is None else emas
+    for span in (rapida, lenta):
+        if span not in emas:
+            emas[span] = df['Close'].ewm(span=span, adjust=ajuste_ema).mean()
+    macd = emas[rapida] - emas[lenta]
+    return (macd - macd.ewm(span=sinal, adjust=ajuste_ema).mean()).to_numpy(dtype=float)
+
+
+def _bandas(df, janela):
+    if janela == 20 and {'Middle_Band', 'Upper_Band'} <= set(df.columns):
+        media = df['Middle_Band'].to_numpy(dtype=float)
+        return media, (df['Upper_Band'].to_numpy(dtype=float) - media) / 2
+    rolagem = df['Close'].rolling(window=janela)
+    return rolagem.mean().to_numpy(dtype=float), rolagem.std().to_numpy(dtype=float)
+
+
+# SINAIS (uma linha por combinação)
+
+def _sinais_rsi(df, grade, ajuste_ema):
+    entradas = np.zeros((len(grade), len(df)), dtype=bool)
+    saidas = np.zeros_like(entradas)
+    for janela, linhas in grade.groupby('janela').indices.items():
+        rsi = _rsi(df, int(janela))
+        # Compra na sobrevenda, zera na sobrecompra
+        entradas[linhas] = rsi < grade['inferior'].to_numpy()[linhas, None]
+        saidas[linhas] = rsi > grade['superior'].to_numpy()[linhas, None]
+    return entradas, saidas
+
+
+def _sinais_macd(df, grade, ajuste_ema):
+    entradas = np.zeros((len(grade), len(df)), dtype=bool)
+    emas = {}
+    for chave, linhas in grade.groupby(['rapida', 'lenta', 'sinal']).indices.items():
+        histograma = _macd(df, *map(int, chave), ajuste_ema, emas)
+        # Comprado enquanto o MACD estiver acima da linha de sinal
+        entradas[linhas] = histograma > 0
+    return entradas, ~entradas
+
+
+def _sinais_bollinger(df, grade, ajuste_ema):
+    close = df['Close'].to_numpy(dtype=float)
+    entradas = np.zeros((len(grade), len(df)), dtype=bool)
+    saidas = np.zeros_like(entradas)
+    for janela, linhas in grade.groupby('janela').indices.items():
+        media, desvio = _bandas(df, int(janela))
+        # Compra abaixo da banda inferior, sai ao voltar à média
+        entradas[linhas] = close < media - grade['desvios'].to_numpy()[linhas, None] * desvio
+        saidas[linhas] = close > media
+    return entradas, saidas
+
+
+SINAIS = {
+    'rsi': _sinais_rsi,
+    'macd': _sinais_macd,
+    'bollinger': _sinais_bollinger,
+}
+
+
+# POSIÇÕES E MÉTRICAS
+
+def posicoes(entradas, saidas):
+    """Posição 1/0 mantida entre uma entrada e a saída seguinte (forward-fill vetorizado)"""
+    estado = np.full(entradas.shape, np.nan)
+    estado[saidas] = 0.0
+    estado[entradas] = 1.0
+    indices = np.where(np.isnan(estado), 0, np.arange(estado.shape[-1]))
+    np.maximum.accumulate(indices, axis=-1, out=indices)
+    posicao = np.take_along_axis(estado, indices, axis=-1)
+    return np.nan_to_num(posicao, nan=0.0)
+
+
+def retornos(close, posicao, custo=0.0):
+    """Retorno por barra: posição da barra anterior vezes a variação, menos o custo das trocas"""
+    close = np.asarray(close, dtype=float)
+    variacao = np.zeros_like(close)
+    variacao[1:] = close[1:] / close[:-1] - 1
+    anterior = np.zeros_like(posicao)
+    anterior[..., 1:] = posicao[..., :-1]
+    return anterior * variacao - custo * np.abs(posicao - anterior)
+
+
+def metricas(retorno, posicao, periodos_ano=PERIODOS_ANO):
+    """Métricas por linha de ``retorno`` (combinações x barras)"""
+    retorno = np.atleast_2d(retorno)
+    posicao = np.atleast_2d(posicao)
+    if retorno.shape[1] == 0:
+        # Sem barras: nenhuma operação e as demais métricas indefinidas
+        indefinido = np.full(retorno.shape[0], np.nan)
+        return {
+            'retorno_total': indefinido, 'retorno_anual': indefinido,
+            'volatilidade': indefinido, 'sharpe': indefinido, 'max_drawdown': indefinido,
+            'operacoes': np.zeros(retorno.shape[0], dtype=int), 'exposicao': indefinido,
+        }
+    capital = np.cumprod(1 + retorno, axis=1)
+    pico = np.maximum.accumulate(capital, axis=1)
+    final = capital[:, -1]
+    anos = retorno.shape[1] / periodos_ano
+    desvio = retorno.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(desvio > 0, retorno.mean(axis=1) / desvio * np.sqrt(periodos_ano), np.nan)
+    return {
+        'retorno_total': final - 1,
+        'retorno_anual': np.maximum(final, 0) ** (1 / anos) - 1,
+        'volatilidade': desvio * np.sqrt(periodos_ano),
+        'sharpe': sharpe,
+        'max_drawdown': (capital / pico - 1).min(axis=1),
+        'operacoes': (np.diff(posicao, axis=1, prepend=0) > 0).sum(axis=1),
+        'exposicao': posicao.mean(axis=1),
+    }
+
+
+def _grade(estrategia, grade):
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia inválida: {estrategia} (use {', '.join(ESTRATEGIAS)})")
+    padrao = ESTRATEGIAS[estrategia]
+    desconhecidos = set(grade) - set(padrao)
+    if desconhecidos:
+        raise ValueError(f'Parâmetros desconhecidos para {estrategia}: {", ".join(sorted(desconhecidos))}')
+    valores = [list(np.atleast_1d(grade.get(nome, padrao[nome]))) for nome in padrao]
+    return pd.DataFrame(list(itertools.product(*valores)), columns=list(padrao))
+
+
+def _avaliar(df, estrategia, grade, custo, ajuste_ema):
+    entradas, saidas = SINAIS[estrategia](df, grade, ajuste_ema)
+    posicao = posicoes(entradas, saidas)
+    return metricas(retornos(df['Close'], posicao, custo), posicao)
+
+
+# API
+
+def backtest(df, estrategia, parametros=None, custo=0.0, ajuste_ema=True):
+    """Uma combinação de parâmetros: métricas e a série de posição, capital e drawdown"""
+    grade = _grade(estrategia, parametros or {})
+    if len(grade) != 1:
+        raise ValueError('Use varredura() para listas de parâmetros')
+    entradas, saidas = SINAIS[estrategia](df, grade, ajuste_ema)
+    posicao = posicoes(entradas, saidas)
+    retorno = retornos(df['Close'], posicao, custo)
+    capital = np.cumprod(1 + retorno[0])
+    curva = pd.DataFrame({
+        'Position': posicao[0],
+        'Return': retorno[0],
+        'Equity': capital,
+        'Drawdown': capital / np.maximum.accumulate(capital) - 1,
+    }, index=df.index)
+    resumo = {nome: valor[0].item() for nome, valor in metricas(retorno, posicao).items()}
+    usados = {nome: grade[nome].iloc[0].item() for nome in grade.columns}
+    return dict(usados, **resumo), curva
+
+
+def varredura(df, estrategia, grade, custo=0.0, ajuste_ema=True, executor=None, bloco=250):
+    """Todas as combinações de ``grade`` (parâmetro -> lista de valores).
+
+    Cada bloco de combinações é avaliado de forma vetorizada; com
+    ``executor`` (um pool de processos, por exemplo) os blocos rodam em
+    paralelo. Retorna um DataFrame ordenado pelo Sharpe.
+    """
+    combinacoes = _grade(estrategia, grade)
+    colunas = [c for c in ('Close', 'RSI', 'MACD', 'MACD_Signal', 'Middle_Band', 'Upper_Band')
+               if c in df.columns]
+    df = df[colunas]
+    blocos = [combinacoes.iloc[i:i + bloco].reset_index(drop=True)
+              for i in range(0, len(combinacoes), bloco)]
+
+    if executor is None or len(blocos) == 1:
+        resultados = [_avaliar(df, estrategia, b, custo, ajuste_ema) for b in blocos]
+    else:
+        futuros = [executor.submit(_avaliar, df, estrategia, b, custo, ajuste_ema) for b in blocos]
+        resultados = [f.result() for f in futuros]
+
+    tabela = pd.concat(
+        [pd.concat([b, pd.DataFrame(r)], axis=1) for b, r in zip(blocos, resultados)],
+        ignore_index=True
+    )
+    return tabela.sort_values('sharpe', ascending=False, na_position='last', ignore_index=True)
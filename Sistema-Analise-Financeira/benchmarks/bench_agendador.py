@@ -0,0 +1,73 @@
+"""Pré-busca da watchlist: passada inicial, passada do dia seguinte e /data quente.
+
+Preenche um armazém temporário com barras diárias sintéticas e mede
+``app_simples.aquecer_simbolo`` na primeira passada (indicadores calculados
+do zero) e na do pregão seguinte (só a barra nova, estado incremental), e a
+primeira consulta do usuário ao /data com e sem a pré-busca.
+
+Uso: python benchmarks/bench_agendador.py [anos]
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+from armazenamento import ArmazemOHLCV
+from bench_indicadores import cronometrar
+from bench_respostas import preencher
+from config import Config
+
+
+def limpar():
+    app_simples.cache_resultados.limpar()
+    app_simples.cache_faixas.limpar()
+    app_simples._incrementais.clear()
+
+
+def executar(anos=20):
+    with tempfile.TemporaryDirectory() as diretorio:
+        app_simples.armazem = ArmazemOHLCV(diretorio)
+        inicio, fim = preencher(app_simples.armazem, 'AAPL', anos)
+        Config.PREFETCH_START = inicio
+        cliente = app_simples.app.test_client()
+        url = f'/data?symbol=AAPL&start={inicio}&end={fim}&horizon={Config.DEFAULT_HORIZON}'
+        dia = pd.Timestamp(fim).date()
+        anterior = app_simples.armazem.ler('AAPL', '1day').index[-2].date()
+
+        def passada_inicial():
+            limpar()
+            return app_simples.aquecer_simbolo('AAPL', dia)
+
+        def passada_seguinte():
+            limpar()
+            app_simples.aquecer_simbolo('AAPL', anterior)
+            return cronometrar(lambda: app_simples.aquecer_simbolo('AAPL', dia))[0]
+
+        def consulta_fria():
+            limpar()
+            return cronometrar(lambda: cliente.get(url))[0]
+
+        def consulta_quente():
+            passada_inicial()
+            return cronometrar(lambda: cliente.get(url))[0]
+
+        linhas = [
+            ('passada inicial', cronometrar(passada_inicial, 3)[0]),
+            ('passada seguinte', min(passada_seguinte() for _ in range(3))),
+            ('/data sem pré-busca', min(consulta_fria() for _ in range(3))),
+            ('/data com pré-busca', min(consulta_quente() for _ in range(3))),
+        ]
+
+    print(f"Pré-busca de 1 símbolo, {anos} anos de barras diárias já no armazém")
+    print(f"{'etapa':<22} {'ms':>8}")
+    for nome, tempo in linhas:
+        print(f"{nome:<22} {tempo * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,59 @@
+"""Avaliação walk-forward: somas acumuladas/filtros fixos contra reajustar em cada origem.
+
+A referência refaz ``previsao.ajustar`` (QR) para cada origem e cada modelo
+polinomial, como faria um laço ingênuo de walk-forward; a EMA entra nos dois
+lados com o mesmo custo. Confere que as previsões batem antes de medir.
+
+Uso: python benchmarks/bench_avaliacao.py [barras...]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import avaliacao
+import previsao
+from bench_indicadores import cronometrar, gerar_ohlcv
+
+POLINOMIAIS = ('poly1', 'poly2', 'poly3', 'log_linear')
+
+
+def reajustando(y, origens, passos, modo, janela):
+    saida = {}
+    for modelo in POLINOMIAIS:
+        serie = np.log(y) if modelo == 'log_linear' else y
+        grau = 1 if modelo == 'log_linear' else int(modelo[4:])
+        linhas = []
+        for t in origens:
+            inicio = 0 if modo == 'expanding' else t - janela + 1
+            ajuste = previsao.ajustar(np.arange(inicio, t + 1), serie[inicio:t + 1], grau)
+            linhas.append(ajuste.prever(np.arange(t + 1, t + passos + 1)))
+        saida[modelo] = np.exp(linhas) if modelo == 'log_linear' else np.array(linhas)
+    return saida
+
+
+def incremental(y, origens, passos, modo, janela):
+    return {modelo: avaliacao.previsoes(y, modelo, origens, passos, modo, janela)
+            for modelo in POLINOMIAIS}
+
+
+def executar(lista_barras, passos=30, janela=250):
+    print(f"{'barras':>8} {'modo':<10} {'origens':>8} {'reajuste (ms)':>14} "
+          f"{'incremental (ms)':>17} {'ganho':>7}")
+    for barras in lista_barras:
+        y = gerar_ohlcv(barras)['Close'].to_numpy()
+        for modo in avaliacao.MODOS:
+            origens = np.arange(janela - 1, barras - 1)
+            t_ref, esperado = cronometrar(lambda: reajustando(y, origens, passos, modo, janela), 1)
+            t_inc, obtido = cronometrar(lambda: incremental(y, origens, passos, modo, janela), 5)
+            for modelo in POLINOMIAIS:
+                np.testing.assert_allclose(obtido[modelo], esperado[modelo], rtol=1e-6)
+            print(f"{barras:>8} {modo:<10} {len(origens):>8} {t_ref * 1000:>14.1f} "
+                  f"{t_inc * 1000:>17.2f} {t_ref / t_inc:>6.0f}x")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]] or [1250, 5000]
+    executar(argumentos)
@@ -0,0 +1,40 @@
+"""Varredura de parâmetros do backtest: 10 anos diários x 1000 combinações.
+
+Uso: python benchmarks/bench_backtest.py [anos] [processos]
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest
+import motor_indicadores
+from bench_indicadores import cronometrar, gerar_ohlcv
+
+GRADES = {
+    # 5 x 10 x 20 = 1000 combinações
+    'rsi': {'janela': [7, 10, 14, 21, 28], 'inferior': list(range(15, 45, 3)),
+            'superior': list(range(55, 95, 2))},
+    'bollinger': {'janela': list(range(10, 60, 2)), 'desvios': [1 + 0.05 * i for i in range(40)]},
+    'macd': {'rapida': list(range(5, 15)), 'lenta': list(range(20, 40, 2)),
+             'sinal': list(range(5, 15))},
+}
+
+
+def executar(anos=10, processos=os.cpu_count()):
+    df = motor_indicadores.calcular(gerar_ohlcv(252 * anos), ajuste_ema=True)
+    print(f"{len(df)} barras, {processos} processos")
+    print(f"{'estratégia':<12} {'combinações':>12} {'serial (s)':>11} {'pool (s)':>10}")
+    with ProcessPoolExecutor(processos) as executor:
+        for estrategia, grade in GRADES.items():
+            t_serial, tabela = cronometrar(lambda: backtest.varredura(df, estrategia, grade))
+            t_pool, _ = cronometrar(
+                lambda: backtest.varredura(df, estrategia, grade, executor=executor)
+            )
+            print(f"{estrategia:<12} {len(tabela):>12} {t_serial:>11.3f} {t_pool:>10.3f}")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,95 @@
+"""POST /portfolio com séries já no armazém: 500 símbolos x 10 anos.
+
+Preenche um armazém temporário com barras diárias sintéticas (cada símbolo
+com alguns dias faltando e inícios diferentes) e mede a rota inteira pelo
+cliente de teste do Flask, separando leitura, alinhamento, métricas e
+serialização. A referência é o caminho com pandas: ``concat`` das séries,
+``ffill``, ``pct_change`` e ``cov``/``corr``/``quantile`` do DataFrame.
+
+Uso: python benchmarks/bench_carteira.py [simbolos] [anos]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+import carteira
+from armazenamento import ArmazemOHLCV
+
+
+def preencher(armazem, simbolos, anos, semente=0):
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range('2014-01-02', periods=252 * anos)
+    inicio, fim = datas[0].date(), datas[-1].date()
+    for i, simbolo in enumerate(simbolos):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(datas))))
+        presentes = rng.random(len(datas)) > 0.01
+        presentes[:i % 20] = False
+        df = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': np.full(len(datas), 1000.0)
+        }, index=datas)[presentes]
+        armazem.gravar(simbolo, '1day', df, inicio, fim)
+    return inicio.isoformat(), fim.isoformat()
+
+
+def com_pandas(armazem, simbolos, inicio, fim):
+    precos = pd.concat(
+        {s: armazem.ler(s, '1day', inicio, fim)['Close'] for s in simbolos}, axis=1, sort=True
+    ).ffill().dropna()
+    r = precos.pct_change().dropna()
+    var = -r.quantile(0.05)
+    return r.cov() * 252, r.corr(), var, -r[r <= -var].mean()
+
+
+def cronometrar(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def executar(quantidade=500, anos=10):
+    simbolos = [f'S{i:04d}' for i in range(quantidade)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = app_simples.armazem = ArmazemOHLCV(diretorio)
+        inicio, fim = preencher(armazem, simbolos, anos)
+
+        t_leitura, series = cronometrar(
+            lambda: [app_simples.fechamentos(s, inicio, fim) for s in simbolos]
+        )
+        t_alinhar, (_, precos) = cronometrar(lambda: carteira.alinhar(series))
+        t_metricas, _ = cronometrar(
+            lambda: carteira.analisar(precos, referencia=precos[:, 0], otimizar='max_sharpe')
+        )
+        t_janelas, _ = cronometrar(lambda: carteira.analisar(precos, janela=63, passo=63))
+        t_pandas, _ = cronometrar(lambda: com_pandas(armazem, simbolos, inicio, fim))
+
+        cliente = app_simples.app.test_client()
+        corpo = {'symbols': simbolos, 'start': inicio, 'end': fim, 'benchmark': simbolos[0],
+                 'optimize': 'max_sharpe', 'format': 'columnar'}
+        t_rota, resposta = cronometrar(lambda: cliente.post('/portfolio', json=corpo))
+        assert resposta.status_code == 200, resposta.get_json()
+
+    print(f"{quantidade} símbolos x {anos} anos ({precos.shape[0]} datas alinhadas)")
+    print(f"{'etapa':<36} {'ms':>9}")
+    for nome, tempo in [('leitura do armazém', t_leitura), ('alinhamento', t_alinhar),
+                        ('métricas + beta + max_sharpe', t_metricas),
+                        ('métricas + janelas de 63 dias', t_janelas),
+                        ('POST /portfolio (tudo)', t_rota),
+                        ('pandas (leitura, cov, corr, VaR)', t_pandas)]:
+        print(f"{nome:<36} {tempo * 1000:>9.1f}")
+    print(f"resposta: {len(resposta.data) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,86 @@
+"""Períodos sobrepostos do mesmo símbolo: um quadro fatiado x cálculo por período.
+
+Preenche um armazém temporário com barras diárias sintéticas e pede os
+indicadores de uma sequência de períodos que terminam na mesma data e
+começam cada vez mais tarde (como quem estreita o gráfico). Sem os quadros
+por faixa cada período lê o armazém e recalcula tudo, aquecimento incluso;
+com eles o primeiro período calcula e os demais são fatias. Mede também
+requisições simultâneas do mesmo período, que esperam um único cálculo.
+
+Uso: python benchmarks/bench_faixas.py [periodos] [anos]
+"""
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+from armazenamento import ArmazemOHLCV
+from bench_indicadores import cronometrar
+
+
+def preencher(armazem, simbolo, anos, semente=0):
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range('2014-01-02', periods=252 * anos)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(datas))))
+    df = pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': np.full(len(datas), 1000.0)
+    }, index=datas)
+    # Cobertura desde antes da primeira barra: o aquecimento não vai ao provedor
+    armazem.gravar(simbolo, '1day', df, pd.Timestamp('2013-01-01').date(), datas[-1].date())
+    return datas
+
+
+def executar(quantidade=50, anos=10):
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = app_simples.armazem = ArmazemOHLCV(diretorio)
+        datas = preencher(armazem, 'AAPL', anos)
+        fim = datas[-1].strftime('%Y-%m-%d')
+        inicios = [d.strftime('%Y-%m-%d') for d in datas[-252 * 5::5][:quantidade]]
+
+        def sem_quadros():
+            for inicio in inicios:
+                app_simples.quadro_indicadores(
+                    app_simples.baixar_aquecido('AAPL', inicio, fim), pd.Timestamp(inicio)
+                )
+
+        def com_quadros():
+            app_simples.cache_faixas.limpar()
+            for inicio in inicios:
+                app_simples.indicadores_periodo('AAPL', inicio, fim)
+
+        t_sem, _ = cronometrar(sem_quadros)
+        t_com, _ = cronometrar(com_quadros)
+
+        app_simples.cache_faixas.limpar()
+        calculos = app_simples.quadros.calculos
+        barreira = threading.Barrier(16)
+
+        def pedir():
+            barreira.wait()
+            app_simples.indicadores_periodo('AAPL', inicios[0], fim)
+
+        threads = [threading.Thread(target=pedir) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        simultaneos = app_simples.quadros.calculos - calculos
+
+    print(f"{quantidade} períodos até {fim} ({anos} anos no armazém)")
+    print(f"{'caminho':<32} {'ms':>9} {'ms/período':>11}")
+    for nome, tempo in [('um cálculo por período', t_sem), ('quadro fatiado', t_com)]:
+        print(f"{nome:<32} {tempo * 1000:>9.1f} {tempo * 1000 / quantidade:>11.2f}")
+    print(f"ganho: {t_sem / t_com:.1f}x")
+    print(f"16 requisições simultâneas do mesmo período: {simultaneos} cálculo(s)")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
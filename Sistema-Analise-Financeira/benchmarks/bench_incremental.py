@@ -0,0 +1,37 @@
+"""Acrescentar uma barra: estado incremental contra recálculo do histórico.
+
+Uso: python benchmarks/bench_incremental.py [tamanhos...]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import motor_indicadores
+from incremental import IndicadoresIncrementais
+from bench_indicadores import cronometrar, gerar_ohlcv
+
+
+def executar(tamanhos, novas=1):
+    print(f"{'histórico':>10} {'recálculo (s)':>14} {'incremental (s)':>16} {'ganho':>8}")
+    for n in tamanhos:
+        df = gerar_ohlcv(n + novas)
+        historico, novos = df.iloc[:n], df.iloc[n:]
+
+        t_lote, _ = cronometrar(lambda: motor_indicadores.calcular(df), repeticoes=5)
+
+        def incremental():
+            inc = IndicadoresIncrementais.de_dict(estado)
+            return inc.atualizar(novos)
+
+        inc = IndicadoresIncrementais()
+        inc.iniciar(historico)
+        estado = inc.para_dict()
+        t_inc, _ = cronometrar(incremental, repeticoes=5)
+        # Restaurar o estado entra no tempo; o passo em si é ainda menor
+        print(f"{n:>10} {t_lote:>14.5f} {t_inc:>16.5f} {t_lote / t_inc:>7.0f}x")
+
+
+if __name__ == '__main__':
+    tamanhos = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    executar(tamanhos)
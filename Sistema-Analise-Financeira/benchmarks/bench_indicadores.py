@@ -0,0 +1,78 @@
+"""Benchmark dos kernels de OBV e CCI contra as implementações originais.
+
+Uso: python benchmarks/bench_indicadores.py [tamanhos...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kernels
+
+
+def obv_original(df):
+    obv = [0]
+    for i in range(1, len(df)):
+        if df['Close'].iloc[i] > df['Close'].iloc[i - 1]:
+            obv.append(obv[-1] + df['Volume'].iloc[i])
+        elif df['Close'].iloc[i] < df['Close'].iloc[i - 1]:
+            obv.append(obv[-1] - df['Volume'].iloc[i])
+        else:
+            obv.append(obv[-1])
+    return np.array(obv)
+
+
+def mad_original(tp):
+    return tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean()).to_numpy()
+
+
+def gerar_ohlcv(n, semente=42):
+    rng = np.random.default_rng(semente)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    # Arredondar gera fechamentos repetidos, exercitando o caso "igual" do OBV
+    close = np.round(close, 1)
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.98, 1.02, n),
+        'High': close * rng.uniform(1.00, 1.05, n),
+        'Low': close * rng.uniform(0.95, 1.00, n),
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 10_000_000, n)
+    }, index=pd.date_range('2000-01-01', periods=n, freq='D'))
+
+
+def cronometrar(funcao, repeticoes=1):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def executar(tamanhos):
+    print(f"{'indicador':<10} {'linhas':>8} {'original (s)':>14} {'kernel (s)':>12} {'ganho':>8}")
+    for n in tamanhos:
+        df = gerar_ohlcv(n)
+        tp = (df['High'] + df['Low'] + df['Close']) / 3
+
+        casos = [
+            ('OBV', lambda: obv_original(df),
+             lambda: kernels.obv(df['Close'].to_numpy(), df['Volume'].to_numpy())),
+            ('CCI/MAD', lambda: mad_original(tp),
+             lambda: kernels.desvio_medio_absoluto(tp.to_numpy(), 20)),
+        ]
+        for nome, original, kernel in casos:
+            t_original, esperado = cronometrar(original)
+            t_kernel, obtido = cronometrar(kernel, repeticoes=5)
+            np.testing.assert_allclose(obtido, esperado, rtol=1e-12, equal_nan=True)
+            print(f"{nome:<10} {n:>8} {t_original:>14.4f} {t_kernel:>12.6f} "
+                  f"{t_original / t_kernel:>7.0f}x")
+
+
+if __name__ == '__main__':
+    tamanhos = [int(a) for a in sys.argv[1:]] or [5_000, 100_000]
+    executar(tamanhos)
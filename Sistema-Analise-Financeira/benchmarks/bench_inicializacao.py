@@ -0,0 +1,103 @@
+"""Tempo de inicialização de um worker: importações e criação do app.
+
+Cada medição roda num processo novo com ``python -X importtime``, sem nada em
+cache no interpretador. Mostra o custo acumulado das importações de primeiro
+nível de ``app_simples``, o das dependências carregadas só sob demanda
+(Excel, Parquet/Arrow, pool de processos) e o tempo de ``criar_app()``.
+Com ``preload_app`` (``gunicorn.conf.py``) esse custo é pago uma vez, no
+processo mestre, e não por worker.
+
+Uso: python benchmarks/bench_inicializacao.py [repeticoes]
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOB_DEMANDA = ['xlsxwriter', 'pyarrow', 'concurrent.futures.process']
+
+CRIAR_APP = (
+    "import time; import app_simples; inicio = time.perf_counter(); app_simples.criar_app(); "
+    "print((time.perf_counter() - inicio) * 1000)"
+)
+
+
+def importtime(codigo, pai=None):
+    """{módulo: ms acumulados} medidos num processo novo.
+
+    Sem ``pai``, as importações feitas diretamente por ``codigo``; com ele,
+    as feitas diretamente pelo módulo ``pai`` (o relatório lista os filhos
+    antes do módulo que os importou).
+    """
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=DIRETORIO, capture_output=True, text=True, check=True
+    ).stderr
+    raiz, filhos = {}, {}
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or '|' not in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        if not acumulado.strip().isdigit():
+            continue
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        ms = int(acumulado) / 1000
+        if nivel == 1:
+            filhos[nome.strip()] = ms
+        elif nivel == 0:
+            raiz[nome.strip()] = ms
+            if nome.strip() == pai:
+                return filhos
+            filhos = {}
+    return raiz
+
+
+def disponivel(modulo):
+    try:
+        return subprocess.run([sys.executable, '-c', f'import {modulo}'],
+                              capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+def executar(repeticoes=5):
+    acumulados = defaultdict(list)
+    totais, parede = [], []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        custos = importtime('import app_simples', pai='app_simples')
+        parede.append(time.perf_counter() - inicio)
+        totais.append(importtime('import app_simples')['app_simples'])
+        for nome, ms in custos.items():
+            acumulados[nome].append(ms)
+
+    print(f"import app_simples ({repeticoes} processos, mediana)")
+    medianas = {nome: sorted(v)[len(v) // 2] for nome, v in acumulados.items()}
+    for nome, ms in sorted(medianas.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {nome:<32} {ms:>8.1f} ms")
+    print(f"  {'import app_simples':<32} {sorted(totais)[len(totais) // 2]:>8.1f} ms")
+    print(f"  {'processo inteiro':<32} {sorted(parede)[len(parede) // 2] * 1000:>8.1f} ms")
+
+    criacao = sorted(
+        float(subprocess.run([sys.executable, '-c', CRIAR_APP], cwd=DIRETORIO,
+                             capture_output=True, text=True, check=True).stdout)
+        for _ in range(repeticoes)
+    )
+    print(f"criar_app(): {criacao[len(criacao) // 2]:.2f} ms")
+
+    print("carregados sob demanda (fora do boot)")
+    for modulo in SOB_DEMANDA:
+        if not disponivel(modulo):
+            print(f"  {modulo:<32} {'ausente':>11}")
+            continue
+        custos = importtime(f'import app_simples, {modulo}')
+        ms = custos.get(modulo, custos.get(modulo.split('.')[0], 0.0))
+        print(f"  {modulo:<32} {ms:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,69 @@
+"""Memória por símbolo da análise do /data: float64 (pandas) contra o quadro compacto.
+
+Para cada modo, ``preparar_analise`` roda sobre ``simbolos`` históricos de
+``barras`` barras e os resultados ficam retidos, como no cache de análises.
+Mede com tracemalloc o pico e a memória que continua alocada por símbolo
+(o histórico de entrada é liberado pelo pipeline e não entra na conta).
+
+- original: o pipeline antigo, com ``dropna`` copiando o quadro inteiro;
+- float64: o pipeline atual, com o recorte do aquecimento como fatia;
+- float32: ``COMPACT_DTYPE=float32``, quadro compacto sem cópias entre etapas.
+
+Uso: python benchmarks/bench_memoria.py [simbolos] [barras]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+from bench_indicadores import gerar_ohlcv
+from cache import estimar_tamanho
+from config import Config
+
+
+def original(df, dias):
+    """Cópia do pipeline antes do quadro compacto"""
+    df = app_simples.calcular_indicadores(df)
+    df_copy = df.dropna()
+    modelo = app_simples.previsao.ajustar(range(len(df_copy)), df_copy['Close'], 2)
+    df_copy['Pred'] = modelo.prever(range(len(df_copy)))
+    return df_copy, []
+
+
+def medir(preparar, historicos):
+    copias = [df.copy() for df in historicos]
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultados = [preparar(copias.pop(), 30) for _ in range(len(historicos))]
+    decorrido = time.perf_counter() - inicio
+    gc.collect()
+    # Retido: o que continua alocado com os resultados vivos (inclui buffers compartilhados)
+    retido, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return decorrido, pico, retido, len(resultados)
+
+
+def executar(simbolos=200, barras=1250):
+    historicos = [gerar_ohlcv(barras, semente=i) for i in range(simbolos)]
+    base = sum(estimar_tamanho(df) for df in historicos)
+    print(f"{simbolos} símbolos x {barras} barras (OHLCV de entrada: "
+          f"{base / simbolos / 1024:.1f} KiB por símbolo)")
+    print(f"{'modo':<10} {'tempo (s)':>10} {'pico (MiB)':>11} {'retido/símbolo (KiB)':>21}")
+    modos = [('original', '', original), ('float64', '', app_simples.preparar_analise),
+             ('float32', 'float32', app_simples.preparar_analise)]
+    for nome, dtype, preparar in modos:
+        Config.COMPACT_DTYPE = dtype
+        decorrido, pico, retido, _ = medir(preparar, historicos)
+        print(f"{nome:<10} {decorrido:>10.2f} {pico / 2 ** 20:>11.1f} "
+              f"{retido / simbolos / 1024:>21.1f}")
+    Config.COMPACT_DTYPE = ''
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,47 @@
+"""Custo da instrumentação: ``metricas.etapa`` ligada e desligada.
+
+Mede o custo por etapa e o compara com uma análise completa do /data
+(indicadores + previsão + serialização), que abre três etapas.
+
+Uso: python benchmarks/bench_metricas.py [repeticoes]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+import metricas
+from bench_indicadores import cronometrar, gerar_ohlcv
+from config import Config
+
+
+def custo_etapa(repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        with metricas.etapa('bench'):
+            pass
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def executar(repeticoes=200_000):
+    df = gerar_ohlcv(1250)
+
+    def analise():
+        resultado = app_simples.preparar_analise(df.copy(), 30)
+        return app_simples.corpo_dados('BENCH', 30, 'rows', *resultado)
+
+    print(f"{'modo':<10} {'etapa (ns)':>11} {'análise (ms)':>13}")
+    for ativo in (False, True):
+        Config.METRICS_ENABLED = ativo
+        metricas.iniciar_requisicao()
+        por_etapa = custo_etapa(repeticoes)
+        t_analise, _ = cronometrar(analise, repeticoes=10)
+        nome = 'ligada' if ativo else 'desligada'
+        print(f"{nome:<10} {por_etapa * 1e9:>11.0f} {t_analise * 1000:>13.2f}")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,71 @@
+"""Motores de indicadores: Series do pandas, kernels NumPy e numba (se instalado).
+
+Mede cada nó de janela móvel ou recursivo do ``motor_indicadores`` e o
+cálculo completo de todos os indicadores, por tamanho de série, conferindo
+que cada motor bate com o pandas. A primeira chamada do numba (compilação ou
+leitura do cache) fica fora do tempo.
+
+Uso: python benchmarks/bench_motores.py [tamanhos...]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kernels
+import motor_indicadores
+from bench_indicadores import cronometrar, gerar_ohlcv
+
+NOS = ['ema_12', 'sma_200', 'std_20', 'minimo_14', 'media_ganho_14', 'true_range', 'ATR',
+       'OBV', 'CCI']
+
+
+def motores():
+    return ['pandas', 'numpy'] + (['numba'] if kernels.NUMBA_DISPONIVEL else [])
+
+
+def executar(tamanhos):
+    nomes = motores()
+    print(f"{'indicador':<16} {'linhas':>8} " + ' '.join(f'{m + " (ms)":>12}' for m in nomes)
+          + f" {'ganho':>7}")
+    for n in tamanhos:
+        df = gerar_ohlcv(n)
+        # O std online do pandas deriva em séries longas (os kernels são de duas passadas)
+        escala = 1e-6 * df['Close'].abs().max()
+        # Cada nó com os intermediários de que depende já prontos, como no motor
+        intermediarios = motor_indicadores.calcular(
+            df, motor_indicadores.plano(NOS), ajuste_ema=True, motor='pandas'
+        )
+        for no in NOS + ['(todos)']:
+            tempos = []
+            for motor in nomes:
+                if no == '(todos)':
+                    def calcular():
+                        return motor_indicadores.calcular(df, ajuste_ema=True, motor=motor)
+                else:
+                    ind = motor_indicadores.REGISTRO[no]
+                    entradas = [intermediarios[e] for e in ind.entradas]
+                    parametros = dict(ind.parametros, motor=kernels.modulo(motor))
+                    if ind.usa_ajuste_ema:
+                        parametros['ajuste'] = True
+
+                    def calcular():
+                        return ind.funcao(*entradas, **parametros)
+                calcular()
+                # Séries curtas medem poucos ms: mais repetições contra o ruído
+                repeticoes = min(50, max(5, 200_000 // n))
+                tempo, resultado = cronometrar(calcular, repeticoes)
+                tempos.append(tempo)
+                if no != '(todos)':
+                    referencia = intermediarios[no].to_numpy(dtype=float)
+                    np.testing.assert_allclose(resultado.to_numpy(dtype=float), referencia,
+                                               rtol=1e-6, atol=escala, equal_nan=True, err_msg=no)
+            print(f"{no:<16} {n:>8} " + ' '.join(f'{t * 1000:>12.3f}' for t in tempos)
+                  + f" {tempos[0] / min(tempos[1:]):>6.1f}x")
+
+
+if __name__ == '__main__':
+    tamanhos = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    executar(tamanhos)
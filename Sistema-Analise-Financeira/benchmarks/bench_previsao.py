@@ -0,0 +1,78 @@
+"""Previsão polinomial: pipeline do scikit-learn contra previsao.py.
+
+Mede o ajuste + previsão de uma série, a previsão de vários símbolos em lote
+e o custo de importar cada implementação (processo novo).
+
+Uso: python benchmarks/bench_previsao.py [tamanhos...]
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import previsao
+from bench_indicadores import cronometrar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pipeline_sklearn(x, y, futuro, grau):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import PolynomialFeatures
+
+    modelo = make_pipeline(PolynomialFeatures(grau), LinearRegression())
+    modelo.fit(x.reshape(-1, 1), y)
+    return modelo.predict(x.reshape(-1, 1)), modelo.predict(futuro.reshape(-1, 1))
+
+
+def pipeline_numpy(x, y, futuro, grau):
+    modelo = previsao.ajustar(x, y, grau)
+    return modelo.prever(x), modelo.prever(futuro)
+
+
+def tempo_importacao(modulo):
+    codigo = f'import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)'
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ,
+                           capture_output=True, text=True, check=True)
+    return float(saida.stdout)
+
+
+def executar(tamanhos, simbolos=200, horizonte=30):
+    rng = np.random.default_rng(0)
+    print(f"{'caso':<24} {'linhas':>8} {'sklearn (s)':>12} {'numpy (s)':>11} {'ganho':>8}")
+    for n in tamanhos:
+        x = np.arange(n, dtype=float)
+        y = 100 + np.cumsum(rng.normal(0, 1, n))
+        futuro = np.arange(n, n + horizonte, dtype=float)
+        for grau in (2, 3):
+            t_sk, (pred_sk, fut_sk) = cronometrar(lambda: pipeline_sklearn(x, y, futuro, grau), 5)
+            t_np, (pred_np, fut_np) = cronometrar(lambda: pipeline_numpy(x, y, futuro, grau), 5)
+            # Referência: polyfit, que também reescala as colunas
+            referencia = np.polyval(np.polyfit(x, y, grau), futuro)
+            np.testing.assert_allclose(fut_np, referencia, rtol=1e-8)
+            erro_sk = np.max(np.abs(fut_sk - referencia))
+            print(f"{'ajuste grau ' + str(grau):<24} {n:>8} {t_sk:>12.5f} {t_np:>11.5f} "
+                  f"{t_sk / t_np:>7.0f}x   (erro sklearn {erro_sk:.2g})")
+
+        ys = 100 + np.cumsum(rng.normal(0, 1, (simbolos, n)), axis=1)
+        modelos = [previsao.ajustar(x, linha, 2) for linha in ys]
+
+        def individual():
+            return [m.prever(futuro) for m in modelos]
+
+        t_ind, _ = cronometrar(individual, 5)
+        t_lote, _ = cronometrar(lambda: previsao.prever_lote(modelos, futuro), 5)
+        print(f"{f'{simbolos} símbolos (lote)':<24} {n:>8} {t_ind:>12.5f} {t_lote:>11.5f} "
+              f"{t_ind / t_lote:>7.0f}x   (1ª coluna: laço de modelo.prever)")
+
+    print(f"\nimportação: sklearn {tempo_importacao('sklearn.linear_model'):.3f}s, "
+          f"previsao {tempo_importacao('previsao'):.3f}s")
+
+
+if __name__ == '__main__':
+    tamanhos = [int(a) for a in sys.argv[1:]] or [200, 5_000]
+    executar(tamanhos)
@@ -0,0 +1,62 @@
+"""Reamostragem de barras de 1 minuto: ``reamostragem.reamostrar`` contra o pandas.
+
+A referência é ``DataFrame.resample(...).agg(...)`` com o mesmo alinhamento
+(grupos a partir das 09:30), descartando os grupos vazios da madrugada.
+
+Uso: python benchmarks/bench_reamostragem.py [pregoes...]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reamostragem
+from bench_indicadores import cronometrar
+
+AGREGACOES = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def gerar_minutos(pregoes, semente=0):
+    """390 barras de 1 minuto (09:30 a 15:59) por pregão"""
+    dias = pd.bdate_range('2015-01-02', periods=pregoes).values
+    datas = (dias[:, None] + np.timedelta64(570, 'm')
+             + np.arange(390).astype('timedelta64[m]')).ravel()
+    n = len(datas)
+    rng = np.random.default_rng(semente)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.999, 1.001, n),
+        'High': close * rng.uniform(1.000, 1.002, n),
+        'Low': close * rng.uniform(0.998, 1.000, n),
+        'Close': close,
+        'Volume': rng.integers(100, 10_000, n).astype(float)
+    }, index=pd.DatetimeIndex(datas, name='datetime'))
+
+
+def pandas_resample(df, intervalo):
+    regra = {'1day': 'D', '1h': 'h'}.get(intervalo, intervalo)
+    offset = None if intervalo == '1day' else '30min'
+    return df.resample(regra, offset=offset).agg(AGREGACOES).dropna()
+
+
+def executar(lista_pregoes):
+    print(f"{'intervalo':<10} {'barras 1min':>12} {'pandas (ms)':>12} {'vetorizado (ms)':>16} "
+          f"{'ganho':>7}")
+    for pregoes in lista_pregoes:
+        df = gerar_minutos(pregoes)
+        for intervalo in ('5min', '15min', '1h', '1day'):
+            t_pandas, esperado = cronometrar(lambda: pandas_resample(df, intervalo), 3)
+            t_vetorizado, obtido = cronometrar(
+                lambda: reamostragem.reamostrar(df, intervalo), 5
+            )
+            np.testing.assert_allclose(obtido.to_numpy(), esperado.to_numpy())
+            print(f"{intervalo:<10} {len(df):>12} {t_pandas * 1000:>12.2f} "
+                  f"{t_vetorizado * 1000:>16.2f} {t_pandas / t_vetorizado:>6.1f}x")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]] or [20, 250, 2500]
+    executar(argumentos)
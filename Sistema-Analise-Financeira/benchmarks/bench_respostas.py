@@ -0,0 +1,66 @@
+"""Tamanho e tempo do GET /data: sem compressão, gzip e revalidação com 304.
+
+Preenche um armazém temporário com barras diárias sintéticas, aquece o
+cache da análise e mede, pelo cliente de teste do Flask, a resposta inteira
+sem compressão, com ``Accept-Encoding: gzip`` (e brotli, se instalado) e a
+revalidação com ``If-None-Match``, que devolve 304 sem serializar o corpo.
+
+Uso: python benchmarks/bench_respostas.py [anos]
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+import respostas
+from armazenamento import ArmazemOHLCV
+from bench_indicadores import cronometrar
+
+
+def preencher(armazem, simbolo, anos, semente=0):
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range('2004-01-02', periods=252 * anos)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(datas))))
+    df = pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(10**6, 10**7, len(datas)).astype(float)
+    }, index=datas)
+    armazem.gravar(simbolo, '1day', df, pd.Timestamp('2003-01-01').date(), datas[-1].date())
+    return datas[0].strftime('%Y-%m-%d'), datas[-1].strftime('%Y-%m-%d')
+
+
+def executar(anos=20):
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = app_simples.armazem = ArmazemOHLCV(diretorio)
+        inicio, fim = preencher(armazem, 'AAPL', anos)
+        cliente = app_simples.app.test_client()
+        linhas = []
+        for formato in ('rows', 'columnar'):
+            url = f'/data?symbol=AAPL&start={inicio}&end={fim}&horizon=30&format={formato}'
+            cliente.get(url)
+            for codificacao in ('identity',) + respostas.codificacoes():
+                tempo, resposta = cronometrar(
+                    lambda: cliente.get(url, headers={'Accept-Encoding': codificacao}), 5
+                )
+                linhas.append((f'{formato}, {codificacao}', tempo, len(resposta.data)))
+            etag = resposta.headers['ETag']
+            tempo, resposta = cronometrar(
+                lambda: cliente.get(url, headers={'If-None-Match': etag}), 5
+            )
+            assert resposta.status_code == 304
+            linhas.append((f'{formato}, 304', tempo, len(resposta.data)))
+
+    print(f"GET /data, {anos} anos de barras diárias (análise já em cache)")
+    print(f"{'resposta':<22} {'ms':>8} {'KB':>10}")
+    for nome, tempo, tamanho in linhas:
+        print(f"{nome:<22} {tempo * 1000:>8.1f} {tamanho / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,55 @@
+"""Atualização de uma barra: POST /data repetido contra o /stream.
+
+Para ``clientes`` telas acompanhando o mesmo símbolo, compara o que cada
+atualização custa ao servidor (CPU) e à rede (bytes):
+
+- polling: cada cliente refaz o /data; a série mudou, então o cache não ajuda
+  e indicadores, previsão e serialização rodam por cliente;
+- stream: uma consulta por canal, indicadores incrementais e uma mensagem
+  ``bars`` codificada uma vez para todos.
+
+Uso: python benchmarks/bench_transmissao.py [barras] [clientes]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+import transmissao
+from bench_indicadores import gerar_ohlcv
+
+
+def executar(barras=1250, clientes=50):
+    serie = gerar_ohlcv(barras + 1)
+    historico, seguinte = serie.iloc[:barras], serie.iloc[barras - 2:barras + 1]
+
+    inicio = time.perf_counter()
+    for _ in range(clientes):
+        df_with_pred, future_data = app_simples.preparar_analise(serie.copy(), 30)
+        corpo = app_simples.corpo_dados('BENCH', 30, 'rows', df_with_pred, future_data)
+    t_polling = time.perf_counter() - inicio
+    bytes_polling = len(corpo) * clientes
+
+    _, recentes, snapshot, codificar, nomes = app_simples._canal_ao_vivo(
+        ('BENCH', '1day', None)
+    )
+    canal = transmissao.Canal(lambda: historico, lambda: seguinte, snapshot, codificar, nomes)
+    canal.iniciar()
+    bytes_snapshot = len(canal.mensagem_snapshot(30))
+    inicio = time.perf_counter()
+    mensagem = canal.atualizar()
+    t_stream = time.perf_counter() - inicio
+    bytes_stream = len(mensagem) * clientes
+
+    print(f"{barras} barras, {clientes} clientes, uma barra nova")
+    print(f"{'modo':<10} {'CPU (ms)':>10} {'bytes':>12}")
+    print(f"{'polling':<10} {t_polling * 1000:>10.1f} {bytes_polling:>12}")
+    print(f"{'stream':<10} {t_stream * 1000:>10.1f} {bytes_stream:>12}")
+    print(f"snapshot inicial (uma vez por cliente): {bytes_snapshot} bytes")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
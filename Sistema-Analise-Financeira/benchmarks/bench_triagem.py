@@ -0,0 +1,62 @@
+"""Consulta da triagem sobre milhares de símbolos.
+
+Compara a consulta na ``TabelaTriagem`` com um laço sobre dicts já prontos e
+com o caminho sem tabela, que recalcula os indicadores de cada símbolo a cada
+consulta (medido em 100 símbolos e extrapolado).
+
+Uso: python benchmarks/bench_triagem.py [simbolos]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import motor_indicadores
+import triagem
+from bench_indicadores import cronometrar, gerar_ohlcv
+
+FILTROS = ['RSI < 30', 'Close < Lower_Band', 'Volume > 2000000']
+
+
+def laco(linhas):
+    """Referência: um dict por símbolo, como faria um laço sobre os DataFrames"""
+    passaram = [
+        (simbolo, valores) for simbolo, valores in linhas.items()
+        if valores['RSI'] < 30 and valores['Close'] < valores['Lower_Band']
+        and valores['Volume'] > 2000000
+    ]
+    return sorted(passaram, key=lambda item: item[1]['RSI'])[:50]
+
+
+def executar(simbolos=3000):
+    # Uma série calculada de verdade; os símbolos usam linhas diferentes dela
+    df = motor_indicadores.calcular(gerar_ohlcv(simbolos + 250))
+    indicadores = [c for c in df.columns if c not in motor_indicadores.COLUNAS_BASE]
+    tabela = triagem.TabelaTriagem(indicadores)
+    linhas = {}
+    for i in range(simbolos):
+        ultima = df.iloc[250 + i]
+        tabela.definir(f'S{i:05d}', ultima.name, ultima)
+        linhas[f'S{i:05d}'] = ultima.to_dict()
+
+    t_tabela, (resultado, total) = cronometrar(
+        lambda: tabela.consultar(FILTROS, ordenar='RSI'), repeticoes=20
+    )
+    t_laco, esperado = cronometrar(lambda: laco(linhas), repeticoes=5)
+    barras = gerar_ohlcv(triagem.BARRAS_AQUECIMENTO)
+    t_recalculo, _ = cronometrar(
+        lambda: [motor_indicadores.calcular(barras).iloc[-1] for _ in range(100)]
+    )
+    assert resultado['Symbol'].tolist() == [s for s, _ in esperado]
+    assert np.isfinite(resultado['RSI']).all()
+    print(f"{simbolos} símbolos, {total} passaram nos filtros")
+    print(f"{'tabela NumPy':<24} {t_tabela * 1000:>10.2f} ms")
+    print(f"{'laço de dicts prontos':<24} {t_laco * 1000:>10.2f} ms")
+    print(f"{'recalcular por consulta':<24} {t_recalculo * simbolos / 100 * 1000:>10.0f} ms")
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    executar(*argumentos)
@@ -0,0 +1,107 @@
+"""Teste de carga do POST /data: workers síncronos (WSGI) contra o modo ASGI.
+
+Sobe o provedor falso (tests/stub_provedor.py) com ``--latencia`` segundos
+por chamada e dispara ``--requisicoes`` requisições com símbolos distintos,
+todas exigindo ida ao provedor.
+
+- sync: ``--workers`` threads, cada uma atendendo uma requisição por vez no
+  app Flask, como os workers síncronos do gunicorn;
+- async: um único loop asyncio chamando ``asgi.app`` com até
+  ``--concorrencia`` requisições em andamento.
+
+Uso: python benchmarks/carga.py [--latencia 0.25] [--requisicoes 64] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+sys.path.append(os.path.join(RAIZ, 'tests'))
+
+from stub_provedor import ProvedorFalso
+
+CORPO = {'start': '2023-01-01', 'end': '2024-06-01', 'horizon': 30}
+
+
+def preparar(app_simples, ArmazemOHLCV):
+    """Armazém e cache vazios: cada rodada busca tudo no provedor"""
+    app_simples.armazem = ArmazemOHLCV(tempfile.mkdtemp())
+    app_simples.cache_resultados.limpar()
+
+
+def rodar_sync(app_simples, simbolos, workers):
+    cliente = app_simples.app.test_client()
+
+    def uma(symbol):
+        return cliente.post('/data', json=dict(CORPO, symbol=symbol)).status_code
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(uma, simbolos))
+
+
+def rodar_async(simbolos, concorrencia):
+    from test_asgi import chamar
+
+    async def todas():
+        limite = asyncio.Semaphore(concorrencia)
+
+        async def uma(symbol):
+            async with limite:
+                status, _, _ = await chamar('POST', '/data', dict(CORPO, symbol=symbol))
+                return status
+
+        return await asyncio.gather(*(uma(s) for s in simbolos))
+
+    return asyncio.run(todas())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia', type=float, default=0.25)
+    parser.add_argument('--requisicoes', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concorrencia', type=int, default=64)
+    args = parser.parse_args()
+
+    with ProvedorFalso(atraso=args.latencia) as stub:
+        # Config é lido na importação: provedor falso e limites folgados
+        os.environ.update({
+            'TWELVE_BASE_URL': stub.url,
+            'TWELVE_API_KEY': 'carga',
+            'TWELVE_RATE_LIMIT': '1000000/second',
+            'RATE_LIMIT': '1000000/second',
+            'HTTP_POOL_SIZE': str(args.concorrencia),
+            'BATCH_PROCESS_WORKERS': '0',
+            'DATA_STORE_DIR': tempfile.mkdtemp(),
+        })
+        import app_simples
+        from armazenamento import ArmazemOHLCV
+
+        print(f"latência do provedor: {args.latencia}s, {args.requisicoes} requisições")
+        print(f"{'modo':<28} {'tempo (s)':>10} {'req/s':>8} {'ok':>5}")
+        for rodada in range(2):
+            simbolos = [f'S{rodada}X{i}' for i in range(args.requisicoes)]
+            casos = [
+                (f'WSGI sync, {args.workers} workers',
+                 lambda: rodar_sync(app_simples, simbolos, args.workers)),
+                (f'ASGI, concorrência {args.concorrencia}',
+                 lambda: rodar_async([s + 'A' for s in simbolos], args.concorrencia)),
+            ]
+            for nome, rodar in casos:
+                preparar(app_simples, ArmazemOHLCV)
+                inicio = time.perf_counter()
+                status = rodar()
+                decorrido = time.perf_counter() - inicio
+                # A primeira rodada aquece importações e pools; só a segunda é exibida
+                if rodada:
+                    print(f"{nome:<28} {decorrido:>10.2f} {len(status) / decorrido:>8.1f} "
+                          f"{status.count(200):>5}")
+
+
+if __name__ == '__main__':
+    main()
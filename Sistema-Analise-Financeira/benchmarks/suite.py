@@ -0,0 +1,285 @@
+"""Suíte de benchmarks do pipeline de análise, com histórico por commit.
+
+Cada caso mede uma etapa do /data sobre OHLCV sintético:
+
+- ``parse``: ``json.loads`` + ``app_simples.quadro_api`` da resposta em
+  ``fixtures/`` (500 barras diárias sintéticas no formato do
+  ``/time_series`` da Twelve Data, com o bloco ``meta``) e de respostas
+  sintéticas maiores;
+- ``indicadores_app`` / ``indicadores_sistema``: as duas variantes de
+  ``calcular_indicadores``;
+- ``previsao_app`` / ``previsao_sistema``: ``prever_precos`` sem o cache de
+  modelos;
+- ``serializacao``: corpo JSON do /data (``rows`` e ``columnar``);
+- ``exportacao``: xlsx e csv do /download;
+- ``lote``: análise completa de vários símbolos em série.
+
+Os resultados vão para ``resultados/<commit>.json``; ``--comparar`` confronta
+com uma execução anterior e termina com erro se algum caso ficou mais lento
+que o limite.
+
+Uso:
+    python benchmarks/suite.py [--perfil rapido|completo] [--filtro texto]
+    python benchmarks/suite.py --comparar benchmarks/resultados/<commit>.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRETORIO)
+sys.path.append(RAIZ)
+
+import app_simples
+import exportacao
+import previsao
+
+FIXTURE = os.path.join(DIRETORIO, 'fixtures', 'time_series_aapl_1day.json')
+RESULTADOS = os.path.join(DIRETORIO, 'resultados')
+
+PERFIS = {
+    'rapido': {'barras': [1_000, 10_000], 'simbolos': [1, 10]},
+    'completo': {'barras': [1_000, 10_000, 100_000, 1_000_000], 'simbolos': [1, 10, 100, 1000]},
+}
+# Cinco anos de pregões por símbolo no caso ``lote``
+BARRAS_POR_SIMBOLO = 1_250
+# Acima disso o xlsx leva minutos sem dizer nada novo
+MAX_BARRAS_EXPORTACAO = 100_000
+
+
+class Caso:
+    """``preparar()`` monta os argumentos (fora do tempo medido) de ``funcao``"""
+
+    def __init__(self, nome, funcao, preparar, **parametros):
+        self.nome = nome
+        self.funcao = funcao
+        self.preparar = preparar
+        self.parametros = parametros
+
+
+# DADOS
+
+def gerar_ohlcv(n, semente=0):
+    """Passeio aleatório em barras de hora em hora (1M barras ainda cabe no datetime64[ns])"""
+    rng = np.random.default_rng(semente)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.99, 1.01, n),
+        'High': close * rng.uniform(1.00, 1.03, n),
+        'Low': close * rng.uniform(0.97, 1.00, n),
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 10_000_000, n).astype(float)
+    }, index=pd.DatetimeIndex(pd.date_range('1990-01-01', periods=n, freq='h'), name='datetime'))
+
+
+def resposta_api(df):
+    """Texto JSON no formato do /time_series da Twelve Data (mais recente primeiro)"""
+    with open(FIXTURE) as arquivo:
+        meta = json.load(arquivo)['meta']
+    invertido = df.iloc[::-1]
+    valores = {
+        'datetime': invertido.index.strftime('%Y-%m-%d %H:%M:%S'),
+        'open': invertido['Open'].map('{:.5f}'.format),
+        'high': invertido['High'].map('{:.5f}'.format),
+        'low': invertido['Low'].map('{:.5f}'.format),
+        'close': invertido['Close'].map('{:.5f}'.format),
+        'volume': invertido['Volume'].astype('int64').astype(str),
+    }
+    return json.dumps({
+        'meta': meta, 'values': pd.DataFrame(valores).to_dict('records'), 'status': 'ok'
+    })
+
+
+def carregar_sistema():
+    """Importa ``sistema-analise-financeira.py`` (nome com hífen)"""
+    caminho = os.path.join(RAIZ, 'sistema-analise-financeira.py')
+    spec = importlib.util.spec_from_file_location('sistema_analise_financeira', caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# CASOS
+
+def _sem_cache_de_modelos(*argumentos):
+    previsao.modelos.limpar()
+    return argumentos
+
+
+def _parse(texto):
+    return app_simples.quadro_api(json.loads(texto))
+
+
+def _exportar(formato, itens):
+    return sum(len(bloco) for bloco in exportacao.exportar(
+        formato, itens, abas=('Dados_Historicos', 'Previsao_Futura'), formatar=True
+    ))
+
+
+def _lote(historicos):
+    return [app_simples.preparar_analise(df, 30) for df in historicos]
+
+
+def casos(perfil):
+    sistema = carregar_sistema()
+    with open(FIXTURE) as arquivo:
+        fixture = arquivo.read()
+    yield Caso('parse/fixture', _parse, lambda: (fixture,),
+               barras=len(json.loads(fixture)['values']))
+
+    for n in perfil['barras']:
+        df = gerar_ohlcv(n)
+        texto = resposta_api(df)
+        com_indicadores = app_simples.calcular_indicadores(df.copy())
+        historico, futuro = app_simples.prever_precos(com_indicadores, 30)
+
+        yield Caso(f'parse/{n}', _parse, lambda texto=texto: (texto,), barras=n)
+        yield Caso(f'indicadores_app/{n}', app_simples.calcular_indicadores,
+                   lambda df=df: (df.copy(),), barras=n)
+        yield Caso(f'indicadores_sistema/{n}', sistema.calcular_indicadores,
+                   lambda df=df: (df,), barras=n)
+        yield Caso(f'previsao_app/{n}', app_simples.prever_precos,
+                   lambda c=com_indicadores: _sem_cache_de_modelos(c, 30), barras=n)
+        yield Caso(f'previsao_sistema/{n}', sistema.prever_precos,
+                   lambda c=com_indicadores: _sem_cache_de_modelos(c, 30), barras=n)
+        for formato in ('rows', 'columnar'):
+            yield Caso(f'serializacao_{formato}/{n}', app_simples.corpo_dados,
+                       lambda h=historico, f=futuro, formato=formato: ('BENCH', 30, formato, h, f),
+                       barras=n)
+        if n <= MAX_BARRAS_EXPORTACAO:
+            for formato in ('xlsx', 'csv'):
+                yield Caso(f'exportacao_{formato}/{n}', _exportar,
+                           lambda h=historico, f=futuro, formato=formato:
+                           (formato, [('BENCH', h, f)]), barras=n)
+
+    for simbolos in perfil['simbolos']:
+        historicos = [gerar_ohlcv(BARRAS_POR_SIMBOLO, semente=i) for i in range(simbolos)]
+        yield Caso(f'lote/{simbolos}', _lote,
+                   lambda h=historicos: _sem_cache_de_modelos([df.copy() for df in h]),
+                   simbolos=simbolos, barras=BARRAS_POR_SIMBOLO)
+
+
+# MEDIÇÃO
+
+def medir(caso, tempo_minimo=0.5, min_repeticoes=3, max_repeticoes=20):
+    """Repete até somar ``tempo_minimo`` segundos (um aquecimento descartado)"""
+    tempos = []
+    aquecimento = True
+    while True:
+        argumentos = caso.preparar()
+        inicio = time.perf_counter()
+        caso.funcao(*argumentos)
+        decorrido = time.perf_counter() - inicio
+        if aquecimento:
+            aquecimento = False
+            # Casos de vários segundos não ganham nada com o aquecimento
+            if decorrido < 1.0:
+                continue
+        tempos.append(decorrido)
+        if len(tempos) >= max_repeticoes or (
+                len(tempos) >= min_repeticoes and sum(tempos) >= tempo_minimo) or decorrido > 5:
+            break
+    return {
+        'minimo': min(tempos),
+        'mediana': statistics.median(tempos),
+        'repeticoes': len(tempos),
+        **caso.parametros,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def executar(perfil='rapido', filtro=None, tempo_minimo=0.5, exibir=print):
+    perfil = PERFIS[perfil] if isinstance(perfil, str) else perfil
+    resultados = {}
+    for caso in casos(perfil):
+        if filtro and filtro not in caso.nome:
+            continue
+        resultados[caso.nome] = medir(caso, tempo_minimo)
+        r = resultados[caso.nome]
+        exibir(f"{caso.nome:<32} {r['minimo'] * 1000:>11.2f} {r['mediana'] * 1000:>11.2f} "
+               f"{r['repeticoes']:>5}")
+    return {
+        'commit': _commit(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'maquina': platform.platform(),
+        'cpus': os.cpu_count(),
+        'resultados': resultados,
+    }
+
+
+def comparar(base, atual, limite=0.10):
+    """``[(caso, razão)]`` dos casos mais lentos que ``base`` além do ``limite``"""
+    regressoes = []
+    linhas = []
+    for nome, medida in atual['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            continue
+        razao = medida['minimo'] / anterior['minimo']
+        marca = ''
+        if razao > 1 + limite:
+            regressoes.append((nome, razao))
+            marca = '  <- regressão'
+        linhas.append(f"{nome:<32} {anterior['minimo'] * 1000:>11.2f} "
+                      f"{medida['minimo'] * 1000:>11.2f} {razao:>7.2f}x{marca}")
+    return regressoes, linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--perfil', choices=sorted(PERFIS), default='rapido')
+    parser.add_argument('--filtro', help='só casos cujo nome contém o texto')
+    parser.add_argument('--tempo-minimo', type=float, default=0.5,
+                        help='segundos somados por caso antes de parar de repetir')
+    parser.add_argument('--saida', help='arquivo de resultados (padrão: resultados/<commit>.json)')
+    parser.add_argument('--comparar', help='resultados de uma execução anterior')
+    parser.add_argument('--limite', type=float, default=0.10,
+                        help='piora relativa tolerada no --comparar (padrão 0.10)')
+    args = parser.parse_args()
+
+    print(f"{'caso':<32} {'mínimo (ms)':>11} {'mediana (ms)':>11} {'rep':>5}")
+    atual = executar(args.perfil, args.filtro, args.tempo_minimo)
+    atual['perfil'] = args.perfil
+
+    saida = args.saida or os.path.join(RESULTADOS, f"{atual['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as arquivo:
+        json.dump(atual, arquivo, indent=2)
+    print(f"\nresultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            base = json.load(arquivo)
+        regressoes, linhas = comparar(base, atual, args.limite)
+        print(f"\ncomparação com {base['commit']} ({base['data']})")
+        print(f"{'caso':<32} {'antes (ms)':>11} {'agora (ms)':>11} {'razão':>8}")
+        print('\n'.join(linhas))
+        if regressoes:
+            print(f"\n{len(regressoes)} caso(s) mais de {args.limite:.0%} mais lento(s)")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Cache em memória (LRU + TTL) para resultados do pipeline de análise."""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimar_tamanho(valor):
+    """Estimativa barata, em bytes, da memória ocupada por um resultado"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=False).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True))
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimar_tamanho(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            estimar_tamanho(k) + estimar_tamanho(v) for k, v in valor.items()
+        )
+    if hasattr(valor, 'nbytes'):
+        return int(valor.nbytes)
+    return sys.getsizeof(valor)
+
+
+class _Voo:
+    """Cálculo em andamento compartilhado pelas requisições idênticas"""
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.valor = None
+        self.erro = None
+
+
+class CacheResultados:
+    """Cache LRU limitado por itens e bytes, com expiração por TTL.
+
+    ``obter_ou_calcular`` garante que requisições concorrentes com a mesma
+    chave executem o cálculo uma única vez (single-flight).
+    """
+
+    def __init__(self, ttl=300, max_itens=128, max_bytes=256 * 1024 * 1024,
+                 relogio=time.monotonic):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._relogio = relogio
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._em_voo = {}
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.expiracoes = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _remover(self, chave):
+        _, _, tamanho = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def _buscar(self, chave):
+        item = self._itens.get(chave)
+        if item is None:
+            return False, None
+        valor, expira_em, _ = item
+        if self._relogio() >= expira_em:
+            self._remover(chave)
+            self.expiracoes += 1
+            return False, None
+        self._itens.move_to_end(chave)
+        return True, valor
+
+    def obter(self, chave):
+        """Retorna ``(encontrado, valor)``"""
+        with self._trava:
+            encontrado, valor = self._buscar(chave)
+            if encontrado:
+                self.acertos += 1
+            else:
+                self.falhas += 1
+            return encontrado, valor
+
+    def definir(self, chave, valor, ttl=None):
+        """Guarda ``valor``; ``ttl`` substitui o padrão do cache para este item"""
+        tamanho = estimar_tamanho(valor)
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+            # Um único resultado maior que o limite nunca entra no cache
+            if tamanho > self.max_bytes:
+                return
+            self._itens[chave] = (valor, self._relogio() + (ttl or self.ttl), tamanho)
+            self._bytes += tamanho
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                antiga = next(iter(self._itens))
+                self._remover(antiga)
+                self.despejos += 1
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Retorna o valor em cache ou executa ``calcular()`` uma única vez"""
+        with self._trava:
+            encontrado, valor = self._buscar(chave)
+            if encontrado:
+                self.acertos += 1
+                return valor
+            self.falhas += 1
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo()
+
+        if not lider:
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.valor
+
+        try:
+            voo.valor = calcular()
+        except BaseException as e:
+            # Erros não são cacheados, mas são repassados a quem esperava
+            voo.erro = e
+            raise
+        else:
+            self.definir(chave, voo.valor)
+            return voo.valor
+        finally:
+            with self._trava:
+                del self._em_voo[chave]
+            voo.pronto.set()
+
+    def invalidar(self, chave):
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+                'despejos': self.despejos,
+                'expiracoes': self.expiracoes
+            }
@@ -0,0 +1,198 @@
+"""Métricas de carteira sobre vários símbolos, com álgebra linear em lote.
+
+Os fechamentos de todos os símbolos viram uma única matriz (datas x
+símbolos) alinhada pela união das datas: cada preço ausente repete o último
+conhecido e as datas anteriores ao início do símbolo mais novo ficam de
+fora. Daí saem os retornos e, com produtos de matrizes, covariância,
+correlação, beta contra uma referência e as matrizes em janelas móveis
+(todas as janelas numa única multiplicação em lote). VaR e CVaR são
+históricos, calculados para todas as colunas de uma vez. Os pesos de média e
+variância têm solução fechada (sem restrição de sinal: pesos negativos são
+posições vendidas).
+"""
+import numpy as np
+
+from backtest import PERIODOS_ANO
+
+OTIMIZACOES = ('min_variance', 'max_sharpe')
+
+
+# ALINHAMENTO
+
+def _preencher_adiante(precos):
+    """Forward-fill por coluna, sem laço: cada NaN recebe a última linha válida"""
+    validos = ~np.isnan(precos)
+    linhas = np.where(validos, np.arange(len(precos))[:, None], 0)
+    np.maximum.accumulate(linhas, axis=0, out=linhas)
+    return precos[linhas, np.arange(precos.shape[1])]
+
+
+def alinhar(series):
+    """Matriz de preços a partir de ``[(datas, valores), ...]`` (datas em ns).
+
+    Devolve ``(datas, precos)``: a união das datas a partir da primeira em
+    que todos os símbolos já têm preço e uma coluna por série.
+    """
+    if not series:
+        raise ValueError('Nenhuma série para alinhar')
+    datas = np.unique(np.concatenate([np.asarray(d, dtype='int64') for d, _ in series]))
+    precos = np.full((len(datas), len(series)), np.nan)
+    for j, (d, valores) in enumerate(series):
+        precos[np.searchsorted(datas, d), j] = valores
+    precos = _preencher_adiante(precos)
+    validos = ~np.isnan(precos)
+    if not validos.any(axis=0).all():
+        raise ValueError('Série sem preços')
+    inicio = int(validos.argmax(axis=0).max())
+    return datas[inicio:], precos[inicio:]
+
+
+# ESTATÍSTICAS
+
+def retornos(precos):
+    """Retornos simples entre linhas consecutivas"""
+    return precos[1:] / precos[:-1] - 1
+
+
+def covariancia(retornos):
+    centrados = retornos - retornos.mean(axis=0)
+    return centrados.T @ centrados / (len(retornos) - 1)
+
+
+def correlacao(cov):
+    """Correlação a partir de uma ou de uma pilha de covariâncias (..., n, n)"""
+    desvio = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cov / desvio[..., :, None] / desvio[..., None, :]
+
+
+def janelas(retornos, janela, passo=1):
+    """Covariâncias em janelas móveis de ``janela`` retornos, a cada ``passo``.
+
+    A última janela termina no último retorno. Devolve ``(fins, cov)``: o
+    índice do último retorno de cada janela e a pilha (janelas, n, n).
+    """
+    if janela < 2 or janela > len(retornos):
+        raise ValueError(f'Janela deve ficar entre 2 e {len(retornos)} retornos')
+    if passo < 1:
+        raise ValueError('Passo deve ser positivo')
+    inicios = np.arange(len(retornos) - janela, -1, -passo)[::-1]
+    # (janelas, n, janela): as janelas são vistas sobre os mesmos dados até a indexação
+    blocos = np.lib.stride_tricks.sliding_window_view(retornos, janela, axis=0)[inicios]
+    blocos = blocos - blocos.mean(axis=2, keepdims=True)
+    return inicios + janela - 1, blocos @ blocos.transpose(0, 2, 1) / (janela - 1)
+
+
+def beta(retornos, referencia):
+    """Beta de cada coluna contra a série ``referencia``"""
+    centrados = retornos - retornos.mean(axis=0)
+    ref = referencia - referencia.mean()
+    return (centrados.T @ ref) / (ref @ ref)
+
+
+def var_cvar(retornos, confianca=0.95):
+    """VaR e CVaR históricos de um período, por coluna, como perdas positivas"""
+    if not 0 < confianca < 1:
+        raise ValueError('Confiança deve ficar entre 0 e 1')
+    retornos = retornos.reshape(len(retornos), -1)
+    corte = np.quantile(retornos, 1 - confianca, axis=0)
+    cauda = retornos <= corte
+    cvar = -(retornos * cauda).sum(axis=0) / cauda.sum(axis=0)
+    return -corte, cvar
+
+
+# PESOS
+
+def _resolver(cov, vetor):
+    try:
+        return np.linalg.solve(cov, vetor)
+    except np.linalg.LinAlgError:
+        # Singular (mais símbolos que retornos, séries repetidas): pseudo-inversa
+        return np.linalg.pinv(cov) @ vetor
+
+
+def pesos_min_variancia(cov):
+    """Carteira de variância mínima: Σ⁻¹1 / 1ᵀΣ⁻¹1"""
+    x = _resolver(cov, np.ones(len(cov)))
+    return x / x.sum()
+
+
+def pesos_max_sharpe(cov, medias, livre=0.0):
+    """Carteira tangente: Σ⁻¹(μ - rf), normalizada para somar 1"""
+    x = _resolver(cov, medias - livre)
+    return x / x.sum()
+
+
+# RESUMO
+
+def resumo_carteira(retornos_ativos, pesos, referencia=None, confianca=0.95,
+                    periodos_ano=PERIODOS_ANO):
+    """Retorno e volatilidade anualizados, VaR/CVaR (e beta) da carteira"""
+    retorno = retornos_ativos @ pesos
+    var, cvar = var_cvar(retorno, confianca)
+    saida = {
+        'return': float(retorno.mean() * periodos_ano),
+        'volatility': float(retorno.std(ddof=1) * np.sqrt(periodos_ano)),
+        'var': float(var[0]),
+        'cvar': float(cvar[0]),
+    }
+    if referencia is not None:
+        saida['beta'] = float(beta(retorno[:, None], referencia)[0])
+    return saida
+
+
+def analisar(precos, pesos=None, referencia=None, confianca=0.95, otimizar=None, livre=0.0,
+             janela=None, passo=None, periodos_ano=PERIODOS_ANO):
+    """Todas as métricas de uma matriz de preços (datas x símbolos).
+
+    ``pesos`` padrão é a carteira igualitária; ``referencia`` é a coluna de
+    preços do benchmark, alinhada com ``precos``. ``livre`` é a taxa livre de
+    risco anual. Retornos, volatilidades e covariâncias saem anualizados;
+    VaR e CVaR são de um período.
+    """
+    if len(precos) < 3:
+        raise ValueError('Poucas datas em comum entre os símbolos')
+    if otimizar is not None and otimizar not in OTIMIZACOES:
+        raise ValueError(f"Otimização inválida: {otimizar} (use {' ou '.join(OTIMIZACOES)})")
+    n = precos.shape[1]
+    pesos = np.full(n, 1 / n) if pesos is None else np.asarray(pesos, dtype=float)
+    r = retornos(precos)
+    r_ref = None if referencia is None else retornos(np.asarray(referencia, dtype=float))
+
+    cov = covariancia(r)
+    medias = r.mean(axis=0) * periodos_ano
+    volatilidade = np.sqrt(np.diag(cov) * periodos_ano)
+    var, cvar = var_cvar(r, confianca)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = (medias - livre) / volatilidade
+    resultado = {
+        'return': medias,
+        'volatility': volatilidade,
+        'sharpe': sharpe,
+        'var': var,
+        'cvar': cvar,
+        'covariance': cov * periodos_ano,
+        'correlation': correlacao(cov),
+        'portfolio': dict(resumo_carteira(r, pesos, r_ref, confianca, periodos_ano),
+                          weights=pesos),
+    }
+    if r_ref is not None:
+        resultado['beta'] = beta(r, r_ref)
+    if otimizar is not None:
+        cov_ano = cov * periodos_ano
+        otimos = (pesos_min_variancia(cov_ano) if otimizar == 'min_variance'
+                  else pesos_max_sharpe(cov_ano, medias, livre))
+        resultado['optimized'] = dict(
+            resumo_carteira(r, otimos, r_ref, confianca, periodos_ano),
+            weights=otimos, method=otimizar
+        )
+    if janela is not None:
+        fins, pilha = janelas(r, janela, passo or janela)
+        resultado['rolling'] = {
+            # Linha de ``precos`` em que cada janela termina
+            'index': fins + 1,
+            'covariance': pilha * periodos_ano,
+            'correlation': correlacao(pilha),
+            'volatility': np.sqrt(np.einsum('i,kij,j->k', pesos, pilha, pesos) * periodos_ano),
+        }
+    return resultado
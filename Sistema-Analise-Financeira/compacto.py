@@ -0,0 +1,113 @@
+"""Representação compacta (struct-of-arrays) dos quadros OHLCV + indicadores.
+
+``QuadroCompacto`` guarda cada coluna como uma linha contígua de uma única
+matriz (colunas x barras) no dtype escolhido, float32 por padrão, e as datas
+como int64 (ns desde a época). Colunas, fatias e o DataFrame de
+``para_quadro`` são views dessa matriz, então as etapas do pipeline
+(indicadores, recorte do aquecimento, previsão e serialização) não copiam os
+dados. Em float32 cada valor guarda cerca de 7 dígitos significativos, o que
+arredonda Volume e OBV muito grandes.
+"""
+import numpy as np
+import pandas as pd
+
+import motor_indicadores
+
+
+class QuadroCompacto:
+    """Datas int64 + matriz (colunas x barras) com uma linha por coluna"""
+
+    __slots__ = ('datas', 'matriz', 'colunas', '_posicao')
+
+    def __init__(self, datas, matriz, colunas):
+        self.datas = datas
+        self.matriz = matriz
+        self.colunas = list(colunas)
+        self._posicao = {nome: i for i, nome in enumerate(self.colunas)}
+
+    @classmethod
+    def vazio(cls, datas, colunas, dtype='float32'):
+        """Quadro com todas as colunas em NaN"""
+        datas = np.ascontiguousarray(pd.DatetimeIndex(datas).astype('datetime64[ns]').asi8)
+        matriz = np.full((len(colunas), len(datas)), np.nan, dtype=dtype)
+        return cls(datas, matriz, colunas)
+
+    @classmethod
+    def de_quadro(cls, df, extras=(), dtype='float32'):
+        """Converte ``df`` (a única cópia do pipeline) reservando as colunas ``extras``"""
+        colunas = list(df.columns) + [c for c in extras if c not in df.columns]
+        quadro = cls.vazio(df.index, colunas, dtype)
+        for nome in df.columns:
+            quadro.matriz[quadro._posicao[nome]] = df[nome].to_numpy()
+        return quadro
+
+    def __len__(self):
+        return len(self.datas)
+
+    @property
+    def dtype(self):
+        return self.matriz.dtype
+
+    @property
+    def nbytes(self):
+        return self.datas.nbytes + self.matriz.nbytes
+
+    def coluna(self, nome):
+        """View da coluna ``nome`` (escrever nela altera o quadro)"""
+        if nome not in self._posicao:
+            raise ValueError(f'Coluna desconhecida: {nome}')
+        return self.matriz[self._posicao[nome]]
+
+    def fatia(self, inicio=None, fim=None):
+        """Barras ``[inicio:fim]`` como view"""
+        return QuadroCompacto(self.datas[inicio:fim], self.matriz[:, inicio:fim], self.colunas)
+
+    def sem_ausentes(self, colunas=None):
+        """Equivalente ao ``dropna`` do pandas.
+
+        Quando os NaN estão só no aquecimento dos indicadores (o caso comum)
+        o resultado é uma fatia, sem cópia.
+        """
+        linhas = self.matriz if colunas is None else self.matriz[[self._posicao[c] for c in colunas]]
+        validas = ~np.isnan(linhas).any(axis=0)
+        primeira = int(np.argmax(validas)) if validas.any() else len(validas)
+        if validas[primeira:].all():
+            return self.fatia(primeira)
+        return QuadroCompacto(self.datas[validas], self.matriz[:, validas], self.colunas)
+
+    def para_quadro(self, nome_indice='Date'):
+        """DataFrame que compartilha a memória do quadro (um único bloco do pandas)"""
+        indice = pd.DatetimeIndex(self.datas.view('M8[ns]'), name=nome_indice, copy=False)
+        return pd.DataFrame(self.matriz.T, index=indice, columns=self.colunas, copy=False)
+
+    def __repr__(self):
+        return f'QuadroCompacto({len(self)} barras, {len(self.colunas)} colunas, {self.dtype})'
+
+
+def calcular(quadro, nomes, ajuste_ema=False):
+    """Indicadores ``nomes`` de ``motor_indicadores`` gravados nas colunas do quadro.
+
+    As colunas precisam ter sido reservadas (``extras`` de ``de_quadro``). O
+    cálculo em si roda em float64 sobre cópias temporárias das colunas OHLCV;
+    só o resultado guardado é compacto.
+    """
+    faltando = [nome for nome in nomes if nome not in quadro._posicao]
+    if faltando:
+        raise ValueError(f'Colunas não reservadas: {", ".join(faltando)}')
+    base = pd.DataFrame({
+        col: quadro.coluna(col).astype(np.float64)
+        for col in motor_indicadores.COLUNAS_BASE if col in quadro._posicao
+    })
+    valores = motor_indicadores.calcular(base, nomes, ajuste_ema=ajuste_ema, inplace=True)
+    for nome in nomes:
+        np.copyto(quadro.coluna(nome), valores[nome].to_numpy(), casting='same_kind')
+    return quadro
+
+
+def sem_aquecimento(df):
+    """``df.dropna()``, mas como fatia quando os NaN estão só no início"""
+    validas = df.notna().all(axis=1).to_numpy()
+    primeira = int(np.argmax(validas)) if validas.any() else len(validas)
+    if validas[primeira:].all():
+        return df.iloc[primeira:]
+    return df[validas]
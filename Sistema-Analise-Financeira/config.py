@@ -6,6 +6,11 @@ load_dotenv()
 class Config:
     # API Configuration
     TWELVE_API_KEY = os.getenv('TWELVE_API_KEY')
+    TWELVE_BASE_URL = os.getenv('TWELVE_BASE_URL', 'https://api.twelvedata.com')
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '15'))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '3'))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
     
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -15,12 +20,92 @@ class Config:
     DEFAULT_TICKER = 'AAPL'
     DEFAULT_HORIZON = 30
     MAX_HORIZON = 365
+    # Granularidade gravada no armazém; 5min, 1h etc. são derivados dela
+    INTRADAY_BASE_INTERVAL = os.getenv('INTRADAY_BASE_INTERVAL', '1min')
+    # Páginas de 5000 barras por lacuna (a Twelve Data não devolve mais que isso por chamada)
+    INTRADAY_MAX_PAGES = int(os.getenv('INTRADAY_MAX_PAGES', '20'))
+    
+    # Previsão do /data: poly1, poly2, poly3, log_linear, ema ou auto (melhor na avaliação walk-forward)
+    FORECAST_MODEL = os.getenv('FORECAST_MODEL', 'auto')
+    # Origens mais recentes avaliadas por série (escolha do modelo e bandas)
+    FORECAST_EVAL_ORIGINS = int(os.getenv('FORECAST_EVAL_ORIGINS', '250'))
+    # Cobertura das bandas Lower/Upper do "future"
+    FORECAST_BAND_CONFIDENCE = float(os.getenv('FORECAST_BAND_CONFIDENCE', '0.9'))
     
     # Cache Configuration
     CACHE_TIMEOUT = 300  # 5 minutes
+    CACHE_MAX_ITEMS = int(os.getenv('CACHE_MAX_ITEMS', '128'))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    DATA_STORE_DIR = os.getenv(
+        'DATA_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados')
+    )
+    
+    # HTTP
+    # Corpos menores que isso saem sem compressão (gzip, ou brotli se instalado)
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+    # Nível 1: quase toda a redução do nível 6 em um quarto do tempo (bench_respostas.py)
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '1'))
+    # Cache-Control (s) do GET /data; depois disso o navegador revalida pelo ETag
+    DATA_MAX_AGE = int(os.getenv('DATA_MAX_AGE', '60'))
     
     # Rate Limiting
-    RATE_LIMIT = "100/hour"
+    RATE_LIMIT = os.getenv('RATE_LIMIT', "100/hour")
+    # Plano gratuito da Twelve Data (ver API_DOCS.md)
+    TWELVE_RATE_LIMIT = os.getenv('TWELVE_RATE_LIMIT', '8/minute')
+    
+    # Batch Configuration
+    BATCH_MAX_SYMBOLS = int(os.getenv('BATCH_MAX_SYMBOLS', '500'))
+    BATCH_FETCH_WORKERS = int(os.getenv('BATCH_FETCH_WORKERS', '8'))
+    # 0 calcula nas threads de busca, sem pool de processos
+    BATCH_PROCESS_WORKERS = int(os.getenv('BATCH_PROCESS_WORKERS', str(os.cpu_count() or 1)))
+    
+    # Backtest Configuration
+    BACKTEST_MAX_COMBOS = int(os.getenv('BACKTEST_MAX_COMBOS', '5000'))
+    
+    # Portfolio Configuration
+    # Valores devolvidos nas matrizes em janelas móveis (janelas x símbolos x símbolos)
+    PORTFOLIO_MAX_CELLS = int(os.getenv('PORTFOLIO_MAX_CELLS', '5000000'))
+    
+    # Indicadores
+    # Kernels das janelas móveis e EMAs: auto (numba se instalado, senão numpy), numpy,
+    # numba ou pandas (Series, o cálculo original)
+    INDICATOR_ENGINE = os.getenv('INDICATOR_ENGINE', 'auto')
+    
+    # Memória
+    # dtype dos quadros de análise (ex: float32); vazio mantém o float64 do pandas
+    COMPACT_DTYPE = os.getenv('COMPACT_DTYPE', '')
+    
+    # Observability
+    # Tempos por etapa, Server-Timing e /metrics (desligado, o custo é um if)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    # Permite ?profile=1 (perfil por amostragem gravado em PROFILE_DIR)
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'False').lower() == 'true'
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(DATA_STORE_DIR, 'perfis'))
+    
+    # Live stream (/stream)
+    # Intervalo (s) entre consultas ao provedor por canal, compartilhado pelos clientes
+    STREAM_POLL_SECONDS = float(os.getenv('STREAM_POLL_SECONDS', '60'))
+    # Barras pedidas em cada consulta
+    STREAM_POLL_BARS = int(os.getenv('STREAM_POLL_BARS', '5'))
+    # Comentário enviado quando não há novidade, para manter a conexão aberta
+    STREAM_HEARTBEAT_SECONDS = float(os.getenv('STREAM_HEARTBEAT_SECONDS', '15'))
+    
+    # Prefetch (agendador.py)
+    # Símbolos aquecidos depois do fechamento, ex: "AAPL,MSFT,GOOG"
+    WATCHLIST = os.getenv('WATCHLIST', '')
+    # Roda o agendador numa thread do próprio worker (com vários workers, prefira
+    # o processo separado: python agendador.py)
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'False').lower() == 'true'
+    # Horário de Nova York da passada diária (o pregão fecha às 16:00)
+    PREFETCH_AT = os.getenv('PREFETCH_AT', '16:30')
+    # Símbolos por período, espaçados igualmente; o resto do limite fica para os usuários
+    PREFETCH_RATE = os.getenv('PREFETCH_RATE', '4/minute')
+    # Início do histórico aquecido: o padrão da interface (templates/index.html)
+    PREFETCH_START = os.getenv('PREFETCH_START', '2020-01-01')
+    
+    # Screener Configuration
+    # Idade máxima (s) da tabela da triagem antes de recalcular em segundo plano
+    SCREENER_MAX_AGE = int(os.getenv('SCREENER_MAX_AGE', '900'))
     
     @staticmethod
     def validate():
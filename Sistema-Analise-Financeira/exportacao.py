@@ -0,0 +1,237 @@
+"""Exportação em streaming do /download (Excel, CSV, Parquet e Arrow IPC).
+
+Os exportadores recebem um iterável de ``(simbolo, historico, futuro)``
+consumido sob demanda, então em exportações de vários símbolos só um deles
+fica em memória por vez. CSV e Arrow são enviados ao cliente à medida que são
+gerados; Excel e Parquet só ficam completos no fechamento do arquivo, por
+isso são escritos em um arquivo temporário (xlsxwriter em ``constant_memory``)
+e enviados em blocos a partir do disco.
+"""
+import importlib.util
+import io
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# pyarrow (centenas de ms de importação) só é carregado na primeira exportação
+# parquet/arrow; o xlsxwriter, na primeira em Excel
+PYARROW_DISPONIVEL = importlib.util.find_spec('pyarrow') is not None
+
+TAMANHO_BLOCO = 64 * 1024
+LINHAS_POR_BLOCO = 10000
+
+FORMATOS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+# Completos só no fechamento: gerados inteiros antes do primeiro bloco
+EM_ARQUIVO = ('xlsx', 'parquet')
+
+
+def validar_formato(formato):
+    """Levanta ValueError se o formato não existir ou faltar dependência"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+    if formato in ('parquet', 'arrow') and not PYARROW_DISPONIVEL:
+        raise ValueError(f'Formato {formato} requer o pacote pyarrow')
+
+
+def quadro_futuro(futuro):
+    """Aceita a previsão como DataFrame ou lista de dicts"""
+    futuro = pd.DataFrame(futuro)
+    futuro['Date'] = pd.to_datetime(futuro['Date'])
+    return futuro
+
+
+def _quadro_unico(simbolo, historico, futuro, incluir_simbolo):
+    """Histórico seguido das linhas de previsão (só Date e Pred preenchidos)"""
+    historico = historico.reset_index()
+    historico = historico.rename(columns={historico.columns[0]: 'Date'})
+    quadro = pd.concat([historico, quadro_futuro(futuro)], ignore_index=True)
+    if incluir_simbolo:
+        quadro.insert(0, 'Symbol', simbolo)
+    return quadro
+
+
+def _enviar_arquivo(caminho):
+    try:
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                bloco = arquivo.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                yield bloco
+    finally:
+        os.remove(caminho)
+
+
+def _temporario(sufixo):
+    descritor, caminho = tempfile.mkstemp(suffix=sufixo)
+    os.close(descritor)
+    return caminho
+
+
+# EXCEL
+
+# Caracteres que o Excel não aceita em nomes de aba (símbolos como EUR/USD)
+_PROIBIDOS_ABA = re.compile(r'[\[\]:*?/\\]')
+TAMANHO_NOME_ABA = 31
+
+
+def nome_aba(nome, usados):
+    """Nome válido e ainda não usado no arquivo (o Excel compara sem caixa)"""
+    base = _PROIBIDOS_ABA.sub('_', nome)[:TAMANHO_NOME_ABA]
+    candidato = base
+    numero = 1
+    while candidato.lower() in usados:
+        numero += 1
+        sufixo = f'~{numero}'
+        candidato = base[:TAMANHO_NOME_ABA - len(sufixo)] + sufixo
+    usados.add(candidato.lower())
+    return candidato
+
+def _valores_linha(quadro):
+    """Colunas convertidas para objetos Python, com NaN/NaT viram None"""
+    colunas = []
+    for nome in quadro.columns:
+        serie = quadro[nome]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valores = np.array(serie.dt.to_pydatetime(), dtype=object)
+        else:
+            valores = serie.to_numpy(dtype=object)
+        valores[pd.isna(serie).to_numpy()] = None
+        colunas.append(valores)
+    return zip(*colunas)
+
+
+def _escrever_planilha(workbook, nome, quadro, formatos, formatar):
+    planilha = workbook.add_worksheet(nome)
+    planilha.set_column(0, 0, 12, formatos['data'])
+    if formatar:
+        planilha.set_column(1, max(len(quadro.columns) - 1, 1), 15, formatos['moeda'])
+    # constant_memory exige escrever linha a linha, em ordem
+    planilha.write_row(0, 0, list(quadro.columns), formatos['cabecalho'])
+    linha = 1
+    for inicio in range(0, len(quadro), LINHAS_POR_BLOCO):
+        for valores in _valores_linha(quadro.iloc[inicio:inicio + LINHAS_POR_BLOCO]):
+            planilha.write_row(linha, 0, valores)
+            linha += 1
+
+
+def exportar_excel(itens, varios=False, abas=('historico', 'previsao_futura'), formatar=False,
+                   ignorados=None):
+    """Planilha com um par de abas por símbolo.
+
+    ``ignorados`` é uma lista de ``(simbolo, erro)`` preenchida por quem
+    produz ``itens``; lida depois do último símbolo, vira a aba ``Ignorados``.
+    """
+    import xlsxwriter
+
+    caminho = _temporario('.xlsx')
+    # ±inf vira erro do Excel (#DIV/0!), como no pd.ExcelWriter, em vez de TypeError
+    workbook = xlsxwriter.Workbook(caminho, {'constant_memory': True, 'nan_inf_to_errors': True})
+    formatos = {
+        'data': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+        'moeda': workbook.add_format({'num_format': '$#,##0.00'}),
+        'cabecalho': workbook.add_format({
+            'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1
+        }) if formatar else None,
+    }
+    usados = set()
+    try:
+        # Em lotes cada símbolo ganha seu par de abas, escritas uma de cada vez
+        for simbolo, historico, futuro in itens:
+            prefixo = f'{simbolo}_' if varios else ''
+            _escrever_planilha(workbook, nome_aba(prefixo + abas[0], usados),
+                               historico.reset_index(), formatos, formatar)
+            _escrever_planilha(workbook, nome_aba(prefixo + abas[1], usados),
+                               quadro_futuro(futuro), formatos, formatar)
+        if ignorados:
+            _escrever_planilha(workbook, nome_aba('Ignorados', usados),
+                               pd.DataFrame([(s, str(e)) for s, e in ignorados],
+                                            columns=['Symbol', 'Erro']),
+                               formatos, False)
+        workbook.close()
+    except BaseException:
+        workbook.close()
+        os.remove(caminho)
+        raise
+    return _enviar_arquivo(caminho)
+
+
+# CSV
+
+def exportar_csv(itens, incluir_simbolo=False):
+    cabecalho = True
+    for simbolo, historico, futuro in itens:
+        quadro = _quadro_unico(simbolo, historico, futuro, incluir_simbolo)
+        for inicio in range(0, len(quadro), LINHAS_POR_BLOCO):
+            parte = quadro.iloc[inicio:inicio + LINHAS_POR_BLOCO]
+            yield parte.to_csv(index=False, header=cabecalho, date_format='%Y-%m-%d').encode()
+            cabecalho = False
+
+
+# PARQUET / ARROW
+
+def exportar_parquet(itens, incluir_simbolo=False):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    caminho = _temporario('.parquet')
+    escritor = None
+    try:
+        for simbolo, historico, futuro in itens:
+            quadro = _quadro_unico(simbolo, historico, futuro, incluir_simbolo)
+            tabela = pa.Table.from_pandas(quadro, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            # Um row group por símbolo
+            escritor.write_table(tabela.cast(escritor.schema))
+    except BaseException:
+        if escritor is not None:
+            escritor.close()
+        os.remove(caminho)
+        raise
+    if escritor is not None:
+        escritor.close()
+    return _enviar_arquivo(caminho)
+
+
+def exportar_arrow(itens, incluir_simbolo=False):
+    import pyarrow as pa
+
+    destino = io.BytesIO()
+    escritor = esquema = None
+    for simbolo, historico, futuro in itens:
+        quadro = _quadro_unico(simbolo, historico, futuro, incluir_simbolo)
+        tabela = pa.Table.from_pandas(quadro, preserve_index=False)
+        if escritor is None:
+            esquema = tabela.schema
+            escritor = pa.ipc.new_stream(destino, esquema)
+        escritor.write_table(tabela.cast(esquema), max_chunksize=LINHAS_POR_BLOCO)
+        # Repassa ao cliente o que já foi escrito e esvazia o buffer
+        yield destino.getvalue()
+        destino.seek(0)
+        destino.truncate()
+    if escritor is not None:
+        escritor.close()
+        yield destino.getvalue()
+
+
+def exportar(formato, itens, varios=False, abas=('historico', 'previsao_futura'),
+             formatar=False, ignorados=None):
+    """Gerador de bytes do arquivo no ``formato`` pedido"""
+    validar_formato(formato)
+    if formato == 'xlsx':
+        yield from exportar_excel(itens, varios, abas, formatar, ignorados)
+    elif formato == 'csv':
+        yield from exportar_csv(itens, varios)
+    elif formato == 'parquet':
+        yield from exportar_parquet(itens, varios)
+    else:
+        yield from exportar_arrow(itens, varios)
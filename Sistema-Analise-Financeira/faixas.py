@@ -0,0 +1,99 @@
+"""Indicadores calculados uma vez por símbolo e servidos em fatias.
+
+Pedidos do mesmo símbolo e intervalo com períodos que se sobrepõem (2024
+inteiro, depois março a dezembro) usam um único quadro de indicadores: ele
+cobre a união dos períodos já pedidos, com barras de aquecimento antes do
+início, e cada pedido recebe a fatia do seu período. Um período contido no
+quadro não busca nem recalcula nada; um que o ultrapassa recalcula a união.
+
+Pedidos simultâneos do mesmo símbolo esperam o cálculo em andamento (uma
+trava por símbolo e intervalo) e, ao entrar, quase sempre já encontram o
+período coberto. Os quadros ficam num ``CacheResultados``, com o mesmo TTL e
+limites de memória dos resultados.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def limites(start, end):
+    """``[inicio, fim]`` como Timestamps; uma data sem hora vale pelo dia inteiro"""
+    inicio = pd.Timestamp(start)
+    fim = pd.Timestamp(end)
+    if len(str(end)) == 10:
+        fim += pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return inicio, fim
+
+
+def fatiar(df, inicio, fim=None):
+    """Linhas de ``df`` entre ``inicio`` e ``fim`` (inclusive), sem copiar"""
+    datas = df.index.values
+    esquerda = int(np.searchsorted(datas, np.datetime64(inicio, 'ns'), side='left'))
+    direita = len(datas) if fim is None else int(
+        np.searchsorted(datas, np.datetime64(fim, 'ns'), side='right')
+    )
+    return df.iloc[esquerda:direita]
+
+
+class QuadrosPorFaixa:
+    """Quadros de indicadores por chave (símbolo, intervalo), servidos em fatias"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.fatias = 0
+        self.calculos = 0
+        self._travas = {}
+        self._trava = threading.Lock()
+
+    def _trava_de(self, chave):
+        with self._trava:
+            trava = self._travas.get(chave)
+            if trava is None:
+                trava = self._travas[chave] = threading.Lock()
+            return trava
+
+    def obter(self, chave, start, end, calcular, uniao=True):
+        """Fatia ``[start, end]`` do quadro de ``chave``.
+
+        ``calcular(inicio, fim)`` recebe o período a cobrir (Timestamps) e
+        devolve o quadro com os indicadores, já válidos desde ``inicio``.
+        Sem ``uniao`` (quem chama só tem as barras do próprio período), um
+        período que ultrapassa o quadro guardado é calculado sozinho e o
+        quadro fica como está.
+        """
+        inicio, fim = limites(start, end)
+        with self._trava_de(chave):
+            encontrado, item = self.cache.obter(chave)
+            if encontrado:
+                coberto_inicio, coberto_fim, df = item
+                if coberto_inicio <= inicio and fim <= coberto_fim:
+                    with self._trava:
+                        self.fatias += 1
+                    return fatiar(df, inicio, fim)
+                if not uniao and inicio <= coberto_fim and fim >= coberto_inicio:
+                    return fatiar(calcular(inicio, fim), inicio, fim)
+                if inicio <= coberto_fim and fim >= coberto_inicio:
+                    # Sobreposição: recalcula a união e ela passa a servir os dois
+                    inicio_uniao = min(inicio, coberto_inicio)
+                    fim_uniao = max(fim, coberto_fim)
+                    df = calcular(inicio_uniao, fim_uniao)
+                    self.guardar(chave, inicio_uniao, fim_uniao, df)
+                    return fatiar(df, inicio, fim)
+            df = calcular(inicio, fim)
+            self.guardar(chave, inicio, fim, df)
+            return fatiar(df, inicio, fim)
+
+    def guardar(self, chave, inicio, fim, df, ttl=None):
+        """Substitui o quadro de ``chave`` por ``df``, que cobre ``[inicio, fim]``"""
+        self.cache.definir(chave, (inicio, fim, df), ttl)
+        with self._trava:
+            self.calculos += 1
+
+    def linhas_metricas(self):
+        """Linhas do Prometheus com as fatias servidas e os quadros calculados"""
+        with self._trava:
+            fatias, calculos = self.fatias, self.calculos
+        return ['# TYPE superset_slices_total counter', f'superset_slices_total {fatias}',
+                '# TYPE superset_computations_total counter',
+                f'superset_computations_total {calculos}']
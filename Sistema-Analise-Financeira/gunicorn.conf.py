@@ -0,0 +1,37 @@
+"""Configuração do gunicorn (lida automaticamente no diretório do app).
+
+Com ``preload_app`` o app é importado uma única vez no processo mestre e os
+workers nascem por fork, compartilhando pandas, numpy e o próprio app em
+copy-on-write: subir (ou reiniciar) um worker deixa de pagar as importações.
+Os workers são ``gthread``: uma conexão longa do /stream ocupa uma thread, não
+o worker inteiro.
+Opções da linha de comando (``--bind``, ``-k``, ``--workers``) continuam
+valendo por cima destas.
+"""
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+
+def pre_fork(server, worker):
+    # O que o mestre já criou vai para a geração permanente: a coleta de lixo
+    # dos workers não escreve nesses objetos e as páginas seguem compartilhadas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Descarta recursos que não podem ser herdados do mestre"""
+    provedor = sys.modules.get('provedor')
+    if provedor is not None:
+        # Conexões keep-alive abertas antes do fork não podem ser usadas por dois processos
+        provedor._cliente = None
+        provedor._cliente_assincrono = None
+    app_simples = sys.modules.get('app_simples')
+    if app_simples is not None:
+        app_simples._pool_calculo = None
@@ -0,0 +1,299 @@
+"""Atualização incremental (somente acréscimo) dos indicadores técnicos.
+
+``IndicadoresIncrementais`` guarda o estado necessário para continuar as
+séries sem recalcular o histórico: EMAs, buffers circulares das janelas
+móveis (médias, desvio, mínimos e máximos), as médias de ganho/perda do RSI
+e o acumulado do OBV. Acrescentar N barras custa O(N), independente do
+tamanho do histórico. Os valores coincidem (dentro da tolerância de ponto
+flutuante) com ``motor_indicadores.calcular`` sobre a série completa.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import motor_indicadores
+
+
+class _Ema:
+    """EMA com o mesmo ``adjust`` do ``ewm`` do pandas"""
+
+    def __init__(self, span, ajuste):
+        self.alfa = 2.0 / (span + 1.0)
+        self.ajuste = ajuste
+        self.valor = np.nan
+        self.peso = 0.0
+
+    def carregar(self, ultimo, quantidade):
+        """Estado equivalente a ter visto ``quantidade`` valores terminando em ``ultimo``"""
+        self.valor = float(ultimo)
+        self.peso = (1 - (1 - self.alfa) ** quantidade) / self.alfa
+
+    def adicionar(self, x):
+        if self.peso == 0:
+            self.valor = x
+            self.peso = 1.0
+        elif self.ajuste:
+            # Média ponderada com pesos (1 - alfa)^i, como adjust=True
+            self.peso = (1 - self.alfa) * self.peso + 1
+            self.valor = self.valor + (x - self.valor) / self.peso
+        else:
+            self.valor = (1 - self.alfa) * self.valor + self.alfa * x
+            self.peso += 1
+        return self.valor
+
+
+class _Janela:
+    """Buffer circular de tamanho fixo; estatísticas só com a janela cheia e sem NaN"""
+
+    def __init__(self, tamanho):
+        self.dados = np.full(tamanho, np.nan)
+        self.posicao = 0
+        self.quantidade = 0
+
+    def carregar(self, valores):
+        valores = np.asarray(valores, dtype=float)[-len(self.dados):]
+        self.dados[:len(valores)] = valores
+        self.posicao = len(valores) % len(self.dados)
+        self.quantidade = len(valores)
+
+    def adicionar(self, x):
+        self.dados[self.posicao] = x
+        self.posicao = (self.posicao + 1) % len(self.dados)
+        self.quantidade = min(self.quantidade + 1, len(self.dados))
+
+    def _valida(self):
+        return self.quantidade == len(self.dados) and not np.isnan(self.dados).any()
+
+    def ordenados(self):
+        """Valores do mais antigo ao mais recente"""
+        if self.quantidade < len(self.dados):
+            return self.dados[:self.quantidade].copy()
+        return np.roll(self.dados, -self.posicao)
+
+    def media(self):
+        return self.dados.mean() if self._valida() else np.nan
+
+    def desvio(self):
+        return self.dados.std(ddof=1) if self._valida() else np.nan
+
+    def minimo(self):
+        return self.dados.min() if self._valida() else np.nan
+
+    def maximo(self):
+        return self.dados.max() if self._valida() else np.nan
+
+    def desvio_medio_absoluto(self):
+        if not self._valida():
+            return np.nan
+        return np.abs(self.dados - self.dados.mean()).mean()
+
+
+# Janelas usadas pelo motor, com a série de origem de cada uma
+JANELAS = {
+    'close_20': 20, 'close_50': 50, 'close_200': 200,
+    'low_14': 14, 'high_14': 14, 'ganho_14': 14, 'perda_14': 14,
+    'true_range_14': 14, 'estocastico_3': 3, 'preco_tipico_20': 20,
+}
+EMAS = {'ema_12': 12, 'ema_26': 26, 'sinal_9': 9}
+
+
+class IndicadoresIncrementais:
+    """Indicadores que avançam barra a barra.
+
+    ``iniciar(df)`` calcula o histórico de forma vetorizada pelo motor e
+    extrai dele o estado; ``atualizar(df)`` acrescenta barras novas (datas
+    posteriores à última vista) e devolve só as linhas novas com os
+    indicadores. ``salvar``/``carregar`` gravam o estado em JSON.
+    """
+
+    def __init__(self, nomes=None, ajuste_ema=False):
+        self.nomes = list(nomes or motor_indicadores.disponiveis())
+        desconhecidos = set(self.nomes) - set(motor_indicadores.disponiveis())
+        if desconhecidos:
+            raise ValueError(f'Indicador desconhecido: {", ".join(sorted(desconhecidos))}')
+        self.ajuste_ema = ajuste_ema
+        self.janelas = {nome: _Janela(tamanho) for nome, tamanho in JANELAS.items()}
+        self.emas = {nome: _Ema(span, ajuste_ema) for nome, span in EMAS.items()}
+        self.fechamento_anterior = None
+        self.obv = 0.0
+        self.barras = 0
+        self.ultima_data = None
+
+    # ESTADO A PARTIR DO HISTÓRICO
+
+    def iniciar(self, df):
+        """Calcula ``df`` inteiro pelo motor e posiciona o estado no fim dele"""
+        if self.barras:
+            raise ValueError('Estado já iniciado; use atualizar() para novas barras')
+        # Intermediários de onde sai o estado das EMAs, do estocástico e do OBV
+        calculado = motor_indicadores.calcular(
+            df, self.nomes + ['ema_12', 'ema_26', 'MACD_Signal', 'Stochastic_K', 'OBV'],
+            ajuste_ema=self.ajuste_ema
+        )
+        if len(df) == 0:
+            return calculado[list(df.columns) + self.nomes]
+
+        high = df['High'].to_numpy(dtype=float)
+        low = df['Low'].to_numpy(dtype=float)
+        close = df['Close'].to_numpy(dtype=float)
+        delta = np.diff(close, prepend=np.nan)
+        anterior = np.concatenate([[np.nan], close[:-1]])
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - anterior), np.abs(low - anterior)))
+
+        origens = {
+            'close_20': close, 'close_50': close, 'close_200': close,
+            'low_14': low, 'high_14': high,
+            'ganho_14': np.where(np.isnan(delta), np.nan, np.maximum(delta, 0)),
+            'perda_14': np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0)),
+            'true_range_14': true_range,
+            'estocastico_3': calculado['Stochastic_K'].to_numpy(dtype=float),
+            'preco_tipico_20': (high + low + close) / 3,
+        }
+        for nome, valores in origens.items():
+            self.janelas[nome].carregar(valores)
+
+        # EMAs do motor começam na primeira barra (min_periods=0)
+        for nome, coluna in (('ema_12', 'ema_12'), ('ema_26', 'ema_26'), ('sinal_9', 'MACD_Signal')):
+            self.emas[nome].carregar(calculado[coluna].iloc[-1], len(df))
+
+        self.fechamento_anterior = float(close[-1])
+        self.obv = float(calculado['OBV'].iloc[-1])
+        self.barras = len(df)
+        self.ultima_data = pd.Timestamp(df.index[-1])
+        return calculado[list(df.columns) + self.nomes]
+
+    # ACRÉSCIMO DE BARRAS
+
+    def _passo(self, high, low, close, volume):
+        j = self.janelas
+        anterior = self.fechamento_anterior
+
+        if anterior is None:
+            delta = np.nan
+            true_range = high - low
+        else:
+            delta = close - anterior
+            true_range = max(high - low, abs(high - anterior), abs(low - anterior))
+            if close > anterior:
+                self.obv += volume
+            elif close < anterior:
+                self.obv -= volume
+        self.fechamento_anterior = close
+
+        j['close_20'].adicionar(close)
+        j['close_50'].adicionar(close)
+        j['close_200'].adicionar(close)
+        j['low_14'].adicionar(low)
+        j['high_14'].adicionar(high)
+        j['ganho_14'].adicionar(max(delta, 0.0) if delta == delta else np.nan)
+        j['perda_14'].adicionar(max(-delta, 0.0) if delta == delta else np.nan)
+        j['true_range_14'].adicionar(true_range)
+        tp = (high + low + close) / 3
+        j['preco_tipico_20'].adicionar(tp)
+
+        ema_12 = self.emas['ema_12'].adicionar(close)
+        ema_26 = self.emas['ema_26'].adicionar(close)
+        macd = ema_12 - ema_26
+        sinal = self.emas['sinal_9'].adicionar(macd)
+
+        sma_20 = j['close_20'].media()
+        std_20 = j['close_20'].desvio()
+        minimo = j['low_14'].minimo()
+        maximo = j['high_14'].maximo()
+        estocastico_k = 100 * ((close - minimo) / (maximo - minimo))
+        j['estocastico_3'].adicionar(estocastico_k)
+        atr = j['true_range_14'].media()
+        media_tp = j['preco_tipico_20'].media()
+
+        return {
+            'SMA_20': sma_20,
+            'SMA_50': j['close_50'].media(),
+            'SMA_200': j['close_200'].media(),
+            'EMA_12': ema_12,
+            'EMA_26': ema_26,
+            'Middle_Band': sma_20,
+            'RSI': 100 - (100 / (1 + j['ganho_14'].media() / j['perda_14'].media())),
+            'MACD': macd,
+            'MACD_Signal': sinal,
+            'MACD_Histogram': macd - sinal,
+            'Upper_Band': sma_20 + (2 * std_20),
+            'Lower_Band': sma_20 - (2 * std_20),
+            'ATR': atr,
+            'ATR_14': atr,
+            'Stochastic_K': estocastico_k,
+            'Stochastic_D': j['estocastico_3'].media(),
+            'OBV': self.obv,
+            'Williams_R': -100 * ((maximo - close) / (maximo - minimo)),
+            'CCI': (tp - media_tp) / (0.015 * j['preco_tipico_20'].desvio_medio_absoluto()),
+        }
+
+    def atualizar(self, df):
+        """Acrescenta as barras de ``df`` e devolve ``df`` com os indicadores"""
+        if len(df) == 0:
+            return df.assign(**{nome: np.nan for nome in self.nomes})
+        datas = pd.DatetimeIndex(df.index)
+        if not datas.is_monotonic_increasing or not datas.is_unique:
+            raise ValueError('As barras novas devem estar em ordem crescente de data')
+        if self.ultima_data is not None and datas[0] <= self.ultima_data:
+            raise ValueError(
+                f'Barra de {datas[0].date()} não é posterior à última '
+                f'({self.ultima_data.date()}); o estado só aceita acréscimos'
+            )
+
+        valores = {nome: np.empty(len(df)) for nome in self.nomes}
+        colunas = [df[c].to_numpy(dtype=float) for c in ('High', 'Low', 'Close', 'Volume')]
+        # Divisões por zero viram inf/NaN, como nas operações vetorizadas do motor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i, (high, low, close, volume) in enumerate(zip(*colunas)):
+                linha = self._passo(np.float64(high), np.float64(low),
+                                    np.float64(close), np.float64(volume))
+                for nome in self.nomes:
+                    valores[nome][i] = linha[nome]
+
+        self.barras += len(df)
+        self.ultima_data = datas[-1]
+        # Um único bloco novo em vez de inserir coluna por coluna
+        return pd.concat([df, pd.DataFrame(valores, index=df.index)], axis=1)
+
+    # SNAPSHOT
+
+    def para_dict(self):
+        return {
+            'nomes': self.nomes,
+            'ajuste_ema': self.ajuste_ema,
+            'janelas': {nome: janela.ordenados().tolist() for nome, janela in self.janelas.items()},
+            'emas': {nome: [ema.valor, ema.peso] for nome, ema in self.emas.items()},
+            'fechamento_anterior': self.fechamento_anterior,
+            'obv': self.obv,
+            'barras': self.barras,
+            'ultima_data': self.ultima_data.isoformat() if self.ultima_data is not None else None,
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        obj = cls(estado['nomes'], estado['ajuste_ema'])
+        for nome, valores in estado['janelas'].items():
+            obj.janelas[nome].carregar(valores)
+        for nome, (valor, peso) in estado['emas'].items():
+            obj.emas[nome].valor = valor
+            obj.emas[nome].peso = peso
+        obj.fechamento_anterior = estado['fechamento_anterior']
+        obj.obv = estado['obv']
+        obj.barras = estado['barras']
+        if estado['ultima_data'] is not None:
+            obj.ultima_data = pd.Timestamp(estado['ultima_data'])
+        return obj
+
+    def salvar(self, caminho):
+        """Grava o estado em JSON (escrita atômica)"""
+        temporario = f'{caminho}.tmp'
+        with open(temporario, 'w') as arquivo:
+            json.dump(self.para_dict(), arquivo)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho) as arquivo:
+            return cls.de_dict(json.load(arquivo))
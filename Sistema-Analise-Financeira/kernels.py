@@ -0,0 +1,325 @@
+"""Kernels NumPy dos indicadores (motor ``numpy``).
+
+Cada função recebe e devolve arrays e reproduz a série do pandas usada no
+motor original (``rolling`` com a janela cheia, ``ewm`` com ``min_periods``
+0): NaN na janela dá NaN, o true range ignora o fechamento anterior ausente.
+``kernels_numba`` tem as mesmas funções compiladas, cada uma numa única
+passada; ``modulo(motor)`` escolhe entre os dois (ou o pandas).
+"""
+import importlib
+import importlib.util
+import sys
+
+import numpy as np
+
+MOTORES = ('auto', 'numpy', 'numba', 'pandas')
+# numba é opcional: sem ele ``auto`` usa estes kernels NumPy
+NUMBA_DISPONIVEL = importlib.util.find_spec('numba') is not None
+
+
+def resolver(motor):
+    """Nome do motor efetivo (``auto`` vira ``numba`` ou ``numpy``)"""
+    motor = (motor or 'auto').lower()
+    if motor not in MOTORES:
+        raise ValueError(f'Motor de indicadores desconhecido: {motor} '
+                         f'(use {", ".join(MOTORES)})')
+    if motor == 'auto':
+        return 'numba' if NUMBA_DISPONIVEL else 'numpy'
+    if motor == 'numba' and not NUMBA_DISPONIVEL:
+        raise ValueError('Motor numba pedido, mas o pacote numba não está instalado')
+    return motor
+
+
+def modulo(motor):
+    """Módulo com os kernels do motor, ou ``None`` para as Series do pandas"""
+    motor = resolver(motor)
+    if motor == 'pandas':
+        return None
+    if motor == 'numba':
+        # Importado só aqui: numba e a compilação não pesam no início do app
+        return importlib.import_module('kernels_numba')
+    return sys.modules[__name__]
+
+
+def obv(close, volume):
+    """On Balance Volume vetorizado.
+
+    Igual ao laço original: soma o volume quando o fechamento sobe,
+    subtrai quando cai e repete o valor anterior quando fica igual
+    (inclusive quando algum dos fechamentos é NaN). O volume de uma barra
+    sem variação não entra na soma, então um volume NaN nela não contamina
+    o restante da série.
+    """
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume)
+    if len(close) == 0:
+        return np.zeros(0, dtype=volume.dtype)
+
+    variacao = np.diff(close)
+    direcao = (variacao > 0).astype(np.int8) - (variacao < 0).astype(np.int8)
+    saida = np.empty(len(close), dtype=np.result_type(volume.dtype, np.int8))
+    saida[0] = 0
+    np.cumsum(np.where(direcao != 0, direcao * volume[1:], 0), out=saida[1:])
+    return saida
+
+
+def desvio_medio_absoluto(valores, janela, bloco=65536):
+    """Desvio médio absoluto em janela móvel (usado no CCI).
+
+    Equivale a ``rolling(janela).apply(lambda x: np.abs(x - x.mean()).mean())``.
+    Em blocos de até ``bloco`` janelas, para limitar a memória temporária, e
+    em cada bloco duas passadas que somam as ``janela`` fatias deslocadas da
+    série (contíguas, bem mais rápidas que reduzir janelas com strides).
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(len(valores), np.nan)
+    if janela <= 0 or len(valores) < janela:
+        return saida
+
+    for inicio in range(0, len(valores) - janela + 1, bloco):
+        parte = valores[inicio:inicio + bloco + janela - 1]
+        m = len(parte) - janela + 1
+        media = np.zeros(m)
+        for j in range(janela):
+            media += parte[j:j + m]
+        media /= janela
+        desvios = np.zeros(m)
+        termo = np.empty(m)
+        for j in range(janela):
+            np.subtract(parte[j:j + m], media, out=termo)
+            np.abs(termo, out=termo)
+            desvios += termo
+        np.divide(desvios, janela, out=saida[inicio + janela - 1:inicio + janela - 1 + m])
+    return saida
+
+
+# JANELAS MÓVEIS
+
+def _janelas_paradas(valores, janela):
+    """Janelas em que todos os valores são iguais (NaN nunca é igual)"""
+    iguais = valores[1:] == valores[:-1]
+    if janela == 1 or not iguais.any():
+        return None
+    mudancas = np.zeros(len(valores), dtype=np.int64)
+    np.cumsum(~iguais, out=mudancas[1:])
+    return mudancas[janela - 1:] == mudancas[:len(valores) - janela + 1]
+
+
+def _contagem_janela(marcas, janela):
+    """Quantas posições marcadas há em cada janela (somas inteiras, exatas)"""
+    acumulado = np.zeros(len(marcas) + 1, dtype=np.int64)
+    np.cumsum(marcas, out=acumulado[1:])
+    return acumulado[janela:] - acumulado[:-janela]
+
+
+def _somas_janela(valores, janela, bloco):
+    """Soma de cada janela, sem NaN, e o centro usado nela.
+
+    As somas acumuladas recomeçam a cada ``bloco`` e são feitas sobre a
+    distância ao primeiro valor do bloco, para o erro de arredondamento não
+    crescer com o tamanho da série.
+    """
+    somas = np.empty(len(valores) - janela + 1)
+    centros = np.empty(len(valores) - janela + 1)
+    for inicio in range(0, len(valores) - janela + 1, bloco):
+        parte = valores[inicio:inicio + bloco + janela - 1]
+        quantidade = len(parte) - janela + 1
+        validos = parte[np.isfinite(parte)]
+        centro = validos[0] if len(validos) else 0.0
+        desvios = parte - centro
+        np.nan_to_num(desvios, copy=False, nan=0.0)
+        acumulado = np.zeros(len(parte) + 1)
+        np.cumsum(desvios, out=acumulado[1:])
+        np.subtract(acumulado[janela:], acumulado[:-janela],
+                    out=somas[inicio:inicio + quantidade])
+        centros[inicio:inicio + quantidade] = centro
+    return somas, centros
+
+
+def media_movel(valores, janela, bloco=4096):
+    """``rolling(janela).mean()``.
+
+    Diferença de somas acumuladas (``_somas_janela``). Como no pandas, a
+    janela de valores iguais dá o próprio valor e a janela sem negativos não
+    fica negativa: ganho zero no RSI continua zero, e não 1e-17.
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(len(valores), np.nan)
+    if janela <= 0 or len(valores) < janela:
+        return saida
+    if janela == 1:
+        saida[:] = valores
+        return saida
+
+    somas, centros = _somas_janela(valores, janela, bloco)
+    medias = saida[janela - 1:]
+    np.divide(somas, janela, out=medias)
+    medias += centros
+
+    negativos, positivos = valores < 0, valores > 0
+    if not negativos.any():
+        np.maximum(medias, 0.0, out=medias)
+    elif not positivos.any():
+        np.minimum(medias, 0.0, out=medias)
+    else:
+        np.maximum(medias, 0.0, out=medias, where=_contagem_janela(negativos, janela) == 0)
+        np.minimum(medias, 0.0, out=medias, where=_contagem_janela(positivos, janela) == 0)
+    paradas = _janelas_paradas(valores, janela)
+    if paradas is not None:
+        medias[paradas] = valores[janela - 1:][paradas]
+    nulos = np.isnan(valores)
+    if nulos.any():
+        medias[_contagem_janela(nulos, janela) > 0] = np.nan
+    return saida
+
+
+def desvio_movel(valores, janela):
+    """``rolling(janela).std()`` (ddof 1).
+
+    Em duas passadas, cada uma somando as ``janela`` fatias deslocadas da
+    série (contíguas, ao contrário das janelas com strides). Fica mais exato
+    que a atualização online do pandas, que acumula erro em séries longas; a
+    janela de valores iguais dá 0, como lá. NaN propaga pelas somas.
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(len(valores), np.nan)
+    if janela <= 1 or len(valores) < janela:
+        return saida
+
+    m = len(valores) - janela + 1
+    media = np.zeros(m)
+    for j in range(janela):
+        media += valores[j:j + m]
+    media /= janela
+    quadrados = np.zeros(m)
+    termo = np.empty(m)
+    for j in range(janela):
+        np.subtract(valores[j:j + m], media, out=termo)
+        termo *= termo
+        quadrados += termo
+    desvios = saida[janela - 1:]
+    np.sqrt(quadrados / (janela - 1), out=desvios)
+
+    paradas = _janelas_paradas(valores, janela)
+    if paradas is not None:
+        desvios[paradas] = 0.0
+    return saida
+
+
+def minimo_movel(valores, janela):
+    """``rolling(janela).min()``"""
+    return _extremo_movel(valores, janela, np.minimum, np.inf)
+
+
+def maximo_movel(valores, janela):
+    """``rolling(janela).max()``"""
+    return _extremo_movel(valores, janela, np.maximum, -np.inf)
+
+
+def _extremo_movel(valores, janela, extremo, neutro):
+    """Algoritmo de van Herk/Gil-Werman: O(n) para qualquer janela.
+
+    Em blocos de ``janela`` valores, o extremo da janela que termina em ``i``
+    junta o acumulado do fim do bloco anterior (de trás para frente) com o
+    acumulado do começo do bloco de ``i``. ``np.minimum``/``np.maximum``
+    propagam NaN, como a janela incompleta do pandas.
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(len(valores), np.nan)
+    if janela <= 0 or len(valores) < janela:
+        return saida
+    n = len(valores)
+    blocos = np.full(-(-n // janela) * janela, neutro)
+    blocos[:n] = valores
+    blocos = blocos.reshape(-1, janela)
+    inicio_bloco = extremo.accumulate(blocos, axis=1).ravel()
+    fim_bloco = extremo.accumulate(blocos[:, ::-1], axis=1)[:, ::-1].ravel()
+    extremo(fim_bloco[:n - janela + 1], inicio_bloco[janela - 1:n], out=saida[janela - 1:])
+    return saida
+
+
+def media_ganho(delta, janela):
+    """``delta.clip(lower=0).rolling(janela).mean()``"""
+    return media_movel(np.maximum(np.asarray(delta, dtype=float), 0.0), janela)
+
+
+def media_perda(delta, janela):
+    """``(-delta.clip(upper=0)).rolling(janela).mean()``"""
+    return media_movel(-np.minimum(np.asarray(delta, dtype=float), 0.0), janela)
+
+
+# RECURSIVOS
+
+def _recursao_linear(entrada, fator):
+    """``z[t] = fator * z[t - 1] + entrada[t]`` com ``z[-1] = 0``.
+
+    Em blocos: dentro de cada um ``z = fator**k * (carry + cumsum(entrada /
+    fator**j))``, com o bloco curto o bastante para ``fator**-j`` não
+    estourar.
+    """
+    saida = np.empty(len(entrada))
+    if fator == 0:
+        saida[:] = entrada
+        return saida
+    bloco = max(1, min(len(entrada), int(300 / -np.log(fator))))
+    potencias = fator ** np.arange(bloco, dtype=float)
+    inversas = 1.0 / potencias
+    carry = 0.0
+    for inicio in range(0, len(entrada), bloco):
+        parte = saida[inicio:inicio + bloco]
+        n = len(parte)
+        np.multiply(entrada[inicio:inicio + n], inversas[:n], out=parte)
+        np.cumsum(parte, out=parte)
+        parte += fator * carry
+        parte *= potencias[:n]
+        carry = parte[-1]
+    return saida
+
+
+def ema(valores, span, ajuste):
+    """``ewm(span=span, adjust=ajuste).mean()``.
+
+    Com ``ajuste`` é a média ponderada por ``(1 - alfa)**i``; sem ele, a
+    recursão ``y = (1 - alfa) * y + alfa * x``. NaN antes do primeiro valor
+    viram NaN; séries com NaN no meio (pesos que decaem sem observação) ficam
+    com o ``ewm`` do pandas.
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(len(valores), np.nan)
+    nulos = np.isnan(valores)
+    if nulos.all():
+        return saida
+    primeiro = int(np.argmax(~nulos))
+    resto = valores[primeiro:]
+    if nulos[primeiro:].any():
+        import pandas as pd
+        return pd.Series(valores).ewm(span=span, adjust=ajuste).mean().to_numpy()
+
+    alfa = 2.0 / (span + 1.0)
+    fator = 1.0 - alfa
+    if ajuste:
+        numerador = _recursao_linear(resto, fator)
+        if fator == 0:
+            saida[primeiro:] = numerador
+        else:
+            pesos = -np.expm1(np.log(fator) * np.arange(1, len(resto) + 1)) / alfa
+            saida[primeiro:] = numerador / pesos
+    else:
+        entrada = alfa * resto
+        entrada[0] = resto[0]
+        saida[primeiro:] = _recursao_linear(entrada, fator)
+    return saida
+
+
+def true_range(high, low, close):
+    """Maior entre ``high - low`` e as distâncias ao fechamento anterior"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    saida = high - low
+    if len(saida) > 1:
+        anterior = close[:-1]
+        # fmax ignora NaN, como o max(axis=1) do pandas na primeira barra
+        np.fmax(saida[1:], np.abs(high[1:] - anterior), out=saida[1:])
+        np.fmax(saida[1:], np.abs(low[1:] - anterior), out=saida[1:])
+    return saida
@@ -0,0 +1,246 @@
+"""Kernels compilados com numba (motor ``numba``).
+
+Mesmas funções de ``kernels``, cada uma numa única passada sobre arrays
+contíguos, sem os temporários das versões NumPy (``clip``, somas
+acumuladas, visões das janelas). As EMAs seguem o algoritmo do ``ewm`` do
+pandas, inclusive com NaN no meio da série.
+
+Só é importado quando o motor é escolhido (``kernels.modulo``). A compilação
+fica em cache em disco (``cache=True``): só o primeiro processo paga.
+"""
+import numpy as np
+from numba import njit
+
+
+def _contiguo(valores):
+    return np.ascontiguousarray(valores, dtype=np.float64)
+
+
+# JANELAS MÓVEIS
+
+@njit(cache=True)
+def _parte(v, sinal):
+    # sinal 0: o próprio valor; 1: só a parte positiva; -1: só a negativa, trocada de sinal
+    if sinal > 0:
+        return max(v, 0.0)
+    if sinal < 0:
+        return -min(v, 0.0)
+    return v
+
+
+@njit(cache=True)
+def _media_movel(x, janela, sinal):
+    n = len(x)
+    saida = np.full(n, np.nan)
+    if janela <= 0:
+        return saida
+    # Soma compensada (Kahan) que entra x[i] e sai x[i - janela], como no pandas
+    soma = 0.0
+    compensacao = 0.0
+    nulos = 0
+    for i in range(n):
+        v = x[i]
+        if np.isnan(v):
+            nulos += 1
+        else:
+            y = _parte(v, sinal) - compensacao
+            t = soma + y
+            compensacao = (t - soma) - y
+            soma = t
+        if i >= janela:
+            v = x[i - janela]
+            if np.isnan(v):
+                nulos -= 1
+            else:
+                y = -_parte(v, sinal) - compensacao
+                t = soma + y
+                compensacao = (t - soma) - y
+                soma = t
+        if i >= janela - 1 and nulos == 0:
+            saida[i] = soma / janela
+    return saida
+
+
+def media_movel(valores, janela):
+    """``rolling(janela).mean()``"""
+    return _media_movel(_contiguo(valores), janela, 0)
+
+
+def media_ganho(delta, janela):
+    """``delta.clip(lower=0).rolling(janela).mean()``"""
+    return _media_movel(_contiguo(delta), janela, 1)
+
+
+def media_perda(delta, janela):
+    """``(-delta.clip(upper=0)).rolling(janela).mean()``"""
+    return _media_movel(_contiguo(delta), janela, -1)
+
+
+@njit(cache=True)
+def _desvio_movel(x, janela):
+    n = len(x)
+    saida = np.full(n, np.nan)
+    if janela <= 1:
+        return saida
+    for i in range(janela - 1, n):
+        soma = 0.0
+        iguais = True
+        for j in range(i - janela + 1, i + 1):
+            soma += x[j]
+            iguais = iguais and x[j] == x[i]
+        if iguais:
+            # Como no pandas, sem o resíduo de arredondamento da média
+            saida[i] = 0.0
+            continue
+        media = soma / janela
+        quadrados = 0.0
+        for j in range(i - janela + 1, i + 1):
+            quadrados += (x[j] - media) * (x[j] - media)
+        # NaN na janela propaga pela soma
+        saida[i] = np.sqrt(quadrados / (janela - 1))
+    return saida
+
+
+def desvio_movel(valores, janela):
+    """``rolling(janela).std()`` (ddof 1), em duas passadas por janela (mais exato que o pandas)"""
+    return _desvio_movel(_contiguo(valores), janela)
+
+
+@njit(cache=True)
+def _extremo_movel(x, janela, maximo):
+    n = len(x)
+    saida = np.full(n, np.nan)
+    for i in range(janela - 1, n):
+        extremo = x[i]
+        for j in range(i - janela + 1, i):
+            v = x[j]
+            if np.isnan(v) or np.isnan(extremo):
+                extremo = np.nan
+                break
+            if (v > extremo) if maximo else (v < extremo):
+                extremo = v
+        saida[i] = extremo
+    return saida
+
+
+def minimo_movel(valores, janela):
+    """``rolling(janela).min()``"""
+    return _extremo_movel(_contiguo(valores), janela, False)
+
+
+def maximo_movel(valores, janela):
+    """``rolling(janela).max()``"""
+    return _extremo_movel(_contiguo(valores), janela, True)
+
+
+@njit(cache=True)
+def _desvio_medio_absoluto(x, janela):
+    n = len(x)
+    saida = np.full(n, np.nan)
+    for i in range(janela - 1, n):
+        soma = 0.0
+        for j in range(i - janela + 1, i + 1):
+            soma += x[j]
+        media = soma / janela
+        desvios = 0.0
+        for j in range(i - janela + 1, i + 1):
+            desvios += abs(x[j] - media)
+        saida[i] = desvios / janela
+    return saida
+
+
+def desvio_medio_absoluto(valores, janela):
+    """Desvio médio absoluto em janela móvel (usado no CCI)"""
+    saida = np.full(len(valores), np.nan)
+    if janela <= 0:
+        return saida
+    return _desvio_medio_absoluto(_contiguo(valores), janela)
+
+
+# RECURSIVOS
+
+@njit(cache=True)
+def _ema(x, alfa, ajuste):
+    # Mesmo laço do ewm do pandas (ignore_na=False, min_periods=0)
+    n = len(x)
+    saida = np.full(n, np.nan)
+    if n == 0:
+        return saida
+    fator = 1.0 - alfa
+    novo = 1.0 if ajuste else alfa
+    media = x[0]
+    observacoes = 0 if np.isnan(media) else 1
+    if observacoes:
+        saida[0] = media
+    peso = 1.0
+    for i in range(1, n):
+        atual = x[i]
+        observado = not np.isnan(atual)
+        if observado:
+            observacoes += 1
+        if not np.isnan(media):
+            peso *= fator
+            if observado:
+                if media != atual:
+                    media = (peso * media + novo * atual) / (peso + novo)
+                if ajuste:
+                    peso += novo
+                else:
+                    peso = 1.0
+        elif observado:
+            media = atual
+        if observacoes:
+            saida[i] = media
+    return saida
+
+
+def ema(valores, span, ajuste):
+    """``ewm(span=span, adjust=ajuste).mean()``"""
+    return _ema(_contiguo(valores), 2.0 / (span + 1.0), bool(ajuste))
+
+
+@njit(cache=True)
+def _true_range(high, low, close):
+    n = len(close)
+    saida = np.empty(n)
+    for i in range(n):
+        maior = high[i] - low[i]
+        if i > 0:
+            # Como o max(axis=1) do pandas: NaN só quando todos são NaN
+            v = abs(high[i] - close[i - 1])
+            if np.isnan(maior) or v > maior:
+                maior = v
+            v = abs(low[i] - close[i - 1])
+            if np.isnan(maior) or v > maior:
+                maior = v
+        saida[i] = maior
+    return saida
+
+
+def true_range(high, low, close):
+    """Maior entre ``high - low`` e as distâncias ao fechamento anterior"""
+    return _true_range(_contiguo(high), _contiguo(low), _contiguo(close))
+
+
+@njit(cache=True)
+def _obv(close, volume):
+    n = len(close)
+    saida = np.empty(n)
+    if n == 0:
+        return saida
+    saida[0] = 0.0
+    for i in range(1, n):
+        if close[i] > close[i - 1]:
+            saida[i] = saida[i - 1] + volume[i]
+        elif close[i] < close[i - 1]:
+            saida[i] = saida[i - 1] - volume[i]
+        else:
+            saida[i] = saida[i - 1]
+    return saida
+
+
+def obv(close, volume):
+    """On Balance Volume, no dtype do volume como ``kernels.obv``"""
+    volume = np.asarray(volume)
+    saida = _obv(_contiguo(close), _contiguo(volume))
+    return saida.astype(np.result_type(volume.dtype, np.int8))
@@ -0,0 +1,100 @@
+"""Limitador de taxa (token bucket) para chamadas ao provedor de dados."""
+import asyncio
+import threading
+import time
+
+PERIODOS = {
+    'second': 1.0,
+    'minute': 60.0,
+    'hour': 3600.0,
+    'day': 86400.0,
+}
+
+
+def interpretar_taxa(texto):
+    """Converte ``"8/minute"`` em ``(8, 60.0)``"""
+    try:
+        quantidade, periodo = texto.strip().split('/')
+        return int(quantidade), PERIODOS[periodo.strip().lower().rstrip('s')]
+    except (ValueError, KeyError):
+        raise ValueError(f'Taxa inválida: {texto!r} (ex: "8/minute", "100/hour")')
+
+
+class BaldeTokens:
+    """Token bucket thread-safe: ``quantidade`` chamadas a cada ``periodo`` segundos.
+
+    O balde começa cheio, permitindo uma rajada de até ``capacidade``
+    chamadas, e é reabastecido continuamente.
+    """
+
+    def __init__(self, quantidade, periodo, capacidade=None, relogio=time.monotonic,
+                 dormir=time.sleep):
+        self.capacidade = float(capacidade or quantidade)
+        self.reposicao = quantidade / periodo
+        self._relogio = relogio
+        self._dormir = dormir
+        self._tokens = self.capacidade
+        self._atualizado = relogio()
+        self._trava = threading.Lock()
+        self.esperas = 0
+
+    @classmethod
+    def de_texto(cls, texto, **kwargs):
+        quantidade, periodo = interpretar_taxa(texto)
+        return cls(quantidade, periodo, **kwargs)
+
+    def _reabastecer(self):
+        agora = self._relogio()
+        self._tokens = min(
+            self.capacidade, self._tokens + (agora - self._atualizado) * self.reposicao
+        )
+        self._atualizado = agora
+
+    def tentar(self):
+        """Consome um token se houver, sem bloquear"""
+        with self._trava:
+            self._reabastecer()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _reservar(self):
+        """Consome um token e retorna 0, ou retorna quantos segundos faltam para o próximo"""
+        with self._trava:
+            self._reabastecer()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.reposicao
+
+    def _contar_espera(self):
+        with self._trava:
+            self.esperas += 1
+
+    def adquirir(self, timeout=None):
+        """Bloqueia até conseguir um token; retorna False se estourar ``timeout``"""
+        limite = None if timeout is None else self._relogio() + timeout
+        esperou = False
+        while True:
+            espera = self._reservar()
+            if not espera:
+                if esperou:
+                    self._contar_espera()
+                return True
+            if limite is not None and self._relogio() + espera > limite:
+                return False
+            esperou = True
+            self._dormir(espera)
+
+    async def adquirir_assincrono(self):
+        """Como ``adquirir``, mas aguarda com ``asyncio.sleep`` sem bloquear o loop"""
+        esperou = False
+        while True:
+            espera = self._reservar()
+            if not espera:
+                if esperou:
+                    self._contar_espera()
+                return True
+            esperou = True
+            await asyncio.sleep(espera)
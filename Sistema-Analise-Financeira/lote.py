@@ -0,0 +1,56 @@
+"""Processamento de vários símbolos: busca concorrente e cálculo em paralelo."""
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_simbolos(simbolos, maximo):
+    """Valida a lista recebida e remove repetições mantendo a ordem"""
+    if not isinstance(simbolos, list) or not simbolos:
+        raise ValueError('Informe "symbols" como uma lista não vazia')
+    unicos = list(dict.fromkeys(str(s).upper().strip() for s in simbolos if str(s).strip()))
+    if not unicos:
+        raise ValueError('Informe "symbols" como uma lista não vazia')
+    if len(unicos) > maximo:
+        raise ValueError(f'No máximo {maximo} símbolos por requisição')
+    return unicos
+
+
+def processar_lote(simbolos, buscar, calcular, threads_busca=8, executor=None):
+    """Gera ``(simbolo, resultado, erro)`` à medida que cada símbolo termina.
+
+    ``buscar(simbolo)`` roda em um pool de threads (I/O, limitado pelo token
+    bucket do provedor) e ``calcular(simbolo, dados)`` é enviado ao
+    ``executor`` (um pool de processos, por exemplo) assim que os dados
+    chegam. Sem executor o cálculo roda na própria thread de busca. Falhas
+    são reportadas por símbolo e não interrompem o lote.
+    """
+    with ThreadPoolExecutor(max_workers=threads_busca) as pool_busca:
+        pendentes = {pool_busca.submit(buscar, s): ('busca', s) for s in simbolos}
+        try:
+            yield from _acompanhar(pendentes, pool_busca, calcular, executor)
+        finally:
+            # Cliente desconectou no meio do lote: não busca o que falta
+            for futuro in pendentes:
+                futuro.cancel()
+
+
+def _acompanhar(pendentes, pool_busca, calcular, executor):
+    while pendentes:
+        prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+        for futuro in prontos:
+            etapa, simbolo = pendentes.pop(futuro)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                logger.warning("Falha em %s (%s): %s", simbolo, etapa, e)
+                yield simbolo, None, str(e)
+                continue
+
+            if etapa == 'calculo':
+                yield simbolo, resultado, None
+            elif executor is not None:
+                pendentes[executor.submit(calcular, simbolo, resultado)] = ('calculo', simbolo)
+            else:
+                pendentes[pool_busca.submit(calcular, simbolo, resultado)] = ('calculo', simbolo)
@@ -0,0 +1,232 @@
+"""Instrumentação do pipeline: tempos por etapa, Server-Timing, /metrics e perfil.
+
+``etapa('indicators')`` mede um trecho do pipeline: alimenta um histograma
+por etapa e, durante uma requisição, a lista que vira o cabeçalho
+``Server-Timing``. Com ``Config.METRICS_ENABLED`` desligado ``etapa`` devolve
+sempre o mesmo contexto nulo, sem relógio nem trava. ``exportar`` gera o
+formato texto do Prometheus com os histogramas e o que os coletores
+registrados (caches, cliente do provedor) informam na hora da coleta.
+``AmostradorPerfil`` é um profiler por amostragem, ligado por requisição.
+
+As métricas são por processo: com vários workers do gunicorn cada um
+responde pelo seu próprio /metrics.
+"""
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from config import Config
+
+LIMITES_ETAPA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULO = contextlib.nullcontext()
+_tempos = contextvars.ContextVar('tempos_requisicao', default=None)
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{nome}="{valor}"' for nome, valor in rotulos) + '}'
+
+
+def linhas_histograma(nome, rotulos, limites, baldes, soma):
+    """Linhas do Prometheus para um histograma (``baldes`` não cumulativos)"""
+    acumulado = 0
+    linhas = []
+    for limite, quantidade in zip([*map(str, limites), '+Inf'], baldes):
+        acumulado += quantidade
+        linhas.append(f'{nome}_bucket{_rotulos([*rotulos, ("le", limite)])} {acumulado}')
+    linhas.append(f'{nome}_sum{_rotulos(rotulos)} {soma}')
+    linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+    return linhas
+
+
+class Histograma:
+    """Histograma com baldes fixos, um conjunto por combinação de rótulos"""
+
+    def __init__(self, nome, descricao, rotulos, limites=LIMITES_ETAPA):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.limites = limites
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, segundos, *valores):
+        with self._trava:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][bisect_left(self.limites, segundos)] += 1
+            serie[1] += segundos
+
+    def limpar(self):
+        with self._trava:
+            self._series.clear()
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self._trava:
+            series = sorted((v, list(b), s) for v, (b, s) in self._series.items())
+        for valores, baldes, soma in series:
+            linhas += linhas_histograma(
+                self.nome, list(zip(self.rotulos, valores)), self.limites, baldes, soma
+            )
+        return linhas
+
+
+etapas = Histograma('pipeline_stage_seconds', 'Tempo de cada etapa do pipeline', ['stage'])
+requisicoes = Histograma(
+    'http_request_seconds', 'Tempo das requisições HTTP', ['method', 'route', 'status']
+)
+
+_coletores = []
+
+
+def registrar_coletor(coletor):
+    """``coletor()`` devolve linhas do Prometheus; é chamado a cada coleta"""
+    _coletores.append(coletor)
+    return coletor
+
+
+# ETAPAS
+
+class _Etapa:
+    __slots__ = ('nome', 'inicio')
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        decorrido = time.perf_counter() - self.inicio
+        etapas.observar(decorrido, self.nome)
+        tempos = _tempos.get()
+        if tempos is not None:
+            tempos.append((self.nome, decorrido))
+        return False
+
+
+def etapa(nome):
+    """Contexto que mede a etapa ``nome`` (nulo com as métricas desligadas)"""
+    if not Config.METRICS_ENABLED:
+        return _NULO
+    return _Etapa(nome)
+
+
+def iniciar_requisicao():
+    """Começa a registrar as etapas da requisição atual; retorna a lista de tempos"""
+    tempos = []
+    _tempos.set(tempos)
+    return tempos
+
+
+def server_timing(tempos, total=None):
+    """Valor do cabeçalho ``Server-Timing`` (etapas repetidas são somadas)"""
+    somas = {}
+    for nome, segundos in tempos:
+        somas[nome] = somas.get(nome, 0.0) + segundos
+    if total is not None:
+        somas['total'] = total
+    return ', '.join(f'{nome};dur={segundos * 1000:.2f}' for nome, segundos in somas.items())
+
+
+# EXPOSIÇÃO
+
+_METRICAS_CACHE = (
+    ('cache_hits_total', 'counter', 'acertos'),
+    ('cache_misses_total', 'counter', 'falhas'),
+    ('cache_hit_ratio', 'gauge', 'taxa_acerto'),
+    ('cache_evictions_total', 'counter', 'despejos'),
+    ('cache_expirations_total', 'counter', 'expiracoes'),
+    ('cache_items', 'gauge', 'itens'),
+    ('cache_bytes', 'gauge', 'bytes'),
+)
+
+
+def linhas_caches(caches):
+    """Linhas do Prometheus para ``{nome: CacheResultados}``"""
+    estatisticas = {nome: cache.estatisticas() for nome, cache in caches.items()}
+    linhas = []
+    for metrica, tipo, campo in _METRICAS_CACHE:
+        linhas.append(f'# TYPE {metrica} {tipo}')
+        linhas += [f'{metrica}{_rotulos([("cache", nome)])} {valores[campo]}'
+                   for nome, valores in estatisticas.items()]
+    return linhas
+
+
+def linhas_provedor(resumo, limites):
+    """Linhas do Prometheus para ``MetricasCliente.resumo()``"""
+    linhas = [
+        '# HELP upstream_request_seconds Latência das chamadas à Twelve Data',
+        '# TYPE upstream_request_seconds histogram',
+    ]
+    linhas += linhas_histograma('upstream_request_seconds', [], limites,
+                                list(resumo['histograma'].values()), resumo['soma_latencia'])
+    for campo, nome in (('novas_tentativas', 'retries'), ('limitacoes', 'rate_limited'),
+                        ('erros', 'errors')):
+        linhas += [f'# TYPE upstream_{nome}_total counter',
+                   f'upstream_{nome}_total {resumo[campo]}']
+    return linhas
+
+
+def exportar():
+    """Texto no formato de exposição do Prometheus"""
+    linhas = etapas.exportar() + requisicoes.exportar()
+    for coletor in _coletores:
+        linhas += coletor()
+    return '\n'.join(linhas) + '\n'
+
+
+# PERFIL
+
+class AmostradorPerfil:
+    """Profiler por amostragem da thread que o criou.
+
+    Uma thread auxiliar lê a pilha da thread alvo a cada ``intervalo``
+    segundos; ``parar`` devolve as pilhas no formato "collapsed" (uma linha
+    ``a;b;c quantidade``), aceito por flamegraph.pl e speedscope.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.alvo = threading.get_ident()
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)})')
+                quadro = quadro.f_back
+            if pilha:
+                self.pilhas[';'.join(reversed(pilha))] += 1
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+        return ''.join(f'{pilha} {n}\n' for pilha, n in self.pilhas.most_common())
+
+    def salvar(self, diretorio, nome):
+        """Para a amostragem e grava ``<diretorio>/<nome>.txt``; retorna o caminho"""
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f'{nome}.txt')
+        with open(caminho, 'w') as arquivo:
+            arquivo.write(self.parar())
+        return caminho
@@ -0,0 +1,281 @@
+"""Motor único de indicadores técnicos.
+
+Cada indicador é registrado com as entradas de que depende (colunas OHLCV ou
+outros nós) e seus parâmetros. Ao pedir um subconjunto de indicadores o motor
+monta o grafo de dependências, calcula cada intermediário compartilhado
+(EMAs, janelas móveis, true range...) uma única vez e ignora o resto.
+
+Os nós recursivos e de janela móvel rodam no motor ``Config.INDICATOR_ENGINE``
+(ver ``kernels``): ``numpy`` e ``numba`` trabalham direto nos arrays, sem
+as Series intermediárias do pandas; ``pandas`` mantém o cálculo original.
+"""
+import pandas as pd
+
+import kernels
+from config import Config
+
+COLUNAS_BASE = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+REGISTRO = {}
+
+
+class Indicador:
+
+    def __init__(self, nome, funcao, entradas, parametros, usa_ajuste_ema, intermediario,
+                 usa_kernels=False):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = entradas
+        self.parametros = parametros
+        self.usa_ajuste_ema = usa_ajuste_ema
+        self.intermediario = intermediario
+        self.usa_kernels = usa_kernels
+
+    def __repr__(self):
+        return f'Indicador({self.nome!r}, entradas={self.entradas!r})'
+
+
+def indicador(nome, entradas, usa_ajuste_ema=False, intermediario=False, usa_kernels=False,
+              **parametros):
+    """Registra ``funcao(*entradas, **parametros)`` como nó do grafo.
+
+    Com ``usa_kernels`` a função recebe também ``motor``: o módulo de kernels
+    do motor escolhido, ou ``None`` no motor ``pandas``.
+    """
+    def registrar(funcao):
+        REGISTRO[nome] = Indicador(
+            nome, funcao, tuple(entradas), parametros, usa_ajuste_ema, intermediario,
+            usa_kernels
+        )
+        return funcao
+    return registrar
+
+
+def disponiveis():
+    """Nomes dos indicadores que podem virar colunas"""
+    return [nome for nome, ind in REGISTRO.items() if not ind.intermediario]
+
+
+def plano(nomes):
+    """Ordem topológica dos nós necessários para calcular ``nomes``"""
+    ordem = []
+    estado = {}
+
+    def visitar(nome, caminho):
+        if nome in COLUNAS_BASE:
+            return
+        if nome not in REGISTRO:
+            raise ValueError(f'Indicador desconhecido: {nome}')
+        if estado.get(nome) == 'feito':
+            return
+        if estado.get(nome) == 'visitando':
+            raise ValueError(f'Dependência circular: {" -> ".join(caminho + [nome])}')
+        estado[nome] = 'visitando'
+        for entrada in REGISTRO[nome].entradas:
+            visitar(entrada, caminho + [nome])
+        estado[nome] = 'feito'
+        ordem.append(nome)
+
+    for nome in nomes:
+        visitar(nome, [])
+    return ordem
+
+
+def calcular(df, nomes=None, ajuste_ema=False, inplace=False, motor=None):
+    """Adiciona a ``df`` as colunas dos indicadores pedidos.
+
+    ``nomes`` define quais colunas são geradas (e em que ordem); por padrão
+    todos os indicadores registrados. ``ajuste_ema`` repassa ``adjust`` ao
+    ``ewm`` do pandas. ``motor`` (``auto``, ``numpy``, ``numba`` ou
+    ``pandas``) substitui ``Config.INDICATOR_ENGINE``.
+    """
+    if nomes is None:
+        nomes = disponiveis()
+    modulo = kernels.modulo(motor or Config.INDICATOR_ENGINE)
+    if not inplace:
+        # As colunas novas não alteram o original; as existentes não são copiadas
+        df = df.copy(deep=False)
+
+    valores = {}
+    for nome in plano(nomes):
+        ind = REGISTRO[nome]
+        entradas = [df[e] if e in COLUNAS_BASE else valores[e] for e in ind.entradas]
+        parametros = dict(ind.parametros)
+        if ind.usa_ajuste_ema:
+            parametros['ajuste'] = ajuste_ema
+        if ind.usa_kernels:
+            parametros['motor'] = modulo
+        valores[nome] = ind.funcao(*entradas, **parametros)
+
+    for nome in nomes:
+        df[nome] = valores[nome]
+    return df
+
+
+# INTERMEDIÁRIOS
+
+def _serie(valores, modelo):
+    """Array de um kernel como Series com o índice de ``modelo``"""
+    return pd.Series(valores, index=modelo.index, copy=False)
+
+
+def _array(serie):
+    return serie.to_numpy(dtype=float)
+
+
+def _ema(serie, span, ajuste, motor):
+    if motor is None:
+        return serie.ewm(span=span, adjust=ajuste).mean()
+    return _serie(motor.ema(_array(serie), span, ajuste), serie)
+
+
+def _media(serie, janela, motor):
+    if motor is None:
+        return serie.rolling(window=janela).mean()
+    return _serie(motor.media_movel(_array(serie), janela), serie)
+
+
+def _desvio(serie, janela, motor):
+    if motor is None:
+        return serie.rolling(window=janela).std()
+    return _serie(motor.desvio_movel(_array(serie), janela), serie)
+
+
+def _minimo(serie, janela, motor):
+    if motor is None:
+        return serie.rolling(window=janela).min()
+    return _serie(motor.minimo_movel(_array(serie), janela), serie)
+
+
+def _maximo(serie, janela, motor):
+    if motor is None:
+        return serie.rolling(window=janela).max()
+    return _serie(motor.maximo_movel(_array(serie), janela), serie)
+
+
+for _nome, _funcao, _entrada, _parametros in [
+    ('ema_12', _ema, 'Close', {'span': 12}), ('ema_26', _ema, 'Close', {'span': 26}),
+    ('sma_20', _media, 'Close', {'janela': 20}), ('sma_50', _media, 'Close', {'janela': 50}),
+    ('sma_200', _media, 'Close', {'janela': 200}), ('std_20', _desvio, 'Close', {'janela': 20}),
+    ('minimo_14', _minimo, 'Low', {'janela': 14}), ('maximo_14', _maximo, 'High', {'janela': 14}),
+]:
+    indicador(_nome, [_entrada], usa_ajuste_ema=_funcao is _ema, intermediario=True,
+              usa_kernels=True, **_parametros)(_funcao)
+del _nome, _funcao, _entrada, _parametros
+
+
+@indicador('delta', ['Close'], intermediario=True)
+def _delta(close):
+    return close.diff()
+
+
+@indicador('media_ganho_14', ['delta'], janela=14, intermediario=True, usa_kernels=True)
+def _media_ganho(delta, janela, motor):
+    if motor is None:
+        return delta.clip(lower=0).rolling(window=janela).mean()
+    return _serie(motor.media_ganho(_array(delta), janela), delta)
+
+
+@indicador('media_perda_14', ['delta'], janela=14, intermediario=True, usa_kernels=True)
+def _media_perda(delta, janela, motor):
+    if motor is None:
+        return (-delta.clip(upper=0)).rolling(window=janela).mean()
+    return _serie(motor.media_perda(_array(delta), janela), delta)
+
+
+@indicador('true_range', ['High', 'Low', 'Close'], intermediario=True, usa_kernels=True)
+def _true_range(high, low, close, motor):
+    if motor is not None:
+        return _serie(motor.true_range(_array(high), _array(low), _array(close)), close)
+    anterior = close.shift()
+    high_low = high - low
+    high_close = (high - anterior).abs()
+    low_close = (low - anterior).abs()
+    return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+
+
+@indicador('preco_tipico', ['High', 'Low', 'Close'], intermediario=True)
+def _preco_tipico(high, low, close):
+    return (high + low + close) / 3
+
+
+# INDICADORES
+
+def _identidade(serie):
+    return serie
+
+
+for _nome, _origem in [
+    ('SMA_20', 'sma_20'), ('SMA_50', 'sma_50'), ('SMA_200', 'sma_200'),
+    ('EMA_12', 'ema_12'), ('EMA_26', 'ema_26'), ('Middle_Band', 'sma_20'),
+]:
+    indicador(_nome, [_origem])(_identidade)
+del _nome, _origem
+
+
+@indicador('RSI', ['media_ganho_14', 'media_perda_14'])
+def _rsi(media_ganho, media_perda):
+    rs = media_ganho / media_perda
+    return 100 - (100 / (1 + rs))
+
+
+@indicador('MACD', ['ema_12', 'ema_26'])
+def _macd(ema_12, ema_26):
+    return ema_12 - ema_26
+
+
+@indicador('MACD_Signal', ['MACD'], usa_ajuste_ema=True, usa_kernels=True, span=9)
+def _macd_signal(macd, span, ajuste, motor):
+    return _ema(macd, span, ajuste, motor)
+
+
+@indicador('MACD_Histogram', ['MACD', 'MACD_Signal'])
+def _macd_histograma(macd, sinal):
+    return macd - sinal
+
+
+@indicador('Upper_Band', ['sma_20', 'std_20'])
+def _banda_superior(media, desvio):
+    return media + (2 * desvio)
+
+
+@indicador('Lower_Band', ['sma_20', 'std_20'])
+def _banda_inferior(media, desvio):
+    return media - (2 * desvio)
+
+
+@indicador('ATR', ['true_range'], usa_kernels=True, janela=14)
+def _atr(true_range, janela, motor):
+    return _media(true_range, janela, motor)
+
+
+# Nome usado em sistema-analise-financeira.py
+indicador('ATR_14', ['ATR'])(_identidade)
+
+
+@indicador('Stochastic_K', ['Close', 'minimo_14', 'maximo_14'])
+def _estocastico_k(close, minimo, maximo):
+    return 100 * ((close - minimo) / (maximo - minimo))
+
+
+@indicador('Stochastic_D', ['Stochastic_K'], usa_kernels=True, janela=3)
+def _estocastico_d(k, janela, motor):
+    return _media(k, janela, motor)
+
+
+@indicador('OBV', ['Close', 'Volume'], usa_kernels=True)
+def _obv(close, volume, motor):
+    # OBV e desvio médio do CCI já eram kernels NumPy no motor pandas
+    return _serie((motor or kernels).obv(close.to_numpy(), volume.to_numpy()), close)
+
+
+@indicador('Williams_R', ['Close', 'minimo_14', 'maximo_14'])
+def _williams_r(close, minimo, maximo):
+    return -100 * ((maximo - close) / (maximo - minimo))
+
+
+@indicador('CCI', ['preco_tipico'], usa_kernels=True, janela=20)
+def _cci(tp, janela, motor):
+    media = _media(tp, janela, motor)
+    mad = _serie((motor or kernels).desvio_medio_absoluto(_array(tp), janela), tp)
+    return (tp - media) / (0.015 * mad)
@@ -0,0 +1,109 @@
+"""Regressão polinomial por mínimos quadrados em NumPy, sem scikit-learn.
+
+O eixo x é reescalado para [-1, 1] antes de montar a matriz de Vandermonde,
+o que mantém o problema bem condicionado mesmo em grau 3 com x em dias
+corridos, e o ajuste é resolvido por QR. Os coeficientes ficam em cache por
+série, então horizontes diferentes reaproveitam o mesmo ajuste.
+
+``prever_lote`` avalia vários modelos de uma vez com uma única operação
+matricial. É só de biblioteca: as rotas com vários símbolos (``/data/batch``,
+``/download``, triagem) calculam cada símbolo assim que os dados chegam, no
+pool de cálculo, e por isso chamam ``prever_precos`` um símbolo por vez.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import reamostragem
+from cache import CacheResultados
+
+# Chaves incluem a impressão digital dos dados, então o ajuste nunca fica velho
+modelos = CacheResultados(ttl=24 * 3600, max_itens=4096, max_bytes=16 * 1024 * 1024)
+
+
+class ModeloPolinomial:
+
+    def __init__(self, coeficientes, centro, escala):
+        self.coeficientes = coeficientes
+        self.centro = centro
+        self.escala = escala
+
+    @property
+    def grau(self):
+        return len(self.coeficientes) - 1
+
+    @property
+    def nbytes(self):
+        return self.coeficientes.nbytes + 16
+
+    def _escalar(self, x):
+        return (np.asarray(x, dtype=float) - self.centro) / self.escala
+
+    def prever(self, x):
+        return np.polynomial.polynomial.polyval(self._escalar(x), self.coeficientes)
+
+    def __repr__(self):
+        return f'ModeloPolinomial(grau={self.grau}, centro={self.centro}, escala={self.escala})'
+
+
+def ajustar(x, y, grau):
+    """Ajusta ``y ~ polinômio(x)`` de grau ``grau``"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        raise ValueError('Sem dados suficientes para a previsão')
+
+    centro = (x.max() + x.min()) / 2
+    escala = (x.max() - x.min()) / 2 or 1.0
+    vandermonde = np.vander((x - centro) / escala, grau + 1, increasing=True)
+    if len(x) > grau:
+        q, r = np.linalg.qr(vandermonde)
+        coeficientes = np.linalg.solve(r, q.T @ y)
+    else:
+        # Menos pontos que coeficientes: solução de norma mínima, como o sklearn
+        coeficientes = np.linalg.lstsq(vandermonde, y, rcond=None)[0]
+    return ModeloPolinomial(coeficientes, centro, escala)
+
+
+def _impressao(x, y):
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(np.ascontiguousarray(x, dtype=float).tobytes())
+    resumo.update(np.ascontiguousarray(y, dtype=float).tobytes())
+    return resumo.hexdigest()
+
+
+def obter_modelo(x, y, grau, chave=None):
+    """Ajuste em cache por ``chave`` (ex: símbolo) e pelo conteúdo da janela"""
+    if chave is None:
+        return ajustar(x, y, grau)
+    return modelos.obter_ou_calcular(
+        (chave, grau, _impressao(x, y)), lambda: ajustar(x, y, grau)
+    )
+
+
+def prever_lote(lista_modelos, xs):
+    """Avalia vários modelos de mesmo grau de uma vez.
+
+    ``xs`` tem forma ``(modelos, pontos)`` (ou ``(pontos,)``, comum a todos).
+    Retorna uma matriz ``(modelos, pontos)``.
+    """
+    coeficientes = np.stack([m.coeficientes for m in lista_modelos])
+    centros = np.array([m.centro for m in lista_modelos])[:, None]
+    escalas = np.array([m.escala for m in lista_modelos])[:, None]
+    t = (np.atleast_2d(np.asarray(xs, dtype=float)) - centros) / escalas
+    potencias = t[..., None] ** np.arange(coeficientes.shape[1])
+    return np.einsum('mpg,mg->mp', potencias, coeficientes)
+
+
+def datas_futuras(ultima, passos, intervalo='1day'):
+    """``passos`` barras de ``intervalo`` após ``ultima``.
+
+    O calendário de pregões é ignorado: o diário segue em dias corridos e o
+    intradiário de ``intervalo`` em ``intervalo``.
+    """
+    ultima = pd.Timestamp(ultima)
+    k = np.arange(1, passos + 1)
+    if intervalo == '1month':
+        return pd.DatetimeIndex([ultima + pd.DateOffset(months=int(i)) for i in k])
+    return ultima + pd.to_timedelta(k * reamostragem.MINUTOS[intervalo], unit='min')
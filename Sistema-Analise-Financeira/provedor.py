@@ -0,0 +1,250 @@
+"""Cliente HTTP compartilhado para a API da Twelve Data.
+
+Reaproveita conexões (keep-alive) por meio de uma ``requests.Session`` com
+pool, aplica timeouts, repete com backoff exponencial em 429/5xx/falhas de
+rede e passa cada chamada pelos token buckets configurados.
+``ClienteAssincrono`` oferece a mesma política para o modo ASGI.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from limitador import BaldeTokens
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+URL_PADRAO = 'https://api.twelvedata.com'
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ProvedorIndisponivel(ConnectionError):
+    """Provedor fora do ar ou limitando chamadas mesmo após as novas tentativas"""
+
+
+class MetricasCliente:
+    """Contadores e histograma de latência das chamadas ao provedor"""
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        self._trava = threading.Lock()
+        self.baldes = [0] * (len(limites) + 1)
+        self.soma_latencia = 0.0
+        self.requisicoes = 0
+        self.novas_tentativas = 0
+        self.limitacoes = 0
+        self.erros = 0
+
+    def observar(self, segundos):
+        with self._trava:
+            self.baldes[bisect_left(self.limites, segundos)] += 1
+            self.soma_latencia += segundos
+            self.requisicoes += 1
+
+    def incrementar(self, nome):
+        with self._trava:
+            setattr(self, nome, getattr(self, nome) + 1)
+
+    def resumo(self):
+        with self._trava:
+            return {
+                'requisicoes': self.requisicoes,
+                'novas_tentativas': self.novas_tentativas,
+                'limitacoes': self.limitacoes,
+                'erros': self.erros,
+                'soma_latencia': self.soma_latencia,
+                'histograma': dict(zip(
+                    [str(l) for l in self.limites] + ['+Inf'], self.baldes
+                ))
+            }
+
+
+class ClienteTwelveData:
+
+    def __init__(self, api_key, base_url=URL_PADRAO, timeout=(3.05, 15), tentativas=3,
+                 espera_base=0.5, espera_maxima=30.0, limitadores=(), tamanho_pool=10,
+                 dormir=time.sleep):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.limitadores = list(limitadores)
+        self.metricas = MetricasCliente()
+        self._dormir = dormir
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+        self.sessao.mount('https://', adaptador)
+        self.sessao.mount('http://', adaptador)
+
+    def _espera(self, tentativa, resposta=None):
+        if resposta is not None:
+            retry_after = resposta.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.espera_maxima)
+        return min(self.espera_base * (2 ** tentativa), self.espera_maxima)
+
+    def _preparar(self, caminho, params):
+        return f'{self.base_url}/{caminho.lstrip("/")}', dict(params, apikey=self.api_key)
+
+    def _avaliar(self, resposta):
+        """``(dados, motivo, limitado)``; ``dados`` é None se a chamada deve ser repetida"""
+        if resposta.status_code == 429 or resposta.status_code >= 500:
+            return None, f'HTTP {resposta.status_code}', resposta.status_code == 429
+        dados = resposta.json()
+        # A Twelve Data também sinaliza limite estourado no corpo do JSON
+        if isinstance(dados, dict) and dados.get('code') == 429:
+            return None, dados.get('message', 'API rate limit exceeded'), True
+        return dados, None, False
+
+    def _falhou(self, tentativa, motivo, limitado, resposta):
+        """Registra a falha e retorna a espera antes da próxima tentativa (None se acabaram)"""
+        if limitado:
+            self.metricas.incrementar('limitacoes')
+        if tentativa < self.tentativas:
+            espera = self._espera(tentativa, resposta)
+            logger.warning("Twelve Data: %s, nova tentativa em %.1fs", motivo, espera)
+            return espera
+        self.metricas.incrementar('erros')
+        return None
+
+    def requisitar(self, caminho, params):
+        """GET em ``caminho`` devolvendo o JSON; repete em falhas temporárias"""
+        url, params = self._preparar(caminho, params)
+
+        for tentativa in range(self.tentativas + 1):
+            if tentativa:
+                self.metricas.incrementar('novas_tentativas')
+            for limitador in self.limitadores:
+                limitador.adquirir()
+
+            resposta = None
+            limitado = False
+            inicio = time.perf_counter()
+            try:
+                resposta = self.sessao.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                motivo = str(e)
+            else:
+                dados, motivo, limitado = self._avaliar(resposta)
+            finally:
+                self.metricas.observar(time.perf_counter() - inicio)
+            if motivo is None:
+                return dados
+
+            espera = self._falhou(tentativa, motivo, limitado, resposta)
+            if espera is None:
+                raise ProvedorIndisponivel(f'Provedor de dados indisponível: {motivo}')
+            self._dormir(espera)
+
+    def serie_temporal(self, symbol, interval='1day', **params):
+        params = {k: v for k, v in params.items() if v is not None}
+        return self.requisitar('time_series', dict(params, symbol=symbol, interval=interval))
+
+
+class ClienteAssincrono:
+    """Versão asyncio do cliente, com a mesma política de tentativas e limites.
+
+    Compartilha configuração, token buckets e métricas com o cliente
+    síncrono. Usa ``httpx.AsyncClient`` quando instalado; sem ele cada
+    chamada roda o cliente síncrono num pool de threads próprio, do tamanho
+    do pool de conexões, o que ainda libera o loop.
+    """
+
+    def __init__(self, sincrono, tamanho_pool=10):
+        self.sincrono = sincrono
+        self.http = None
+        self._threads = None
+        if httpx is None:
+            self._threads = ThreadPoolExecutor(tamanho_pool, thread_name_prefix='provedor')
+        else:
+            conectar, ler = sincrono.timeout
+            self.http = httpx.AsyncClient(
+                timeout=httpx.Timeout(ler, connect=conectar),
+                limits=httpx.Limits(max_connections=tamanho_pool,
+                                    max_keepalive_connections=tamanho_pool)
+            )
+
+    async def requisitar(self, caminho, params):
+        if self.http is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._threads, self.sincrono.requisitar, caminho, params
+            )
+
+        cliente = self.sincrono
+        url, params = cliente._preparar(caminho, params)
+        for tentativa in range(cliente.tentativas + 1):
+            if tentativa:
+                cliente.metricas.incrementar('novas_tentativas')
+            for limitador in cliente.limitadores:
+                await limitador.adquirir_assincrono()
+
+            resposta = None
+            limitado = False
+            inicio = time.perf_counter()
+            try:
+                resposta = await self.http.get(url, params=params)
+            except httpx.TransportError as e:
+                motivo = str(e) or type(e).__name__
+            else:
+                dados, motivo, limitado = cliente._avaliar(resposta)
+            finally:
+                cliente.metricas.observar(time.perf_counter() - inicio)
+            if motivo is None:
+                return dados
+
+            espera = cliente._falhou(tentativa, motivo, limitado, resposta)
+            if espera is None:
+                raise ProvedorIndisponivel(f'Provedor de dados indisponível: {motivo}')
+            await asyncio.sleep(espera)
+
+    async def serie_temporal(self, symbol, interval='1day', **params):
+        params = {k: v for k, v in params.items() if v is not None}
+        return await self.requisitar('time_series', dict(params, symbol=symbol, interval=interval))
+
+
+_cliente = None
+_cliente_assincrono = None
+_trava_cliente = threading.Lock()
+
+
+def obter_cliente():
+    """Cliente compartilhado, criado no primeiro uso a partir do Config"""
+    global _cliente
+    with _trava_cliente:
+        if _cliente is None:
+            _cliente = ClienteTwelveData(
+                Config.TWELVE_API_KEY,
+                base_url=Config.TWELVE_BASE_URL,
+                timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT),
+                tentativas=Config.HTTP_RETRIES,
+                limitadores=[
+                    BaldeTokens.de_texto(Config.TWELVE_RATE_LIMIT),
+                    BaldeTokens.de_texto(Config.RATE_LIMIT),
+                ],
+                tamanho_pool=Config.HTTP_POOL_SIZE
+            )
+        return _cliente
+
+
+def obter_cliente_assincrono():
+    """Cliente assíncrono compartilhado, sobre o cliente síncrono do ``obter_cliente``"""
+    global _cliente_assincrono
+    sincrono = obter_cliente()
+    with _trava_cliente:
+        if _cliente_assincrono is None or _cliente_assincrono.sincrono is not sincrono:
+            _cliente_assincrono = ClienteAssincrono(sincrono, Config.HTTP_POOL_SIZE)
+        return _cliente_assincrono
@@ -0,0 +1,135 @@
+"""Intervalos de barras e reamostragem vetorizada de OHLCV.
+
+As barras intradiárias ficam no armazém só na granularidade base
+(``Config.INTRADAY_BASE_INTERVAL``) e as diárias em ``1day``; os intervalos
+mais longos são derivados delas na hora, sem nova ida ao provedor.
+
+A reamostragem exige barras em ordem cronológica (como o armazém devolve):
+cada barra recebe a chave do seu grupo, as fronteiras saem de um ``diff`` e
+cada coluna é agregada com um único ``ufunc.reduceat`` (Open primeira, High
+máxima, Low mínima, Close última, Volume soma). Os grupos intradiários
+começam na primeira barra de cada dia, como os da Twelve Data (barras de 1h
+às 09:30, 10:30, ...), as semanas na segunda-feira e os meses no dia 1.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+NS_MINUTO = 60 * 10**9
+NS_DIA = 24 * 60 * NS_MINUTO
+# Pregão regular da bolsa americana: 09:30 às 16:00
+MINUTOS_PREGAO = 390
+
+# Duração de cada intervalo da Twelve Data (semana e mês são de calendário)
+MINUTOS = {
+    '1min': 1, '5min': 5, '15min': 15, '30min': 30, '45min': 45,
+    '1h': 60, '2h': 120, '4h': 240,
+    '1day': 24 * 60, '1week': 7 * 24 * 60, '1month': 31 * 24 * 60,
+}
+INTERVALOS = tuple(MINUTOS)
+COLUNAS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def validar(intervalo):
+    if intervalo not in MINUTOS:
+        raise ValueError(f"Intervalo inválido: {intervalo} (use {', '.join(INTERVALOS)})")
+    return intervalo
+
+
+def intradiario(intervalo):
+    return MINUTOS[intervalo] < MINUTOS['1day']
+
+
+def formato_data(intervalo):
+    """Formato das datas nas respostas: com hora só nos intervalos intradiários"""
+    return '%Y-%m-%d %H:%M:%S' if intradiario(intervalo) else '%Y-%m-%d'
+
+
+def dias_corridos(intervalo, barras):
+    """Dias corridos que contêm ao menos ``barras`` barras de ``intervalo``.
+
+    Conta cinco pregões a cada sete dias, com folga para os feriados; usado
+    para recuar o início da busca e aquecer os indicadores.
+    """
+    validar(intervalo)
+    if not intradiario(intervalo) and intervalo != '1day':
+        return barras * MINUTOS[intervalo] // MINUTOS['1day'] + 31
+    pregoes = barras
+    if intradiario(intervalo):
+        pregoes = math.ceil(barras / math.ceil(MINUTOS_PREGAO / MINUTOS[intervalo]))
+    return math.ceil(pregoes * 1.5) + 7
+
+
+def derivavel(origem, destino):
+    """Se as barras de ``destino`` podem ser montadas a partir das de ``origem``"""
+    if origem == destino:
+        return True
+    if not intradiario(destino):
+        # Semana e mês saem do diário; o diário vem sempre do provedor, porque o
+        # fechamento oficial não é o da última barra intradiária
+        return origem == '1day'
+    return intradiario(origem) and MINUTOS[destino] % MINUTOS[origem] == 0
+
+
+def intervalo_base(intervalo, base_intradiaria):
+    """Intervalo gravado no armazém do qual ``intervalo`` é derivado"""
+    validar(intervalo)
+    if not intradiario(intervalo):
+        return '1day'
+    if derivavel(base_intradiaria, intervalo):
+        return base_intradiaria
+    return intervalo
+
+
+def _grupos(ns, intervalo):
+    """Chave do grupo e início (rótulo) do grupo de cada barra"""
+    dias = ns // NS_DIA
+    if intervalo == '1month':
+        meses = ns.astype('datetime64[ns]').astype('datetime64[M]')
+        return meses.astype('int64'), meses.astype('datetime64[ns]').astype('int64')
+    if intervalo == '1week':
+        # 1970-01-01 foi uma quinta: semanas de segunda a domingo
+        semanas = (dias + 3) // 7
+        return semanas, (semanas * 7 - 3) * NS_DIA
+    if intervalo == '1day':
+        return dias, dias * NS_DIA
+
+    passo = MINUTOS[intervalo] * NS_MINUTO
+    inicios = np.flatnonzero(np.diff(dias)) + 1
+    inicios = np.concatenate(([0], inicios))
+    primeira = np.repeat(ns[inicios], np.diff(np.append(inicios, len(ns))))
+    posicao = (ns - primeira) // passo
+    return dias * (NS_DIA // passo + 1) + posicao, primeira + posicao * passo
+
+
+def agregar(ns, abertura, maxima, minima, fechamento, volume, intervalo):
+    """Reamostra arrays de barras ordenadas; ``ns`` são datas em int64 (ns).
+
+    Retorna ``(ns, abertura, maxima, minima, fechamento, volume)`` agregados.
+    """
+    ns = np.asarray(ns, dtype='int64')
+    if not len(ns):
+        return (ns, *(np.asarray(c, dtype=float) for c in
+                      (abertura, maxima, minima, fechamento, volume)))
+    chaves, rotulos = _grupos(ns, validar(intervalo))
+    inicios = np.concatenate(([0], np.flatnonzero(np.diff(chaves)) + 1))
+    finais = np.append(inicios[1:], len(ns)) - 1
+    return (
+        rotulos[inicios],
+        np.asarray(abertura)[inicios],
+        np.maximum.reduceat(np.asarray(maxima), inicios),
+        np.minimum.reduceat(np.asarray(minima), inicios),
+        np.asarray(fechamento)[finais],
+        np.add.reduceat(np.asarray(volume), inicios),
+    )
+
+
+def reamostrar(df, intervalo):
+    """DataFrame OHLCV (índice de datas em ordem) nas barras de ``intervalo``"""
+    ns = df.index.values.astype('datetime64[ns]').astype('int64')
+    datas, *valores = agregar(ns, *(df[col].to_numpy() for col in COLUNAS), intervalo)
+    return pd.DataFrame(
+        dict(zip(COLUNAS, valores)),
+        index=pd.DatetimeIndex(datas.astype('datetime64[ns]'), name=df.index.name)
+    )
@@ -0,0 +1,120 @@
+"""Compressão e validadores HTTP das respostas.
+
+Corpos acima de ``Config.COMPRESS_MIN_BYTES`` saem em brotli (se o pacote
+estiver instalado) ou gzip, conforme o ``Accept-Encoding`` do cliente; um
+histórico longo do /data cai para cerca de um quinto. Respostas em streaming
+(NDJSON, SSE) passam direto: comprimir exigiria segurar os blocos.
+
+O ETag de uma representação comprimida ganha o sufixo da codificação (o
+corpo é outro), mas a comparação do ``If-None-Match`` ignora o sufixo: o
+cliente que guardou a versão em gzip recebe 304 do mesmo jeito.
+
+Os arquivos estáticos são servidos com ``?v=<hash do conteúdo>`` na URL
+(``impressao_digital``); com a versão na URL eles podem ficar um ano no
+cache do navegador, porque qualquer mudança gera outra URL.
+"""
+import gzip
+import hashlib
+import importlib.util
+import os
+from functools import lru_cache
+
+from werkzeug.http import parse_accept_header
+
+from config import Config
+
+# brotli é opcional: sem ele as respostas saem em gzip
+BROTLI_DISPONIVEL = importlib.util.find_spec('brotli') is not None
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/javascript', 'text/')
+# Tipos transmitidos bloco a bloco, que nunca são segurados para comprimir
+TIPOS_EM_STREAMING = ('application/x-ndjson', 'text/event-stream')
+UM_ANO = 365 * 24 * 3600
+
+
+def codificacoes():
+    return ('br', 'gzip') if BROTLI_DISPONIVEL else ('gzip',)
+
+
+def escolher_codificacao(accept_encoding):
+    """Melhor codificação aceita pelo cliente, ou ``None``"""
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(codificacoes())
+
+
+def comprimir(corpo, codificacao):
+    if codificacao == 'br':
+        import brotli
+        return brotli.compress(corpo, quality=Config.COMPRESS_LEVEL)
+    # mtime fixo: o mesmo corpo gera sempre os mesmos bytes
+    return gzip.compress(corpo, compresslevel=Config.COMPRESS_LEVEL, mtime=0)
+
+
+def comprimivel(tipo):
+    tipo = (tipo or '').split(';')[0].strip()
+    return tipo.startswith(TIPOS_COMPRIMIVEIS) and tipo not in TIPOS_EM_STREAMING
+
+
+def comprimir_resposta(resposta, accept_encoding):
+    """Comprime o corpo de uma resposta Flask quando vale a pena"""
+    if (resposta.status_code != 200 or 'Content-Encoding' in resposta.headers
+            or not comprimivel(resposta.mimetype)):
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+    if resposta.is_streamed and not resposta.direct_passthrough:
+        return resposta
+    tamanho = resposta.content_length
+    if tamanho is not None and tamanho < Config.COMPRESS_MIN_BYTES:
+        return resposta
+    codificacao = escolher_codificacao(accept_encoding)
+    if codificacao is None:
+        return resposta
+    # Arquivos (send_file) chegam como iterador: lidos aqui, são pequenos
+    resposta.direct_passthrough = False
+    corpo = resposta.get_data()
+    if len(corpo) < Config.COMPRESS_MIN_BYTES:
+        return resposta
+    resposta.set_data(comprimir(corpo, codificacao))
+    resposta.headers['Content-Encoding'] = codificacao
+    etag, fraco = resposta.get_etag()
+    if etag:
+        resposta.set_etag(f'{etag}-{codificacao}', weak=fraco)
+    return resposta
+
+
+# VALIDADORES
+
+def etag(*partes):
+    """ETag forte a partir do que determina o corpo"""
+    return hashlib.blake2b(repr(partes).encode(), digest_size=16).hexdigest()
+
+
+def sem_codificacao(tag):
+    for codificacao in ('br', 'gzip'):
+        if tag.endswith(f'-{codificacao}'):
+            return tag[:-len(codificacao) - 1]
+    return tag
+
+
+def corresponde(if_none_match, tag):
+    """Se o ``If-None-Match`` (``werkzeug.datastructures.ETags``) já tem ``tag``"""
+    if if_none_match.star_tag:
+        return True
+    return any(sem_codificacao(t) == tag for t in if_none_match.as_set(include_weak=True))
+
+
+# ESTÁTICOS
+
+@lru_cache(maxsize=64)
+def _hash_arquivo(caminho, modificado):
+    with open(caminho, 'rb') as arquivo:
+        return hashlib.blake2b(arquivo.read(), digest_size=6).hexdigest()
+
+
+def impressao_digital(pasta, nome):
+    """Hash curto do conteúdo de um arquivo estático (recalculado se ele mudar)"""
+    caminho = os.path.join(pasta, nome)
+    try:
+        return _hash_arquivo(caminho, os.stat(caminho).st_mtime_ns)
+    except OSError:
+        return None
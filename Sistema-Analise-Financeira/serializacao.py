@@ -0,0 +1,97 @@
+"""Serialização vetorizada das respostas JSON do /data."""
+import json
+
+import numpy as np
+import pandas as pd
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CAMPOS_HISTORICO = [
+    'Date', 'Open', 'High', 'Low', 'Close', 'Volume',
+    'SMA_20', 'SMA_50', 'EMA_12', 'EMA_26', 'RSI', 'MACD', 'MACD_Signal',
+    'Upper_Band', 'Lower_Band', 'Pred'
+]
+CAMPOS_FUTURO = ['Date', 'Pred']
+# Bandas de confiança, quando a previsão foi avaliada
+CAMPOS_BANDAS = ['Lower', 'Upper']
+
+FORMATOS = ('rows', 'columnar')
+
+
+def _lista(valores):
+    """Converte um array em lista Python trocando NaN por None de uma vez"""
+    valores = np.asarray(valores)
+    if valores.dtype.kind in 'iub':
+        return valores.tolist()
+    if valores.dtype == np.float32:
+        # Representação mais curta do float32 (183.3946 e não 183.39459228515625)
+        valores = valores.astype(str)
+    valores = valores.astype(float)
+    ausentes = np.isnan(valores)
+    if not ausentes.any():
+        return valores.tolist()
+    objetos = valores.astype(object)
+    objetos[ausentes] = None
+    return objetos.tolist()
+
+
+def matriz(valores):
+    """Array de qualquer dimensão em listas aninhadas (NaN vira None)"""
+    return _lista(valores)
+
+
+def colunas(df, campos, formato_data='%Y-%m-%d'):
+    """Dicionário campo -> lista, pronto para JSON.
+
+    ``Date`` vem do índice, a menos que exista como coluna. ``Volume`` é
+    convertido para inteiro como no formato original e colunas de texto
+    seguem sem conversão.
+    """
+    saida = {}
+    for campo in campos:
+        if campo == 'Date':
+            datas = df['Date'] if 'Date' in df.columns else df.index
+            saida[campo] = pd.DatetimeIndex(datas).strftime(formato_data).tolist()
+        elif campo == 'Volume':
+            saida[campo] = df[campo].to_numpy().astype('int64').tolist()
+        elif not pd.api.types.is_numeric_dtype(df[campo]):
+            # Texto (ex: Symbol da triagem) segue como está
+            saida[campo] = df[campo].tolist()
+        else:
+            saida[campo] = _lista(df[campo].to_numpy())
+    return saida
+
+
+def linhas(cols):
+    """Transforma o formato colunar em lista de registros (um dict por linha)"""
+    campos = list(cols)
+    return [dict(zip(campos, valores)) for valores in zip(*cols.values())]
+
+
+def serializar(df, campos, formato='rows', formato_data='%Y-%m-%d'):
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {' ou '.join(FORMATOS)})")
+    cols = colunas(df, campos, formato_data)
+    return cols if formato == 'columnar' else linhas(cols)
+
+
+def serializar_futuro(futuro, formato='rows', formato_data='%Y-%m-%d'):
+    """Previsão futura (lista de dicts), com as bandas quando existirem"""
+    df = pd.DataFrame(futuro)
+    campos = CAMPOS_FUTURO + [c for c in CAMPOS_BANDAS if c in df.columns]
+    return serializar(df, campos, formato, formato_data)
+
+
+def dumps(obj):
+    """Codifica em JSON (bytes), usando orjson quando instalado"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def resposta_json(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype='application/json')
@@ -1,40 +1,51 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify
 import pandas as pd
-import numpy as np
-import datetime as dt
-from sklearn.pipeline import make_pipeline
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-import io
-import requests
 from dotenv import load_dotenv
 import os
+from armazenamento import ArmazemOHLCV
+from cache import CacheResultados
+import motor_indicadores
+import previsao
+import serializacao
+import provedor
+import exportacao
+from config import Config
 
 load_dotenv()
 API_KEY = os.getenv('TWELVE_API_KEY')
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
+armazem = ArmazemOHLCV(Config.DATA_STORE_DIR)
+cache_resultados = CacheResultados(
+    Config.CACHE_TIMEOUT, Config.CACHE_MAX_ITEMS, Config.CACHE_MAX_BYTES
+)
+
+SEM_DADOS = "No data is available"
 
 
 
 # BAIXAR DADOS DA API
 
 def baixar_dados(ticker, start, end):
-    url = "https://api.twelvedata.com/time_series"
-    params = {
-        "symbol": ticker,
-        "interval": "1day",
-        "apikey": API_KEY,
-        "start_date": start,
-        "end_date": end,
-        "format": "JSON",
-        "outputsize": 5000
-    }
-
-    response = requests.get(url, params=params)
-    data = response.json()
+    # Sem período definido não há como saber o que já está em disco
+    if not start or not end:
+        return _buscar_api(ticker, start, end)
+    return armazem.obter(
+        ticker, "1day", start, end,
+        lambda inicio, fim: _buscar_api(ticker, inicio, fim),
+        limite=5000
+    )
+
+
+def _buscar_api(ticker, start, end):
+    data = provedor.obter_cliente().serie_temporal(
+        ticker, "1day", start_date=start, end_date=end, format="JSON", outputsize=5000
+    )
 
     if "status" in data and data["status"] == "error":
+        # Período sem pregão (feriado) não é erro para o armazém local
+        if SEM_DADOS in data.get("message", ""):
+            return pd.DataFrame()
         print("Erro da API:", data["message"])
         return None
 
@@ -66,71 +77,33 @@ def baixar_dados(ticker, start, end):
 
 # INDICADORES
 
-def calcular_indicadores(df):
-    df = df.copy()
-
-    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-
-    delta = df['Close'].diff()
-    ganho = delta.clip(lower=0)
-    perda = -delta.clip(upper=0)
-    media_ganho = ganho.rolling(window=14).mean()
-    media_perda = perda.rolling(window=14).mean()
-    rs = media_ganho / media_perda
-    df['RSI'] = 100 - (100 / (1 + rs))
-
-    ema_12 = df['Close'].ewm(span=12, adjust=False).mean()
-    ema_26 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = ema_12 - ema_26
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-
-    df['Middle_Band'] = df['Close'].rolling(window=20).mean()
-    std = df['Close'].rolling(window=20).std()
-    df['Upper_Band'] = df['Middle_Band'] + (2 * std)
-    df['Lower_Band'] = df['Middle_Band'] - (2 * std)
-
-    high_low = df['High'] - df['Low']
-    high_close = (df['High'] - df['Close'].shift()).abs()
-    low_close = (df['Low'] - df['Close'].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    df['ATR_14'] = tr.rolling(window=14).mean()
-
-    obv = [0]
-    for i in range(1, len(df)):
-        if df['Close'].iloc[i] > df['Close'].iloc[i - 1]:
-            obv.append(obv[-1] + df['Volume'].iloc[i])
-        elif df['Close'].iloc[i] < df['Close'].iloc[i - 1]:
-            obv.append(obv[-1] - df['Volume'].iloc[i])
-        else:
-            obv.append(obv[-1])
-    df['OBV'] = obv
+INDICADORES = [
+    'EMA_12', 'EMA_26', 'SMA_20', 'SMA_50', 'RSI', 'MACD', 'MACD_Signal',
+    'Middle_Band', 'Upper_Band', 'Lower_Band', 'ATR_14', 'OBV'
+]
 
-    return df
+
+def calcular_indicadores(df, indicadores=None):
+    return motor_indicadores.calcular(df, indicadores or INDICADORES, ajuste_ema=False)
 
 
 # PREVISÃO
 
-def prever_precos(df, dias_a_frente=30, grau=3):
-    df = df.copy()
+def prever_precos(df, dias_a_frente=30, grau=3, ticker=None):
+    # Cópia rasa: só índice e a coluna Pred novos, sem duplicar os dados
+    df = df.copy(deep=False)
     df.index = pd.to_datetime(df.index)
 
-    dias = (df.index - df.index.min()).days.values.reshape(-1, 1)
-    y = df['Close'].values
-
-    modelo = make_pipeline(PolynomialFeatures(degree=grau), LinearRegression())
-    modelo.fit(dias, y)
+    inicio = df.index.min()
+    dias = (df.index - inicio).days.to_numpy()
+    y = df['Close'].to_numpy()
 
-    df['Pred'] = modelo.predict(dias)
+    modelo = previsao.obter_modelo(dias, y, grau, chave=ticker)
 
-    last_day = df.index.max()
-    future_dates = [last_day + dt.timedelta(days=i) for i in range(1, dias_a_frente + 1)]
-    future_days = np.array([(d - df.index.min()).days for d in future_dates]).reshape(-1, 1)
+    df['Pred'] = modelo.prever(dias)
 
-    future_preds = modelo.predict(future_days)
+    future_dates = previsao.datas_futuras(df.index.max(), dias_a_frente)
+    future_preds = modelo.prever((future_dates - inicio).days.to_numpy())
 
     future_df = pd.DataFrame({
         'Date': future_dates,
@@ -141,6 +114,26 @@ def prever_precos(df, dias_a_frente=30, grau=3):
 
 
 
+# PIPELINE
+
+class DadosIndisponiveis(Exception):
+    pass
+
+
+def analisar(ticker, start, end, horizon):
+    def calcular():
+        df = baixar_dados(ticker, start, end)
+        if df is None:
+            # Exceção em vez de None para que a falha não fique em cache
+            raise DadosIndisponiveis(ticker)
+        df = calcular_indicadores(df)
+        return prever_precos(df, horizon, ticker=ticker)
+
+    chave = (ticker.upper(), start, end, horizon)
+    return cache_resultados.obter_ou_calcular(chave, calcular)
+
+
+
 # ROTAS
 
 @app.route('/')
@@ -159,60 +152,35 @@ def get_data():
         start = payload.get("start")
         end = payload.get("end")
         horizon = int(payload.get("horizon", 30))
+        formato = payload.get("format", "rows")
+        if formato not in serializacao.FORMATOS:
+            return jsonify({"error": f"Formato inválido: {formato}"}), 400
         
         print(f"Parâmetros: symbol={symbol}, start={start}, end={end}, horizon={horizon}")
 
-        # Baixar dados históricos
-        df = baixar_dados(symbol, start, end)
-        if df is None:
+        # Dados históricos, indicadores e previsão (com cache em memória)
+        try:
+            df_with_preds, future_df = analisar(symbol, start, end, horizon)
+        except DadosIndisponiveis:
             return jsonify({"error": "Erro ao baixar dados do ticker"}), 400
+        except provedor.ProvedorIndisponivel as e:
+            return jsonify({"error": str(e)}), 503
 
-        # Calcular indicadores
-        df = calcular_indicadores(df)
-        
-        # Fazer previsão
-        df_with_preds, future_df = prever_precos(df, horizon)
-
-        # Preparar dados para o frontend
-        candles = []
-        for idx, row in df_with_preds.iterrows():
-            candles.append({
-                "Date": idx.strftime("%Y-%m-%d"),
-                "Open": float(row["Open"]),
-                "High": float(row["High"]),
-                "Low": float(row["Low"]),
-                "Close": float(row["Close"]),
-                "Volume": int(row["Volume"]),
-                "SMA_20": float(row["SMA_20"]) if pd.notna(row["SMA_20"]) else None,
-                "SMA_50": float(row["SMA_50"]) if pd.notna(row["SMA_50"]) else None,
-                "EMA_12": float(row["EMA_12"]) if pd.notna(row["EMA_12"]) else None,
-                "EMA_26": float(row["EMA_26"]) if pd.notna(row["EMA_26"]) else None,
-                "RSI": float(row["RSI"]) if pd.notna(row["RSI"]) else None,
-                "MACD": float(row["MACD"]) if pd.notna(row["MACD"]) else None,
-                "MACD_Signal": float(row["MACD_Signal"]) if pd.notna(row["MACD_Signal"]) else None,
-                "Upper_Band": float(row["Upper_Band"]) if pd.notna(row["Upper_Band"]) else None,
-                "Lower_Band": float(row["Lower_Band"]) if pd.notna(row["Lower_Band"]) else None,
-                "Pred": float(row["Pred"]) if pd.notna(row["Pred"]) else None
-            })
-
-        future_data = []
-        for idx, row in future_df.iterrows():
-            future_data.append({
-                "Date": row["Date"].strftime("%Y-%m-%d"),
-                "Pred": float(row["Pred"])
-            })
-
-        return jsonify({
+        # Preparar dados para o frontend (conversão vetorizada)
+        resposta = {
             "status": "ok",
             "meta": {
                 "symbol": symbol,
                 "name": f"{symbol} Stock",
                 "horizon": horizon
             },
-            "candles": candles,
-            "data": candles,  # Para compatibilidade
-            "future": future_data
-        })
+            "data": serializacao.serializar(df_with_preds, serializacao.CAMPOS_HISTORICO, formato),
+            "future": serializacao.serializar(future_df, serializacao.CAMPOS_FUTURO, formato)
+        }
+        # Cópia em "candles" só para clientes antigos que pedirem: dobra o payload
+        if payload.get("candles"):
+            resposta["candles"] = resposta["data"]
+        return serializacao.resposta_json(resposta)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -225,22 +193,26 @@ def download():
     end = payload.get('end')
     horizon = int(payload.get('horizon', 30))
 
-    df = baixar_dados(ticker, start, end)
-    if df is None:
+    try:
+        df_with_preds, future_df = analisar(ticker, start, end, horizon)
+    except DadosIndisponiveis:
         return jsonify({'error': 'Ticker inválido.'}), 404
+    except provedor.ProvedorIndisponivel as e:
+        return jsonify({'error': str(e)}), 503
 
-    df = calcular_indicadores(df)
-    df_with_preds, future_df = prever_precos(df, horizon)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_with_preds.to_excel(writer, sheet_name='historico')
-        future_df.to_excel(writer, sheet_name='previsao_futura', index=False)
-
-    output.seek(0)
-    filename = f"{ticker}_data.xlsx"
-    return send_file(output, as_attachment=True, download_name=filename)
-
+    formato = payload.get('format', 'xlsx')
+    try:
+        exportacao.validar_formato(formato)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype, extensao = exportacao.FORMATOS[formato]
+    filename = f"{ticker}_data.{extensao}"
+    return Response(
+        exportacao.exportar(formato, [(ticker, df_with_preds, future_df)]),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 if __name__ == '__main__':
     app.run(debug=True)
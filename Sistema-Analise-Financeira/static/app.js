@@ -13,11 +13,9 @@ async function buscarDados() {
     const sel = Array.from(checkboxes).map(cb => cb.value);
 
     try {
-        const res = await fetch('/data', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ symbol: ticker, start, end, horizon })
-        });
+        // GET: o navegador guarda a resposta e revalida pelo ETag (304 sem corpo)
+        const params = new URLSearchParams({ symbol: ticker, start, end, horizon });
+        const res = await fetch(`/data?${params}`);
 
         const payload = await res.json();
         if (!res.ok) {
@@ -217,6 +215,29 @@ function montarGraficos(payload, indicadores) {
     // 5. PREVISÃO - Multi-linha colorida
     const futureDates = future.map(f => f.Date);
     const futurePreds = future.map(f => f.Pred);
+    // Faixa de confiança da avaliação walk-forward (ausente em séries curtas).
+    // Vai depois das linhas: o Preço Real segue como traço 0 (aplicarBarras)
+    const bandas = future.length && future[0].Lower !== undefined ? [
+        {
+            x: futureDates,
+            y: future.map(f => f.Lower),
+            type: 'scatter',
+            mode: 'lines',
+            line: { width: 0 },
+            hoverinfo: 'skip',
+            showlegend: false
+        },
+        {
+            x: futureDates,
+            y: future.map(f => f.Upper),
+            type: 'scatter',
+            mode: 'lines',
+            name: 'Faixa de confiança',
+            fill: 'tonexty',
+            fillcolor: 'rgba(239, 68, 68, 0.15)',
+            line: { width: 0 }
+        }
+    ] : [];
 
     Plotly.newPlot('previsao', [
         {
@@ -243,11 +264,12 @@ function montarGraficos(payload, indicadores) {
             name: 'Previsão Futura',
             line: { color: '#ef4444', width: 3 },
             marker: { size: 8, color: '#ef4444' }
-        }
+        },
+        ...bandas
     ], {
         ...baseLayout,
         title: { 
-            text: `🔮 Previsão ${meta.horizon} dias - Machine Learning`,
+            text: `🔮 Previsão ${meta.horizon} dias - ${meta.model || 'Machine Learning'}`,
             font: { size: 20, color: '#ffffff' }
         },
         yaxis: { ...baseLayout.yaxis, title: 'Preço (USD)' },
@@ -255,6 +277,69 @@ function montarGraficos(payload, indicadores) {
     }, {responsive: true, displayModeBar: true});
 }
 
+// AO VIVO: snapshot uma vez por /stream e depois só as barras novas
+let fonteAoVivo = null;
+let payloadAoVivo = null;
+
+function acompanharAoVivo() {
+    const botao = document.getElementById('ao-vivo');
+    if (fonteAoVivo) {
+        fonteAoVivo.close();
+        fonteAoVivo = null;
+        botao.textContent = '🔴 Ao vivo';
+        return;
+    }
+
+    const params = new URLSearchParams({
+        symbol: document.getElementById('ticker').value.trim(),
+        start: document.getElementById('start').value,
+        horizon: document.getElementById('horizon').value
+    });
+    const checkboxes = document.querySelectorAll('.indicator-checkbox input[type="checkbox"]:checked');
+    const sel = Array.from(checkboxes).map(cb => cb.value);
+
+    // O EventSource reconecta sozinho e o servidor manda um snapshot novo
+    fonteAoVivo = new EventSource('/stream?' + params);
+    botao.textContent = '⏹ Parar';
+    fonteAoVivo.addEventListener('snapshot', e => {
+        payloadAoVivo = JSON.parse(e.data);
+        montarGraficos(payloadAoVivo, sel);
+    });
+    fonteAoVivo.addEventListener('bars', e => {
+        if (payloadAoVivo) aplicarBarras(JSON.parse(e.data).bars);
+    });
+    fonteAoVivo.onerror = () => console.warn('Conexão ao vivo interrompida, reconectando...');
+}
+
+function aplicarBarras(barras) {
+    // A barra de mesma data substitui a provisória; as demais são acrescentadas
+    const data = payloadAoVivo.data;
+    barras.forEach(barra => {
+        if (data.length && data[data.length - 1].Date === barra.Date) {
+            data[data.length - 1] = { ...data[data.length - 1], ...barra };
+        } else {
+            data.push(barra);
+        }
+    });
+
+    const dates = data.map(d => d.Date);
+    const closes = data.map(d => d.Close);
+    const volumeColors = closes.map((c, i) => i === 0 || c >= closes[i-1] ? '#10b981' : '#ef4444');
+    const macdHist = data.map(d => (d.MACD || 0) - (d.MACD_Signal || 0));
+
+    // Só os dados das séries mudam; layout e demais traços ficam como estão
+    Plotly.restyle('precos', { x: [dates], y: [closes] }, [0]);
+    Plotly.restyle('volume', { x: [dates], y: [data.map(d => d.Volume)],
+                               'marker.color': [volumeColors] }, [0]);
+    Plotly.restyle('rsi', { x: [dates], y: [data.map(d => d.RSI)] }, [0]);
+    Plotly.restyle('macd', {
+        x: [dates, dates, dates],
+        y: [macdHist, data.map(d => d.MACD), data.map(d => d.MACD_Signal)],
+        'marker.color': [macdHist.map(v => v >= 0 ? '#10b981' : '#ef4444'), null, null]
+    }, [0, 1, 2]);
+    Plotly.restyle('previsao', { x: [dates], y: [closes] }, [0]);
+}
+
 async function baixarExcel() {
     const ticker = document.getElementById('ticker').value.trim();
     const start = document.getElementById('start').value;
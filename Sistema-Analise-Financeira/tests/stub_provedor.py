@@ -0,0 +1,165 @@
+"""Servidor local que imita a API da Twelve Data, para testes e testes de carga."""
+import json
+import tempfile
+import threading
+import time
+import unittest
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+
+def gerar_valores(symbol, start=None, end=None, outputsize=5000, interval='1day'):
+    """Barras determinísticas no formato de ``values`` da Twelve Data"""
+    if interval != '1day':
+        return gerar_intradiario(symbol, start, end, outputsize, interval)
+    fim = pd.Timestamp(end) if end else pd.Timestamp('2024-12-31')
+    inicio = pd.Timestamp(start) if start else fim - pd.Timedelta(days=int(outputsize) * 2)
+    datas = pd.bdate_range(inicio, fim)[-int(outputsize):]
+    semente = sum(ord(c) for c in symbol)
+    rng = np.random.default_rng(semente)
+    # Passeio aleatório contínuo: a mesma data tem o mesmo preço em qualquer janela
+    dias = (datas - pd.Timestamp('2000-01-01')).days.to_numpy()
+    close = 100 + 10 * np.sin(dias / 50 + semente) + dias * 0.01
+    valores = []
+    for data, c in zip(datas[::-1], close[::-1]):
+        valores.append({
+            'datetime': data.strftime('%Y-%m-%d'),
+            'open': f'{c * 0.99:.4f}',
+            'high': f'{c * 1.02:.4f}',
+            'low': f'{c * 0.97:.4f}',
+            'close': f'{c:.4f}',
+            'volume': str(int(rng.integers(1_000_000, 5_000_000)))
+        })
+    return valores
+
+
+def gerar_intradiario(symbol, start, end, outputsize, interval):
+    """Pregões de 09:30 a 16:00 em barras de ``interval`` (``1min``, ``5min``, ``1h``...)"""
+    passo = int(interval[:-3]) if interval.endswith('min') else int(interval[:-1]) * 60
+    fim = pd.Timestamp(end) if end else pd.Timestamp('2024-12-31 23:59:59')
+    inicio = pd.Timestamp(start) if start else fim - pd.Timedelta(days=30)
+    dias = pd.bdate_range(inicio.normalize(), fim.normalize())
+    minutos = np.arange(0, 390, passo)
+    datas = pd.DatetimeIndex(
+        (dias.values[:, None] + np.timedelta64(570, 'm') + minutos.astype('timedelta64[m]'))
+        .ravel()
+    )
+    datas = datas[(datas >= inicio) & (datas <= fim)][-int(outputsize):]
+    semente = sum(ord(c) for c in symbol)
+    # Preço em função do minuto: a mesma barra tem o mesmo preço em qualquer página
+    t = ((datas - pd.Timestamp('2000-01-01')) // pd.Timedelta(minutes=1)).to_numpy()
+    close = 100 + 10 * np.sin(t / 5000 + semente) + np.sin(t / 7)
+    volume = 1000 + (t * 7919 + semente) % 5000
+    return [{
+        'datetime': data.strftime('%Y-%m-%d %H:%M:%S'),
+        'open': f'{c * 0.999:.4f}',
+        'high': f'{c * 1.002:.4f}',
+        'low': f'{c * 0.997:.4f}',
+        'close': f'{c:.4f}',
+        'volume': str(v)
+    } for data, c, v in zip(datas[::-1], close[::-1], volume[::-1])]
+
+
+class ProvedorFalso:
+    """Sobe um ThreadingHTTPServer numa porta livre.
+
+    Respostas enfileiradas em ``respostas`` (status, corpo, cabeçalhos) são
+    usadas primeiro; depois disso ``/time_series`` devolve dados sintéticos.
+    ``atraso`` simula a latência do provedor.
+    """
+
+    def __init__(self, atraso=0.0):
+        self.atraso = atraso
+        self.respostas = deque()
+        self.requisicoes = []
+        self.portas_clientes = set()
+        provedor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                provedor.requisicoes.append((url.path, params))
+                provedor.portas_clientes.add(self.client_address[1])
+                if provedor.atraso:
+                    time.sleep(provedor.atraso)
+
+                if provedor.respostas:
+                    status, corpo, cabecalhos = provedor.respostas.popleft()
+                else:
+                    status, cabecalhos = 200, {}
+                    corpo = {
+                        'meta': {'symbol': params.get('symbol')},
+                        'values': gerar_valores(
+                            params.get('symbol', 'AAPL'), params.get('start_date'),
+                            params.get('end_date'), params.get('outputsize', 5000),
+                            params.get('interval', '1day')
+                        ),
+                        'status': 'ok'
+                    }
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                for nome, valor in cabecalhos.items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self.servidor.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.servidor.server_port}'
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class TesteComProvedor(unittest.TestCase):
+    """Base dos testes do app contra o provedor falso.
+
+    Cada teste recebe o stub em ``self.stub``, um armazém vazio num diretório
+    temporário, os caches limpos, o cliente da Twelve Data apontado para o
+    stub e ``self.cliente`` (test client do Flask). Tudo é desfeito por
+    ``addCleanup``, então as subclasses só chamam ``super().setUp()``.
+    """
+
+    def setUp(self):
+        # Importados aqui: o stub também é usado fora dos testes (benchmarks/carga.py)
+        import app_simples
+        import provedor
+        from armazenamento import ArmazemOHLCV
+
+        self.stub = ProvedorFalso().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        self.addCleanup(setattr, app_simples, 'armazem', app_simples.armazem)
+        app_simples.armazem = ArmazemOHLCV(self.diretorio.name)
+        self._limpar_caches()
+        self.addCleanup(self._limpar_caches)
+        provedor._cliente = provedor.ClienteTwelveData(
+            'chave', base_url=self.stub.url, timeout=(1, 2), tentativas=0
+        )
+        self.addCleanup(setattr, provedor, '_cliente', None)
+        self.cliente = app_simples.app.test_client()
+
+    @staticmethod
+    def _limpar_caches():
+        import app_simples
+        app_simples.cache_resultados.limpar()
+        app_simples.cache_faixas.limpar()
@@ -0,0 +1,159 @@
+import unittest
+import tempfile
+from datetime import date, datetime
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import agendador
+import app_simples
+import provedor
+from config import Config
+from limitador import BaldeTokens
+from stub_provedor import TesteComProvedor
+
+
+def em_nova_york(*partes):
+    return datetime(*partes, tzinfo=agendador.FUSO_BOLSA)
+
+
+class TestCalendario(unittest.TestCase):
+
+    def test_proxima_execucao(self):
+        ag = agendador.Agendador([], None, horario=(16, 30))
+        # Sexta depois do horário: só na segunda
+        self.assertEqual(ag.proxima(em_nova_york(2024, 6, 7, 17, 0)),
+                         em_nova_york(2024, 6, 10, 16, 30))
+        self.assertEqual(ag.proxima(em_nova_york(2024, 6, 10, 9, 0)),
+                         em_nova_york(2024, 6, 10, 16, 30))
+
+    def test_atraso_em_pregoes(self):
+        sexta = date(2024, 6, 7)
+        # Segunda antes do fechamento: o último pregão fechado ainda é sexta
+        self.assertEqual(agendador.atraso_pregoes(sexta, em_nova_york(2024, 6, 10, 10, 0)), 0)
+        self.assertEqual(agendador.atraso_pregoes(sexta, em_nova_york(2024, 6, 11, 17, 0)), 2)
+        self.assertEqual(agendador.atraso_pregoes(sexta, em_nova_york(2024, 6, 9, 12, 0)), 0)
+
+    def test_configuracao(self):
+        self.assertEqual(agendador.interpretar_watchlist(' aapl,MSFT,,aapl '), ['AAPL', 'MSFT'])
+        self.assertEqual(agendador.interpretar_horario('16:30'), (16, 30))
+        with self.assertRaises(ValueError):
+            agendador.interpretar_horario('25:00')
+
+
+class TestExecucao(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, 'agendador.json')
+        self.agora = em_nova_york(2024, 6, 7, 16, 30)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def aquecer(self, simbolo, dia):
+        if simbolo == 'ERRO':
+            raise ValueError('Dados não encontrados')
+        return date(2024, 6, 6) if simbolo == 'VELHO' else dia
+
+    def test_passada_espacada_e_status(self):
+        relogio = [0.0]
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(segundos)
+            relogio[0] += segundos
+
+        ag = agendador.Agendador(['AAPL', 'ERRO', 'VELHO'], self.aquecer,
+                                 caminho_status=self.caminho, relogio=lambda: self.agora)
+        # Um símbolo a cada 15 s, sem rajada no início
+        ag.limitador = BaldeTokens(1, 15, capacidade=1, relogio=lambda: relogio[0],
+                                   dormir=dormir)
+        ag.executar()
+        self.assertEqual(esperas, [15.0, 15.0])
+
+        status = {item['symbol']: item for item in ag.status()['symbols']}
+        self.assertEqual(status['AAPL']['status'], 'ok')
+        self.assertEqual(status['AAPL']['last_bar'], '2024-06-07')
+        self.assertEqual(status['AAPL']['lag_sessions'], 0)
+        self.assertEqual(status['ERRO']['status'], 'error')
+        self.assertIn('Dados não encontrados', status['ERRO']['error'])
+        self.assertEqual(status['VELHO']['lag_sessions'], 1)
+
+        # Outro processo lê o arquivo, com o atraso calculado na hora da leitura
+        gravado = agendador.ler_status(self.caminho, em_nova_york(2024, 6, 11, 17, 0))
+        atrasos = {item['symbol']: item.get('lag_sessions') for item in gravado['symbols']}
+        self.assertEqual(atrasos, {'AAPL': 2, 'ERRO': None, 'VELHO': 3})
+
+
+class TestAquecimentoApp(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        app_simples._incrementais.clear()
+        self.inicio_original = Config.PREFETCH_START
+        Config.PREFETCH_START = '2023-01-01'
+
+    def tearDown(self):
+        Config.PREFETCH_START = self.inicio_original
+        app_simples._agendador = None
+        app_simples._incrementais.clear()
+
+    def test_aquecimento_incremental_e_cache(self):
+        self.assertEqual(app_simples.aquecer_simbolo('aapl', date(2024, 6, 3)),
+                         date(2024, 6, 3))
+        # Dia seguinte: só a barra nova, indicadores continuados do estado
+        self.assertEqual(app_simples.aquecer_simbolo('AAPL', date(2024, 6, 4)),
+                         date(2024, 6, 4))
+        _, quadro = app_simples._incrementais['AAPL']
+        completo = app_simples.calcular_indicadores(
+            app_simples.baixar_aquecido('AAPL', '2023-01-01', '2024-06-04')
+        )
+        for nome in app_simples.INDICADORES:
+            np.testing.assert_allclose(quadro[nome], completo[nome], rtol=1e-9, err_msg=nome)
+
+        # As consultas do usuário saem como fatias do quadro aquecido, sem chamar o provedor
+        requisicoes = len(self.stub.requisicoes)
+        fatias = app_simples.quadros.fatias
+        for inicio in ['2023-01-01', '2024-01-02']:
+            resposta = self.cliente.post('/data', json={
+                'symbol': 'AAPL', 'start': inicio, 'end': '2024-06-04', 'horizon': 10
+            })
+            self.assertEqual(resposta.status_code, 200)
+            self.assertEqual(resposta.get_json()['data'][0]['Date'][:4], inicio[:4])
+            self.assertEqual(resposta.get_json()['data'][-1]['Date'], '2024-06-04')
+        self.assertEqual(app_simples.quadros.fatias, fatias + 2)
+        self.assertEqual(len(self.stub.requisicoes), requisicoes)
+
+    def test_pregao_do_dia_coberto_depois_do_fechamento(self):
+        # Pré-busca logo depois do fechamento de hoje: a barra do dia já é definitiva
+        hoje = date.today()
+        app_simples.aquecer_simbolo('AAPL', hoje)
+        self.assertEqual(app_simples.armazem.lacunas('AAPL', '1day', '2023-01-01', hoje), [])
+
+    def test_endpoint_de_status(self):
+        ag = agendador.Agendador(
+            ['AAPL'], app_simples.aquecer_simbolo, taxa='100/second',
+            caminho_status=app_simples._status_agendador(),
+            relogio=lambda: em_nova_york(2024, 6, 4, 17, 0)
+        )
+        ag.executar()
+        app_simples._agendador = ag
+        dados = self.cliente.get('/prefetch').get_json()
+        self.assertEqual(dados['source'], 'worker')
+        self.assertEqual(dados['symbols'][0]['status'], 'ok')
+        self.assertEqual(dados['symbols'][0]['last_bar'], '2024-06-04')
+
+        # Sem agendador neste processo: o status gravado no armazém
+        app_simples._agendador = None
+        dados = self.cliente.get('/prefetch').get_json()
+        self.assertEqual(dados['source'], 'file')
+        self.assertEqual(dados['symbols'][0]['symbol'], 'AAPL')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import tempfile
+import shutil
+from datetime import date
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazenamento import ArmazemOHLCV, calcular_lacunas
+
+
+def gerar_barras(inicio, fim):
+    dates = pd.bdate_range(start=inicio, end=fim)
+    closes = np.linspace(100, 120, len(dates))
+    return pd.DataFrame({
+        'Open': closes * 0.99,
+        'High': closes * 1.01,
+        'Low': closes * 0.98,
+        'Close': closes,
+        'Volume': np.arange(len(dates), dtype='int64') + 1000
+    }, index=dates)
+
+
+class BuscaFalsa:
+
+    def __init__(self):
+        self.chamadas = []
+
+    def __call__(self, inicio, fim):
+        self.chamadas.append((inicio, fim))
+        return gerar_barras(inicio, fim)
+
+
+class TestLacunas(unittest.TestCase):
+
+    def test_sem_cobertura(self):
+        lacunas = calcular_lacunas([], date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(lacunas, [(date(2024, 1, 1), date(2024, 1, 31))])
+
+    def test_cobertura_no_meio(self):
+        cobertos = [(date(2024, 1, 10), date(2024, 1, 20))]
+        lacunas = calcular_lacunas(cobertos, date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(lacunas, [
+            (date(2024, 1, 1), date(2024, 1, 9)),
+            (date(2024, 1, 21), date(2024, 1, 31))
+        ])
+
+    def test_totalmente_coberto(self):
+        cobertos = [(date(2024, 1, 1), date(2024, 1, 15)), (date(2024, 1, 16), date(2024, 2, 1))]
+        self.assertEqual(calcular_lacunas(cobertos, date(2024, 1, 5), date(2024, 1, 31)), [])
+
+
+class TestArmazemOHLCV(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.armazem = ArmazemOHLCV(self.raiz)
+
+    def tearDown(self):
+        shutil.rmtree(self.raiz)
+
+    def test_repeticao_servida_do_disco(self):
+        busca = BuscaFalsa()
+        primeiro = self.armazem.obter('AAPL', '1day', '2023-01-02', '2023-06-30', busca)
+        segundo = self.armazem.obter('AAPL', '1day', '2023-02-01', '2023-05-31', busca)
+
+        self.assertEqual(len(busca.chamadas), 1)
+        pd.testing.assert_frame_equal(
+            segundo, primeiro.loc['2023-02-01':'2023-05-31'], check_freq=False
+        )
+
+    def test_busca_apenas_lacunas(self):
+        busca = BuscaFalsa()
+        self.armazem.obter('AAPL', '1day', '2023-03-01', '2023-03-31', busca)
+        df = self.armazem.obter('AAPL', '1day', '2023-01-02', '2023-04-28', busca)
+
+        self.assertEqual(busca.chamadas[1:], [
+            ('2023-01-02', '2023-02-28'),
+            ('2023-04-01', '2023-04-28')
+        ])
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertFalse(df.index.has_duplicates)
+        self.assertEqual(len(df), len(pd.bdate_range('2023-01-02', '2023-04-28')))
+
+    def test_resposta_truncada_cobre_so_o_recebido(self):
+        def busca(inicio, fim):
+            return gerar_barras(inicio, fim).iloc[-10:]
+
+        self.armazem.obter('AAPL', '1day', '2023-01-02', '2023-06-30', busca, limite=10)
+        cobertos = self.armazem.intervalos_cobertos('AAPL', '1day')
+        self.assertEqual(len(cobertos), 1)
+        self.assertGreater(cobertos[0][0], date(2023, 1, 2))
+
+    def test_paginas_ate_o_inicio(self):
+        chamadas = []
+
+        def busca(inicio, fim):
+            chamadas.append(fim)
+            return gerar_barras(inicio, fim).iloc[-50:]
+
+        df = self.armazem.obter('AAPL', '1day', '2023-01-02', '2023-06-30', busca,
+                                limite=50, paginas=5)
+        self.assertEqual(len(chamadas), 3)
+        self.assertEqual(chamadas[1], '2023-04-23 23:59:59')
+        self.assertEqual(len(df), len(pd.bdate_range('2023-01-02', '2023-06-30')))
+        self.assertEqual(self.armazem.intervalos_cobertos('AAPL', '1day'),
+                         [(date(2023, 1, 2), date(2023, 6, 30))])
+
+    def test_erro_da_busca(self):
+        df = self.armazem.obter('AAPL', '1day', '2023-01-02', '2023-01-31', lambda i, f: None)
+        self.assertIsNone(df)
+        self.assertEqual(self.armazem.intervalos_cobertos('AAPL', '1day'), [])
+
+    def test_fim_de_semana_nao_busca(self):
+        busca = BuscaFalsa()
+        df = self.armazem.obter('AAPL', '1day', '2023-01-07', '2023-01-08', busca)
+        self.assertIsNone(df)
+        self.assertEqual(busca.chamadas, [])
+
+    def test_simbolos(self):
+        self.armazem.obter('msft', '1day', '2023-01-02', '2023-01-31', BuscaFalsa())
+        self.assertEqual(self.armazem.simbolos('1day'), ['MSFT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
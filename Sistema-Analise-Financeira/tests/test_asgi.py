@@ -0,0 +1,186 @@
+import unittest
+import asyncio
+import gzip
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import asgi
+import provedor
+from armazenamento import ArmazemOHLCV
+from config import Config
+from stub_provedor import TesteComProvedor
+
+
+async def chamar(metodo, caminho, corpo=None, consulta=b'', cabecalhos=()):
+    """Executa uma requisição na aplicação ASGI e retorna (status, cabeçalhos, corpo)"""
+    dados = json.dumps(corpo).encode() if corpo is not None else b''
+    enviado = False
+    mensagens = []
+
+    async def receive():
+        nonlocal enviado
+        if enviado:
+            await asyncio.sleep(3600)
+        enviado = True
+        return {'type': 'http.request', 'body': dados, 'more_body': False}
+
+    async def send(mensagem):
+        mensagens.append(mensagem)
+
+    scope = {
+        'type': 'http', 'method': metodo, 'path': caminho, 'query_string': consulta,
+        'headers': [(b'content-type', b'application/json'), *cabecalhos],
+    }
+    await asgi.app(scope, receive, send)
+    inicio = mensagens[0]
+    corpo = b''.join(m.get('body', b'') for m in mensagens[1:])
+    return inicio['status'], dict(inicio['headers']), corpo
+
+
+class TestAppAssincrono(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        self.corpo = {'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-01',
+                      'horizon': 5}
+
+    def test_data_igual_ao_flask(self):
+        status, cabecalhos, corpo = asyncio.run(chamar('POST', '/data', self.corpo))
+        self.assertEqual(status, 200)
+        self.assertEqual(cabecalhos[b'content-type'], b'application/json')
+
+        # Armazém vazio de novo, para o Flask buscar exatamente o mesmo trecho
+        app_simples.cache_resultados.limpar()
+        app_simples.cache_faixas.limpar()
+        with tempfile.TemporaryDirectory() as outro:
+            app_simples.armazem = ArmazemOHLCV(outro)
+            esperado = app_simples.app.test_client().post('/data', json=self.corpo).get_json()
+        self.assertEqual(json.loads(corpo), esperado)
+
+    def test_reaproveita_armazem_e_cache(self):
+        asyncio.run(chamar('POST', '/data', self.corpo))
+        asyncio.run(chamar('POST', '/data', dict(self.corpo, horizon=10)))
+        chamadas = len(self.stub.requisicoes)
+        # Mesmo período já gravado no armazém, e mesma análise já em cache
+        asyncio.run(chamar('POST', '/data', dict(self.corpo, horizon=15)))
+        asyncio.run(chamar('POST', '/data', self.corpo))
+        self.assertEqual(len(self.stub.requisicoes), chamadas)
+
+    def test_requisicoes_iguais_concorrentes(self):
+        self.stub.atraso = 0.2
+
+        async def varias():
+            return await asyncio.gather(*(chamar('POST', '/data', self.corpo) for _ in range(8)))
+
+        respostas = asyncio.run(varias())
+        self.assertEqual([r[0] for r in respostas], [200] * 8)
+        self.assertEqual(len({r[2] for r in respostas}), 1)
+        # Uma única ida ao provedor, como no Flask
+        self.assertEqual(len(self.stub.requisicoes), 1)
+        self.assertEqual(asgi._em_andamento, {})
+
+    def test_janela_ate_hoje_busca_uma_vez(self):
+        # O pregão de hoje (ou o próximo, no fim de semana) nunca é dado como coberto
+        fim = date.today()
+        while fim.weekday() >= 5:
+            fim += timedelta(days=1)
+        corpo = dict(self.corpo, start=(fim - timedelta(days=400)).isoformat(),
+                     end=fim.isoformat())
+        status, _, corpo_async = asyncio.run(chamar('POST', '/data', corpo))
+        self.assertEqual(status, 200)
+        self.assertEqual(len(self.stub.requisicoes), 1)
+        self.assertEqual(json.loads(corpo_async)['data'][-1]['Date'], fim.isoformat())
+
+        # Mesmo número de idas ao provedor que o Flask, com o mesmo resultado
+        app_simples.cache_resultados.limpar()
+        app_simples.cache_faixas.limpar()
+        with tempfile.TemporaryDirectory() as outro:
+            app_simples.armazem = ArmazemOHLCV(outro)
+            esperado = app_simples.app.test_client().post('/data', json=corpo).get_json()
+        self.assertEqual(len(self.stub.requisicoes), 2)
+        self.assertEqual(json.loads(corpo_async), esperado)
+
+    def test_erros(self):
+        status, _, corpo = asyncio.run(chamar('POST', '/data', dict(self.corpo, format='xml')))
+        self.assertEqual(status, 400)
+        self.stub.respostas.append((503, {'message': 'fora'}, {}))
+        status, _, corpo = asyncio.run(chamar('POST', '/data', self.corpo))
+        self.assertEqual(status, 503)
+        self.assertIn('indisponível', json.loads(corpo)['error'])
+
+    def test_buscas_concorrentes_nao_bloqueiam(self):
+        self.stub.atraso = 0.3
+
+        async def varias():
+            return await asyncio.gather(*(
+                chamar('POST', '/data', dict(self.corpo, symbol=f'SYM{i}')) for i in range(6)
+            ))
+
+        inicio = time.perf_counter()
+        respostas = asyncio.run(varias())
+        self.assertEqual([r[0] for r in respostas], [200] * 6)
+        self.assertLess(time.perf_counter() - inicio, 6 * 0.3)
+
+    def test_compressao(self):
+        status, cabecalhos, corpo = asyncio.run(chamar('POST', '/data', {
+            'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-01', 'horizon': 5
+        }, cabecalhos=[(b'accept-encoding', b'gzip, deflate')]))
+        self.assertEqual(status, 200)
+        self.assertEqual(cabecalhos[b'content-encoding'], b'gzip')
+        self.assertEqual(int(cabecalhos[b'content-length']), len(corpo))
+        self.assertEqual(json.loads(gzip.decompress(corpo))['status'], 'ok')
+
+    def test_demais_rotas_via_flask(self):
+        status, cabecalhos, _ = asyncio.run(chamar(
+            'GET', '/data', consulta=b'symbol=AAPL&start=2023-01-01&end=2024-06-01'
+        ))
+        self.assertEqual(status, 200)
+        self.assertIn(b'etag', cabecalhos)
+        status, cabecalhos, corpo = asyncio.run(chamar('POST', '/data/batch', {
+            'symbols': ['AAPL', 'MSFT'], 'start': '2023-01-01', 'end': '2024-06-01'
+        }))
+        self.assertEqual(status, 200)
+        linhas = [json.loads(l) for l in corpo.splitlines()]
+        self.assertEqual(linhas[-1], {'status': 'done', 'ok': 2, 'errors': 0})
+
+    def test_stream_encerra_quando_cliente_desconecta(self):
+        heartbeat = Config.STREAM_HEARTBEAT_SECONDS
+        Config.STREAM_HEARTBEAT_SECONDS = 0.05
+        self.addCleanup(setattr, Config, 'STREAM_HEARTBEAT_SECONDS', heartbeat)
+        mensagens = []
+        pedidos = []
+        recebeu_bloco = asyncio.Event()
+
+        async def receive():
+            # O corpo (vazio) e, depois do primeiro bloco, a desconexão
+            pedidos.append(True)
+            if len(pedidos) == 1:
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await recebeu_bloco.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(mensagem):
+            mensagens.append(mensagem)
+            if mensagem.get('body'):
+                recebeu_bloco.set()
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/stream',
+                 'query_string': b'symbol=AAPL&start=2023-01-01&horizon=5', 'headers': []}
+
+        asyncio.run(asyncio.wait_for(asgi.app(scope, receive, send), 5))
+        self.assertEqual(mensagens[0]['status'], 200)
+        self.assertIn(b'event: snapshot', mensagens[1]['body'])
+        self.assertEqual(app_simples.difusor.resumo(), {'canais': 0, 'assinantes': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import avaliacao
+import previsao
+from stub_provedor import TesteComProvedor
+
+
+def gerar_close(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, n)))
+
+
+class TestPrevisoesWalkForward(unittest.TestCase):
+
+    def setUp(self):
+        self.y = gerar_close(600)
+        self.origens = np.array([19, 120, 598])
+
+    def test_expansiva_igual_ao_reajuste(self):
+        for grau in (1, 2, 3):
+            obtido = avaliacao.previsoes(self.y, f'poly{grau}', self.origens, 5)
+            for linha, t in zip(obtido, self.origens):
+                modelo = previsao.ajustar(np.arange(t + 1), self.y[:t + 1], grau)
+                np.testing.assert_allclose(linha, modelo.prever(np.arange(t + 1, t + 6)),
+                                           rtol=1e-8)
+
+    def test_movel_igual_ao_reajuste(self):
+        obtido = avaliacao.previsoes(self.y, 'log_linear', self.origens, 5, 'rolling', 20)
+        for linha, t in zip(obtido, self.origens):
+            modelo = previsao.ajustar(np.arange(20), np.log(self.y[t - 19:t + 1]), 1)
+            np.testing.assert_allclose(linha, np.exp(modelo.prever(np.arange(20, 25))),
+                                       rtol=1e-8)
+
+    def test_ema_de_brown(self):
+        alfa = 2 / (avaliacao.SPAN_EMA + 1)
+        s1 = s2 = self.y[0]
+        for valor in self.y[:121]:
+            s1 = alfa * valor + (1 - alfa) * s1
+            s2 = alfa * s1 + (1 - alfa) * s2
+        esperado = 2 * s1 - s2 + alfa / (1 - alfa) * (s1 - s2) * np.arange(1, 4)
+        np.testing.assert_allclose(avaliacao.previsoes(self.y, 'ema', [120], 3)[0], esperado)
+
+
+class TestAvaliacao(unittest.TestCase):
+
+    def test_erros_e_horizontes(self):
+        y = gerar_close(100)
+        erros = avaliacao.avaliar(y, 10, ['poly2'], origens=30)['poly2']
+        self.assertEqual(erros.shape, (30, 10))
+        # A última origem (barra 98) só confere o horizonte 1
+        self.assertFalse(np.isnan(erros[-1, 0]))
+        self.assertTrue(np.isnan(erros[-1, 1:]).all())
+
+    def test_escolhe_o_modelo_certo(self):
+        y = 100 * np.exp(0.002 * np.arange(400))
+        erros = avaliacao.avaliar(y, 20, origens=100)
+        self.assertEqual(avaliacao.escolher(erros), 'log_linear')
+
+    def test_bandas(self):
+        y = gerar_close(500)
+        erros = avaliacao.avaliar(y, 10, ['ema'], origens=200)['ema']
+        inferior, superior = avaliacao.bandas(erros, 40, 0.9)
+        self.assertEqual(len(inferior), 40)
+        self.assertTrue((inferior < superior).all())
+        # Além do horizonte avaliado a faixa só abre
+        self.assertTrue((np.diff(superior[9:] - inferior[9:]) > 0).all())
+
+    def test_parametros_invalidos(self):
+        y = gerar_close(100)
+        with self.assertRaises(ValueError):
+            avaliacao.avaliar(y, 5, ['arima'])
+        with self.assertRaises(ValueError):
+            avaliacao.avaliar(y, 5, modo='rolling')
+        with self.assertRaises(ValueError):
+            avaliacao.avaliar(y[:10], 5)
+        with self.assertRaises(ValueError):
+            avaliacao.avaliar(y, 0)
+        with self.assertRaises(ValueError):
+            avaliacao.avaliar(y, 5, origens=-3)
+
+
+class TestPrevisaoApp(TesteComProvedor):
+
+    def test_data_com_bandas(self):
+        resposta = self.cliente.post('/data', json={
+            'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-01', 'horizon': 5
+        })
+        dados = resposta.get_json()
+        self.assertIn(dados['meta']['model'], avaliacao.CANDIDATOS)
+        for linha in dados['future']:
+            self.assertLess(linha['Lower'], linha['Upper'])
+
+    def test_avaliacao_por_simbolo(self):
+        resposta = self.cliente.post('/forecast/evaluate', json={
+            'symbols': ['AAPL', 'MSFT'], 'start': '2023-01-01', 'end': '2024-06-01',
+            'horizon': 10, 'models': ['poly1', 'ema'], 'mode': 'rolling', 'window': 60
+        })
+        self.assertEqual(resposta.status_code, 200)
+        resultados = resposta.get_json()['results']
+        self.assertEqual([r['symbol'] for r in resultados], ['AAPL', 'MSFT'])
+        for resultado in resultados:
+            self.assertIn(resultado['best'], ('poly1', 'ema'))
+            self.assertEqual(len(resultado['scores']['ema']['mae']), 10)
+
+    def test_avaliacao_invalida(self):
+        resposta = self.cliente.post('/forecast/evaluate', json={
+            'symbols': ['AAPL'], 'mode': 'rolling'
+        })
+        self.assertEqual(resposta.status_code, 400)
+        for campos in ({'horizon': 0}, {'origins': -3}, {'origins': 0}):
+            resposta = self.cliente.post('/forecast/evaluate', json={'symbols': ['AAPL'], **campos})
+            self.assertEqual(resposta.status_code, 400, campos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import backtest
+import motor_indicadores
+from stub_provedor import TesteComProvedor
+
+
+def backtest_laco(close, entradas, saidas, custo):
+    """Referência barra a barra"""
+    posicao = 0
+    anterior = 0
+    capital = [1.0]
+    posicoes = [0]
+    for i in range(len(close)):
+        if entradas[i]:
+            posicao = 1
+        elif saidas[i]:
+            posicao = 0
+        if i > 0:
+            retorno = anterior * (close[i] / close[i - 1] - 1) - custo * abs(posicao - anterior)
+            capital.append(capital[-1] * (1 + retorno))
+            posicoes.append(posicao)
+        else:
+            capital[0] = 1 - custo * posicao
+            posicoes[0] = posicao
+        anterior = posicao
+    return np.array(posicoes), np.array(capital)
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(3)
+        n = 600
+        close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.015, n)))
+        df = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': np.random.randint(1000, 5000, n)
+        }, index=pd.bdate_range('2020-01-01', periods=n))
+        self.df = motor_indicadores.calcular(df, ajuste_ema=True)
+
+    def test_igual_ao_laco(self):
+        metricas, curva = backtest.backtest(self.df, 'rsi', {'inferior': 40, 'superior': 60},
+                                            custo=0.001)
+        rsi = self.df['RSI'].to_numpy()
+        posicoes, capital = backtest_laco(self.df['Close'].to_numpy(), rsi < 40, rsi > 60, 0.001)
+        np.testing.assert_array_equal(curva['Position'].to_numpy(), posicoes)
+        np.testing.assert_allclose(curva['Equity'].to_numpy(), capital, rtol=1e-12)
+        self.assertAlmostEqual(metricas['retorno_total'], capital[-1] - 1)
+        self.assertAlmostEqual(metricas['max_drawdown'],
+                               (capital / np.maximum.accumulate(capital) - 1).min())
+        self.assertEqual(metricas['janela'], 14)
+        self.assertGreater(metricas['operacoes'], 0)
+
+    def test_colunas_do_quadro_e_calculo_proprio(self):
+        # Sem as colunas de indicadores o resultado deve ser o mesmo
+        so_precos = self.df[['Open', 'High', 'Low', 'Close', 'Volume']]
+        for estrategia in backtest.ESTRATEGIAS:
+            com, _ = backtest.backtest(self.df, estrategia)
+            sem, _ = backtest.backtest(so_precos, estrategia)
+            for nome in ('retorno_total', 'sharpe', 'operacoes'):
+                self.assertAlmostEqual(com[nome], sem[nome], places=9, msg=estrategia)
+
+    def test_varredura(self):
+        grade = {'janela': [10, 14], 'inferior': [25, 30, 35], 'superior': [65, 70]}
+        tabela = backtest.varredura(self.df, 'rsi', grade, bloco=5)
+        self.assertEqual(len(tabela), 12)
+        self.assertTrue(tabela['sharpe'].is_monotonic_decreasing)
+
+        linha = tabela[(tabela['janela'] == 10) & (tabela['inferior'] == 35)
+                       & (tabela['superior'] == 65)].iloc[0]
+        individual, _ = backtest.backtest(self.df, 'rsi',
+                                          {'janela': 10, 'inferior': 35, 'superior': 65})
+        self.assertAlmostEqual(linha['retorno_total'], individual['retorno_total'])
+
+        with ThreadPoolExecutor(2) as executor:
+            paralela = backtest.varredura(self.df, 'rsi', grade, executor=executor, bloco=5)
+        pd.testing.assert_frame_equal(paralela, tabela)
+
+    def test_metricas_sem_barras(self):
+        vazio = np.zeros((3, 0))
+        resultado = backtest.metricas(vazio, vazio)
+        np.testing.assert_array_equal(resultado['operacoes'], [0, 0, 0])
+        self.assertTrue(np.isnan(resultado['retorno_total']).all())
+        self.assertTrue(np.isnan(resultado['max_drawdown']).all())
+
+    def test_parametros_invalidos(self):
+        with self.assertRaises(ValueError):
+            backtest.backtest(self.df, 'tartaruga')
+        with self.assertRaises(ValueError):
+            backtest.backtest(self.df, 'rsi', {'limite': 3})
+        with self.assertRaises(ValueError):
+            backtest.backtest(self.df, 'rsi', {'inferior': [20, 30]})
+
+
+class TestBacktestApp(TesteComProvedor):
+
+    def post(self, **corpo):
+        corpo = dict({'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-28',
+                      'strategy': 'rsi', 'params': {'inferior': 40, 'superior': 60},
+                      'cost': 0.001}, **corpo)
+        return self.cliente.post('/backtest', json=corpo)
+
+    def test_janela_valida(self):
+        resposta = self.post()
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.get_json()
+        self.assertEqual(dados['meta'], {'symbol': 'AAPL', 'strategy': 'rsi', 'cost': 0.001})
+        self.assertLessEqual({'retorno_total', 'sharpe', 'operacoes'}, set(dados['metrics']))
+        curva = dados['equity']
+        self.assertEqual(curva[0]['Date'], '2023-01-02')
+        self.assertEqual(curva[-1]['Date'], '2024-06-28')
+        self.assertAlmostEqual(curva[-1]['Equity'] - 1, dados['metrics']['retorno_total'])
+
+    def test_estrategia_desconhecida(self):
+        resposta = self.post(strategy='tartaruga')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('Estratégia inválida', resposta.get_json()['error'])
+
+    def test_janela_vazia(self):
+        # Fim de semana e início depois do fim: 400, não um erro no cálculo das métricas
+        for start, end in [('2024-06-08', '2024-06-09'), ('2024-06-10', '2024-06-03')]:
+            resposta = self.post(start=start, end=end)
+            self.assertEqual(resposta.status_code, 400)
+            self.assertIn('Dados não encontrados', resposta.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
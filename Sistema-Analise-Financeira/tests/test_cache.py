@@ -0,0 +1,107 @@
+import unittest
+import threading
+import time
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import CacheResultados
+
+
+class RelogioFalso:
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class TestCacheResultados(unittest.TestCase):
+
+    def test_lru_despeja_mais_antigo(self):
+        cache = CacheResultados(ttl=60, max_itens=2)
+        cache.definir('a', 1)
+        cache.definir('b', 2)
+        cache.obter('a')
+        cache.definir('c', 3)
+
+        self.assertEqual(cache.obter('a'), (True, 1))
+        self.assertEqual(cache.obter('b'), (False, None))
+        self.assertEqual(cache.despejos, 1)
+
+    def test_ttl_expira(self):
+        relogio = RelogioFalso()
+        cache = CacheResultados(ttl=300, relogio=relogio)
+        cache.definir('AAPL', 'resultado')
+
+        relogio.agora = 299
+        self.assertEqual(cache.obter('AAPL'), (True, 'resultado'))
+        relogio.agora = 300
+        self.assertEqual(cache.obter('AAPL'), (False, None))
+        self.assertEqual(cache.expiracoes, 1)
+
+    def test_limite_de_bytes(self):
+        cache = CacheResultados(ttl=60, max_bytes=20000)
+        cache.definir('a', np.zeros(1000))
+        cache.definir('b', np.zeros(1000))
+        cache.definir('grande', np.zeros(5000))
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(cache.obter('grande')[0])
+
+        cache.definir('c', np.zeros(1500))
+        self.assertFalse(cache.obter('a')[0])
+        self.assertTrue(cache.obter('b')[0])
+        self.assertTrue(cache.obter('c')[0])
+
+    def test_contadores(self):
+        cache = CacheResultados(ttl=60)
+        cache.obter_ou_calcular('x', lambda: 1)
+        cache.obter_ou_calcular('x', lambda: 1)
+        stats = cache.estatisticas()
+
+        self.assertEqual(stats['acertos'], 1)
+        self.assertEqual(stats['falhas'], 1)
+        self.assertAlmostEqual(stats['taxa_acerto'], 0.5)
+
+    def test_single_flight(self):
+        cache = CacheResultados(ttl=60)
+        chamadas = []
+        barreira = threading.Barrier(8)
+
+        def calcular():
+            chamadas.append(1)
+            time.sleep(0.1)
+            return 'pronto'
+
+        resultados = []
+
+        def requisicao():
+            barreira.wait()
+            resultados.append(cache.obter_ou_calcular('AAPL', calcular))
+
+        threads = [threading.Thread(target=requisicao) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(chamadas), 1)
+        self.assertEqual(resultados, ['pronto'] * 8)
+
+    def test_erro_nao_fica_em_cache(self):
+        cache = CacheResultados(ttl=60)
+
+        def falhar():
+            raise ValueError('Symbol not found')
+
+        with self.assertRaises(ValueError):
+            cache.obter_ou_calcular('XXX', falhar)
+        self.assertEqual(cache.obter_ou_calcular('XXX', lambda: 'ok'), 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import carteira
+from stub_provedor import TesteComProvedor
+
+
+def gerar_precos(n, colunas, semente=0):
+    rng = np.random.default_rng(semente)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, (n, colunas)), axis=0))
+
+
+class TestAlinhamento(unittest.TestCase):
+
+    def test_datas_ausentes_e_inicio_comum(self):
+        datas = pd.bdate_range('2024-01-01', periods=10)
+        precos = gerar_precos(10, 2)
+        # A: sem o dia 4; B: começa no dia 2
+        a = (np.delete(datas.values, 4).astype('int64'), np.delete(precos[:, 0], 4))
+        b = (datas.values[2:].astype('int64'), precos[2:, 1])
+
+        obtidas, matriz = carteira.alinhar([a, b])
+        esperado = pd.DataFrame({
+            'a': pd.Series(a[1], index=pd.DatetimeIndex(a[0])),
+            'b': pd.Series(b[1], index=pd.DatetimeIndex(b[0]))
+        }).ffill().dropna()
+        np.testing.assert_array_equal(obtidas, esperado.index.values.astype('int64'))
+        np.testing.assert_array_equal(matriz, esperado.to_numpy())
+        # Dia sem pregão repete o preço anterior
+        self.assertEqual(matriz[2, 0], precos[3, 0])
+
+    def test_serie_vazia(self):
+        with self.assertRaises(ValueError):
+            carteira.alinhar([(np.array([], dtype='int64'), np.array([]))])
+
+
+class TestMetricas(unittest.TestCase):
+
+    def setUp(self):
+        self.precos = gerar_precos(300, 6)
+        self.retornos = pd.DataFrame(self.precos).pct_change().dropna()
+
+    def test_covariancia_e_correlacao(self):
+        resultado = carteira.analisar(self.precos)
+        np.testing.assert_allclose(resultado['covariance'], self.retornos.cov() * 252)
+        np.testing.assert_allclose(resultado['correlation'], self.retornos.corr())
+        np.testing.assert_allclose(resultado['volatility'], self.retornos.std() * np.sqrt(252))
+
+    def test_janelas_moveis(self):
+        fins, pilha = carteira.janelas(self.retornos.to_numpy(), 60, 25)
+        esperado = self.retornos.rolling(60).cov()
+        self.assertEqual(fins[-1], len(self.retornos) - 1)
+        for fim, cov in zip(fins, pilha):
+            np.testing.assert_allclose(cov, esperado.loc[self.retornos.index[fim]])
+
+    def test_beta(self):
+        ref = self.retornos[0]
+        esperado = [self.retornos[c].cov(ref) / ref.var() for c in self.retornos]
+        resultado = carteira.analisar(self.precos[:, 1:], referencia=self.precos[:, 0])
+        np.testing.assert_allclose(resultado['beta'], esperado[1:])
+
+    def test_var_cvar(self):
+        r = self.retornos.to_numpy()
+        var, cvar = carteira.var_cvar(r, 0.9)
+        corte = np.quantile(r[:, 2], 0.1)
+        self.assertAlmostEqual(var[2], -corte)
+        self.assertAlmostEqual(cvar[2], -r[r[:, 2] <= corte, 2].mean())
+        self.assertTrue((cvar >= var).all())
+
+    def test_pesos_otimos(self):
+        cov = carteira.covariancia(self.retornos.to_numpy())
+        minima = carteira.pesos_min_variancia(cov)
+        self.assertAlmostEqual(minima.sum(), 1)
+        # Nenhuma carteira igualitária ou de um ativo tem variância menor
+        for pesos in [np.full(6, 1 / 6)] + list(np.eye(6)):
+            self.assertLessEqual(minima @ cov @ minima, pesos @ cov @ pesos)
+
+        resultado = carteira.analisar(self.precos, otimizar='max_sharpe')
+        tangente = resultado['optimized']
+        self.assertGreaterEqual(tangente['return'] / tangente['volatility'],
+                                resultado['portfolio']['return'] /
+                                resultado['portfolio']['volatility'])
+
+    def test_otimizacao_invalida(self):
+        with self.assertRaises(ValueError):
+            carteira.analisar(self.precos, otimizar='max_return')
+
+
+class TestPortfolioApp(TesteComProvedor):
+
+    def consultar(self, **corpo):
+        corpo = dict({'symbols': ['AAPL', 'MSFT', 'GOOG'], 'start': '2024-01-01',
+                      'end': '2024-06-28'}, **corpo)
+        return self.cliente.post('/portfolio', json=corpo)
+
+    def test_portfolio(self):
+        resposta = self.consultar(benchmark='spy', weights={'aapl': 0.5, 'MSFT': 0.5},
+                                  optimize='min_variance', window=20, step=10,
+                                  format='columnar')
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.get_json()
+        self.assertEqual(dados['meta']['symbols'], ['AAPL', 'MSFT', 'GOOG'])
+        self.assertEqual(dados['assets']['Symbol'], ['AAPL', 'MSFT', 'GOOG'])
+        self.assertEqual(len(dados['assets']['Beta']), 3)
+        self.assertEqual(dados['portfolio']['weights'], {'AAPL': 0.5, 'MSFT': 0.5, 'GOOG': 0.0})
+        self.assertAlmostEqual(sum(dados['optimized']['weights'].values()), 1)
+        self.assertEqual(np.shape(dados['correlation']), (3, 3))
+        # Primeiro e último dia útil do período pedido (o stub gera dias úteis)
+        self.assertEqual(dados['meta']['start'], '2024-01-01')
+        self.assertEqual(dados['meta']['end'], '2024-06-28')
+        datas = dados['rolling']['dates']
+        self.assertEqual(datas[-1], dados['meta']['end'])
+        self.assertEqual(datas, sorted(datas))
+        self.assertTrue(all('2024-01-01' < d <= '2024-06-28' for d in datas))
+        self.assertEqual(np.shape(dados['rolling']['correlation'])[1:], (3, 3))
+
+        # Segunda consulta vem só do armazém
+        requisicoes = len(self.stub.requisicoes)
+        self.assertEqual(self.consultar().status_code, 200)
+        self.assertEqual(len(self.stub.requisicoes), requisicoes)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.consultar(symbols=[]).status_code, 400)
+        self.assertEqual(self.consultar(weights=[0.5, 0.5]).status_code, 400)
+        self.assertEqual(self.consultar(rolling_matrix='beta').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
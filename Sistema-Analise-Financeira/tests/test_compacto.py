@@ -0,0 +1,108 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_simples
+import compacto
+import motor_indicadores
+import serializacao
+from config import Config
+
+
+def gerar(n=400):
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.99, 1.01, n), 'High': close * 1.02,
+        'Low': close * 0.98, 'Close': close,
+        'Volume': rng.integers(1000, 5000, n).astype(float)
+    }, index=pd.DatetimeIndex(pd.bdate_range('2020-01-01', periods=n), name='Date'))
+
+
+class TestQuadroCompacto(unittest.TestCase):
+
+    def setUp(self):
+        self.df = gerar()
+        self.nomes = ['SMA_20', 'SMA_200', 'RSI', 'MACD', 'Lower_Band', 'Stochastic_K', 'OBV']
+        self.quadro = compacto.QuadroCompacto.de_quadro(self.df, self.nomes)
+
+    def test_layout(self):
+        self.assertEqual(self.quadro.dtype, np.float32)
+        self.assertEqual(self.quadro.datas.dtype, np.int64)
+        self.assertEqual(self.quadro.nbytes, 400 * 8 + 12 * 400 * 4)
+        self.assertTrue(self.quadro.coluna('Close').flags['C_CONTIGUOUS'])
+        self.assertTrue(np.isnan(self.quadro.coluna('RSI')).all())
+        with self.assertRaises(ValueError):
+            self.quadro.coluna('XYZ')
+
+    def test_views_sem_copia(self):
+        fatia = self.quadro.fatia(100, 200)
+        self.assertEqual(len(fatia), 100)
+        self.assertTrue(np.shares_memory(fatia.coluna('Close'), self.quadro.matriz))
+        df = fatia.para_quadro()
+        self.assertTrue(np.shares_memory(df['Close'].to_numpy(), self.quadro.matriz))
+        self.assertTrue(np.shares_memory(df.index.asi8, self.quadro.datas))
+        pd.testing.assert_index_equal(df.index, self.df.index[100:200].astype('datetime64[ns]'), exact=False)
+        np.testing.assert_array_equal(df['Close'], self.df['Close'].iloc[100:200].astype('float32'))
+
+    def test_calcular(self):
+        compacto.calcular(self.quadro, self.nomes, ajuste_ema=True)
+        esperado = motor_indicadores.calcular(self.df, self.nomes, ajuste_ema=True)
+        for nome in self.nomes:
+            obtido = self.quadro.coluna(nome)
+            np.testing.assert_array_equal(np.isnan(obtido), esperado[nome].isna(), err_msg=nome)
+            np.testing.assert_allclose(obtido, esperado[nome], rtol=1e-4, atol=1e-3, err_msg=nome)
+        with self.assertRaises(ValueError):
+            compacto.calcular(self.quadro, ['ATR'])
+
+    def test_sem_ausentes(self):
+        compacto.calcular(self.quadro, self.nomes)
+        recorte = self.quadro.sem_ausentes()
+        # NaN só no aquecimento da SMA_200: fatia
+        self.assertEqual(len(recorte), 400 - 199)
+        self.assertTrue(np.shares_memory(recorte.matriz, self.quadro.matriz))
+        pd.testing.assert_frame_equal(recorte.para_quadro(), self.quadro.para_quadro().dropna())
+
+        self.quadro.coluna('RSI')[300] = np.nan
+        recorte = self.quadro.sem_ausentes()
+        self.assertEqual(len(recorte), 400 - 200)
+        pd.testing.assert_frame_equal(recorte.para_quadro(), self.quadro.para_quadro().dropna())
+        self.assertEqual(len(self.quadro.sem_ausentes(['Close'])), 400)
+
+    def test_sem_aquecimento(self):
+        df = motor_indicadores.calcular(self.df, self.nomes)
+        recorte = compacto.sem_aquecimento(df)
+        pd.testing.assert_frame_equal(recorte, df.dropna())
+        self.assertTrue(np.shares_memory(recorte['Close'].to_numpy(), df['Close'].to_numpy()))
+        df.iloc[300, df.columns.get_loc('RSI')] = np.nan
+        pd.testing.assert_frame_equal(compacto.sem_aquecimento(df), df.dropna())
+        self.assertTrue(compacto.sem_aquecimento(df.iloc[:150]).empty)
+
+    def test_serializacao_float32(self):
+        df = pd.DataFrame({'Close': np.array([183.3946, np.nan], dtype='float32')},
+                          index=pd.to_datetime(['2024-01-02', '2024-01-03']))
+        self.assertEqual(serializacao.colunas(df, ['Close'])['Close'], [183.3946, None])
+
+    def test_analise_compacta(self):
+        df = gerar(600)
+        esperado, futuro_esperado = app_simples.preparar_analise(df.copy(), 10)
+        Config.COMPACT_DTYPE = 'float32'
+        try:
+            obtido, futuro = app_simples.preparar_analise(df.copy(), 10)
+        finally:
+            Config.COMPACT_DTYPE = ''
+        self.assertEqual(set(obtido.dtypes), {np.dtype('float32')})
+        pd.testing.assert_index_equal(obtido.index, esperado.index, exact=False)
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, check_index_type=False,
+                                      check_freq=False, rtol=1e-4, atol=1e-2)
+        np.testing.assert_allclose([f['Pred'] for f in futuro],
+                                   [f['Pred'] for f in futuro_esperado], rtol=1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
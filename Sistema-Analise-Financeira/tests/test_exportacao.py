@@ -0,0 +1,139 @@
+import unittest
+import io
+import zipfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import exportacao
+from stub_provedor import TesteComProvedor
+
+
+def _item(simbolo, n=30):
+    datas = pd.bdate_range('2024-01-01', periods=n, name='Date')
+    historico = pd.DataFrame({
+        'Close': np.linspace(100, 110, n),
+        'Volume': np.arange(n, dtype='int64') * 1000,
+        'RSI': [np.nan] * 5 + [50.0] * (n - 5),
+        'Pred': np.linspace(101, 111, n)
+    }, index=datas)
+    futuro = [{'Date': '2024-03-01', 'Pred': 112.0}, {'Date': '2024-03-04', 'Pred': 113.5}]
+    return simbolo, historico, futuro
+
+
+class TestExportacao(unittest.TestCase):
+
+    def test_formato_invalido(self):
+        with self.assertRaises(ValueError):
+            exportacao.validar_formato('xls')
+
+    @unittest.skipIf(exportacao.PYARROW_DISPONIVEL, 'pyarrow instalado')
+    def test_parquet_sem_pyarrow(self):
+        with self.assertRaises(ValueError):
+            exportacao.validar_formato('parquet')
+
+    def test_csv_um_cabecalho_por_arquivo(self):
+        original = exportacao.LINHAS_POR_BLOCO
+        exportacao.LINHAS_POR_BLOCO = 7
+        try:
+            blocos = list(exportacao.exportar('csv', [_item('AAPL'), _item('MSFT')], varios=True))
+        finally:
+            exportacao.LINHAS_POR_BLOCO = original
+
+        self.assertGreater(len(blocos), 2)
+        quadro = pd.read_csv(io.BytesIO(b''.join(blocos)))
+        self.assertEqual(len(quadro), 2 * 32)
+        self.assertEqual(list(quadro.columns[:2]), ['Symbol', 'Date'])
+        self.assertEqual(quadro['Symbol'].unique().tolist(), ['AAPL', 'MSFT'])
+        self.assertEqual(quadro['Pred'].iloc[-1], 113.5)
+
+    def test_excel_abas_por_simbolo(self):
+        dados = b''.join(exportacao.exportar(
+            'xlsx', iter([_item('AAPL'), _item('MSFT')]), varios=True, formatar=True
+        ))
+        with zipfile.ZipFile(io.BytesIO(dados)) as arquivo:
+            pastas = arquivo.read('xl/workbook.xml').decode()
+        for aba in ('AAPL_historico', 'AAPL_previsao_futura',
+                    'MSFT_historico', 'MSFT_previsao_futura'):
+            self.assertIn(f'name="{aba}"', pastas)
+
+    def test_excel_valores(self):
+        dados = b''.join(exportacao.exportar('xlsx', [_item('AAPL')]))
+        with zipfile.ZipFile(io.BytesIO(dados)) as arquivo:
+            planilha = arquivo.read('xl/worksheets/sheet1.xml').decode()
+        # Cabeçalho + 30 linhas; NaN do RSI não vira célula
+        self.assertEqual(planilha.count('<row '), 31)
+        self.assertIn('<v>29000</v>', planilha)
+        self.assertNotIn('nan', planilha.lower())
+
+    def test_nome_de_aba(self):
+        usados = set()
+        self.assertEqual(exportacao.nome_aba('EUR/USD_historico', usados), 'EUR_USD_historico')
+        self.assertEqual(exportacao.nome_aba('A[1]:*?\\', usados), 'A_1_____')
+        # Truncado em 31 caracteres e sem repetir (o Excel ignora a caixa)
+        longo = 'X' * 40
+        self.assertEqual(exportacao.nome_aba(longo, usados), 'X' * 31)
+        self.assertEqual(exportacao.nome_aba(longo.lower(), usados), 'x' * 29 + '~2')
+        self.assertEqual(exportacao.nome_aba(longo, usados), 'X' * 29 + '~3')
+
+    def test_excel_com_infinito(self):
+        simbolo, historico, futuro = _item('AAPL')
+        historico.iloc[3, 0] = np.inf
+        historico.iloc[4, 0] = -np.inf
+        dados = b''.join(exportacao.exportar('xlsx', [(simbolo, historico, futuro)]))
+        with zipfile.ZipFile(io.BytesIO(dados)) as arquivo:
+            planilha = arquivo.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(planilha.count('<row '), 31)
+        self.assertEqual(planilha.count('t="e"'), 2)
+
+    def test_temporario_removido(self):
+        diretorio = exportacao.tempfile.gettempdir()
+        antes = set(os.listdir(diretorio))
+        b''.join(exportacao.exportar('xlsx', [_item('AAPL')]))
+        self.assertEqual(set(os.listdir(diretorio)) - antes, set())
+
+
+def abas_xlsx(dados):
+    with zipfile.ZipFile(io.BytesIO(dados)) as arquivo:
+        return arquivo.read('xl/workbook.xml').decode()
+
+
+class TestDownload(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        self.corpo = {'start': '2024-01-01', 'end': '2024-06-01', 'horizon': 5}
+
+    def test_simbolo_com_barra_e_ignorados(self):
+        # O primeiro símbolo pedido ao provedor não existe
+        self.stub.respostas.append((200, {'status': 'error', 'message': 'symbol not found'}, {}))
+        resposta = self.cliente.post('/download', json=dict(
+            self.corpo, tickers=['XXXX', 'EUR/USD', 'AAPL']
+        ))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.headers['X-Skipped-Symbols'], 'XXXX')
+        abas = abas_xlsx(resposta.data)
+        for aba in ('EUR_USD_Dados_Historicos', 'EUR_USD_Previsao_Futura',
+                    'AAPL_Dados_Historicos', 'Ignorados'):
+            self.assertIn(f'name="{aba}"', abas)
+
+    def test_nenhum_simbolo_com_dados(self):
+        for _ in range(2):
+            self.stub.respostas.append((200, {'status': 'error', 'message': 'symbol not found'}, {}))
+        resposta = self.cliente.post('/download', json=dict(self.corpo, tickers=['XXXX', 'YYYY']))
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual([s['symbol'] for s in resposta.get_json()['skipped']], ['XXXX', 'YYYY'])
+
+        for _ in range(2):
+            self.stub.respostas.append((503, {'message': 'fora'}, {}))
+        resposta = self.cliente.post('/download', json=dict(self.corpo, tickers=['XXXX', 'YYYY']))
+        self.assertEqual(resposta.status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
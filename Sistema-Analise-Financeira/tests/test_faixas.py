@@ -0,0 +1,144 @@
+import unittest
+import threading
+import time
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import faixas
+from cache import CacheResultados
+from stub_provedor import TesteComProvedor
+
+
+class TestQuadrosPorFaixa(unittest.TestCase):
+
+    def setUp(self):
+        self.quadros = faixas.QuadrosPorFaixa(CacheResultados(60))
+        self.chamadas = []
+
+    def calcular(self, inicio, fim):
+        self.chamadas.append((inicio, fim))
+        datas = pd.bdate_range(inicio, fim)
+        return pd.DataFrame({'Close': np.arange(len(datas), dtype=float)}, index=datas)
+
+    def obter(self, start, end):
+        return self.quadros.obter(('AAPL', '1day'), start, end, self.calcular)
+
+    def test_periodo_contido_e_fatia(self):
+        self.obter('2024-01-01', '2024-12-31')
+        df = self.obter('2024-03-01', '2024-03-31')
+        self.assertEqual(len(self.chamadas), 1)
+        self.assertEqual(df.index[0], pd.Timestamp('2024-03-01'))
+        self.assertEqual(df.index[-1], pd.Timestamp('2024-03-29'))
+        self.assertEqual((self.quadros.fatias, self.quadros.calculos), (1, 1))
+
+    def test_sobreposicao_recalcula_a_uniao(self):
+        self.obter('2024-01-01', '2024-06-30')
+        df = self.obter('2024-04-01', '2024-09-30')
+        self.assertEqual(self.chamadas[-1][0], pd.Timestamp('2024-01-01'))
+        self.assertEqual(self.chamadas[-1][1].date(), pd.Timestamp('2024-09-30').date())
+        self.assertEqual(df.index[0], pd.Timestamp('2024-04-01'))
+        # A união serve os dois períodos
+        self.obter('2024-02-01', '2024-08-30')
+        self.assertEqual(len(self.chamadas), 2)
+
+    def test_sobreposicao_sem_uniao(self):
+        self.obter('2024-01-01', '2024-06-30')
+        df = self.quadros.obter(('AAPL', '1day'), '2024-04-01', '2024-09-30', self.calcular,
+                                uniao=False)
+        # Só o próprio período, e o quadro guardado continua o mesmo
+        self.assertEqual(self.chamadas[-1][0], pd.Timestamp('2024-04-01'))
+        self.assertEqual(df.index[-1], pd.Timestamp('2024-09-30'))
+        self.obter('2024-02-01', '2024-03-29')
+        self.assertEqual(len(self.chamadas), 2)
+
+    def test_periodo_disjunto_substitui(self):
+        self.obter('2024-01-01', '2024-01-31')
+        self.obter('2024-06-01', '2024-06-30')
+        self.assertEqual(self.chamadas[-1][0], pd.Timestamp('2024-06-01'))
+
+    def test_pedidos_simultaneos_calculam_uma_vez(self):
+        calcular = self.calcular
+
+        def lento(inicio, fim):
+            time.sleep(0.05)
+            return calcular(inicio, fim)
+
+        self.calcular = lento
+        barreira = threading.Barrier(8)
+        resultados = []
+
+        def pedir():
+            barreira.wait()
+            resultados.append(len(self.obter('2024-01-01', '2024-12-31')))
+
+        threads = [threading.Thread(target=pedir) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.chamadas), 1)
+        self.assertEqual(len(set(resultados)), 1)
+
+    def test_data_sem_hora_vale_o_dia(self):
+        inicio, fim = faixas.limites('2024-01-02', '2024-01-05')
+        self.assertEqual(inicio, pd.Timestamp('2024-01-02'))
+        self.assertEqual(fim, pd.Timestamp('2024-01-06') - pd.Timedelta(1, unit='ns'))
+
+
+class TestFaixasApp(TesteComProvedor):
+
+    def post(self, start, end):
+        return self.cliente.post('/data', json={
+            'symbol': 'AAPL', 'start': start, 'end': end, 'horizon': 5
+        }).get_json()
+
+    def test_janela_menor_sai_do_mesmo_quadro(self):
+        ano = self.post('2024-01-01', '2024-12-31')
+        requisicoes = len(self.stub.requisicoes)
+        calculos = app_simples.quadros.calculos
+
+        marco = self.post('2024-03-01', '2024-12-31')
+        self.assertEqual(len(self.stub.requisicoes), requisicoes)
+        self.assertEqual(app_simples.quadros.calculos, calculos)
+        self.assertEqual(marco['data'][0]['Date'], '2024-03-01')
+        # Mesmos indicadores nas datas em comum
+        por_data = {linha['Date']: linha for linha in ano['data']}
+        for linha in marco['data']:
+            self.assertEqual(linha['SMA_50'], por_data[linha['Date']]['SMA_50'])
+
+    def test_indicadores_aquecidos_no_inicio(self):
+        # Janela bem menor que a SMA_200: o aquecimento vem de antes do início
+        df = app_simples.indicadores_simbolo('AAPL', '2024-06-03', '2024-07-31')
+        self.assertEqual(df.index[0], pd.Timestamp('2024-06-03'))
+        self.assertFalse(df['SMA_200'].isna().any())
+
+        completo = app_simples.calcular_indicadores(
+            app_simples.baixar_dados('AAPL', '2020-01-01', '2024-07-31')
+        )
+        np.testing.assert_allclose(df['SMA_200'], completo.loc[df.index, 'SMA_200'])
+
+        dados = self.post('2024-06-03', '2024-07-31')
+        self.assertEqual(len(dados['data']), len(df))
+
+    def test_janela_sem_pregao(self):
+        self.post('2024-01-01', '2024-12-31')
+        # Fim de semana dentro do quadro, e início depois do fim
+        for start, end in [('2024-06-08', '2024-06-09'), ('2024-06-10', '2024-06-03')]:
+            with self.assertRaises(ValueError):
+                app_simples.indicadores_periodo('AAPL', start, end)
+            resposta = self.cliente.post('/data', json={
+                'symbol': 'AAPL', 'start': start, 'end': end, 'horizon': 5
+            })
+            self.assertEqual(resposta.status_code, 400)
+            self.assertIn('Dados não encontrados', resposta.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
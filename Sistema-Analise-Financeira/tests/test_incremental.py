@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import motor_indicadores
+from incremental import IndicadoresIncrementais
+
+
+class TestIndicadoresIncrementais(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        n = 400
+        # Arredondado para ter fechamentos repetidos (caso "igual" do OBV)
+        close = np.round(100 * np.exp(np.cumsum(np.random.normal(0, 0.02, n))), 1)
+        self.df = pd.DataFrame({
+            'Open': close * np.random.uniform(0.98, 1.02, n),
+            'High': close * np.random.uniform(1.00, 1.05, n),
+            'Low': close * np.random.uniform(0.95, 1.00, n),
+            'Close': close,
+            'Volume': np.random.randint(1000000, 10000000, n)
+        }, index=pd.date_range('2023-01-01', periods=n, freq='D'))
+        self.nomes = motor_indicadores.disponiveis()
+
+    def comparar(self, obtido, esperado):
+        for nome in self.nomes:
+            np.testing.assert_allclose(
+                obtido[nome].to_numpy(dtype=float), esperado[nome].to_numpy(dtype=float),
+                rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=nome
+            )
+
+    def test_barra_a_barra_igual_ao_lote(self):
+        for ajuste in (False, True):
+            esperado = motor_indicadores.calcular(self.df, ajuste_ema=ajuste)
+            inc = IndicadoresIncrementais(ajuste_ema=ajuste)
+            obtido = pd.concat([inc.atualizar(self.df.iloc[i:i + 37])
+                                for i in range(0, len(self.df), 37)])
+            self.comparar(obtido, esperado)
+
+    def test_iniciar_e_continuar(self):
+        for ajuste in (False, True):
+            esperado = motor_indicadores.calcular(self.df, ajuste_ema=ajuste)
+            inc = IndicadoresIncrementais(ajuste_ema=ajuste)
+            historico = inc.iniciar(self.df.iloc[:300])
+            novos = inc.atualizar(self.df.iloc[300:])
+            self.comparar(pd.concat([historico, novos]), esperado)
+            self.assertEqual(inc.barras, 400)
+
+    def test_subconjunto_de_indicadores(self):
+        inc = IndicadoresIncrementais(['RSI', 'OBV'])
+        inc.iniciar(self.df.iloc[:100])
+        novos = inc.atualizar(self.df.iloc[100:110])
+        self.assertEqual(list(novos.columns), list(self.df.columns) + ['RSI', 'OBV'])
+        with self.assertRaises(ValueError):
+            IndicadoresIncrementais(['RSI', 'Inexistente'])
+
+    def test_somente_acrescimo(self):
+        inc = IndicadoresIncrementais()
+        inc.iniciar(self.df.iloc[:100])
+        with self.assertRaises(ValueError):
+            inc.atualizar(self.df.iloc[99:101])
+        with self.assertRaises(ValueError):
+            inc.iniciar(self.df.iloc[:100])
+
+    def test_snapshot(self):
+        esperado = motor_indicadores.calcular(self.df)
+        inc = IndicadoresIncrementais()
+        inc.iniciar(self.df.iloc[:250])
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'estado.json')
+            inc.salvar(caminho)
+            restaurado = IndicadoresIncrementais.carregar(caminho)
+        self.assertEqual(restaurado.ultima_data, inc.ultima_data)
+        novos = restaurado.atualizar(self.df.iloc[250:])
+        self.comparar(novos, esperado.iloc[250:])
+
+
+if __name__ == '__main__':
+    unittest.main()
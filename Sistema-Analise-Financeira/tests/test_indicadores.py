@@ -1,7 +1,24 @@
+import importlib.util
+import os
+import sys
+
 import pandas as pd
-from Back_end.sistema_analise_financeira import calcular_indicadores
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+_spec = importlib.util.spec_from_file_location(
+    'sistema_analise_financeira', os.path.join(RAIZ, 'sistema-analise-financeira.py')
+)
+sistema = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sistema)
+
 
 def test_calcular_indicadores():
     df = pd.DataFrame({'Close': [10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24]})
-    result = calcular_indicadores(df)
-    assert 'SMA_20' in result.columns
\ No newline at end of file
+    result = sistema.calcular_indicadores(df, ['SMA_20', 'RSI'])
+    assert 'SMA_20' in result.columns
+    # Menos de 20 barras: a média de 20 ainda não existe
+    assert result['SMA_20'].isna().all()
+    # Só altas: RSI máximo depois do aquecimento
+    assert result['RSI'].iloc[-1] == 100
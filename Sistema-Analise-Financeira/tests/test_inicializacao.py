@@ -0,0 +1,42 @@
+import unittest
+import subprocess
+import sys
+import os
+
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(DIRETORIO)
+
+import app_simples
+
+
+def modulos_apos(codigo, cwd=DIRETORIO):
+    """Módulos carregados num processo novo depois de ``codigo``"""
+    saida = subprocess.run(
+        [sys.executable, '-c', codigo + '\nimport sys\nprint(" ".join(sys.modules))'],
+        cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+    return set(saida.split())
+
+
+class TestCriarApp(unittest.TestCase):
+
+    def test_app_novo_com_as_rotas(self):
+        novo = app_simples.criar_app()
+        self.assertIsNot(novo, app_simples.app)
+        rotas = {regra.rule for regra in novo.url_map.iter_rules()}
+        self.assertTrue({'/', '/data', '/data/batch', '/stream', '/metrics'} <= rotas)
+        self.assertEqual(novo.test_client().get('/metrics').status_code, 200)
+
+    def test_importacoes_sob_demanda(self):
+        modulos = modulos_apos('import app_simples')
+        for pesado in ('xlsxwriter', 'pyarrow', 'sklearn', 'concurrent.futures.process'):
+            self.assertNotIn(pesado, modulos)
+
+    def test_index_na_raiz(self):
+        modulos = modulos_apos('import index', cwd=os.path.dirname(DIRETORIO))
+        self.assertIn('app_simples', modulos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kernels
+import motor_indicadores
+
+
+class TestKernels(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        n = 300
+        close = np.round(100 + np.cumsum(np.random.normal(0, 1, n)), 0)
+        self.df = pd.DataFrame({
+            'High': close + np.random.uniform(0, 2, n),
+            'Low': close - np.random.uniform(0, 2, n),
+            'Close': close,
+            'Volume': np.random.randint(1000, 5000, n)
+        })
+
+    def test_obv_igual_ao_laco(self):
+        esperado = [0]
+        for i in range(1, len(self.df)):
+            if self.df['Close'].iloc[i] > self.df['Close'].iloc[i - 1]:
+                esperado.append(esperado[-1] + self.df['Volume'].iloc[i])
+            elif self.df['Close'].iloc[i] < self.df['Close'].iloc[i - 1]:
+                esperado.append(esperado[-1] - self.df['Volume'].iloc[i])
+            else:
+                esperado.append(esperado[-1])
+
+        obtido = kernels.obv(self.df['Close'], self.df['Volume'])
+        np.testing.assert_array_equal(obtido, esperado)
+
+    def test_obv_com_nan_repete_valor(self):
+        obtido = kernels.obv([1.0, 2.0, np.nan, 3.0], [10, 20, 30, 40])
+        np.testing.assert_array_equal(obtido, [0, 20, 20, 20])
+
+    def test_obv_volume_nan_sem_variacao(self):
+        obtido = kernels.obv([1.0, 2.0, 2.0, 3.0, 2.0, 3.0], [10, 20, np.nan, 40, 50, 60])
+        np.testing.assert_array_equal(obtido, [0, 20, 20, 60, 10, 70])
+
+    def test_obv_vazio(self):
+        self.assertEqual(len(kernels.obv([], [])), 0)
+
+    def test_desvio_medio_absoluto(self):
+        tp = (self.df['High'] + self.df['Low'] + self.df['Close']) / 3
+        esperado = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
+
+        obtido = kernels.desvio_medio_absoluto(tp.to_numpy(), 20, bloco=37)
+        np.testing.assert_allclose(obtido, esperado.to_numpy(), rtol=1e-12, equal_nan=True)
+
+    def test_desvio_medio_serie_curta(self):
+        self.assertTrue(np.isnan(kernels.desvio_medio_absoluto([1.0, 2.0], 20)).all())
+
+
+class ParidadeMotor:
+    """Kernels de um motor contra as Series do pandas que eles substituem"""
+
+    motor = None
+
+    def setUp(self):
+        self.k = kernels.modulo(self.motor)
+        rng = np.random.default_rng(7)
+        n = 600
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        # Trecho parado (janelas de valores iguais) e NaN no início e no meio
+        close[300:330] = close[299]
+        close[:3] = np.nan
+        close[450] = np.nan
+        self.close = pd.Series(close)
+        self.high = self.close * rng.uniform(1.0, 1.03, n)
+        self.low = self.close * rng.uniform(0.97, 1.0, n)
+
+    def comparar(self, obtido, esperado):
+        np.testing.assert_allclose(obtido, esperado.to_numpy(dtype=float), rtol=1e-10,
+                                   atol=1e-12, equal_nan=True)
+
+    def test_janelas_moveis(self):
+        for janela in (1, 3, 14, 200, 700):
+            rolagem = self.close.rolling(window=janela)
+            self.comparar(self.k.media_movel(self.close.to_numpy(), janela), rolagem.mean())
+            self.comparar(self.k.minimo_movel(self.close.to_numpy(), janela), rolagem.min())
+            self.comparar(self.k.maximo_movel(self.close.to_numpy(), janela), rolagem.max())
+            if janela > 1:
+                # Referência em duas passadas: o std online do pandas deixa resíduo
+                # (3e-6 na janela parada) e erra na 10ª casa
+                self.comparar(self.k.desvio_movel(self.close.to_numpy(), janela),
+                              rolagem.apply(lambda x: x.std(ddof=1), raw=True))
+
+    def test_ganho_e_perda(self):
+        delta = self.close.diff()
+        ganho = self.k.media_ganho(delta.to_numpy(), 14)
+        perda = self.k.media_perda(delta.to_numpy(), 14)
+        self.comparar(ganho, delta.clip(lower=0).rolling(window=14).mean())
+        self.comparar(perda, (-delta.clip(upper=0)).rolling(window=14).mean())
+        # No trecho parado as médias zeram de fato: RSI 0/0 fica NaN, como no pandas
+        self.assertEqual(ganho[329], 0.0)
+        self.assertEqual(perda[329], 0.0)
+
+    def test_ema(self):
+        for ajuste in (True, False):
+            for span in (1, 9, 26):
+                esperado = self.close.ewm(span=span, adjust=ajuste).mean()
+                self.comparar(self.k.ema(self.close.to_numpy(), span, ajuste), esperado)
+                sem_nan = self.close.iloc[460:]
+                self.comparar(self.k.ema(sem_nan.to_numpy(), span, ajuste),
+                              sem_nan.ewm(span=span, adjust=ajuste).mean())
+
+    def test_ema_serie_longa(self):
+        # Muitos blocos da recursão vetorizada
+        serie = pd.Series(np.random.default_rng(1).normal(100, 5, 50_000))
+        for ajuste in (True, False):
+            self.comparar(self.k.ema(serie.to_numpy(), 12, ajuste),
+                          serie.ewm(span=12, adjust=ajuste).mean())
+
+    def test_true_range(self):
+        anterior = self.close.shift()
+        esperado = pd.concat([
+            self.high - self.low, (self.high - anterior).abs(), (self.low - anterior).abs()
+        ], axis=1).max(axis=1)
+        obtido = self.k.true_range(self.high.to_numpy(), self.low.to_numpy(),
+                                   self.close.to_numpy())
+        self.comparar(obtido, esperado)
+
+    def test_obv_e_desvio_medio(self):
+        volume = np.arange(600) * 10
+        np.testing.assert_array_equal(self.k.obv(self.close.to_numpy(), volume),
+                                      kernels.obv(self.close.to_numpy(), volume))
+        # Volume NaN nas barras paradas e na de fechamento NaN não entra na soma
+        com_nan = volume.astype(float)
+        com_nan[[310, 450]] = np.nan
+        obtido = self.k.obv(self.close.to_numpy(), com_nan)
+        self.assertFalse(np.isnan(obtido).any())
+        np.testing.assert_array_equal(obtido, kernels.obv(self.close.to_numpy(), volume))
+        self.comparar(self.k.desvio_medio_absoluto(self.close.to_numpy(), 20),
+                      self.close.rolling(20).apply(lambda x: np.abs(x - x.mean()).mean()))
+
+    def test_motor_completo(self):
+        rng = np.random.default_rng(3)
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 400))))
+        df = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                           'Close': close, 'Volume': rng.integers(1000, 5000, 400)})
+        for ajuste in (True, False):
+            esperado = motor_indicadores.calcular(df, ajuste_ema=ajuste, motor='pandas')
+            obtido = motor_indicadores.calcular(df, ajuste_ema=ajuste, motor=self.motor)
+            for nome in motor_indicadores.disponiveis():
+                np.testing.assert_allclose(obtido[nome], esperado[nome], rtol=1e-9,
+                                           atol=1e-9, equal_nan=True, err_msg=nome)
+
+
+class TestParidadeNumpy(ParidadeMotor, unittest.TestCase):
+    motor = 'numpy'
+
+
+@unittest.skipUnless(kernels.NUMBA_DISPONIVEL, 'numba não instalado')
+class TestParidadeNumba(ParidadeMotor, unittest.TestCase):
+    motor = 'numba'
+
+
+class TestEscolhaDoMotor(unittest.TestCase):
+
+    def test_resolver(self):
+        self.assertEqual(kernels.resolver('auto'),
+                         'numba' if kernels.NUMBA_DISPONIVEL else 'numpy')
+        self.assertIsNone(kernels.modulo('pandas'))
+        self.assertIs(kernels.modulo('NumPy'), kernels)
+        with self.assertRaises(ValueError):
+            kernels.resolver('cuda')
+
+    @unittest.skipIf(kernels.NUMBA_DISPONIVEL, 'numba instalado')
+    def test_numba_ausente(self):
+        with self.assertRaises(ValueError):
+            motor_indicadores.calcular(pd.DataFrame({'Close': [1.0, 2.0]}), ['SMA_20'],
+                                       motor='numba')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import time
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limitador import BaldeTokens, interpretar_taxa
+
+
+class RelogioFalso:
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.agora += segundos
+
+
+class TestBaldeTokens(unittest.TestCase):
+
+    def test_interpretar_taxa(self):
+        self.assertEqual(interpretar_taxa('8/minute'), (8, 60.0))
+        self.assertEqual(interpretar_taxa('100/hour'), (100, 3600.0))
+        with self.assertRaises(ValueError):
+            interpretar_taxa('muitas')
+
+    def test_rajada_e_reposicao(self):
+        relogio = RelogioFalso()
+        balde = BaldeTokens(8, 60, relogio=relogio, dormir=relogio.dormir)
+
+        self.assertTrue(all(balde.tentar() for _ in range(8)))
+        self.assertFalse(balde.tentar())
+
+        relogio.agora += 7.5
+        self.assertTrue(balde.tentar())
+        self.assertFalse(balde.tentar())
+
+    def test_adquirir_espera_o_necessario(self):
+        relogio = RelogioFalso()
+        balde = BaldeTokens(8, 60, relogio=relogio, dormir=relogio.dormir)
+        for _ in range(8):
+            balde.adquirir()
+
+        balde.adquirir()
+        self.assertAlmostEqual(relogio.agora, 7.5)
+        self.assertEqual(balde.esperas, 1)
+
+    def test_timeout(self):
+        relogio = RelogioFalso()
+        balde = BaldeTokens(1, 60, relogio=relogio, dormir=relogio.dormir)
+        balde.adquirir()
+        self.assertFalse(balde.adquirir(timeout=10))
+
+    def test_adquirir_assincrono_nao_bloqueia_o_loop(self):
+        balde = BaldeTokens(20, 1, capacidade=1)
+
+        async def cenario():
+            batidas = 0
+
+            async def relogio():
+                nonlocal batidas
+                while True:
+                    batidas += 1
+                    await asyncio.sleep(0.005)
+
+            tarefa = asyncio.create_task(relogio())
+            for _ in range(3):
+                await balde.adquirir_assincrono()
+            tarefa.cancel()
+            return batidas
+
+        inicio = time.perf_counter()
+        batidas = asyncio.run(cenario())
+        # Dois tokens a 20/s: ~0.1s, durante os quais o loop seguiu rodando
+        self.assertGreaterEqual(time.perf_counter() - inicio, 0.09)
+        self.assertGreater(batidas, 5)
+        self.assertEqual(balde.esperas, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lote
+
+
+def buscar(simbolo):
+    if simbolo == 'XXX':
+        raise ValueError('Symbol not found')
+    return [1, 2, 3]
+
+
+def calcular(simbolo, dados):
+    if simbolo == 'ERRO':
+        raise ZeroDivisionError('falha no cálculo')
+    return f'{simbolo}:{sum(dados)}'
+
+
+class TestLote(unittest.TestCase):
+
+    def test_normalizar_simbolos(self):
+        self.assertEqual(lote.normalizar_simbolos(['aapl', ' MSFT', 'AAPL'], 10), ['AAPL', 'MSFT'])
+        with self.assertRaises(ValueError):
+            lote.normalizar_simbolos('AAPL', 10)
+        with self.assertRaises(ValueError):
+            lote.normalizar_simbolos(['A', 'B', 'C'], 2)
+
+    def test_falhas_por_simbolo(self):
+        resultados = {
+            s: (r, e) for s, r, e in lote.processar_lote(['AAPL', 'XXX', 'ERRO'], buscar, calcular)
+        }
+        self.assertEqual(resultados['AAPL'], ('AAPL:6', None))
+        self.assertEqual(resultados['XXX'], (None, 'Symbol not found'))
+        self.assertEqual(resultados['ERRO'], (None, 'falha no cálculo'))
+
+    def test_com_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            resultados = list(lote.processar_lote(['A', 'B'], buscar, calcular, executor=executor))
+        self.assertEqual(sorted(r for _, r, _ in resultados), ['A:6', 'B:6'])
+
+
+if __name__ == '__main__':
+    unittest.main()
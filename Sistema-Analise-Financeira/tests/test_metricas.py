@@ -0,0 +1,159 @@
+import unittest
+import asyncio
+import tempfile
+import time
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import metricas
+from cache import CacheResultados
+from config import Config
+from stub_provedor import TesteComProvedor
+
+
+class TestMetricas(unittest.TestCase):
+
+    def setUp(self):
+        self.ativo = Config.METRICS_ENABLED
+        Config.METRICS_ENABLED = True
+        metricas.etapas.limpar()
+
+    def tearDown(self):
+        Config.METRICS_ENABLED = self.ativo
+
+    def test_etapa_desligada_e_nula(self):
+        Config.METRICS_ENABLED = False
+        tempos = metricas.iniciar_requisicao()
+        self.assertIs(metricas.etapa('a'), metricas.etapa('b'))
+        with metricas.etapa('a'):
+            pass
+        self.assertEqual(tempos, [])
+        self.assertNotIn('stage="a"', metricas.exportar())
+
+    def test_etapas_e_server_timing(self):
+        tempos = metricas.iniciar_requisicao()
+        with metricas.etapa('fetch'):
+            time.sleep(0.002)
+        for _ in range(2):
+            with metricas.etapa('indicators'):
+                pass
+        self.assertEqual([nome for nome, _ in tempos], ['fetch', 'indicators', 'indicators'])
+        self.assertGreaterEqual(tempos[0][1], 0.002)
+        cabecalho = metricas.server_timing([('a', 0.0015), ('b', 0.001), ('a', 0.001)], 0.01)
+        self.assertEqual(cabecalho, 'a;dur=2.50, b;dur=1.00, total;dur=10.00')
+
+    def test_histograma_prometheus(self):
+        histograma = metricas.Histograma('teste_seconds', 'Teste', ['stage'], limites=(0.1, 1.0))
+        for segundos in (0.05, 0.5, 0.5, 5.0):
+            histograma.observar(segundos, 'x')
+        linhas = histograma.exportar()
+        self.assertEqual(linhas[:2], ['# HELP teste_seconds Teste', '# TYPE teste_seconds histogram'])
+        self.assertEqual(linhas[2:], [
+            'teste_seconds_bucket{stage="x",le="0.1"} 1',
+            'teste_seconds_bucket{stage="x",le="1.0"} 3',
+            'teste_seconds_bucket{stage="x",le="+Inf"} 4',
+            'teste_seconds_sum{stage="x"} 6.05',
+            'teste_seconds_count{stage="x"} 4',
+        ])
+
+    def test_caches(self):
+        cache = CacheResultados()
+        cache.obter_ou_calcular('a', lambda: 1)
+        cache.obter_ou_calcular('a', lambda: 1)
+        linhas = metricas.linhas_caches({'teste': cache})
+        self.assertIn('cache_hits_total{cache="teste"} 1', linhas)
+        self.assertIn('cache_hit_ratio{cache="teste"} 0.5', linhas)
+        self.assertIn('# TYPE cache_hit_ratio gauge', linhas)
+
+    def test_amostrador_perfil(self):
+        perfil = metricas.AmostradorPerfil(intervalo=0.001).iniciar()
+
+        def ocupada():
+            fim = time.perf_counter() + 0.05
+            while time.perf_counter() < fim:
+                pass
+
+        ocupada()
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = perfil.salvar(diretorio, 'perfil')
+            with open(caminho) as arquivo:
+                linhas = arquivo.read().splitlines()
+        self.assertTrue(linhas)
+        pilha, quantidade = linhas[0].rsplit(' ', 1)
+        self.assertGreater(int(quantidade), 0)
+        self.assertTrue(any('ocupada (test_metricas.py)' in l for l in linhas))
+
+
+class TestInstrumentacaoApp(TesteComProvedor):
+
+    def setUp(self):
+        self.config = (Config.METRICS_ENABLED, Config.PROFILE_ENABLED, Config.PROFILE_DIR)
+        Config.METRICS_ENABLED = True
+        super().setUp()
+        self.corpo = {'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-01', 'horizon': 5}
+
+    def tearDown(self):
+        Config.METRICS_ENABLED, Config.PROFILE_ENABLED, Config.PROFILE_DIR = self.config
+
+    def etapas(self, resposta):
+        return [parte.split(';')[0] for parte in resposta.headers['Server-Timing'].split(', ')]
+
+    def test_server_timing(self):
+        resposta = self.cliente.post('/data', json=self.corpo)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            sorted(self.etapas(resposta)),
+            ['fetch', 'forecast', 'indicators', 'serialize', 'total', 'upstream']
+        )
+        # Em cache: só a serialização
+        resposta = self.cliente.post('/data', json=self.corpo)
+        self.assertEqual(self.etapas(resposta), ['serialize', 'total'])
+
+        Config.METRICS_ENABLED = False
+        resposta = self.cliente.post('/data', json=self.corpo)
+        self.assertNotIn('Server-Timing', resposta.headers)
+
+    def test_endpoint_metrics(self):
+        self.cliente.post('/data', json=self.corpo)
+        self.cliente.post('/data', json=self.corpo)
+        resposta = self.cliente.get('/metrics')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.content_type.startswith('text/plain; version=0.0.4'))
+        texto = resposta.get_data(as_text=True)
+        self.assertIn('pipeline_stage_seconds_count{stage="indicators"}', texto)
+        self.assertIn('cache_hits_total{cache="analises"}', texto)
+        self.assertIn('http_request_seconds_count{method="POST",route="/data",status="200"}', texto)
+        self.assertIn('upstream_request_seconds_bucket{le="+Inf"}', texto)
+
+    def test_perfil_por_requisicao(self):
+        resposta = self.cliente.post('/data?profile=1', json=self.corpo)
+        self.assertNotIn('X-Profile', resposta.headers)
+
+        Config.PROFILE_ENABLED = True
+        Config.PROFILE_DIR = os.path.join(self.diretorio.name, 'perfis')
+        resposta = self.cliente.post('/data?profile=1', json=dict(self.corpo, horizon=6))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn(resposta.headers['X-Profile'], os.listdir(Config.PROFILE_DIR))
+
+    def test_server_timing_asgi(self):
+        from test_asgi import chamar
+        # Sem pool de processos o cálculo roda numa thread e entra no cabeçalho
+        pool, workers = app_simples._pool_calculo, Config.BATCH_PROCESS_WORKERS
+        app_simples._pool_calculo, Config.BATCH_PROCESS_WORKERS = None, 0
+        try:
+            status, cabecalhos, _ = asyncio.run(chamar('POST', '/data', self.corpo))
+        finally:
+            app_simples._pool_calculo, Config.BATCH_PROCESS_WORKERS = pool, workers
+        self.assertEqual(status, 200)
+        timing = cabecalhos[b'server-timing'].decode()
+        for nome in ('fetch', 'upstream', 'indicators', 'forecast', 'serialize', 'total'):
+            self.assertIn(f'{nome};dur=', timing)
+
+
+if __name__ == '__main__':
+    unittest.main()
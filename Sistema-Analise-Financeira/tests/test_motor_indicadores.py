@@ -0,0 +1,114 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import motor_indicadores
+
+
+def indicadores_originais(df, ajuste):
+    """Cálculo como era feito antes do motor, usado como referência"""
+    df = df.copy()
+    df['SMA_20'] = df['Close'].rolling(window=20).mean()
+    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df['SMA_200'] = df['Close'].rolling(window=200).mean()
+    df['EMA_12'] = df['Close'].ewm(span=12, adjust=ajuste).mean()
+    df['EMA_26'] = df['Close'].ewm(span=26, adjust=ajuste).mean()
+
+    delta = df['Close'].diff()
+    rs = delta.clip(lower=0).rolling(window=14).mean() / \
+        (-delta.clip(upper=0)).rolling(window=14).mean()
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    df['MACD'] = df['EMA_12'] - df['EMA_26']
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=ajuste).mean()
+    df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
+
+    df['Middle_Band'] = df['Close'].rolling(window=20).mean()
+    std = df['Close'].rolling(window=20).std()
+    df['Upper_Band'] = df['Middle_Band'] + (2 * std)
+    df['Lower_Band'] = df['Middle_Band'] - (2 * std)
+
+    high_low = df['High'] - df['Low']
+    high_close = (df['High'] - df['Close'].shift()).abs()
+    low_close = (df['Low'] - df['Close'].shift()).abs()
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    df['ATR'] = tr.rolling(window=14).mean()
+
+    low_14 = df['Low'].rolling(window=14).min()
+    high_14 = df['High'].rolling(window=14).max()
+    df['Stochastic_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
+    df['Stochastic_D'] = df['Stochastic_K'].rolling(window=3).mean()
+    df['Williams_R'] = -100 * ((high_14 - df['Close']) / (high_14 - low_14))
+
+    tp = (df['High'] + df['Low'] + df['Close']) / 3
+    sma_tp = tp.rolling(window=20).mean()
+    mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
+    df['CCI'] = (tp - sma_tp) / (0.015 * mad)
+    return df
+
+
+class TestMotorIndicadores(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        n = 400
+        close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.02, n)))
+        self.df = pd.DataFrame({
+            'Open': close * np.random.uniform(0.98, 1.02, n),
+            'High': close * np.random.uniform(1.00, 1.05, n),
+            'Low': close * np.random.uniform(0.95, 1.00, n),
+            'Close': close,
+            'Volume': np.random.randint(1000000, 10000000, n)
+        }, index=pd.date_range('2023-01-01', periods=n, freq='D'))
+
+    def test_paridade_com_calculo_original(self):
+        for ajuste in (True, False):
+            esperado = indicadores_originais(self.df, ajuste)
+            nomes = [c for c in esperado.columns if c not in self.df.columns]
+            obtido = motor_indicadores.calcular(self.df, nomes, ajuste_ema=ajuste)
+            for nome in nomes:
+                np.testing.assert_allclose(
+                    obtido[nome], esperado[nome], rtol=1e-10, equal_nan=True, err_msg=nome
+                )
+
+    def test_ordem_das_colunas(self):
+        nomes = ['RSI', 'SMA_20', 'ATR_14']
+        resultado = motor_indicadores.calcular(self.df, nomes)
+        self.assertEqual(list(resultado.columns[-3:]), nomes)
+        self.assertNotIn('CCI', resultado.columns)
+
+    def test_subconjunto_nao_calcula_o_resto(self):
+        plano = motor_indicadores.plano(['RSI'])
+        self.assertEqual(plano, ['delta', 'media_ganho_14', 'media_perda_14', 'RSI'])
+
+    def test_intermediarios_calculados_uma_vez(self):
+        chamadas = []
+        original = motor_indicadores.REGISTRO['sma_20'].funcao
+
+        def contar(*args, **kwargs):
+            chamadas.append(1)
+            return original(*args, **kwargs)
+
+        motor_indicadores.REGISTRO['sma_20'].funcao = contar
+        try:
+            motor_indicadores.calcular(self.df, ['SMA_20', 'Middle_Band', 'Upper_Band'])
+        finally:
+            motor_indicadores.REGISTRO['sma_20'].funcao = original
+        self.assertEqual(len(chamadas), 1)
+
+    def test_indicador_desconhecido(self):
+        with self.assertRaises(ValueError):
+            motor_indicadores.calcular(self.df, ['XYZ'])
+
+    def test_nao_altera_entrada(self):
+        motor_indicadores.calcular(self.df, ['RSI'])
+        self.assertNotIn('RSI', self.df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import previsao
+
+
+class TestPrevisao(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(7)
+        self.x = np.arange(250, dtype=float)
+        self.y = 100 + 0.3 * self.x - 0.001 * self.x ** 2 + np.random.normal(0, 1, 250)
+        previsao.modelos.limpar()
+
+    def test_igual_ao_polyfit(self):
+        for grau in (1, 2, 3):
+            modelo = previsao.ajustar(self.x, self.y, grau)
+            esperado = np.polyval(np.polyfit(self.x, self.y, grau), np.arange(250, 280))
+            np.testing.assert_allclose(modelo.prever(np.arange(250, 280)), esperado, rtol=1e-9)
+
+    def test_grau_3_em_dias_corridos(self):
+        # x em dias desde o início: sem reescala a matriz fica mal condicionada
+        datas = pd.bdate_range('2005-01-03', periods=5000)
+        dias = (datas - datas[0]).days.to_numpy()
+        y = 50 + 1e-2 * dias + 1e-6 * dias ** 2 - 1e-10 * dias ** 3
+        modelo = previsao.ajustar(dias, y, 3)
+        np.testing.assert_allclose(modelo.prever(dias), y, rtol=1e-9)
+
+    def test_poucos_pontos(self):
+        modelo = previsao.ajustar([0.0], [10.0], 2)
+        np.testing.assert_allclose(modelo.prever([0, 1]), [10.0, 10.0])
+        with self.assertRaises(ValueError):
+            previsao.ajustar([], [], 2)
+
+    def test_cache_por_janela(self):
+        # limpar() não zera os contadores: conta só os acertos deste teste
+        acertos = previsao.modelos.acertos
+        primeiro = previsao.obter_modelo(self.x, self.y, 2, chave='AAPL')
+        self.assertIs(previsao.obter_modelo(self.x, self.y, 2, chave='AAPL'), primeiro)
+        y = self.y.copy()
+        y[-1] += 1
+        self.assertIsNot(previsao.obter_modelo(self.x, y, 2, chave='AAPL'), primeiro)
+        self.assertEqual(previsao.modelos.acertos - acertos, 1)
+
+    def test_lote_igual_a_individual(self):
+        modelos = [previsao.ajustar(self.x * k, self.y + k, 2) for k in (1, 2, 3)]
+        futuros = np.vstack([np.arange(250, 260) * k for k in (1, 2, 3)])
+        lote = previsao.prever_lote(modelos, futuros)
+        for i, modelo in enumerate(modelos):
+            np.testing.assert_allclose(lote[i], modelo.prever(futuros[i]), rtol=1e-12)
+
+    def test_datas_futuras(self):
+        datas = previsao.datas_futuras(pd.Timestamp('2024-02-27'), 3)
+        self.assertEqual(list(datas.strftime('%Y-%m-%d')),
+                         ['2024-02-28', '2024-02-29', '2024-03-01'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from provedor import ClienteTwelveData, ProvedorIndisponivel
+from limitador import BaldeTokens
+from stub_provedor import ProvedorFalso
+
+
+class TestClienteTwelveData(unittest.TestCase):
+
+    def setUp(self):
+        self.esperas = []
+        self.stub = ProvedorFalso().__enter__()
+        self.cliente = ClienteTwelveData(
+            'chave', base_url=self.stub.url, timeout=(1, 1), tentativas=2,
+            dormir=self.esperas.append
+        )
+
+    def tearDown(self):
+        self.stub.__exit__()
+
+    def test_serie_temporal(self):
+        dados = self.cliente.serie_temporal('AAPL', start_date='2024-01-01',
+                                            end_date='2024-01-31', end=None)
+        self.assertEqual(dados['status'], 'ok')
+        self.assertEqual(len(dados['values']), 23)
+        caminho, params = self.stub.requisicoes[0]
+        self.assertEqual(caminho, '/time_series')
+        self.assertEqual(params['apikey'], 'chave')
+        self.assertEqual(params['interval'], '1day')
+        self.assertNotIn('end', params)
+
+    def test_reaproveita_conexao(self):
+        for _ in range(5):
+            self.cliente.serie_temporal('AAPL', outputsize=10)
+        self.assertEqual(len(self.stub.portas_clientes), 1)
+
+    def test_repete_em_429_e_5xx(self):
+        self.stub.respostas.extend([
+            (429, {'message': 'limite'}, {'Retry-After': '3'}),
+            (503, {'message': 'fora'}, {}),
+        ])
+        dados = self.cliente.serie_temporal('AAPL', outputsize=10)
+
+        self.assertEqual(len(dados['values']), 10)
+        self.assertEqual(self.esperas, [3.0, 1.0])
+        resumo = self.cliente.metricas.resumo()
+        self.assertEqual(resumo['requisicoes'], 3)
+        self.assertEqual(resumo['novas_tentativas'], 2)
+        self.assertEqual(resumo['limitacoes'], 1)
+        self.assertEqual(sum(resumo['histograma'].values()), 3)
+
+    def test_limite_no_corpo_json(self):
+        self.stub.respostas.append(
+            (200, {'code': 429, 'status': 'error', 'message': 'API rate limit exceeded'}, {})
+        )
+        self.cliente.serie_temporal('AAPL', outputsize=10)
+        self.assertEqual(self.cliente.metricas.limitacoes, 1)
+
+    def test_desiste_apos_tentativas(self):
+        self.stub.respostas.extend([(500, {}, {})] * 3)
+        with self.assertRaises(ProvedorIndisponivel):
+            self.cliente.serie_temporal('AAPL')
+        self.assertEqual(self.esperas, [0.5, 1.0])
+        self.assertEqual(self.cliente.metricas.erros, 1)
+
+    def test_erro_de_negocio_nao_repete(self):
+        self.stub.respostas.append(
+            (200, {'code': 400, 'status': 'error', 'message': 'Symbol not found'}, {})
+        )
+        dados = self.cliente.serie_temporal('XXXX')
+        self.assertEqual(dados['message'], 'Symbol not found')
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+    def test_timeout(self):
+        self.stub.atraso = 1.5
+        cliente = ClienteTwelveData('chave', base_url=self.stub.url, timeout=(1, 0.2),
+                                    tentativas=1, dormir=self.esperas.append)
+        with self.assertRaises(ProvedorIndisponivel):
+            cliente.serie_temporal('AAPL', outputsize=1)
+
+    def test_passa_pelo_limitador(self):
+        balde = BaldeTokens(2, 60, dormir=self.esperas.append)
+        cliente = ClienteTwelveData('chave', base_url=self.stub.url, limitadores=[balde])
+        cliente.serie_temporal('AAPL', outputsize=1)
+        cliente.serie_temporal('AAPL', outputsize=1)
+        self.assertFalse(balde.tentar())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import previsao
+import reamostragem
+from stub_provedor import TesteComProvedor
+
+
+def gerar_minutos(dias=3, inicio='2024-01-02'):
+    """Barras de 1 minuto das 09:30 às 15:59 em ``dias`` pregões"""
+    pregoes = pd.bdate_range(inicio, periods=dias)
+    datas = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(dia + pd.Timedelta('9h30min'), periods=390, freq='min') for dia in pregoes
+    ]))
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(datas)))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.05, len(datas)),
+        'High': close + 0.2,
+        'Low': close - 0.2,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(datas)).astype(float)
+    }, index=pd.DatetimeIndex(datas, name='datetime'))
+
+
+def pandas_resample(df, regra, **opcoes):
+    return df.resample(regra, **opcoes).agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+
+
+class TestReamostragem(unittest.TestCase):
+
+    def test_intradiario_igual_ao_pandas(self):
+        df = gerar_minutos()
+        for intervalo, regra in (('5min', '5min'), ('15min', '15min'), ('1h', '1h')):
+            with self.subTest(intervalo=intervalo):
+                obtido = reamostragem.reamostrar(df, intervalo)
+                esperado = pandas_resample(df, regra, offset='30min')
+                esperado.index = esperado.index.astype('datetime64[ns]')
+                pd.testing.assert_frame_equal(obtido, esperado, check_freq=False)
+
+    def test_grupos_comecam_no_primeiro_pregao_do_dia(self):
+        obtido = reamostragem.reamostrar(gerar_minutos(dias=1), '1h')
+        self.assertEqual(obtido.index.strftime('%H:%M').tolist(),
+                         ['09:30', '10:30', '11:30', '12:30', '13:30', '14:30', '15:30'])
+        # A última barra do dia tem só 30 minutos
+        self.assertEqual(obtido['Volume'].iloc[-1],
+                         gerar_minutos(dias=1)['Volume'].iloc[-30:].sum())
+
+    def test_semana_e_mes(self):
+        datas = pd.bdate_range('2024-01-01', '2024-02-29')
+        df = pd.DataFrame({col: np.arange(len(datas), dtype=float)
+                           for col in reamostragem.COLUNAS}, index=datas)
+        semanas = reamostragem.reamostrar(df, '1week')
+        self.assertTrue((semanas.index.dayofweek == 0).all())
+        self.assertEqual(semanas['Volume'].iloc[0], sum(range(5)))
+        self.assertEqual(semanas['Close'].iloc[0], 4)
+        meses = reamostragem.reamostrar(df, '1month')
+        self.assertEqual(meses.index.strftime('%Y-%m-%d').tolist(), ['2024-01-01', '2024-02-01'])
+        self.assertEqual(meses['Open'].iloc[1], len(pd.bdate_range('2024-01-01', '2024-01-31')))
+
+    def test_vazio(self):
+        vazio = gerar_minutos().iloc[:0]
+        self.assertTrue(reamostragem.reamostrar(vazio, '1h').empty)
+
+    def test_intervalo_base(self):
+        self.assertEqual(reamostragem.intervalo_base('1h', '1min'), '1min')
+        self.assertEqual(reamostragem.intervalo_base('1h', '45min'), '1h')
+        self.assertEqual(reamostragem.intervalo_base('1week', '1min'), '1day')
+        self.assertEqual(reamostragem.intervalo_base('1min', '5min'), '1min')
+        with self.assertRaises(ValueError):
+            reamostragem.intervalo_base('3min', '1min')
+
+    def test_datas_futuras(self):
+        ultima = pd.Timestamp('2024-01-02 15:55')
+        self.assertEqual(
+            previsao.datas_futuras(ultima, 2, '5min').strftime('%H:%M').tolist(),
+            ['16:00', '16:05']
+        )
+        self.assertEqual(
+            previsao.datas_futuras('2024-01-31', 2, '1month').strftime('%Y-%m-%d').tolist(),
+            ['2024-02-29', '2024-03-31']
+        )
+        self.assertEqual(len(previsao.datas_futuras('2024-01-31', 3)), 3)
+
+
+class TestDadosIntradiarios(TesteComProvedor):
+
+    def post(self, **corpo):
+        corpo = dict({'symbol': 'AAPL', 'start': '2024-01-02', 'end': '2024-02-09',
+                      'horizon': 3}, **corpo)
+        return self.cliente.post('/data', json=corpo)
+
+    def test_paginas_e_reamostragem(self):
+        resposta = self.post(interval='1h')
+        self.assertEqual(resposta.status_code, 200)
+        corpo = resposta.get_json()
+        self.assertEqual(corpo['meta']['interval'], '1h')
+        # 29 pregões pedidos e 36 de aquecimento (desde 2023-11-12), de 390
+        # minutos: seis páginas de 1min na base do armazém
+        chamadas = [p for _, p in self.stub.requisicoes]
+        self.assertEqual(len(chamadas), 6)
+        self.assertTrue(all(p['interval'] == '1min' for p in chamadas))
+        self.assertEqual(chamadas[0]['start_date'], '2023-11-12 00:00:00')
+        self.assertEqual(chamadas[0]['end_date'], '2024-02-09 23:59:59')
+        self.assertEqual(chamadas[1]['end_date'][:10], '2024-01-24')
+
+        df = app_simples.armazem.ler('AAPL', '1min')
+        self.assertEqual(len(df), 65 * 390)
+        self.assertFalse(df.index.has_duplicates)
+        datas = [linha['Date'] for linha in corpo['data']]
+        self.assertEqual(datas[0], '2024-01-02 09:30:00')
+        self.assertTrue(datas[-1].endswith('15:30:00'))
+        self.assertEqual(corpo['future'][0]['Date'], '2024-02-09 16:30:00')
+
+        # Outro intervalo derivado da mesma base: nenhuma chamada nova
+        resposta = self.post(interval='5min')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(self.stub.requisicoes), 6)
+        self.assertTrue(resposta.get_json()['data'][-1]['Date'].endswith('15:55:00'))
+
+    def test_diario_inalterado(self):
+        resposta = self.post(start='2023-01-01', end='2024-06-01')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.get_json()['meta']['interval'], '1day')
+        self.assertEqual(self.stub.requisicoes[0][1]['interval'], '1day')
+        self.assertEqual(len(resposta.get_json()['future'][0]['Date']), 10)
+
+    def test_intervalo_invalido(self):
+        resposta = self.post(interval='3min')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('Intervalo inválido', resposta.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
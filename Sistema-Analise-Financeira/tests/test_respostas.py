@@ -0,0 +1,98 @@
+import unittest
+import gzip
+import json
+import re
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import respostas
+from stub_provedor import TesteComProvedor
+
+
+class TestCodificacao(unittest.TestCase):
+
+    def test_negociacao(self):
+        self.assertEqual(respostas.escolher_codificacao('gzip, deflate'), 'gzip')
+        self.assertIsNone(respostas.escolher_codificacao('identity'))
+        self.assertIsNone(respostas.escolher_codificacao('gzip;q=0'))
+        self.assertIsNone(respostas.escolher_codificacao(None))
+
+    def test_etag_sem_sufixo(self):
+        self.assertEqual(respostas.sem_codificacao('abc-gzip'), 'abc')
+        self.assertEqual(respostas.sem_codificacao('abc-br'), 'abc')
+        self.assertEqual(respostas.sem_codificacao('abc'), 'abc')
+
+    def test_tipos(self):
+        self.assertTrue(respostas.comprimivel('application/json'))
+        self.assertTrue(respostas.comprimivel('text/css; charset=utf-8'))
+        self.assertFalse(respostas.comprimivel('application/x-ndjson'))
+        self.assertFalse(respostas.comprimivel('image/png'))
+
+
+class TestRespostasApp(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        self.url = '/data?symbol=AAPL&start=2023-01-01&end=2024-06-01&horizon=5'
+
+    def test_get_com_etag_e_304(self):
+        resposta = self.cliente.get(self.url)
+        self.assertEqual(resposta.status_code, 200)
+        etag, _ = resposta.get_etag()
+        self.assertTrue(etag)
+        self.assertIn('max-age', resposta.headers['Cache-Control'])
+        self.assertEqual(resposta.get_json(), self.cliente.post('/data', json={
+            'symbol': 'AAPL', 'start': '2023-01-01', 'end': '2024-06-01', 'horizon': 5
+        }).get_json())
+
+        revalidada = self.cliente.get(self.url, headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertEqual(revalidada.data, b'')
+        # A versão em gzip guardada pelo cliente também vale
+        revalidada = self.cliente.get(self.url, headers={'If-None-Match': f'"{etag}-gzip"'})
+        self.assertEqual(revalidada.status_code, 304)
+
+        outra = self.cliente.get(self.url.replace('2024-06-01', '2024-05-01'))
+        self.assertNotEqual(outra.get_etag()[0], etag)
+
+    def test_compressao(self):
+        resposta = self.cliente.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resposta.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resposta.headers['Vary'])
+        self.assertTrue(resposta.get_etag()[0].endswith('-gzip'))
+        corpo = json.loads(gzip.decompress(resposta.data))
+        self.assertEqual(corpo, self.cliente.get(self.url).get_json())
+
+        # Erro pequeno e NDJSON em streaming saem sem compressão
+        erro = self.cliente.post('/data', json={'format': 'xml'},
+                                 headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', erro.headers)
+        lote = self.cliente.post('/data/batch', json={
+            'symbols': ['AAPL'], 'start': '2023-01-01', 'end': '2024-06-01'
+        }, headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', lote.headers)
+
+    def test_estaticos_versionados(self):
+        pagina = self.cliente.get('/').get_data(as_text=True)
+        url = re.search(r'/static/app\.js\?v=[0-9a-f]+', pagina).group(0)
+        resposta = self.cliente.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('immutable', resposta.headers['Cache-Control'])
+        self.assertEqual(resposta.headers['Content-Encoding'], 'gzip')
+        with open(os.path.join(app_simples.app.static_folder, 'app.js'), 'rb') as arquivo:
+            self.assertEqual(gzip.decompress(resposta.data), arquivo.read())
+        resposta.close()
+
+        # Versão que não é a do arquivo atual não ganha cache longo
+        antiga = self.cliente.get('/static/app.js?v=0')
+        self.assertNotIn('immutable', antiga.headers.get('Cache-Control', ''))
+        antiga.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import json
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serializacao
+
+
+class TestSerializacao(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Close': [10.5, 11.0, 12.25],
+            'Volume': [100, 200, 300],
+            'RSI': [np.nan, 55.5, np.nan]
+        }, index=pd.date_range('2024-01-01', periods=3, freq='D'))
+
+    def test_linhas_iguais_ao_iterrows(self):
+        campos = ['Date', 'Close', 'Volume', 'RSI']
+        esperado = []
+        for idx, row in self.df.iterrows():
+            esperado.append({
+                'Date': idx.strftime('%Y-%m-%d'),
+                'Close': float(row['Close']),
+                'Volume': int(row['Volume']),
+                'RSI': float(row['RSI']) if pd.notna(row['RSI']) else None
+            })
+        self.assertEqual(serializacao.serializar(self.df, campos), esperado)
+
+    def test_colunar(self):
+        cols = serializacao.serializar(self.df, ['Date', 'RSI'], 'columnar')
+        self.assertEqual(cols, {
+            'Date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+            'RSI': [None, 55.5, None]
+        })
+
+    def test_date_como_coluna(self):
+        futuro = pd.DataFrame({'Date': pd.date_range('2024-02-01', periods=2), 'Pred': [1.0, 2.0]})
+        self.assertEqual(
+            serializacao.serializar(futuro, serializacao.CAMPOS_FUTURO),
+            [{'Date': '2024-02-01', 'Pred': 1.0}, {'Date': '2024-02-02', 'Pred': 2.0}]
+        )
+
+    def test_json_valido(self):
+        corpo = serializacao.dumps({'data': serializacao.serializar(self.df, ['RSI'], 'columnar')})
+        self.assertEqual(json.loads(corpo), {'data': {'RSI': [None, 55.5, None]}})
+
+    def test_formato_invalido(self):
+        with self.assertRaises(ValueError):
+            serializacao.serializar(self.df, ['Close'], 'xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,20 @@
 import unittest
+import importlib.util
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import sys
 import os
 
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+# O módulo tem hífen no nome, então é carregado pelo caminho
+_spec = importlib.util.spec_from_file_location(
+    'sistema_analise_financeira', os.path.join(RAIZ, 'sistema-analise-financeira.py')
+)
+sistema = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sistema)
 
 class TestIndicadores(unittest.TestCase):
     
@@ -33,9 +41,7 @@ class TestIndicadores(unittest.TestCase):
     
     def test_sma_calculation(self):
         
-        from sistema_analise_financeira import calcular_indicadores
-        
-        result = calcular_indicadores(self.test_data)
+        result = sistema.calcular_indicadores(self.test_data)
         
         
         self.assertIn('SMA_20', result.columns)
@@ -52,9 +58,7 @@ class TestIndicadores(unittest.TestCase):
     
     def test_rsi_calculation(self):
        
-        from Iqbraq import calcular_indicadores
-        
-        result = calcular_indicadores(self.test_data)
+        result = sistema.calcular_indicadores(self.test_data)
         
        
         self.assertIn('RSI', result.columns)
@@ -65,9 +69,7 @@ class TestIndicadores(unittest.TestCase):
     
     def test_macd_calculation(self):
         
-        from sistema_analise_financeira import calcular_indicadores
-        
-        result = calcular_indicadores(self.test_data)
+        result = sistema.calcular_indicadores(self.test_data)
         
         
         self.assertIn('MACD', result.columns)
@@ -79,9 +81,7 @@ class TestIndicadores(unittest.TestCase):
     
     def test_bollinger_bands(self):
         
-        from sistema_analise_financeira import calcular_indicadores
-        
-        result = calcular_indicadores(self.test_data)
+        result = sistema.calcular_indicadores(self.test_data)
         
        
         self.assertIn('Upper_Band', result.columns)
@@ -115,9 +115,7 @@ class TestPrevisao(unittest.TestCase):
     
     def test_prediction_function(self):
      
-        from Iqbraq import prever_precos
-        
-        df_with_preds, future_df = prever_precos(self.test_data, dias_a_frente=30)
+        df_with_preds, future_df = sistema.prever_precos(self.test_data, dias_a_frente=30)
         
         
         self.assertIn('Pred', df_with_preds.columns)
@@ -0,0 +1,51 @@
+import unittest
+import json
+import sys
+import os
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+sys.path.append(os.path.join(RAIZ, 'benchmarks'))
+
+import app_simples
+import suite
+
+
+class TestSuiteBenchmarks(unittest.TestCase):
+
+    def test_fixture_no_formato_da_api(self):
+        with open(suite.FIXTURE) as arquivo:
+            df = app_simples.quadro_api(json.load(arquivo))
+        self.assertEqual(list(df.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(len(df), 500)
+
+    def test_resposta_sintetica(self):
+        df = suite.gerar_ohlcv(50)
+        lido = app_simples.quadro_api(json.loads(suite.resposta_api(df)))
+        self.assertTrue((lido.index == df.index).all())
+        self.assertLess((lido['Close'] - df['Close']).abs().max(), 1e-5)
+
+    def test_executar_e_comparar(self):
+        saida = []
+        atual = suite.executar({'barras': [300], 'simbolos': [2]}, tempo_minimo=0,
+                               exibir=saida.append)
+        nomes = set(atual['resultados'])
+        for caso in ('parse/fixture', 'parse/300', 'indicadores_app/300',
+                     'indicadores_sistema/300', 'previsao_app/300', 'previsao_sistema/300',
+                     'serializacao_rows/300', 'exportacao_xlsx/300', 'lote/2'):
+            self.assertIn(caso, nomes)
+        self.assertEqual(len(saida), len(nomes))
+        self.assertGreaterEqual(atual['resultados']['lote/2']['repeticoes'], 3)
+
+        base = json.loads(json.dumps(atual))
+        base['resultados']['parse/300']['minimo'] = atual['resultados']['parse/300']['minimo'] / 2
+        regressoes, linhas = suite.comparar(base, atual, limite=0.10)
+        self.assertEqual([nome for nome, _ in regressoes], ['parse/300'])
+        self.assertAlmostEqual(regressoes[0][1], 2.0)
+        self.assertEqual(len(linhas), len(nomes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+import json
+import time
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import motor_indicadores
+import transmissao
+from config import Config
+from stub_provedor import TesteComProvedor
+
+
+def gerar_ohlcv(n, semente=0):
+    rng = np.random.default_rng(semente)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.5, n),
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1000, 5000, n).astype(float)
+    }, index=pd.bdate_range('2023-01-02', periods=n))
+
+
+def ler_evento(mensagem):
+    cabecalho, dados = mensagem.decode().strip().split('\n')
+    return cabecalho[len('event: '):], json.loads(dados[len('data: '):])
+
+
+class FonteFalsa:
+    """``historico`` até ``n`` barras; ``recentes`` devolve ``self.proxima``"""
+
+    def __init__(self, serie, n):
+        self.serie = serie
+        self.n = n
+        self.proxima = serie.iloc[n - 3:n]
+        self.consultas = 0
+
+    def recentes(self):
+        self.consultas += 1
+        return self.proxima
+
+    def argumentos(self):
+        return (
+            lambda: self.serie.iloc[:self.n], self.recentes,
+            lambda df, horizon: json.dumps({'linhas': len(df), 'horizon': horizon}).encode(),
+            lambda df: df.reset_index().to_json(orient='records', date_format='iso',
+                                                double_precision=15).encode(),
+            ['SMA_20', 'RSI', 'MACD', 'OBV']
+        )
+
+
+class TestCanal(unittest.TestCase):
+
+    def setUp(self):
+        self.serie = gerar_ohlcv(300)
+        self.fonte = FonteFalsa(self.serie, 250)
+        self.canal = transmissao.Canal(*self.fonte.argumentos(), intervalo=3600)
+        self.canal.iniciar()
+
+    def esperado(self, ate):
+        return motor_indicadores.calcular(
+            self.serie.iloc[:ate], ['SMA_20', 'RSI', 'MACD', 'OBV'], ajuste_ema=True
+        )
+
+    def barras(self, mensagem):
+        nome, dados = ler_evento(mensagem)
+        self.assertEqual(nome, 'bars')
+        return pd.DataFrame(dados).set_index('index')
+
+    def test_snapshot(self):
+        nome, dados = ler_evento(self.canal.mensagem_snapshot(7))
+        self.assertEqual(nome, 'snapshot')
+        self.assertEqual(dados, {'linhas': 250, 'horizon': 7})
+
+    def test_sem_novidade(self):
+        self.assertIsNone(self.canal.atualizar())
+
+    def test_barra_provisoria_alterada(self):
+        alterada = self.serie.iloc[247:250].copy()
+        alterada.iloc[-1, alterada.columns.get_loc('Close')] += 5
+        self.fonte.proxima = alterada
+        barras = self.barras(self.canal.atualizar())
+        self.assertEqual(len(barras), 1)
+        self.assertAlmostEqual(barras['Close'].iloc[0], alterada['Close'].iloc[-1])
+
+        # A versão alterada não entra no estado: com a barra seguinte o valor
+        # volta a ser o da série original
+        self.fonte.proxima = self.serie.iloc[248:251]
+        barras = self.barras(self.canal.atualizar())
+        self.assertEqual(len(barras), 2)
+        esperado = self.esperado(251)
+        for coluna in ('SMA_20', 'RSI', 'MACD', 'OBV'):
+            np.testing.assert_allclose(barras[coluna].to_numpy(),
+                                       esperado[coluna].iloc[-2:].to_numpy(), rtol=1e-9)
+
+    def test_novas_barras_e_snapshot_atualizado(self):
+        self.fonte.proxima = self.serie.iloc[255:260]
+        barras = self.barras(self.canal.atualizar())
+        # A provisória (249) sai com o último valor conhecido, depois as novas
+        self.assertEqual(len(barras), 6)
+        # 249 fechadas no início + 5 que fecharam agora + a nova provisória
+        self.assertEqual(ler_evento(self.canal.mensagem_snapshot(7))[1]['linhas'], 255)
+
+
+class TestDifusor(unittest.TestCase):
+
+    def test_um_canal_por_chave(self):
+        fonte = FonteFalsa(gerar_ohlcv(300), 250)
+        criados = []
+
+        def criar(chave):
+            criados.append(chave)
+            return fonte.argumentos()
+
+        difusor = transmissao.Difusor(criar, intervalo=0.01)
+        recebidos = {'a': [], 'b': []}
+        difusor.assinar('AAPL', recebidos['a'].append, 30)
+        difusor.assinar('AAPL', recebidos['b'].append, 5)
+        self.assertEqual(difusor.resumo(), {'canais': 1, 'assinantes': 2})
+
+        fonte.proxima = fonte.serie.iloc[249:252]
+        limite = time.time() + 2
+        while not recebidos['b'] and time.time() < limite:
+            time.sleep(0.01)
+        self.assertEqual(len(recebidos['a']), 1)
+        # Uma consulta e uma codificação para todos os assinantes
+        self.assertIs(recebidos['a'][0], recebidos['b'][0])
+
+        difusor.cancelar('AAPL', recebidos['a'].append)
+        difusor.cancelar('AAPL', recebidos['b'].append)
+        self.assertEqual(difusor.resumo(), {'canais': 0, 'assinantes': 0})
+        consultas = fonte.consultas
+        time.sleep(0.05)
+        self.assertEqual(fonte.consultas, consultas)
+        self.assertEqual(criados, ['AAPL'])
+
+
+class TestStreamApp(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        self.heartbeat = Config.STREAM_HEARTBEAT_SECONDS
+        Config.STREAM_HEARTBEAT_SECONDS = 0.05
+
+    def tearDown(self):
+        Config.STREAM_HEARTBEAT_SECONDS = self.heartbeat
+
+    def test_snapshot_e_heartbeat(self):
+        resposta = self.cliente.get('/stream?symbol=aapl&start=2023-01-01&horizon=5',
+                                    buffered=False)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.mimetype, 'text/event-stream')
+        partes = iter(resposta.response)
+        nome, dados = ler_evento(next(partes))
+        self.assertEqual(nome, 'snapshot')
+        self.assertEqual(dados['meta']['symbol'], 'AAPL')
+        self.assertEqual(len(dados['future']), 5)
+        self.assertEqual(next(partes), transmissao.PING)
+        self.assertEqual(app_simples.difusor.resumo()['assinantes'], 1)
+        self.assertIn('stream_subscribers 1', app_simples.metricas.exportar())
+
+        resposta.close()
+        self.assertEqual(app_simples.difusor.resumo(), {'canais': 0, 'assinantes': 0})
+
+    def test_intervalo_invalido(self):
+        resposta = self.cliente.get('/stream?symbol=AAPL&interval=3min')
+        self.assertEqual(resposta.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
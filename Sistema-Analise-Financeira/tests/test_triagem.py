@@ -0,0 +1,161 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_simples
+import triagem
+import motor_indicadores
+from armazenamento import ArmazemOHLCV
+from stub_provedor import TesteComProvedor
+
+
+def gerar(n, semente):
+    rng = np.random.default_rng(semente)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(1000, 5000, n).astype(float)
+    }, index=pd.DatetimeIndex(pd.bdate_range('2022-01-03', periods=n), name='Date'))
+
+
+class TestTabelaTriagem(unittest.TestCase):
+
+    def setUp(self):
+        self.tabela = triagem.TabelaTriagem(['RSI', 'Lower_Band'], capacidade=2)
+        dados = {
+            'AAA': {'Close': 10.0, 'RSI': 25.0, 'Lower_Band': 12.0},
+            'BBB': {'Close': 20.0, 'RSI': 55.0, 'Lower_Band': 18.0},
+            'CCC': {'Close': 30.0, 'RSI': np.nan, 'Lower_Band': 31.0},
+            'DDD': {'Close': 40.0, 'RSI': 80.0, 'Lower_Band': 35.0},
+        }
+        for simbolo, valores in dados.items():
+            self.tabela.definir(simbolo, '2024-05-31', valores)
+
+    def test_filtros(self):
+        resultado, total = self.tabela.consultar(['RSI < 30'])
+        self.assertEqual(resultado['Symbol'].tolist(), ['AAA'])
+        self.assertEqual(total, 1)
+        # Coluna contra coluna; NaN não passa em nenhum filtro
+        resultado, _ = self.tabela.consultar(['Close < Lower_Band'])
+        self.assertEqual(resultado['Symbol'].tolist(), ['AAA', 'CCC'])
+        resultado, _ = self.tabela.consultar(['Close < Lower_Band', 'RSI >= 0'])
+        self.assertEqual(resultado['Symbol'].tolist(), ['AAA'])
+        self.assertEqual(list(resultado.columns), ['Symbol', 'Date', *self.tabela.colunas])
+
+    def test_ordenacao_e_limite(self):
+        resultado, total = self.tabela.consultar(ordenar='RSI', decrescente=True, limite=2,
+                                                 colunas=['RSI'])
+        self.assertEqual(resultado['Symbol'].tolist(), ['DDD', 'BBB'])
+        self.assertEqual(total, 4)
+        self.assertEqual(list(resultado.columns), ['Symbol', 'Date', 'RSI'])
+        resultado, _ = self.tabela.consultar(ordenar='RSI', limite=None)
+        self.assertEqual(resultado['Symbol'].tolist(), ['AAA', 'BBB', 'DDD', 'CCC'])
+
+    def test_erros(self):
+        for filtro in ('RSI <', 'RSI ~ 3', 'XYZ > 1', 'RSI > XYZ'):
+            with self.assertRaises(ValueError):
+                self.tabela.consultar([filtro])
+        with self.assertRaises(ValueError):
+            self.tabela.consultar(colunas=['XYZ'])
+
+    def test_remover_e_crescer(self):
+        self.tabela.remover('AAA')
+        self.tabela.remover('AAA')
+        self.assertEqual(len(self.tabela), 3)
+        resultado, _ = self.tabela.consultar(limite=None)
+        self.assertEqual(sorted(resultado['Symbol']), ['BBB', 'CCC', 'DDD'])
+        self.tabela.definir('EEE', '2024-05-31', {'Close': 1.0})
+        self.tabela.definir('BBB', '2024-06-03', {'Close': 21.0, 'RSI': 60.0})
+        resultado, _ = self.tabela.consultar(['Close > 20'])
+        self.assertEqual(sorted(resultado['Symbol']), ['BBB', 'CCC', 'DDD'])
+        self.assertEqual(self.tabela.data_de('BBB'), pd.Timestamp('2024-06-03').value)
+
+    def test_snapshot(self):
+        self.tabela.atualizado_em = 123.0
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'triagem.npz')
+            self.tabela.salvar(caminho)
+            outra = triagem.TabelaTriagem(['RSI', 'Lower_Band'])
+            outra.carregar(caminho)
+        self.assertEqual(outra.atualizado_em, 123.0)
+        esperado, _ = self.tabela.consultar(limite=None)
+        obtido, _ = outra.consultar(limite=None)
+        pd.testing.assert_frame_equal(obtido, esperado)
+
+    def test_atualizar_do_armazem(self):
+        calculados = []
+
+        def calcular(df):
+            calculados.append(len(df))
+            return motor_indicadores.calcular(df, ['RSI', 'Lower_Band'])
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            armazem = ArmazemOHLCV(diretorio)
+            for semente, simbolo in enumerate(['AAPL', 'MSFT']):
+                df = gerar(600, semente)
+                armazem.gravar(simbolo, '1day', df, df.index[0], df.index[-1])
+            tabela = triagem.TabelaTriagem(['RSI', 'Lower_Band'])
+            self.assertEqual(tabela.atualizar(armazem, calcular), 2)
+            # Só as últimas barras são lidas para aquecer os indicadores
+            self.assertEqual(calculados, [triagem.BARRAS_AQUECIMENTO] * 2)
+
+            resultado, _ = tabela.consultar(ordenar='Close', limite=None)
+            esperado = motor_indicadores.calcular(gerar(600, 1), ['RSI']).iloc[-1]
+            linha = resultado.set_index('Symbol').loc['MSFT']
+            self.assertAlmostEqual(linha['RSI'], esperado['RSI'])
+            self.assertEqual(linha['Date'], esperado.name)
+
+            # Sem barra nova nada é recalculado
+            self.assertEqual(tabela.atualizar(armazem, calcular), 0)
+            self.assertEqual(len(calculados), 2)
+            novo = gerar(601, 0).iloc[-1:]
+            armazem.gravar('AAPL', '1day', novo, novo.index[0], novo.index[0])
+            self.assertEqual(tabela.atualizar(armazem, calcular), 1)
+
+
+class TestScreenApp(TesteComProvedor):
+
+    def setUp(self):
+        super().setUp()
+        # Tabela nova, preenchida na primeira consulta a partir do armazém do teste
+        self.addCleanup(setattr, app_simples, 'tabela_triagem', app_simples.tabela_triagem)
+        app_simples.tabela_triagem = triagem.TabelaTriagem(app_simples.INDICADORES)
+        for semente, simbolo in enumerate(['AAPL', 'MSFT', 'GOOG']):
+            df = gerar(600, semente)
+            app_simples.armazem.gravar(simbolo, '1day', df, df.index[0], df.index[-1])
+
+    def test_consulta(self):
+        resposta = self.cliente.post('/screen', json={
+            'filters': ['RSI >= 0', 'Close > 0'], 'sort': 'RSI', 'desc': True, 'limit': 2,
+            'columns': ['RSI', 'Close']
+        })
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.get_json()
+        self.assertEqual(dados['meta']['symbols'], 3)
+        self.assertEqual(dados['meta']['matches'], 3)
+        self.assertIsNotNone(dados['meta']['updated'])
+        resultados = dados['results']
+        self.assertEqual(len(resultados), 2)
+        self.assertEqual(list(resultados[0]), ['Symbol', 'Date', 'RSI', 'Close'])
+        self.assertGreaterEqual(resultados[0]['RSI'], resultados[1]['RSI'])
+
+        colunar = self.cliente.post('/screen', json={'format': 'columnar', 'limit': 5}).get_json()
+        self.assertEqual(sorted(colunar['results']['Symbol']), ['AAPL', 'GOOG', 'MSFT'])
+
+    def test_parametros_invalidos(self):
+        for corpo in ({'filters': 'RSI < 30'}, {'filters': ['RSI ~ 30']},
+                      {'columns': ['XYZ']}, {'format': 'xml'}, {'limit': 'muitos'}):
+            resposta = self.cliente.post('/screen', json=corpo)
+            self.assertEqual(resposta.status_code, 400, corpo)
+            self.assertIn('error', resposta.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
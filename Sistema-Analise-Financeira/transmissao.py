@@ -0,0 +1,184 @@
+"""Atualização ao vivo dos gráficos por server-sent events (SSE).
+
+Cada ``Canal`` acompanha uma série (símbolo, intervalo, início): monta o
+snapshot inicial uma vez, guarda o estado de ``IndicadoresIncrementais`` e,
+enquanto houver assinantes, consulta o provedor a cada ``intervalo`` segundos
+numa única thread. Só as barras novas ou alteradas saem, já com os
+indicadores atualizados de forma incremental, e a mensagem é codificada uma
+vez e entregue a todos os assinantes do canal.
+
+A última barra recebida é provisória (o pregão ou a hora ainda pode mudar):
+ela é calculada sobre uma cópia do estado e só entra nele quando chega uma
+barra posterior. Um cliente aplica ``bars`` trocando a barra de mesma data
+e acrescentando as demais.
+"""
+import copy
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metricas
+from incremental import IndicadoresIncrementais
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PING = b': ping\n\n'
+
+
+def evento(nome, dados):
+    """Mensagem SSE; ``dados`` é JSON em uma linha (bytes)"""
+    return b'event: ' + nome.encode() + b'\ndata: ' + dados + b'\n\n'
+
+
+class Canal:
+    """Uma série acompanhada ao vivo, compartilhada pelos assinantes.
+
+    ``historico()`` e ``recentes()`` devolvem barras OHLCV (o histórico
+    inteiro e as últimas do provedor); ``snapshot(df, horizon)`` e
+    ``barras(df)`` codificam as mensagens a partir das barras com indicadores.
+    """
+
+    def __init__(self, historico, recentes, snapshot, barras, indicadores, intervalo=60.0):
+        self.historico = historico
+        self.recentes = recentes
+        self.snapshot = snapshot
+        self.barras = barras
+        self.indicadores = indicadores
+        self.intervalo = intervalo
+        self.assinantes = set()
+        self.encerrado = False
+        self.estado = None
+        self.quadro = None
+        self.pendente = None
+        self.provisoria = None
+        self._snapshots = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    # ESTADO
+
+    def _calcular_provisoria(self):
+        self.provisoria = copy.deepcopy(self.estado).atualizar(self.pendente)
+
+    def iniciar(self):
+        df = self.historico()
+        if df is None or df.empty:
+            raise ValueError('Dados não encontrados')
+        df = df[COLUNAS]
+        self.estado = IndicadoresIncrementais(self.indicadores, ajuste_ema=True)
+        self.quadro = self.estado.iniciar(df.iloc[:-1])
+        self.pendente = df.iloc[-1:]
+        self._calcular_provisoria()
+
+    def atualizar(self):
+        """Consulta o provedor; mensagem ``bars`` com o que mudou ou ``None``"""
+        df = self.recentes()
+        if df is None or df.empty:
+            return None
+        data_pendente = self.pendente.index[0]
+        novas = df.loc[df.index >= data_pendente, COLUNAS]
+        if novas.empty or novas.index[0] > data_pendente:
+            # A versão final da barra provisória não veio: fica a última conhecida
+            novas = pd.concat([self.pendente, novas])
+        if len(novas) == 1 and np.array_equal(
+                novas.to_numpy(dtype=float), self.pendente.to_numpy(dtype=float)):
+            return None
+
+        fechadas = self.estado.atualizar(novas.iloc[:-1])
+        if len(fechadas):
+            self.quadro = pd.concat([self.quadro, fechadas])
+        self.pendente = novas.iloc[-1:]
+        self._calcular_provisoria()
+        self._snapshots.clear()
+        return evento('bars', self.barras(pd.concat([fechadas, self.provisoria])))
+
+    def mensagem_snapshot(self, horizon):
+        mensagem = self._snapshots.get(horizon)
+        if mensagem is None:
+            quadro = pd.concat([self.quadro, self.provisoria])
+            mensagem = self._snapshots[horizon] = evento('snapshot', self.snapshot(quadro, horizon))
+        return mensagem
+
+    # ASSINANTES
+
+    def entrar(self, entregar, horizon):
+        """Registra ``entregar(mensagem)``; devolve o snapshot (ou ``None`` se encerrado)"""
+        with self._trava:
+            if self.encerrado:
+                return None
+            if self.estado is None:
+                self.iniciar()
+            self.assinantes.add(entregar)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._acompanhar, daemon=True)
+                self._thread.start()
+            return self.mensagem_snapshot(horizon)
+
+    def sair(self, entregar):
+        """Remove o assinante; retorna True (e para o canal) se não sobrou nenhum"""
+        with self._trava:
+            self.assinantes.discard(entregar)
+            if self.assinantes:
+                return False
+            self.encerrado = True
+            self._parar.set()
+            return True
+
+    def _acompanhar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                with metricas.etapa('stream_poll'), self._trava:
+                    mensagem = self.atualizar()
+                    assinantes = list(self.assinantes)
+            except Exception as e:
+                logger.warning("Falha ao atualizar o canal ao vivo: %s", e)
+                continue
+            if mensagem is not None:
+                for entregar in assinantes:
+                    entregar(mensagem)
+
+
+class Difusor:
+    """Canais ao vivo por chave, criados no primeiro assinante e parados no último.
+
+    ``criar(chave)`` devolve os argumentos de ``Canal`` (sem o intervalo).
+    """
+
+    def __init__(self, criar, intervalo=60.0):
+        self.criar = criar
+        self.intervalo = intervalo
+        self._canais = {}
+        self._trava = threading.Lock()
+
+    def assinar(self, chave, entregar, horizon):
+        """Registra o assinante e devolve a mensagem de snapshot"""
+        while True:
+            with self._trava:
+                canal = self._canais.get(chave)
+                if canal is None:
+                    canal = self._canais[chave] = Canal(*self.criar(chave), self.intervalo)
+            try:
+                mensagem = canal.entrar(entregar, horizon)
+            except Exception:
+                with self._trava:
+                    if self._canais.get(chave) is canal and not canal.assinantes:
+                        del self._canais[chave]
+                raise
+            if mensagem is not None:
+                return mensagem
+            # O canal encerrou entre a busca e a entrada: outro será criado
+
+    def cancelar(self, chave, entregar):
+        with self._trava:
+            canal = self._canais.get(chave)
+            if canal is not None and canal.sair(entregar):
+                del self._canais[chave]
+
+    def resumo(self):
+        with self._trava:
+            canais = list(self._canais.values())
+        return {'canais': len(canais), 'assinantes': sum(len(c.assinantes) for c in canais)}
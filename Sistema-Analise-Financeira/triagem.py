@@ -0,0 +1,200 @@
+"""Triagem (screener) entre símbolos sobre os últimos valores dos indicadores.
+
+``TabelaTriagem`` guarda, para cada símbolo do armazém local, a última barra
+OHLCV e os indicadores de ``calcular_indicadores`` numa matriz NumPy
+(símbolos x colunas). Filtros como ``"RSI < 30"`` ou ``"Close < Lower_Band"``
+viram máscaras booleanas sobre colunas inteiras, então uma consulta sobre
+milhares de símbolos custa poucos milissegundos. A atualização lê do armazém
+só as barras necessárias para aquecer os indicadores e pula símbolos sem
+barra nova.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import COLUNAS as COLUNAS_OHLCV
+
+logger = logging.getLogger(__name__)
+
+# Barras lidas por símbolo: cobre o aquecimento da SMA_200
+BARRAS_AQUECIMENTO = 400
+
+OPERADORES = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+_FILTRO = re.compile(r'^\s*(\w+)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$')
+
+
+class TabelaTriagem:
+    """Tabela em memória com a última linha de indicadores de cada símbolo"""
+
+    def __init__(self, indicadores, capacidade=1024):
+        self.colunas = list(COLUNAS_OHLCV) + [c for c in indicadores if c not in COLUNAS_OHLCV]
+        self._posicao = {nome: i for i, nome in enumerate(self.colunas)}
+        self.simbolos = np.empty(capacidade, dtype=object)
+        self.datas = np.zeros(capacidade, dtype='int64')
+        self.valores = np.full((capacidade, len(self.colunas)), np.nan)
+        self.quantidade = 0
+        self._linhas = {}
+        self._trava = threading.RLock()
+        self.atualizado_em = None
+
+    def __len__(self):
+        return self.quantidade
+
+    def _linha(self, simbolo):
+        linha = self._linhas.get(simbolo)
+        if linha is None:
+            if self.quantidade == len(self.simbolos):
+                # Capacidade dobrada, como uma lista do Python
+                nova = len(self.simbolos) * 2
+                self.simbolos = np.resize(self.simbolos, nova)
+                self.datas = np.resize(self.datas, nova)
+                valores = np.full((nova, len(self.colunas)), np.nan)
+                valores[:self.quantidade] = self.valores[:self.quantidade]
+                self.valores = valores
+            linha = self.quantidade
+            self.quantidade += 1
+            self.simbolos[linha] = simbolo
+            self._linhas[simbolo] = linha
+        return linha
+
+    def data_de(self, simbolo):
+        with self._trava:
+            linha = self._linhas.get(simbolo)
+            return None if linha is None else int(self.datas[linha])
+
+    def definir(self, simbolo, data, valores):
+        """Grava a última linha de ``simbolo`` (``valores``: dict ou Series por coluna)"""
+        with self._trava:
+            linha = self._linha(simbolo)
+            self.datas[linha] = pd.Timestamp(data).value
+            self.valores[linha] = [valores.get(c, np.nan) for c in self.colunas]
+
+    def remover(self, simbolo):
+        with self._trava:
+            linha = self._linhas.pop(simbolo, None)
+            if linha is None:
+                return
+            ultima = self.quantidade - 1
+            if linha != ultima:
+                # A última linha ocupa o lugar da removida
+                movido = self.simbolos[ultima]
+                self.simbolos[linha] = movido
+                self.datas[linha] = self.datas[ultima]
+                self.valores[linha] = self.valores[ultima]
+                self._linhas[movido] = linha
+            self.simbolos[ultima] = None
+            self.valores[ultima] = np.nan
+            self.quantidade = ultima
+
+    # ATUALIZAÇÃO
+
+    def atualizar_simbolo(self, armazem, simbolo, calcular, intervalo='1day'):
+        """Recalcula ``simbolo`` se houver barra nova; retorna True se mudou"""
+        df = armazem.ultimas(simbolo, intervalo, BARRAS_AQUECIMENTO)
+        if df is None or df.empty:
+            return False
+        data = df.index[-1]
+        if self.data_de(simbolo) == pd.Timestamp(data).value:
+            return False
+        ultima = calcular(df).iloc[-1]
+        self.definir(simbolo, data, ultima)
+        return True
+
+    def atualizar(self, armazem, calcular, simbolos=None, intervalo='1day'):
+        """Atualiza a partir do armazém local; retorna quantos símbolos mudaram"""
+        simbolos = armazem.simbolos(intervalo) if simbolos is None else simbolos
+        alterados = 0
+        for simbolo in simbolos:
+            try:
+                alterados += self.atualizar_simbolo(armazem, simbolo, calcular, intervalo)
+            except Exception as e:
+                logger.warning("Triagem: falha ao atualizar %s: %s", simbolo, e)
+        self.atualizado_em = time.time()
+        return alterados
+
+    # CONSULTA
+
+    def _coluna(self, nome):
+        if nome not in self._posicao:
+            raise ValueError(f'Coluna desconhecida: {nome}')
+        return self.valores[:self.quantidade, self._posicao[nome]]
+
+    def _mascara(self, filtro):
+        correspondencia = _FILTRO.match(filtro)
+        if not correspondencia:
+            raise ValueError(f'Filtro inválido: {filtro!r} (ex: "RSI < 30", "Close < Lower_Band")')
+        esquerda, operador, direita = correspondencia.groups()
+        try:
+            valor = float(direita)
+        except ValueError:
+            valor = self._coluna(direita)
+        # Comparações com NaN (indicador ainda sem valor) resultam em False
+        with np.errstate(invalid='ignore'):
+            return OPERADORES[operador](self._coluna(esquerda), valor)
+
+    def consultar(self, filtros=(), ordenar=None, decrescente=False, limite=50, colunas=None):
+        """Símbolos que passam em todos os ``filtros``, como DataFrame.
+
+        Retorna ``(resultado, total)``, onde ``total`` é a quantidade de
+        símbolos que passaram nos filtros antes do ``limite``.
+        """
+        colunas = self.colunas if colunas is None else list(colunas)
+        desconhecidas = [c for c in colunas if c not in self._posicao]
+        if desconhecidas:
+            raise ValueError(f'Coluna desconhecida: {", ".join(desconhecidas)}')
+        with self._trava:
+            mascara = np.ones(self.quantidade, dtype=bool)
+            for filtro in filtros:
+                mascara &= self._mascara(filtro)
+            linhas = np.flatnonzero(mascara)
+
+            if ordenar is not None:
+                chave = self._coluna(ordenar)[linhas]
+                # NaN sempre no fim, em qualquer direção
+                ordem = np.argsort(-chave if decrescente else chave, kind='stable')
+                linhas = linhas[ordem]
+            total = len(linhas)
+            if limite is not None:
+                linhas = linhas[:limite]
+
+            indices = [self._posicao[c] for c in colunas]
+            resultado = pd.DataFrame(self.valores[np.ix_(linhas, indices)], columns=colunas)
+            resultado.insert(0, 'Date', pd.to_datetime(self.datas[linhas], unit='ns'))
+            resultado.insert(0, 'Symbol', self.simbolos[linhas].astype(str))
+        return resultado, total
+
+    # SNAPSHOT
+
+    def salvar(self, caminho):
+        """Grava a tabela em ``.npz`` (escrita atômica)"""
+        with self._trava:
+            n = self.quantidade
+            temporario = f'{caminho}.tmp.npz'
+            np.savez(
+                temporario, colunas=np.array(self.colunas), simbolos=self.simbolos[:n].astype(str),
+                datas=self.datas[:n], valores=self.valores[:n],
+                atualizado_em=np.array(self.atualizado_em or 0.0)
+            )
+            os.replace(temporario, caminho)
+
+    def carregar(self, caminho):
+        """Recupera uma tabela salva; colunas que mudaram desde então ficam NaN"""
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            colunas = list(arquivo['colunas'])
+            valores = arquivo['valores']
+            with self._trava:
+                for simbolo, data, linha in zip(arquivo['simbolos'], arquivo['datas'], valores):
+                    self.definir(str(simbolo), int(data), dict(zip(colunas, linha)))
+                self.atualizado_em = float(arquivo['atualizado_em']) or None
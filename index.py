@@ -1,4 +1,13 @@
-from Sistema-Analise-Financeira.app_simples import app
+"""Ponto de entrada na raiz do repositório (ex: ``gunicorn index:app``).
 
+O app fica em ``Sistema-Analise-Financeira/``, que não é um pacote
+importável (o nome tem hífens), então o diretório entra no ``sys.path``.
+"""
+import os
+import sys
 
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sistema-Analise-Financeira')
+)
 
+from app_simples import app, criar_app  # noqa: E402,F401